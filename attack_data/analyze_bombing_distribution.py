@@ -5,6 +5,7 @@ import seaborn as sns
 import os
 from matplotlib.ticker import MaxNLocator
 from matplotlib.gridspec import GridSpec
+from raids_loader import load_cleaned_raids
 
 # Set style
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -17,49 +18,8 @@ os.makedirs('plots/bombing_distribution', exist_ok=True)
 
 # Load USAAF data
 print("Loading USAAF data...")
-df = pd.read_csv('processed_data/usaaf/usaaf_raids_full.csv')
-
-# Clean up year data
-print("Cleaning year and date data...")
-df['YEAR'] = df['YEAR'].fillna(0).astype(float)
-df['Year'] = (1940 + df['YEAR']).astype(int)
-# Handle any outlier years
-df.loc[df['Year'] < 1941, 'Year'] = 1941
-df.loc[df['Year'] > 1946, 'Year'] = 1945
-
-# Clean up month data
-df['MONTH'] = df['MONTH'].fillna(1).astype(float).astype(int)
-df['Month'] = df['MONTH'].clip(1, 12)  # Ensure valid month values
-
-# Clean up day data
-def clean_day(day_value):
-    if pd.isna(day_value):
-        return 1
-    day_str = str(day_value)
-    if '-' in day_str:
-        day_str = day_str.split('-')[0]
-    try:
-        return int(float(day_str))
-    except (ValueError, TypeError):
-        return 1
-
-df['DAY'] = df['DAY'].apply(clean_day)
-df['Day'] = df['DAY'].clip(1, 31)  # Ensure valid day values
-
-# Create a clean location field
-df['Location'] = df['target_location'].str.strip().str.upper()
-
-# Create date fields
-df['Date'] = pd.to_datetime(
-    df['Year'].astype(str) + '-' + 
-    df['Month'].astype(str).str.zfill(2) + '-' + 
-    df['Day'].astype(str).str.zfill(2),
-    errors='coerce'
-)
-
-# Create quarter-year field and quarter field
-df['Year_Quarter'] = df['Year'].astype(str) + '-Q' + ((df['Month']-1)//3 + 1).astype(str)
-df['Quarter'] = df['Year'].astype(str) + 'Q' + ((df['Month']-1)//3 + 1).astype(str)
+# Cleaned Year/Month/Day, Location, Date and Quarter fields come from the shared loader
+df = load_cleaned_raids('processed_data/usaaf/usaaf_raids_full.csv')
 
 print("Analyzing bombing distribution...")
 
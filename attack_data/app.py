@@ -2,11 +2,16 @@ import streamlit as st
 import pandas as pd
 import os
 import base64
-from PIL import Image
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
+from group_charts import (group_summary, score_distribution, tonnage_vs_incendiary, scores_by_target_type,
+                          category_pie, component_scores, MIN_RAIDS_PIE, MIN_RAIDS_COMPONENTS)
+from raid_search import SearchIndex
+from dashboard_catalog import load_catalog
+from raids_dataset import ensure_dataset, load_raids
+
 # Set page configuration
 st.set_page_config(
     page_title="USAAF Bombing Campaign Analysis",
@@ -19,14 +24,39 @@ st.set_page_config(
 PLOT_PATH = "plots/usaaf"
 ORIGINAL_DATA_PATH = "combined_attack_data.csv"
 PROCESSED_DATA_PATH = "processed_data/usaaf/usaaf_raids_full.csv"
+# The columns of PROCESSED_DATA_PATH, read from the Parquet raids dataset; Location is the
+# normalized target_location the pages filter on
+RAID_COLUMNS = ['Location', 'target_name', 'BOOK', 'TOTAL_TONS', 'INCENDIARY_PERCENT', 'TARGET_SCORE',
+                'TONNAGE_SCORE', 'INCENDIARY_SCORE', 'AREA_BOMBING_SCORE', 'AREA_BOMBING_SCORE_NORMALIZED',
+                'CATEGORY', 'raid_id', 'AIR FORCE', 'DAY', 'MONTH', 'YEAR', 'TIME OF ATTACK', 'AVG_ALTITUDE',
+                'TOTAL_AIRCRAFT', 'Year']
 
-# Function to load an image
-def load_image(image_path):
-    try:
-        return Image.open(image_path)
-    except Exception as e:
-        st.error(f"Error loading image {image_path}: {e}")
-        return None
+# Cities, categories, years and pre-rendered figures, loaded once per server process
+@st.cache_resource
+def load_dashboard_catalog():
+    return load_catalog(raids_csv=PROCESSED_DATA_PATH, plot_path=PLOT_PATH)
+
+# Function to show a pre-rendered figure from its display-width copy in the catalog
+def show_image(name, caption):
+    image_path = catalog['images'].get(name)
+    if image_path:
+        st.image(image_path, use_container_width=True)
+        st.markdown(caption)
+
+# Function to show the catalog's summary metrics of a city, category or year
+def display_entity_metrics(section, name):
+    if section not in catalog or name not in catalog[section].index:
+        return
+    metrics = catalog[section].loc[name]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Raids", f"{int(metrics['raids'])}")
+    with col2:
+        st.metric("Average Area Bombing Score", f"{metrics['score']:.2f}")
+    with col3:
+        st.metric("Average Tonnage", f"{metrics['tons']:.2f}")
+    with col4:
+        st.metric("Average Incendiary %", f"{metrics['incendiary']:.2f}%")
 
 # Function to create a download link for data
 def get_download_link(file_path, link_text):
@@ -51,26 +81,42 @@ def get_filtered_df(df, filter_type, filter_value):
         return df[df["Year"] == filter_value]
     return df
 
+# Index over the target names and locations, built once per server process
+@st.cache_resource
+def load_search_index():
+    return SearchIndex(load_data())
+
+# Identifies the rows of a table selection, so a prepared export is only offered for the rows it holds
+def export_key(df):
+    return len(df), int(pd.util.hash_array(df.index.to_numpy()).sum())
+
 # Function to format data table display
-def display_data_table(df, num_rows=10):
+def display_data_table(df, num_rows=10, selection="all"):
     if len(df) > 0:
         # Create expandable section with data table
         with st.expander("View Raid Data Table", expanded=False):
-            st.markdown(f"**Showing {min(num_rows, len(df))} of {len(df)} raids**")
-            
             # Add a search filter
-            search_term = st.text_input("Search in target name:", "")
+            search_term = st.text_input("Search in target name or location:", "", key=f"search_{selection}")
             if search_term:
-                filtered_df = df[df['target_name'].str.contains(search_term, case=False, na=False)]
+                filtered_df = df[load_search_index().mask(df.index, search_term)]
             else:
                 filtered_df = df
+            if len(filtered_df) == 0:
+                st.info(f"No raids match '{search_term}'")
+                return
                 
-            # Display table with pagination
-            start_idx = st.number_input("Starting row", min_value=0, max_value=max(0, len(filtered_df)-num_rows), value=0, step=num_rows)
+            # Only the rows of the current page are sent to the browser; the page resets with the search
+            num_pages = -(-len(filtered_df) // num_rows)
+            page_number = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1,
+                                          step=1, key=f"page_{selection}_{search_term}")
+            start_idx = (page_number - 1) * num_rows
             end_idx = min(start_idx + num_rows, len(filtered_df))
+            st.markdown(f"**Showing raids {start_idx + 1}-{end_idx} of {len(filtered_df)}**")
             
-            # Display subset of dataframe
-            st.dataframe(filtered_df.iloc[start_idx:end_idx], use_container_width=True)
+            # Display subset of dataframe; categoricals would send their whole dictionary with each page
+            page = filtered_df.iloc[start_idx:end_idx]
+            st.dataframe(page.astype({col: object for col in page.select_dtypes('category').columns}),
+                         use_container_width=True)
             
             # Calculate summary statistics
             st.markdown("### Summary Statistics")
@@ -82,49 +128,65 @@ def display_data_table(df, num_rows=10):
             with col3:
                 st.metric("Average Incendiary %", f"{filtered_df['INCENDIARY_PERCENT'].mean():.2f}%")
             
-            # Add download option for filtered data
-            csv = filtered_df.to_csv(index=False)
-            b64 = base64.b64encode(csv.encode()).decode()
-            href = f'<a href="data:file/csv;base64,{b64}" download="filtered_raids.csv">Download Filtered Data</a>'
-            st.markdown(href, unsafe_allow_html=True)
+            # The CSV is only generated on request, then served as a separate file until the rows change
+            export_state = f"export_{selection}"
+            rows = export_key(filtered_df)
+            if st.button("Prepare export", key=f"prepare_{selection}"):
+                st.session_state[export_state] = (rows, filtered_df.to_csv(index=False).encode('utf-8'))
+            prepared = st.session_state.get(export_state)
+            if prepared is not None and prepared[0] == rows:
+                st.download_button("Download Filtered Data", data=prepared[1],
+                                   file_name="filtered_raids.csv", mime="text/csv", key=f"download_{selection}")
 
 # Load the data for filtering options
 @st.cache_data
 def load_data():
     try:
-        data = pd.read_csv(PROCESSED_DATA_PATH)
-        # Add Year column if it doesn't exist
-        if 'Year' not in data.columns and 'YEAR' in data.columns:
-            data['Year'] = (1940 + data['YEAR'].astype(float)).astype(int)
-            # Handle any outlier years
-            data.loc[data['Year'] < 1939, 'Year'] = 1940
-            data.loc[data['Year'] > 1946, 'Year'] = 1945
-        
-        # Normalize location names to uppercase to prevent duplicates with different case
-        data['target_location'] = data['target_location'].str.strip().str.upper()
-        
-        return data
+        ensure_dataset()
+        # Repeated labels come back as categoricals: the page filters compare integer codes
+        data = load_raids(columns=RAID_COLUMNS, usaaf_only=True)
+        return data.rename(columns={'Location': 'target_location'})
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return pd.DataFrame()
 
-# Function to get list of cities with available visualizations
-def get_cities_with_visualizations():
-    cities_with_viz = []
-    try:
-        for city in cities:
-            city_lower = city.lower()
-            if os.path.exists(f"{PLOT_PATH}/cities/score_distribution_city_{city_lower}.png") or \
-               os.path.exists(f"{PLOT_PATH}/cities/tonnage_vs_incendiary_city_{city_lower}.png") or \
-               os.path.exists(f"{PLOT_PATH}/cities/scores_by_target_type_city_{city_lower}.png") or \
-               os.path.exists(f"{PLOT_PATH}/cities/category_pie_city_{city_lower}.png"):
-                cities_with_viz.append((city, True))
-            else:
-                cities_with_viz.append((city, False))
-        return cities_with_viz
-    except Exception as e:
-        st.error(f"Error checking for city visualizations: {e}")
-        return [(city, False) for city in cities]
+# Summarize the raids of a city, category or year for its charts; cached per selection
+@st.cache_data
+def load_group_summary(filter_type, filter_value):
+    return group_summary(get_filtered_df(load_data(), filter_type, filter_value))
+
+# Function to draw the charts of a city, category or year
+def display_group_charts(summary, subject, components=True):
+    if summary['raids'] == 0:
+        st.info(f"No raids recorded for {subject}")
+        return
+    
+    st.subheader("Area Bombing Score Distribution")
+    st.altair_chart(score_distribution(summary), use_container_width=True)
+    st.markdown(f"*Distribution of area bombing scores for {subject}*")
+    
+    st.subheader("Tonnage vs Incendiary Percentage")
+    st.altair_chart(tonnage_vs_incendiary(summary), use_container_width=True)
+    st.markdown(f"*Relationship between bombing tonnage and incendiary percentage for {subject}*")
+    
+    st.subheader("Scores by Target Type")
+    st.altair_chart(scores_by_target_type(summary), use_container_width=True)
+    st.markdown(f"*Breakdown of area bombing scores by target type for {subject}*")
+    
+    if components:
+        st.subheader("Component Score Analysis")
+        if summary['raids'] >= MIN_RAIDS_COMPONENTS:
+            st.altair_chart(component_scores(summary), use_container_width=True)
+            st.markdown(f"*Average target type, tonnage and incendiary component scores for {subject}*")
+        else:
+            st.info(f"Too few raids for a component analysis of {subject}")
+    
+    st.subheader("Bombing Category Distribution")
+    if summary['raids'] >= MIN_RAIDS_PIE:
+        st.altair_chart(category_pie(summary), use_container_width=True)
+        st.markdown(f"*Distribution of bombing categories for {subject}*")
+    else:
+        st.info(f"Too few raids for a category distribution of {subject}")
 
 # Sidebar navigation
 st.sidebar.title("Navigation")
@@ -133,14 +195,16 @@ page = st.sidebar.radio(
     ["General Analysis", "City Analysis", "Category Analysis", "Year Analysis", "Data Download"]
 )
 
-# Load data for filters
+# Load data and the catalog for filters
 try:
     df = load_data()
-    cities = sorted(df["target_location"].unique())
-    categories = sorted(df["CATEGORY"].unique())
-    years = sorted([y for y in range(1940, 1946)])
+    catalog = load_dashboard_catalog()
+    cities = list(catalog['cities'].index)
+    categories = list(catalog['categories'].index)
+    years = list(catalog['years'].index)
 except Exception as e:
     st.sidebar.error(f"Error loading filter options: {e}")
+    catalog = {'images': {}}
     cities = []
     categories = []
     years = []
@@ -167,64 +231,34 @@ if page == "General Analysis":
     
     # Display general visualizations stacked vertically
     st.subheader("Overall Distribution of Area Bombing Scores")
-    img = load_image(f"{PLOT_PATH}/general/overall_score_distribution.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Distribution showing how USAAF missions scored on the area bombing scale (0=precise, 10=area)*")
+    show_image("general/overall_score_distribution.png", "*Distribution showing how USAAF missions scored on the area bombing scale (0=precise, 10=area)*")
     
     st.subheader("Tonnage Distribution")
-    img = load_image(f"{PLOT_PATH}/general/tonnage_distribution.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Distribution of bombing tonnage per raid across all USAAF missions*")
+    show_image("general/tonnage_distribution.png", "*Distribution of bombing tonnage per raid across all USAAF missions*")
     
     st.subheader("HE vs Incendiary Bombing by Year")
-    img = load_image(f"{PLOT_PATH}/general/he_vs_incendiary_by_year.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Annual comparison of high explosive vs. incendiary bombing tonnage*")
+    show_image("general/he_vs_incendiary_by_year.png", "*Annual comparison of high explosive vs. incendiary bombing tonnage*")
     
     st.subheader("Relationship Between Tonnage and Area Bombing")
-    img = load_image(f"{PLOT_PATH}/general/tonnage_vs_score_relationship.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Correlation between bombing tonnage and area bombing scores*")
+    show_image("general/tonnage_vs_score_relationship.png", "*Correlation between bombing tonnage and area bombing scores*")
     
     st.subheader("Bombing Patterns Over Time")
-    img = load_image(f"{PLOT_PATH}/general/quarterly_metrics_evolution.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Quarterly evolution of key bombing metrics throughout the war*")
+    show_image("general/quarterly_metrics_evolution.png", "*Quarterly evolution of key bombing metrics throughout the war*")
         
     st.subheader("Target Category Analysis")
-    img = load_image(f"{PLOT_PATH}/general/he_vs_incendiary_by_category.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*HE vs. incendiary bombing by target category with area bombing scores*")
+    show_image("general/he_vs_incendiary_by_category.png", "*HE vs. incendiary bombing by target category with area bombing scores*")
     
-    img = load_image(f"{PLOT_PATH}/general/tonnage_distribution_by_category.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Distribution of bombing tonnage across different target categories*")
+    show_image("general/tonnage_distribution_by_category.png", "*Distribution of bombing tonnage across different target categories*")
     
     st.subheader("Temporal Analysis by Target Category")
-    img = load_image(f"{PLOT_PATH}/general/year_category_score_heatmap.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Evolution of area bombing scores by target category and year*")
+    show_image("general/year_category_score_heatmap.png", "*Evolution of area bombing scores by target category and year*")
         
     st.subheader("Monthly Progression")
-    img = load_image(f"{PLOT_PATH}/general/monthly_score_progression.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Monthly progression of area bombing scores with marker size representing tonnage*")
+    show_image("general/monthly_score_progression.png", "*Monthly progression of area bombing scores with marker size representing tonnage*")
     
     # Add the category by year visualization
     st.subheader("Distribution of Bombing Categories by Year")
-    img = load_image(f"{PLOT_PATH}/years/category_by_year.png")
-    if img:
-        st.image(img, use_container_width=True)
-        st.markdown("*Evolution of bombing categories throughout the war years*")
+    show_image("years/category_by_year.png", "*Evolution of bombing categories throughout the war years*")
     
     # Add complete dataset view
     st.markdown("---")
@@ -234,90 +268,30 @@ if page == "General Analysis":
 elif page == "City Analysis":
     st.title("City-Specific Bombing Analysis")
     
-    # Get cities with available visualizations
-    cities_with_viz = get_cities_with_visualizations()
-    
-    # Create a dropdown with clear indicators of which cities have visualizations
-    city_options = [f"{city} {'✓' if has_viz else '○'}" for city, has_viz in cities_with_viz]
-    selected_city_option = st.selectbox(
-        "Select a city (✓ = visualizations available, ○ = limited or no visualizations):", 
-        city_options
-    )
-    
-    # Extract just the city name from the selected option
-    selected_city = selected_city_option.split(' ')[0] if selected_city_option else None
+    selected_city = st.selectbox("Select a city:", cities)
     
     if selected_city:
         st.markdown(f"## Bombing Analysis for {selected_city}")
+        display_entity_metrics('cities', selected_city)
         
-        # Display city-specific visualizations stacked vertically
-        # Score distribution
-        score_dist_path = f"{PLOT_PATH}/cities/score_distribution_city_{selected_city.lower()}.png"
-        if os.path.exists(score_dist_path):
-            img = load_image(score_dist_path)
-            if img:
-                st.subheader("Area Bombing Score Distribution")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Distribution of area bombing scores for raids targeting {selected_city}*")
-        else:
-            st.info(f"No score distribution visualization available for {selected_city}")
-        
-        # Tonnage vs incendiary
-        tonnage_path = f"{PLOT_PATH}/cities/tonnage_vs_incendiary_city_{selected_city.lower()}.png"
-        if os.path.exists(tonnage_path):
-            img = load_image(tonnage_path)
-            if img:
-                st.subheader("Tonnage vs Incendiary Percentage")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Relationship between bombing tonnage and incendiary percentage for {selected_city} raids*")
-        else:
-            st.info(f"No tonnage visualization available for {selected_city}")
-        
-        # Target type analysis
-        target_path = f"{PLOT_PATH}/cities/scores_by_target_type_city_{selected_city.lower()}.png"
-        if os.path.exists(target_path):
-            img = load_image(target_path)
-            if img:
-                st.subheader("Scores by Target Type")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Breakdown of area bombing scores by target type within {selected_city}*")
-        else:
-            st.info(f"No target type visualization available for {selected_city}")
-        
-        # Category distribution
-        category_path = f"{PLOT_PATH}/cities/category_pie_city_{selected_city.lower()}.png"
-        if os.path.exists(category_path):
-            img = load_image(category_path)
-            if img:
-                st.subheader("Bombing Category Distribution")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Distribution of bombing categories for raids on {selected_city}*")
-        else:
-            st.info(f"No category distribution visualization available for {selected_city}")
+        # Charts are drawn from the city's raids on demand
+        display_group_charts(load_group_summary("city", selected_city), f"raids targeting {selected_city}",
+                             components=False)
         
         # Check for Schweinfurt-specific analysis
         if selected_city.upper() == "SCHWEINFURT":
             st.subheader("Special Analysis: Schweinfurt Ball Bearing Plant Raids")
             
-            schweinfurt_path = f"{PLOT_PATH}/cities/schweinfurt/raids_timeline.png"
-            if os.path.exists(schweinfurt_path):
-                img = load_image(schweinfurt_path)
-                if img:
-                    st.image(img, use_container_width=True)
-                    st.markdown("*Timeline of Schweinfurt raids showing tonnage and area bombing scores*")
-            
-            comparison_path = f"{PLOT_PATH}/cities/schweinfurt/schweinfurt_vs_other_bearings.png"
-            if os.path.exists(comparison_path):
-                img = load_image(comparison_path)
-                if img:
-                    st.image(img, use_container_width=True)
-                    st.markdown("*Comparison of Schweinfurt to other ball bearing factory targets*")
+            show_image("cities/schweinfurt/raids_timeline.png",
+                       "*Timeline of Schweinfurt raids showing tonnage and area bombing scores*")
+            show_image("cities/schweinfurt/schweinfurt_vs_other_bearings.png",
+                       "*Comparison of Schweinfurt to other ball bearing factory targets*")
         
         # Add city-specific data table
         st.markdown("---")
         st.subheader(f"Raid Data for {selected_city}")
         city_df = get_filtered_df(df, "city", selected_city)
-        display_data_table(city_df)
+        display_data_table(city_df, selection=f"city_{selected_city}")
 
 elif page == "Category Analysis":
     st.title("Target Category Analysis")
@@ -327,68 +301,15 @@ elif page == "Category Analysis":
     
     if selected_category:
         st.markdown(f"## Bombing Analysis for {selected_category} Targets")
+        display_entity_metrics('categories', selected_category)
         
-        # Display category-specific visualizations stacked vertically
-        # Score distribution
-        score_dist_path = f"{PLOT_PATH}/categories/score_distribution_category_{selected_category.lower()}.png"
-        if os.path.exists(score_dist_path):
-            img = load_image(score_dist_path)
-            if img:
-                st.subheader("Area Bombing Score Distribution")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Distribution of area bombing scores for {selected_category} targets*")
-        else:
-            st.info(f"No score distribution visualization available for {selected_category}")
-        
-        # Tonnage vs incendiary
-        tonnage_path = f"{PLOT_PATH}/categories/tonnage_vs_incendiary_category_{selected_category.lower()}.png"
-        if os.path.exists(tonnage_path):
-            img = load_image(tonnage_path)
-            if img:
-                st.subheader("Tonnage vs Incendiary Percentage")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Relationship between bombing tonnage and incendiary percentage for {selected_category} targets*")
-        else:
-            st.info(f"No tonnage visualization available for {selected_category}")
-        
-        # Target type analysis
-        target_path = f"{PLOT_PATH}/categories/scores_by_target_type_category_{selected_category.lower()}.png"
-        if os.path.exists(target_path):
-            img = load_image(target_path)
-            if img:
-                st.subheader("Scores by Target Type")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Breakdown of area bombing scores by target type within {selected_category} category*")
-        else:
-            st.info(f"No target type visualization available for {selected_category}")
-        
-        # Component radar
-        radar_path = f"{PLOT_PATH}/categories/component_radar_category_{selected_category.lower()}.png"
-        if os.path.exists(radar_path):
-            img = load_image(radar_path)
-            if img:
-                st.subheader("Component Score Analysis")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Radar chart showing component scores for {selected_category} targets*")
-        else:
-            st.info(f"No component analysis visualization available for {selected_category}")
-        
-        # Category distribution
-        category_path = f"{PLOT_PATH}/categories/category_pie_category_{selected_category.lower()}.png"
-        if os.path.exists(category_path):
-            img = load_image(category_path)
-            if img:
-                st.subheader("Bombing Category Distribution")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Distribution of bombing categories for {selected_category} targets*")
-        else:
-            st.info(f"No category distribution visualization available for {selected_category}")
+        display_group_charts(load_group_summary("category", selected_category), f"{selected_category} targets")
         
         # Add category-specific data table
         st.markdown("---")
         st.subheader(f"Raid Data for {selected_category} Targets")
         category_df = get_filtered_df(df, "category", selected_category)
-        display_data_table(category_df)
+        display_data_table(category_df, selection=f"category_{selected_category}")
 
 elif page == "Year Analysis":
     st.title("Yearly Bombing Analysis")
@@ -398,68 +319,15 @@ elif page == "Year Analysis":
     
     if selected_year:
         st.markdown(f"## Bombing Analysis for {selected_year}")
+        display_entity_metrics('years', selected_year)
         
-        # Display year-specific visualizations stacked vertically
-        # Score distribution
-        score_dist_path = f"{PLOT_PATH}/years/score_distribution_year_{selected_year}.png"
-        if os.path.exists(score_dist_path):
-            img = load_image(score_dist_path)
-            if img:
-                st.subheader("Area Bombing Score Distribution")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Distribution of area bombing scores during {selected_year}*")
-        else:
-            st.info(f"No score distribution visualization available for {selected_year}")
-        
-        # Tonnage vs incendiary
-        tonnage_path = f"{PLOT_PATH}/years/tonnage_vs_incendiary_year_{selected_year}.png"
-        if os.path.exists(tonnage_path):
-            img = load_image(tonnage_path)
-            if img:
-                st.subheader("Tonnage vs Incendiary Percentage")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Relationship between bombing tonnage and incendiary percentage in {selected_year}*")
-        else:
-            st.info(f"No tonnage visualization available for {selected_year}")
-        
-        # Target type analysis
-        target_path = f"{PLOT_PATH}/years/scores_by_target_type_year_{selected_year}.png"
-        if os.path.exists(target_path):
-            img = load_image(target_path)
-            if img:
-                st.subheader("Scores by Target Type")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Breakdown of area bombing scores by target type in {selected_year}*")
-        else:
-            st.info(f"No target type visualization available for {selected_year}")
-        
-        # Component radar
-        radar_path = f"{PLOT_PATH}/years/component_radar_year_{selected_year}.png"
-        if os.path.exists(radar_path):
-            img = load_image(radar_path)
-            if img:
-                st.subheader("Component Score Analysis")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Radar chart showing component scores for raids in {selected_year}*")
-        else:
-            st.info(f"No component analysis visualization available for {selected_year}")
-        
-        # Category distribution
-        category_path = f"{PLOT_PATH}/years/category_pie_year_{selected_year}.png"
-        if os.path.exists(category_path):
-            img = load_image(category_path)
-            if img:
-                st.subheader("Bombing Category Distribution")
-                st.image(img, use_container_width=True)
-                st.markdown(f"*Distribution of bombing categories during {selected_year}*")
-        else:
-            st.info(f"No category distribution visualization available for {selected_year}")
+        display_group_charts(load_group_summary("year", selected_year), f"raids in {selected_year}")
         
         # Add year-specific data table
         st.markdown("---")
         st.subheader(f"Raid Data for {selected_year}")
         year_df = get_filtered_df(df, "year", selected_year)
-        display_data_table(year_df)
+        display_data_table(year_df, selection=f"year_{selected_year}")
 
 elif page == "Data Download":
     st.title("Download Raw Data")
@@ -0,0 +1,1125 @@
+# benchmarks.py
+"""Timing comparisons for the attack-data pipeline.
+
+    python benchmarks.py validators [BOXES_DIR]
+    python benchmarks.py context [BOXES_DIR]
+    python benchmarks.py pipeline [PAGES]
+    python benchmarks.py dataset
+    python benchmarks.py raids [CORRECTED_CSV]
+    python benchmarks.py categorize [CLEANED_CSV]
+    python benchmarks.py reports [BOMBING_TYPE_CSV]
+    python benchmarks.py cube
+    python benchmarks.py dashboard
+    python benchmarks.py table
+    python benchmarks.py app
+    python benchmarks.py reconcile [BOXES_DIR]
+    python benchmarks.py combine [BOXES_DIR]
+"""
+
+import os
+import re
+import sys
+import json
+import glob
+import time
+import random
+import argparse
+import resource
+import shutil
+import tempfile
+import multiprocessing
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+BASE_DIR = '/Users/chim/Working/Thesis/Attack_Images/BOXES'
+
+
+def find_tables(base_dir, name='table_data.csv'):
+    return sorted(glob.glob(os.path.join(base_dir, 'BOX_*', 'BOOK_*', '*_output', name)))
+
+
+def find_invalid_cells_scalar(df):
+    """process_table.find_invalid_cells with the scalar check_* functions, cell by cell; the reference for the engine."""
+    import process_table
+
+    invalid_cells = []
+    for row_idx in range(len(df)):
+        current_row = df.iloc[row_idx]
+        if current_row['SUMMATION_ROW']:
+            continue
+
+        for col, check_func in process_table.CHECK_FUNCTIONS.items():
+            value = current_row[col]
+            is_valid, error_msg = check_func(value, process_table.is_column_required(current_row, col))
+            if col == "AIR FORCE" and is_valid and row_idx > 0:
+                prev_row = df.iloc[row_idx - 1]
+                if (current_row['DAY'] == prev_row['DAY'] and
+                    current_row['MONTH'] == prev_row['MONTH'] and
+                    current_row['YEAR'] == prev_row['YEAR'] and
+                    current_row['AIR FORCE'] != prev_row['AIR FORCE']):
+                    is_valid = False
+                    error_msg = process_table.AIR_FORCE_CHANGED_MSG
+            if not is_valid:
+                invalid_cells.append((row_idx, col, value, error_msg))
+    return invalid_cells
+
+
+def benchmark_validators(base_dir):
+    """Per-cell check_* loop against the vectorized validate_table engine."""
+    import process_table
+
+    tables = [process_table.prepare_table(pd.read_csv(path)) for path in find_tables(base_dir)]
+    print(f"Loaded {len(tables)} tables ({sum(len(df) for df in tables)} rows)")
+
+    start = time.perf_counter()
+    scalar = [find_invalid_cells_scalar(df) for df in tables]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = [process_table.find_invalid_cells(df) for df in tables]
+    vector_time = time.perf_counter() - start
+
+    # The engine pays off most when the whole corpus is validated in a single pass
+    corpus = pd.concat(tables, ignore_index=True)
+    pages = np.repeat(np.arange(len(tables)), [len(df) for df in tables])
+    start = time.perf_counter()
+    error_mask, _, _ = process_table.validate_table(corpus, pages=pages)
+    corpus_time = time.perf_counter() - start
+
+    mismatches = sum(
+        [(r, c, e) for r, c, _, e in a] != [(r, c, e) for r, c, _, e in b]
+        for a, b in zip(scalar, vectorized)
+    )
+    print(f"Invalid cells found: {sum(len(cells) for cells in vectorized)}")
+    print(f"Scalar check_* loop:  {scalar_time:.2f}s")
+    print(f"Vectorized per page:  {vector_time:.2f}s ({scalar_time / vector_time:.1f}x)")
+    print(f"Vectorized corpus:    {corpus_time:.2f}s ({scalar_time / corpus_time:.1f}x), "
+          f"{int(error_mask.to_numpy().sum())} invalid cells")
+    print(f"Tables with differing results: {mismatches}")
+
+
+def benchmark_context(base_dir):
+    """get_context_values against the bisect-based context index, checked cell by cell."""
+    import process_table
+
+    tables = [process_table.prepare_table(pd.read_csv(path)) for path in find_tables(base_dir)]
+    print(f"Loaded {len(tables)} tables ({sum(len(df) for df in tables)} rows)")
+    queries = [(df, col, row_idx) for df in tables
+               for col in process_table.CHECK_FUNCTIONS for row_idx in range(len(df))]
+
+    start = time.perf_counter()
+    expected = [process_table.get_context_values(df, col, row_idx, process_table.CHECK_FUNCTIONS[col], n=5)
+                for df, col, row_idx in queries]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexes = {id(df): process_table.build_context_index(df) for df in tables}
+    actual = [process_table.get_indexed_context_values(indexes[id(df)], col, row_idx, n=5)
+              for df, col, row_idx in queries]
+    index_time = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+    print(f"Context queries: {len(queries)}")
+    print(f"get_context_values:  {scan_time:.2f}s")
+    print(f"Context index:       {index_time:.2f}s ({scan_time / index_time:.1f}x faster, including index builds)")
+    print(f"Differing contexts:  {mismatches}")
+
+
+class EchoChatClient:
+    """Offline chat client that answers with the JSON template embedded in the prompt."""
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, **kwargs):
+        template = re.search(r'```json\s*([\s\S]*?)\s*```', messages[-1]["content"]).group(1)
+        message = SimpleNamespace(content=f"```json\n{template}\n```")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_synthetic_boxes(base_dir, pages, rows_per_page=25, seed=0):
+    """Write a BOX_*/BOOK_* tree of fake layout-model JSON pages and blank JPGs."""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    headers = ["DATE OF ATTACK DAY", "MO", "YR", "TIME OF ATTACK", "AIR FORCE", "GROUP OR SQUADRON NUMBER",
+               "NUMBER OF AIRCRAFT BOMBING", "ALTITUDE OF RELEASE IN HUND. FT.", "SIGHTING",
+               "VISIBILITY OF TARGET", "TARGET PRIORITY", "HIGH EXPLOSIVE BOMBS NUMBER", "SIZE", "TONS",
+               "FUZING NOSE", "TAIL", "INCENDIARY BOMBS NUMBER", "SIZE", "TONS",
+               "FRAGMENTATION BOMBS NUMBER", "SIZE", "TONS", "TOTAL TONS"]
+    box = {"polygon": [{"x": 0, "y": 0}, {"x": 10, "y": 0}, {"x": 10, "y": 5}, {"x": 0, "y": 5}]}
+    for page in range(pages):
+        book_dir = os.path.join(base_dir, f"BOX_{page // 200 + 1}", f"BOOK_{page // 50 + 1}")
+        os.makedirs(book_dir, exist_ok=True)
+        cells = [{"kind": "columnHeader", "row_index": 0, "column_index": i, "content": name}
+                 for i, name in enumerate(headers)]
+        for row in range(1, rows_per_page + 1):
+            aircraft, he_number = rng.randint(1, 60), rng.randint(1, 200)
+            he_tons = he_number // 4
+            values = [rng.randint(1, 31), rng.randint(1, 12), rng.randint(2, 5), rng.choice(["1234", "0930", "2561"]),
+                      rng.choice(["8", "15", "R", "B"]), rng.choice(["305G", "96G", "44BG", "3O5G"]), aircraft,
+                      rng.randint(50, 300), rng.choice(["1", "R", "X"]), rng.choice(["G", "C", "Q"]), rng.randint(1, 4),
+                      he_number, rng.choice([3, 4, 17]), he_tons, 4, 9, "", "", "", "", "", "",
+                      he_tons + rng.choice([0, 0, 1])]
+            cells += [{"kind": "content", "row_index": row, "column_index": i, "content": str(value)}
+                      for i, value in enumerate(values)]
+        layout = {
+            "paragraphs": [{"content": f"TARGET LOCATION SYNTHETIC {page}", "bounding_regions": [box]}],
+            "tables": [{"row_count": rows_per_page + 1, "column_count": len(headers), "cells": cells}],
+        }
+        image_path = os.path.join(book_dir, f"IMG_{page:05d}")
+        with open(image_path + ".json", "w") as f:
+            json.dump(layout, f)
+        Image.new("L", (30, 90)).save(image_path + ".JPG", "JPEG")
+
+
+def benchmark_pipeline(pages):
+    """Pages/min per worker of run_pipeline on a synthetic BOXES fixture with an offline chat client."""
+    os.environ["LLM_CACHE_MODE"] = "off"
+    import run_pipeline
+
+    pages = int(pages) if str(pages).isdigit() else 200
+    with tempfile.TemporaryDirectory() as base_dir:
+        make_synthetic_boxes(base_dir, pages)
+        print(f"Synthetic fixture: {pages} pages in {base_dir}")
+        results = {}
+        for workers in sorted({1, os.cpu_count()}):
+            print(f"\n--- {workers} worker(s) ---")
+            results[workers] = run_pipeline.run_pipeline(
+                base_dir, workers=workers, chat_client=EchoChatClient(),
+                manifest_path=os.path.join(base_dir, f"manifest_{workers}.json"))
+    for workers, pages_per_minute in results.items():
+        print(f"{workers:>3} worker(s): {pages_per_minute:8.1f} pages/min "
+              f"({pages_per_minute / workers:.1f} per worker)")
+
+
+def derive_dates_from_csv(path):
+    """What the visualize_* scripts do after pd.read_csv."""
+    import raids_loader
+
+    df = pd.read_csv(path, low_memory=False)
+    df['YEAR'] = df['YEAR'].fillna(0).astype(float)
+    df['Year'] = (1940 + df['YEAR']).astype(int)
+    df.loc[df['Year'] < 1941, 'Year'] = 1941
+    df.loc[df['Year'] > 1946, 'Year'] = 1945
+    df['MONTH'] = df['MONTH'].fillna(1).astype(float).astype(int)
+    df['Month'] = df['MONTH'].clip(1, 12)
+    df['DAY'] = df['DAY'].apply(raids_loader.clean_day)
+    df['Day'] = df['DAY'].clip(1, 31)
+    df['Location'] = df['target_location'].str.strip().str.upper()
+    df['Date'] = pd.to_datetime(
+        df['Year'].astype(str) + '-' + df['Month'].astype(str).str.zfill(2) + '-' + df['Day'].astype(str).str.zfill(2),
+        errors='coerce'
+    )
+    return df
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        # No /proc (macOS): fall back to the peak, which ru_maxrss reports in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20
+
+
+def measure_load(loader, args):
+    """Seconds, RSS growth (MB) and frame size (MB) of one load, run in a fresh process."""
+    import raids_dataset  # noqa: F401 -- keep pyarrow's import time out of the measurement
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    df = loader(*args)
+    seconds = time.perf_counter() - start
+    return seconds, current_rss_mb() - rss_before, df.memory_usage(deep=True).sum() / 1e6, len(df)
+
+
+def load_parquet(dataset_dir, kwargs):
+    import raids_dataset
+
+    return raids_dataset.load_raids(dataset_dir=dataset_dir, **kwargs)
+
+
+def benchmark_dataset(_):
+    """Load time and memory of the processed_data CSVs against the partitioned Parquet dataset."""
+    import raids_dataset
+
+    with tempfile.TemporaryDirectory() as dataset_dir:
+        raids_dataset.build_dataset(dataset_dir)
+        size = sum(os.path.getsize(path) for path in glob.glob(os.path.join(dataset_dir, '**', '*.parquet'),
+                                                                   recursive=True))
+        print(f"Parquet dataset: {size / 1e6:.1f} MB "
+              f"(raids_summary.csv: {os.path.getsize(raids_dataset.SUMMARY_CSV) / 1e6:.1f} MB, "
+              f"with_category.csv: {os.path.getsize(raids_dataset.CATEGORY_CSV) / 1e6:.1f} MB)")
+        cases = [
+            ("CSV raids_summary + dates", derive_dates_from_csv, (raids_dataset.SUMMARY_CSV,)),
+            ("CSV usaaf_raids_full + dates", derive_dates_from_csv, ('processed_data/usaaf/usaaf_raids_full.csv',)),
+            ("Parquet, all raids", load_parquet, (dataset_dir, {})),
+            ("Parquet, USAAF", load_parquet, (dataset_dir, {'usaaf_only': True})),
+            ("Parquet, USAAF 1944, 4 columns", load_parquet,
+             (dataset_dir, {'columns': ['Location', 'date', 'TOTAL_TONS', 'AREA_BOMBING_SCORE_NORMALIZED'],
+                            'years': [1944], 'usaaf_only': True})),
+        ]
+        context = multiprocessing.get_context('spawn')
+        print(f"{'case':<34}{'rows':>8}{'seconds':>10}{'RSS +MB':>10}{'frame MB':>10}")
+        for name, loader, args in cases:
+            with context.Pool(1) as pool:
+                seconds, rss_growth, frame_mb, rows = pool.apply(measure_load, (loader, args))
+            print(f"{name:<34}{rows:>8}{seconds:>10.3f}{rss_growth:>10.1f}{frame_mb:>10.1f}")
+
+
+def identify_raids_scalar(df):
+    """Group sorted attack rows into raids with iterrows; the reference for process_raids.summarize_raids."""
+    raids = []
+    current_raid = []
+    
+    # Sort by location, target, date and time for proper sequencing
+    sorted_df = df.sort_values(by=['target_location', 'target_name', 'YEAR', 'MONTH', 'DAY', 'TIME OF ATTACK'])
+    
+    for idx, row in sorted_df.iterrows():
+        if not current_raid:
+            current_raid.append(row)
+            continue
+            
+        prev_row = current_raid[-1]
+        
+        # Check if this row belongs to the same raid (same location, target, and date)
+        same_location = prev_row['target_location'] == row['target_location']
+        same_target = prev_row['target_name'] == row['target_name']
+        same_day = prev_row['DAY'] == row['DAY']
+        same_month = prev_row['MONTH'] == row['MONTH']
+        same_year = prev_row['YEAR'] == row['YEAR']
+        
+        if same_location and same_target and same_day and same_month and same_year:
+            current_raid.append(row)
+        else:
+            raids.append(current_raid)
+            current_raid = [row]
+    
+    # Add the last raid
+    if current_raid:
+        raids.append(current_raid)
+    
+    return raids
+
+def aggregate_raid_data_scalar(raid_rows):
+    """One raids_summary row from a raid's attack rows, summed with Python's sum()."""
+    first_row = raid_rows[0]
+    
+    # Get unique books for this raid
+    books = set(row['book'] for row in raid_rows if pd.notna(row['book']))
+    book_info = list(books)[0] if len(books) == 1 else list(books)
+    
+    result = {
+        'target_location': first_row['target_location'],
+        'target_name': first_row['target_name'],
+        'BOOK': book_info,  # Add book information
+        'latitude': first_row['latitude'],
+        'longitude': first_row['longitude'],
+        'target_code': first_row['target_code'],
+        'DAY': first_row['DAY'],
+        'MONTH': first_row['MONTH'],
+        'YEAR': first_row['YEAR'],
+        'TIME OF ATTACK': first_row['TIME OF ATTACK'],  # Using first attack time as reference
+        'AIR FORCE': first_row['AIR FORCE'],
+        # Sum of aircraft
+        'TOTAL_AIRCRAFT': sum(row['NUMBER OF AIRCRAFT BOMBING'] for row in raid_rows if pd.notna(row['NUMBER OF AIRCRAFT BOMBING'])),
+        # Average altitude
+        'AVG_ALTITUDE': sum(row['ALTITUDE OF RELEASE IN HUND. FT.'] for row in raid_rows if pd.notna(row['ALTITUDE OF RELEASE IN HUND. FT.'])) / 
+                        sum(1 for row in raid_rows if pd.notna(row['ALTITUDE OF RELEASE IN HUND. FT.'])) if any(pd.notna(row['ALTITUDE OF RELEASE IN HUND. FT.']) for row in raid_rows) else None,
+        # Sum of high explosive bombs
+        'TOTAL_HE_BOMBS': sum(row['HIGH EXPLOSIVE BOMBS NUMBER'] for row in raid_rows if pd.notna(row['HIGH EXPLOSIVE BOMBS NUMBER'])),
+        'TOTAL_HE_TONS': sum(row['HIGH EXPLOSIVE BOMBS TONS'] for row in raid_rows if pd.notna(row['HIGH EXPLOSIVE BOMBS TONS'])),
+        # Sum of incendiary bombs
+        'TOTAL_INCENDIARY_BOMBS': sum(row['INCENDIARY BOMBS NUMBER'] for row in raid_rows if pd.notna(row['INCENDIARY BOMBS NUMBER'])),
+        'TOTAL_INCENDIARY_TONS': sum(row['INCENDIARY BOMBS TONS'] for row in raid_rows if pd.notna(row['INCENDIARY BOMBS TONS'])),
+        # Sum of fragmentation bombs
+        'TOTAL_FRAG_BOMBS': sum(row['FRAGMENTATION BOMBS NUMBER'] for row in raid_rows if pd.notna(row['FRAGMENTATION BOMBS NUMBER'])),
+        'TOTAL_FRAG_TONS': sum(row['FRAGMENTATION BOMBS TONS'] for row in raid_rows if pd.notna(row['FRAGMENTATION BOMBS TONS'])),
+        # Total tonnage
+        'TOTAL_TONS': sum(row['TOTAL TONS'] for row in raid_rows if pd.notna(row['TOTAL TONS'])),
+        # Count of attacks in the raid
+        'NUM_ATTACKS': len(raid_rows)
+    }
+    return result
+
+
+def benchmark_raids(path):
+    """identify_raids_scalar + aggregate_raid_data_scalar against summarize_raids, compared as CSV text."""
+    import process_raids
+
+    if str(path).endswith('.csv') and os.path.exists(path):
+        df = pd.read_csv(path, low_memory=False)
+    else:
+        # locations/*.csv is organize_by_location's split of the corrected CSV
+        df = pd.concat([pd.read_csv(p, low_memory=False) for p in sorted(glob.glob('locations/*.csv'))],
+                       ignore_index=True)
+    print(f"Attack rows: {len(df)}")
+
+    start = time.perf_counter()
+    raids = identify_raids_scalar(df)
+    expected = pd.DataFrame([aggregate_raid_data_scalar(raid) for raid in raids])
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = process_raids.summarize_raids(df)
+    vector_time = time.perf_counter() - start
+
+    print(f"Raids: {len(actual)}")
+    print(f"iterrows + aggregate_raid_data: {loop_time:.2f}s")
+    print(f"summarize_raids:                {vector_time:.3f}s ({loop_time / vector_time:.0f}x)")
+    print(f"Identical CSV output: {expected.to_csv(index=False) == actual.to_csv(index=False)}")
+
+
+def attacks_with_datetime():
+    """locations/*.csv with a DATETIME built from the cleaned date and TIME OF ATTACK."""
+    import raids_loader
+
+    df = pd.concat([pd.read_csv(p, low_memory=False) for p in sorted(glob.glob('locations/*.csv'))],
+                   ignore_index=True)
+    dates = raids_loader.clean_raids(df[['YEAR', 'MONTH', 'DAY', 'target_location']].copy())['Date']
+    hours = (df['TIME OF ATTACK'] // 100).clip(0, 23)
+    minutes = (df['TIME OF ATTACK'] % 100).clip(0, 59).fillna(0)
+    # Attacks without a time have no DATETIME, like the cleaned CSV
+    df['DATETIME'] = dates + pd.to_timedelta(hours, unit='h') + pd.to_timedelta(minutes, unit='m')
+    return df
+
+
+def benchmark_categorize(path, pages=400):
+    """categorize_mission applied row by row against categorize_missions."""
+    import logging
+    import categorize_bombing
+
+    if str(path).endswith('.csv') and os.path.exists(path):
+        df = pd.read_csv(path, low_memory=False)
+        df['DATETIME'] = pd.to_datetime(df['DATETIME'])
+    else:
+        df = attacks_with_datetime()
+    print(f"Attack rows: {len(df)}")
+
+    start = time.perf_counter()
+    labels = categorize_bombing.categorize_missions(df)
+    print(f"categorize_missions, all rows: {time.perf_counter() - start:.3f}s "
+          f"({(labels == 'area').sum()} area, {(labels == 'precision').sum()} precision)")
+
+    # The row-by-row version is quadratic, so compare on whole sheets from the first `pages` images
+    subset = df[df['image'].isin(df['image'].dropna().unique()[:pages])].reset_index(drop=True)
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    expected = subset.apply(lambda row: categorize_bombing.categorize_mission(row, subset), axis=1)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = categorize_bombing.categorize_missions(subset)
+    vector_time = time.perf_counter() - start
+    print(f"Subset rows: {len(subset)}")
+    print(f"apply(categorize_mission): {loop_time:.2f}s")
+    print(f"categorize_missions:       {vector_time:.3f}s ({loop_time / vector_time:.0f}x)")
+    print(f"Identical labels: {expected.equals(actual)}")
+
+
+def rolling_contributions_by_filter(df, start, end, parts):
+    """The per-month window filter create_reports used before the monthly cube."""
+    results = []
+    for current_date in pd.date_range(start=start, end=end, freq='MS'):
+        window_data = df[(df['date'] >= current_date - pd.DateOffset(months=11)) & (df['date'] <= current_date)]
+        if len(window_data) > 0:
+            total_tonnage = window_data['TOTAL TONS'].sum()
+            for category in window_data['book_category'].unique():
+                category_data = window_data[window_data['book_category'] == category]
+                category_tonnage = category_data['TOTAL TONS'].sum()
+                category_weight = category_tonnage / total_tonnage
+                if category_tonnage > 0:
+                    row = {'date': current_date, 'category': category}
+                    for name, part_tons in parts.items():
+                        row[name] = (part_tons(category_data) / category_tonnage) * category_weight
+                    results.append(row)
+    return pd.DataFrame(results)
+
+
+def mission_tons(mission):
+    return lambda data: data.groupby('mission_category')['TOTAL TONS'].sum().get(mission, 0)
+
+
+def contribution_pivots(stats):
+    return {column: stats.pivot(index='date', columns='category', values=column).fillna(0)
+            for column in stats.columns if column.endswith('_contrib')}
+
+
+def benchmark_reports(path):
+    """create_reports' rolling 12-month statistics: window filters against the monthly cube."""
+    import categorize_bombing
+    import create_reports
+
+    if not (str(path).endswith('.csv') and os.path.exists(path)):
+        df = attacks_with_datetime()
+        df['bombing_type'] = categorize_bombing.categorize_missions(df)
+        path = os.path.join(tempfile.mkdtemp(), 'combined_attack_data_bombing_type.csv')
+        df.to_csv(path, index=False)
+    df = create_reports.load_and_prepare_data(path)
+    print(f"Attack rows: {len(df)}")
+
+    cases = {
+        'industry contribution, RAF': (
+            lambda: rolling_contributions_by_filter(df[df['force_name'] == 'RAF'], '1943-03-01', '1945-12-01', {
+                'precision_contrib': mission_tons('precision'), 'area_contrib': mission_tons('area')}),
+            lambda cube: create_reports.industry_contribution_stats(cube, 'RAF')),
+        'industry contribution, USAAF': (
+            lambda: rolling_contributions_by_filter(df[df['force_name'] == 'USAAF'], '1943-03-01', '1945-12-01', {
+                'precision_contrib': mission_tons('precision'), 'area_contrib': mission_tons('area')}),
+            lambda cube: create_reports.industry_contribution_stats(cube, 'USAAF')),
+        'area bombing composition': (
+            lambda: rolling_contributions_by_filter(df[df['mission_category'] == 'area'], '1942-01-01', '1945-12-01', {
+                'he_contrib': lambda data: data['HIGH EXPLOSIVE BOMBS TONS'].sum(),
+                'inc_contrib': lambda data: data['INCENDIARY BOMBS TONS'].sum()}),
+            create_reports.area_composition_stats),
+    }
+
+    start = time.perf_counter()
+    cube = create_reports.build_monthly_cube(df)
+    print(f"build_monthly_cube: {time.perf_counter() - start:.3f}s ({cube.shape[0]} x {cube.shape[1]})")
+    print(f"{'case':<30}{'filter':>10}{'cube':>10}{'max diff':>12}")
+    for name, (by_filter, from_cube) in cases.items():
+        start = time.perf_counter()
+        expected = contribution_pivots(by_filter())
+        filter_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = contribution_pivots(from_cube(cube))
+        cube_time = time.perf_counter() - start
+
+        for column in expected:
+            # Same months and categories; values agree up to float summation order
+            assert expected[column].index.equals(actual[column].index), name
+            assert expected[column].columns.equals(actual[column].columns), name
+        max_diff = max((expected[column] - actual[column]).abs().max().max() for column in expected)
+        print(f"{name:<30}{filter_time:>9.3f}s{cube_time:>9.3f}s{max_diff:>12.1e}")
+
+
+def usaaf_frame():
+    """usaaf_raids_full.csv with the dimensions visualize_usaaf_bombing.py derives."""
+    df = pd.read_csv('processed_data/usaaf/usaaf_raids_full.csv')
+    df['YEAR'] = df['YEAR'].fillna(0).astype(float)
+    df['Year'] = (1940 + df['YEAR']).astype(int)
+    df.loc[df['Year'] < 1941, 'Year'] = 1941
+    df.loc[df['Year'] > 1946, 'Year'] = 1945
+    df['Location'] = df['target_location'].str.strip().str.upper()
+    df['Score Category'] = pd.cut(df['AREA_BOMBING_SCORE_NORMALIZED'], bins=[0, 2, 4, 6, 8, 10],
+                                  labels=['Very Precise (0-2)', 'Precise (2-4)', 'Mixed (4-6)',
+                                          'Area (6-8)', 'Heavy Area (8-10)'])
+    df['Month'] = df['MONTH'].fillna(1).astype(float).astype(int)
+    df['Quarter'] = pd.PeriodIndex(pd.to_datetime((1940 + df['YEAR'].astype(int)).astype(str) + '-'
+                                                  + df['Month'].astype(str).str.zfill(2) + '-01'), freq='Q')
+    return df
+
+
+def benchmark_cube(_):
+    """The per-chart groupby passes of visualize_usaaf_bombing.py against one cube and its rollups."""
+    import raids_cube
+
+    df = usaaf_frame()
+    score = 'AREA_BOMBING_SCORE_NORMALIZED'
+    cities = df['Location'].value_counts().head(10).index
+    tons = df[['Year', 'CATEGORY', 'Location', 'Quarter', 'TOTAL_TONS', score]].assign(
+        HE_TONS=df['TOTAL_TONS'] * (100 - df['INCENDIARY_PERCENT'].fillna(0)) / 100)
+
+    def weighted(data):
+        return np.average(data[score], weights=data['TOTAL_TONS'])
+
+    # (name, the frame version, the cube version, cube column compared)
+    queries = [
+        ('yearly mean/std', lambda: df.groupby('Year')[score].agg(['mean', 'std']),
+         lambda cube: raids_cube.rollup(cube, ['Year'])[['score_mean', 'score_std']]),
+        ('year x score category', lambda: pd.crosstab(df['Year'], df['Score Category']),
+         lambda cube: raids_cube.counts(cube, 'Year', 'Score Category')),
+        ('category x year mean', lambda: df.pivot_table(values=score, index='CATEGORY', columns='Year', aggfunc='mean'),
+         lambda cube: raids_cube.rollup(cube, ['CATEGORY', 'Year'])['score_mean'].unstack('Year')),
+        ('top cities mean', lambda: df[df['Location'].isin(cities)].groupby('Location')[score].mean(),
+         lambda cube: raids_cube.rollup(cube, ['Location'], where=cube['Location'].isin(cities))['score_mean']),
+        ('city x score category', lambda: pd.crosstab(df[df['Location'].isin(cities)]['Location'],
+                                                      df[df['Location'].isin(cities)]['Score Category']),
+         lambda cube: raids_cube.counts(cube, 'Location', 'Score Category', where=cube['Location'].isin(cities))),
+        ('category tonnage', lambda: tons.groupby('CATEGORY')[['HE_TONS', 'TOTAL_TONS']].sum(),
+         lambda cube: raids_cube.rollup(cube, ['CATEGORY'])[['he_tons', 'tons_sum']]),
+        ('quarterly means', lambda: df.groupby('Quarter')[[score, 'TOTAL_TONS']].mean(),
+         lambda cube: raids_cube.rollup(cube, ['Quarter'])[['score_mean', 'tons_mean']]),
+        ('weighted by year', lambda: tons.groupby('Year').apply(weighted),
+         lambda cube: raids_cube.rollup(cube, ['Year'])['weighted_score_mean']),
+        ('weighted by city', lambda: tons.groupby('Location').apply(weighted),
+         lambda cube: raids_cube.rollup(cube, ['Location'])['weighted_score_mean']),
+    ]
+
+    start = time.perf_counter()
+    cube = raids_cube.build_cube(df)
+    build_time = time.perf_counter() - start
+    print(f"Raids: {len(df)}, cube cells: {len(cube)}, build_cube: {build_time:.3f}s")
+    print(f"{'query':<24}{'frame':>10}{'cube':>10}{'max diff':>12}")
+    frame_total = cube_total = 0
+    for name, from_frame, from_cube in queries:
+        start = time.perf_counter()
+        expected = from_frame()
+        frame_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = from_cube(cube)
+        cube_time = time.perf_counter() - start
+        frame_total += frame_time
+        cube_total += cube_time
+        max_diff = np.nanmax(np.abs(np.asarray(expected, dtype=float) - np.asarray(actual, dtype=float)))
+        print(f"{name:<24}{frame_time:>9.3f}s{cube_time:>9.3f}s{max_diff:>12.1e}")
+    print(f"{'total':<24}{frame_total:>9.3f}s{cube_total:>9.3f}s  (+{build_time:.3f}s to build the cube once)")
+
+
+def benchmark_dashboard(_):
+    """Loading a city's four PNGs against summarizing its raids and building the chart specs."""
+    from PIL import Image
+    import group_charts
+
+    df = pd.read_csv('processed_data/usaaf/usaaf_raids_full.csv')
+    df['target_location'] = df['target_location'].str.strip().str.upper().astype('category')
+    charts = [group_charts.score_distribution, group_charts.tonnage_vs_incendiary,
+              group_charts.scores_by_target_type, group_charts.category_pie]
+
+    png_times = []
+    for pie in sorted(glob.glob('plots/usaaf/cities/category_pie_city_*.png')):
+        slug = os.path.basename(pie)[len('category_pie_city_'):]
+        start = time.perf_counter()
+        for prefix in ('score_distribution', 'tonnage_vs_incendiary', 'scores_by_target_type', 'category_pie'):
+            path = f'plots/usaaf/cities/{prefix}_city_{slug}'
+            if os.path.exists(path):
+                Image.open(path).load()
+        png_times.append(time.perf_counter() - start)
+
+    chart_times = []
+    for city in df['target_location'].cat.categories:
+        start = time.perf_counter()
+        summary = group_charts.group_summary(df[df['target_location'] == city])
+        for chart in charts:
+            chart(summary).to_dict()
+        chart_times.append((time.perf_counter() - start, city))
+    chart_times.sort()
+
+    print(f"{'city page':<28}{'cities':>8}{'median':>10}{'max':>10}")
+    if png_times:
+        print(f"{'load pre-rendered PNGs':<28}{len(png_times):>8}{np.median(png_times):>9.3f}s{max(png_times):>9.3f}s")
+    print(f"{'summary + chart specs':<28}{len(chart_times):>8}{chart_times[len(chart_times) // 2][0]:>9.3f}s"
+          f"{chart_times[-1][0]:>9.3f}s  (slowest: {chart_times[-1][1]})")
+
+
+def arrow_bytes(df):
+    """Size of `df` as the Arrow stream st.dataframe sends, with categoricals as plain values like app.py."""
+    import pyarrow as pa
+
+    df = df.astype({col: object for col in df.select_dtypes('category').columns})
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def benchmark_table(_):
+    """app.display_data_table reruns: str.contains and an inline base64 CSV against the search index and a page.
+
+    The CSV export is now only built when asked for; its cost per request is
+    reported on its own.
+    """
+    import base64
+    from raid_search import SearchIndex
+
+    df = pd.read_csv('processed_data/usaaf/usaaf_raids_full.csv', low_memory=False)
+    df['target_location'] = df['target_location'].str.strip().str.upper().astype('category')
+    start = time.perf_counter()
+    index = SearchIndex(df)
+    print(f"Raids: {len(df)}, search index built in {time.perf_counter() - start:.3f}s")
+
+    top_city = df['target_location'].value_counts().index[0]
+    selections = [('all', df), (top_city, df[df['target_location'] == top_city]),
+                  ('TRANSPORTATION', df[df['CATEGORY'] == 'TRANSPORTATION']), ('1944', df[df['Year'] == 1944])]
+    terms = ['', 'm', 'mar', 'marshalling', 'oil', 'airdrome', 'ber']
+
+    print(f"{'selection':<16}{'before':>10}{'after':>10}{'export':>10}{'payload before':>16}{'after':>10}{'export':>10}")
+    for name, selection in selections:
+        before_time = after_time = export_time = 0
+        before_bytes = after_bytes = export_bytes = 0
+        for term in terms:
+            start = time.perf_counter()
+            found = selection[selection['target_name'].str.contains(term, case=False, na=False)] if term else selection
+            page = found.iloc[0:10]
+            link = base64.b64encode(found.to_csv(index=False).encode()).decode()
+            before_time += time.perf_counter() - start
+            before_bytes += arrow_bytes(page) + len(link)
+
+            start = time.perf_counter()
+            found = selection[index.mask(selection.index, term)] if term else selection
+            page = found.iloc[0:10]
+            # app.export_key: the fingerprint a prepared export is matched against
+            pd.util.hash_array(found.index.to_numpy()).sum()
+            after_time += time.perf_counter() - start
+            after_bytes += arrow_bytes(page)
+
+            # "Prepare export": the CSV, then served from its own URL
+            start = time.perf_counter()
+            export = found.to_csv(index=False).encode('utf-8')
+            export_time += time.perf_counter() - start
+            export_bytes += len(export)
+        print(f"{name:<16}{before_time / len(terms) * 1e3:>8.1f}ms{after_time / len(terms) * 1e3:>8.1f}ms"
+              f"{export_time / len(terms) * 1e3:>8.1f}ms{before_bytes / len(terms) / 1024:>14.0f}KB"
+              f"{after_bytes / len(terms) / 1024:>8.0f}KB{export_bytes / len(terms) / 1024:>8.0f}KB")
+
+
+def benchmark_app(_):
+    """Cold start and page switches of app.py in a headless Streamlit session."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath('app.py'), default_timeout=300)
+    start = time.perf_counter()
+    at.run()
+    print(f"{'cold start (General Analysis)':<32}{time.perf_counter() - start:>8.3f}s")
+    pages = ["City Analysis", "Category Analysis", "Year Analysis", "Data Download", "General Analysis"]
+    for visit in ('first', 'again'):
+        for page in pages:
+            at.sidebar.radio[0].set_value(page)
+            start = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - start
+            assert not at.exception, at.exception
+            print(f"{f'{page} ({visit})':<32}{elapsed:>8.3f}s")
+
+
+def make_updated_tables(base_dir, pages, rows_per_page=25, seed=0):
+    """Write BOX_*/BOOK_*/*_output/table_data_updated.csv pages covering the reconciliation cases."""
+    import process_table
+
+    rng = random.Random(seed)
+    columns = (process_table.REQUIRED_COLS + process_table.HE_COLS + process_table.INCENDIARY_COLS
+               + process_table.FRAG_COLS + ['TOTAL TONS'])
+    sizes = list(range(1, 17)) * 4 + [0, 17, 21, None, None, 'C', '3', '3.0', 2.7]
+
+    def bomb_values(noisy):
+        number = rng.choice([rng.randint(1, 400), rng.randint(1, 400), None])
+        tons = rng.choice([round(rng.uniform(0.5, 120), 1), rng.randint(1, 60), None])
+        if number is None and tons is None and rng.random() < 0.5:
+            tons = rng.randint(1, 60)
+        # process_row fails on a text tonnage it has to convert, so noisy pages read every number
+        if noisy:
+            number = rng.randint(1, 400)
+            if rng.random() < 0.1:
+                tons = rng.choice(['l0', '1O.5'])
+        return [number, rng.choice(sizes), tons]
+
+    for page in range(pages):
+        output_dir = os.path.join(base_dir, f"BOX_{page // 200 + 1}", f"BOOK_{page // 50 + 1}", f"IMG_{page:05d}_output")
+        os.makedirs(output_dir, exist_ok=True)
+        # Some pages are all numbers, the rest carry text (air forces, day ranges, group codes)
+        text_page = rng.random() < 0.7
+        noisy = text_page and rng.random() < 0.2
+        rows = []
+        for _ in range(rows_per_page):
+            day = rng.choice([rng.randint(1, 31), '4-5']) if text_page else rng.randint(1, 31)
+            row = [day, rng.randint(1, 12), rng.randint(2, 5), rng.choice(['8', 'R', '15']) if text_page else 8,
+                   rng.randint(1, 60), rng.randint(0, 2359), rng.randint(50, 300),
+                   rng.choice(['305G', '96G']) if text_page else 305, 1, 1, rng.randint(1, 4)]
+            row += bomb_values(noisy) + [rng.choice([1, 4, None]), rng.choice([9, None])]
+            row += bomb_values(noisy) + bomb_values(noisy) + [rng.randint(1, 200)]
+            rows.append(row)
+        pd.DataFrame(rows, columns=columns).to_csv(os.path.join(output_dir, 'table_data_updated.csv'), index=False)
+
+
+def process_dataframe_scalar(df):
+    """post_process_2.process_row over every row; the reference for process_dataframe."""
+    import post_process_2
+
+    return df.apply(post_process_2.process_row, axis=1)
+
+
+RECONCILE_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'reconcile')
+
+
+def copy_tables(paths, root, target_dir):
+    """Copy table CSVs under target_dir, keeping their layout below root; returns the copies' paths."""
+    copies = []
+    for path in paths:
+        copy = os.path.join(target_dir, os.path.relpath(path, root))
+        os.makedirs(os.path.dirname(copy), exist_ok=True)
+        shutil.copyfile(path, copy)
+        copies.append(copy)
+    return copies
+
+
+def reconcile_batch(paths, root):
+    """process_tables over a temporary copy of the pages, so nothing is written next to the originals."""
+    import post_process_2
+
+    with tempfile.TemporaryDirectory() as batch_dir:
+        copies = copy_tables(paths, root, batch_dir)
+        start = time.perf_counter()
+        post_process_2.process_tables(copies, output_name='table_data_batch.csv')
+        elapsed = time.perf_counter() - start
+        outputs = []
+        for copy in copies:
+            with open(os.path.join(os.path.dirname(copy), 'table_data_batch.csv')) as f:
+                outputs.append(f.read())
+    return outputs, elapsed
+
+
+def check_reconcile_fixture():
+    """Row-wise, paged and batch reconciliation of the committed pages against their expected outputs."""
+    import post_process_2
+
+    paths = post_process_2.find_updated_tables(RECONCILE_FIXTURE)
+    expected = []
+    for path in paths:
+        with open(os.path.join(os.path.dirname(path), 'table_data_expected.csv')) as f:
+            expected.append(f.read())
+    tables = [pd.read_csv(path) for path in paths]
+    outputs = {
+        'row-wise': [process_dataframe_scalar(df).to_csv(index=False) for df in tables],
+        'paged': [post_process_2.process_dataframe(df).to_csv(index=False) for df in tables],
+        'batch': reconcile_batch(paths, RECONCILE_FIXTURE)[0],
+    }
+    differing = {name: [os.path.relpath(path, RECONCILE_FIXTURE) for path, text, want in zip(paths, texts, expected)
+                        if text != want]
+                 for name, texts in outputs.items()}
+    for name, pages in differing.items():
+        print(f"fixture, {name}: {f'{len(pages)} of {len(paths)} pages differ' if pages else f'{len(paths)} pages match'}")
+        for page in pages:
+            print(f"    {page}")
+    return sum(len(pages) for pages in differing.values())
+
+
+def benchmark_reconcile(base_dir):
+    """Row-wise post_process_2 against the vectorized engine, per page and as one batch; outputs must match."""
+    import logging
+    import post_process_2
+
+    logging.disable(logging.WARNING)
+    failures = check_reconcile_fixture()
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        root = base_dir
+        paths = post_process_2.find_updated_tables(base_dir) if os.path.isdir(base_dir) else []
+        if not paths:
+            root = fixture_dir
+            make_updated_tables(fixture_dir, 400)
+            paths = post_process_2.find_updated_tables(fixture_dir)
+            print(f"Synthetic fixture: {len(paths)} pages in {fixture_dir}")
+        tables = [pd.read_csv(path) for path in paths]
+        print(f"Loaded {len(tables)} tables ({sum(len(df) for df in tables)} rows)")
+
+        start = time.perf_counter()
+        golden = [process_dataframe_scalar(df).to_csv(index=False) for df in tables]
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = [post_process_2.process_dataframe(df).to_csv(index=False) for df in tables]
+        vector_time = time.perf_counter() - start
+
+        batch, batch_time = reconcile_batch(paths, root)
+
+    paged_differing = sum(a != b for a, b in zip(golden, vectorized))
+    batch_differing = sum(a != b for a, b in zip(golden, batch))
+    print(f"row-wise apply:     {scalar_time:8.3f}s")
+    print(f"vectorized, paged:  {vector_time:8.3f}s  ({scalar_time / vector_time:.0f}x)")
+    print(f"vectorized, batch:  {batch_time:8.3f}s  (read, reconcile and write)")
+    print(f"pages differing from the row-wise output: paged {paged_differing}, batch {batch_differing}")
+    if failures or paged_differing or batch_differing:
+        sys.exit("reconcile: output differs from the committed fixture or the row-wise reference")
+
+
+def make_page_tree(base_dir, pages, rows_per_page=25, seed=0):
+    """Write BOX_*/BOOK_*/*_output pages for combine, with the page layouts it has to tell apart."""
+    import process_table
+
+    rng = random.Random(seed)
+    columns = (process_table.REQUIRED_COLS + process_table.HE_COLS + process_table.INCENDIARY_COLS
+               + process_table.FRAG_COLS + ['TOTAL TONS', 'SUMMATION_ROW'])
+    locations = ['BERLIN', 'HAMM', 'SCHWEINFURT', 'MUNSTER']
+
+    def bombs(text_page):
+        number = rng.choice([rng.randint(1, 400), rng.randint(1, 400), 0, None, None])
+        if text_page and rng.random() < 0.03:
+            number = 'l2'
+        return [number, rng.randint(1, 14), rng.choice([round(rng.uniform(0.5, 120), 1), None])]
+
+    def metadata():
+        kind = rng.random()
+        if kind < 0.25:
+            return {}
+        location = rng.choice(locations)
+        fields = {'Target Location': location, 'Target Name': f"{location} MARSHALLING YARD",
+                  'Latitude': rng.choice([round(rng.uniform(47, 55), 4), 52, None, 'NA']),
+                  'Longitude': round(rng.uniform(6, 14), 4), 'Target Code': f"GH{rng.randint(100, 999)}"}
+        if kind < 0.35:
+            fields = {key: value for key, value in fields.items() if rng.random() < 0.5}
+        return fields
+
+    for page in range(pages):
+        output_dir = os.path.join(base_dir, f"BOX_{page // 200 + 1}", f"BOOK_{page // 50 + 1}", f"IMG_{page:05d}_output")
+        os.makedirs(output_dir, exist_ok=True)
+        layout = rng.random()
+        if layout < 0.03:
+            open(os.path.join(output_dir, 'no_table.txt'), 'w').close()
+        if layout < 0.06:
+            continue
+        with open(os.path.join(output_dir, 'extracted_data.json'), 'w') as f:
+            json.dump({'metadata': metadata()}, f)
+        if layout < 0.09:
+            continue
+
+        text_page = layout >= 0.2
+        rows = []
+        for _ in range(rng.randint(0, rows_per_page) if layout < 0.12 else rows_per_page):
+            day = rng.choice([rng.randint(1, 31), '4-5']) if text_page else rng.randint(1, 31)
+            row = [day, rng.randint(1, 12), rng.choice([rng.randint(2, 5), None]),
+                   rng.choice(['8', 'R', '15']) if text_page else 8, rng.randint(1, 60), rng.randint(0, 2359),
+                   rng.randint(50, 300), rng.choice(['305G', '96G']) if text_page else 305, 1, 1, rng.randint(1, 4)]
+            row += bombs(text_page) + [rng.choice([1, 4, None]), rng.choice([9, None])]
+            row += bombs(text_page) + bombs(text_page) + [rng.randint(1, 200)]
+            # Numeric pages mark summation rows with 0/1
+            summation = rng.random() < 0.1 or layout < 0.15
+            row.append(summation if text_page else int(summation))
+            rows.append(row)
+        df = pd.DataFrame(rows, columns=columns)
+        if 0.15 <= layout < 0.17:
+            df = df.drop(columns='SUMMATION_ROW')
+        elif 0.3 <= layout < 0.35:
+            df['NOTES'] = rng.choice(['RECALLED', 'PFF'])
+        elif 0.35 <= layout < 0.38:
+            df = df.drop(columns='TIME OF ATTACK')
+        df.to_csv(os.path.join(output_dir, 'table_data_final.csv'), index=False)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 2**20 if sys.platform == 'darwin' else 2**10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def process_files_scalar(base_path):
+    """Combine the tree row by row into two DataFrames; the reference for combine.combine_files."""
+    import combine
+
+    # Initialize lists to store data and tracking information
+    all_data = []
+    all_data_simplified = []
+    empty_table_files = []
+    previous_metadata = None
+
+    # Walk through the directory structure
+    pages = combine.find_page_dirs(base_path)
+    for box_dir, book_dir, img_output_path in pages:
+        # Skip if no_table.txt exists
+        if os.path.exists(os.path.join(img_output_path, 'no_table.txt')):
+            combine.logger.info(f"Skipping {img_output_path} - no table marker found")
+            continue
+
+        # Process the files
+        try:
+            complete_data, simplified_data = process_image_output_scalar(
+                img_output_path,
+                box_dir,
+                book_dir,
+                previous_metadata,
+                empty_table_files
+            )
+
+            if complete_data:
+                all_data.extend(complete_data)
+                all_data_simplified.extend(simplified_data)
+                # Update previous_metadata if we found valid metadata
+                if complete_data[0].get('target_location') != 'NA':
+                    previous_metadata = {
+                        'target_location': complete_data[0]['target_location'],
+                        'target_name': complete_data[0]['target_name'],
+                        'latitude': complete_data[0]['latitude'],
+                        'longitude': complete_data[0]['longitude'],
+                        'target_code': complete_data[0]['target_code']
+                    }
+        except Exception as e:
+            combine.logger.error(f"Error processing {img_output_path}: {str(e)}")
+            continue
+
+    # Create final DataFrames
+    df_complete = pd.DataFrame(all_data)
+    df_simplified = pd.DataFrame(all_data_simplified)
+
+    # Log empty table files
+    if empty_table_files:
+        combine.logger.warning("Files with tables but no values:")
+        for file in empty_table_files:
+            combine.logger.warning(f"  {file}")
+
+    return df_complete, df_simplified
+
+
+def read_page_scalar(img_path):
+    # Read metadata from extracted_data.json
+    json_path = os.path.join(img_path, 'extracted_data.json')
+    if not os.path.exists(json_path):
+        return {'status': 'no_json'}
+
+    with open(json_path, 'r') as f:
+        extracted_data = json.load(f)
+
+    # Get metadata
+    metadata = extracted_data.get('metadata', {})
+    current_metadata = {
+        'target_location': metadata.get('Target Location', 'NA'),
+        'target_name': metadata.get('Target Name', 'NA'),
+        'latitude': metadata.get('Latitude', 'NA'),
+        'longitude': metadata.get('Longitude', 'NA'),
+        'target_code': metadata.get('Target Code', 'NA')
+    }
+
+    # Read CSV data
+    csv_path = os.path.join(img_path, 'table_data_final.csv')
+    if not os.path.exists(csv_path):
+        return {'status': 'no_csv', 'metadata': current_metadata}
+
+    df = pd.read_csv(csv_path)
+
+    # Skip if no valid rows
+    if len(df) == 0 or (df['SUMMATION_ROW'] == True).all():
+        return {'status': 'empty', 'metadata': current_metadata}
+
+    rows = []
+    for index, row in df[df['SUMMATION_ROW'] == False].iterrows():
+        # Process bomb data
+        has_he_bombs = not pd.isna(row['HIGH EXPLOSIVE BOMBS NUMBER']) and row['HIGH EXPLOSIVE BOMBS NUMBER'] != 0 and row['HIGH EXPLOSIVE BOMBS NUMBER'] != ''
+        has_incendiary_bombs = not pd.isna(row['INCENDIARY BOMBS NUMBER']) and row['INCENDIARY BOMBS NUMBER'] != 0 and row['INCENDIARY BOMBS NUMBER'] != ''
+        has_fragmentation_bombs = not pd.isna(row['FRAGMENTATION BOMBS NUMBER']) and row['FRAGMENTATION BOMBS NUMBER'] != 0 and row['FRAGMENTATION BOMBS NUMBER'] != ''
+
+        if not has_he_bombs and not has_incendiary_bombs and not has_fragmentation_bombs:
+            continue
+
+        rows.append((row.to_dict(), has_he_bombs, has_incendiary_bombs, has_fragmentation_bombs))
+
+    return {'status': 'ok', 'metadata': current_metadata, 'rows': rows}
+
+
+def process_image_output_scalar(img_path, box_dir, book_dir, previous_metadata, empty_table_files):
+    import combine
+
+    page = read_page_scalar(img_path)
+
+    if page['status'] == 'no_json':
+        combine.logger.warning(f"No extracted_data.json found in {img_path}")
+        return None, None
+
+    # Use previous metadata if current is all NA
+    current_metadata = page['metadata']
+    if all(v == 'NA' for v in current_metadata.values()) and previous_metadata:
+        current_metadata = previous_metadata
+
+    if page['status'] == 'no_csv':
+        combine.logger.warning(f"No table_data_final.csv found in {img_path}")
+        return None, None
+
+    if page['status'] == 'empty':
+        empty_table_files.append(img_path)
+        combine.logger.warning(f"Skipping {img_path} - no valid rows")
+        return None, None
+
+    # Process each non-summation row
+    complete_results = []
+    simplified_results = []
+
+    for row, has_he_bombs, has_incendiary_bombs, has_fragmentation_bombs in page['rows']:
+        # Complete dataset
+        complete_result = {
+            'box': box_dir,
+            'book': book_dir,
+            'image': os.path.basename(img_path),
+            **current_metadata,
+            **row  # Include all columns from the CSV
+        }
+        complete_results.append(complete_result)
+
+        # Simplified dataset
+        simplified_result = {
+            'box': box_dir,
+            'book': book_dir,
+            'image': os.path.basename(img_path),
+            'target_location': current_metadata['target_location'],
+            'target_name': current_metadata['target_name'],
+            'day': row['DAY'],
+            'month': row['MONTH'],
+            'year': row['YEAR'],
+            'air_force': row['AIR FORCE'],
+            'has_he_bombs': has_he_bombs,
+            'has_incendiary_bombs': has_incendiary_bombs,
+            'has_fragmentation_bombs': has_fragmentation_bombs
+        }
+        simplified_results.append(simplified_result)
+
+    return complete_results, simplified_results
+
+
+def measure_combine(base_dir, output_dir, workers):
+    """Seconds and peak RSS growth (MB) of one combine run, in a fresh process; workers=None runs the row-wise reference."""
+    import logging
+    import combine
+
+    logging.disable(logging.ERROR)
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    complete_path = os.path.join(output_dir, 'complete.csv')
+    simplified_path = os.path.join(output_dir, 'simplified.csv')
+    if workers is None:
+        df_complete, df_simplified = process_files_scalar(base_dir)
+        df_complete.to_csv(complete_path, index=False)
+        df_simplified.to_csv(simplified_path, index=False)
+    else:
+        combine.combine_files(base_dir, complete_path, simplified_path, workers=workers)
+    return time.perf_counter() - start, peak_rss_mb() - rss_before
+
+
+def benchmark_combine(base_dir):
+    """Row-wise combine against the streaming combiner, run on the tree or a synthetic one; outputs must match."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        if not os.path.isdir(base_dir):
+            base_dir = os.path.join(work_dir, 'BOXES')
+            make_page_tree(base_dir, 2000)
+            print(f"Synthetic fixture: 2000 pages in {base_dir}")
+        cases = [("row-wise", None)] + [(f"streaming, {workers} worker(s)", workers)
+                                         for workers in sorted({1, os.cpu_count()})]
+        context = multiprocessing.get_context('spawn')
+        outputs = {}
+        print(f"{'case':<28}{'seconds':>10}{'peak RSS +MB':>14}")
+        for name, workers in cases:
+            output_dir = os.path.join(work_dir, f"out_{workers}")
+            os.makedirs(output_dir)
+            with context.Pool(1) as pool:
+                seconds, rss_growth = pool.apply(measure_combine, (base_dir, output_dir, workers))
+            print(f"{name:<28}{seconds:>10.2f}{rss_growth:>14.1f}")
+            outputs[name] = [open(os.path.join(output_dir, file)).read() for file in ('complete.csv', 'simplified.csv')]
+    reference = outputs.pop("row-wise")
+    for name, texts in outputs.items():
+        print(f"{name}: complete {'matches' if texts[0] == reference[0] else 'DIFFERS'}, "
+              f"simplified {'matches' if texts[1] == reference[1] else 'DIFFERS'} "
+              f"({reference[0].count(chr(10)) - 1} rows)")
+
+
+BENCHMARKS = {
+    'validators': benchmark_validators,
+    'context': benchmark_context,
+    'pipeline': benchmark_pipeline,
+    'dataset': benchmark_dataset,
+    'raids': benchmark_raids,
+    'categorize': benchmark_categorize,
+    'reports': benchmark_reports,
+    'cube': benchmark_cube,
+    'dashboard': benchmark_dashboard,
+    'table': benchmark_table,
+    'app': benchmark_app,
+    'reconcile': benchmark_reconcile,
+    'combine': benchmark_combine,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run attack-data pipeline benchmarks.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("base_dir", nargs="?", default=BASE_DIR,
+                        help="Root of the BOX_*/BOOK_* tree (page count for the pipeline benchmark).")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args.base_dir)
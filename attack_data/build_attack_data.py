@@ -0,0 +1,256 @@
+# build_attack_data.py
+"""Make-style incremental rebuild of the attack-data derivation chain.
+
+    combine -> fill_missing_targets -> fix_missing_years -> process_raids
+            -> analyze_raids -> add_category -> filter_usaaf_data -> visualize_* -> dashboard_catalog
+                                             add_category -> raids_dataset (Parquet)
+
+Every stage lists the files it reads and writes. After a stage runs, the
+size, mtime and SHA-256 of its inputs are recorded in a state file; on the
+next run a stage is skipped unless an input (including its own script)
+changed or an output is missing. A stage whose inputs were rewritten with
+identical content is also skipped, so a rebuild stops as soon as the data
+stops changing.
+
+combine is incremental within the stage: parsed pages are cached and only
+pages whose extracted_data.json or table_data_final.csv changed are
+re-read, on a process pool, and streamed to the outputs.
+
+combined_attack_data_checked.csv (written by the interactive
+check_attacka_data.py review) is used as the input of fill_missing_targets
+when it exists; otherwise the combined CSV feeds the chain directly.
+
+    python build_attack_data.py                      # everything that is stale
+    python build_attack_data.py filter_usaaf_data    # one target and what it needs
+    python build_attack_data.py --dry-run
+"""
+
+import os
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import subprocess
+
+import combine
+import dashboard_catalog
+from manifest import Manifest, file_signature, file_digest
+
+BASE_DIR = '/Users/chim/Working/Thesis/Attack_Images/BOXES'
+WORK_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_NAME = 'build_state.json'
+PAGE_CACHE_NAME = 'combine_cache.pkl'
+
+COMPLETE_CSV = 'combined_attack_data_complete.csv'
+SIMPLIFIED_CSV = 'combined_attack_data_simplified.csv'
+REVIEWED_CSV = 'combined_attack_data_checked.csv'
+SUMMARY_CSV = 'processed_data/raids_summary.csv'
+CLASSIFICATION_CSV = 'processed_data/raids_area_bombing_classification.csv'
+CATEGORY_CSV = 'processed_data/raids_area_bombing_classification_with_category.csv'
+USAAF_FULL_CSV = 'processed_data/usaaf/usaaf_raids_full.csv'
+USAAF_CATEGORY_CSV = 'processed_data/usaaf/usaaf_raids_classification_with_category.csv'
+RAIDS_DATASET = 'processed_data/raids_dataset/_common_metadata'
+DASHBOARD_CATALOG = 'processed_data/dashboard/catalog.json'
+# The pre-rendered figures the catalog makes display-width copies of
+DASHBOARD_FIGURES = [os.path.join(dashboard_catalog.PLOT_PATH, name) for name in dashboard_catalog.IMAGES]
+
+
+def visualization(script, inputs, cwd=WORK_DIR):
+    # Plots are not tracked as outputs: a visualization reruns when its data or script changes,
+    # and figure_cache skips the figures whose inputs did not
+    return {'name': script[:-3], 'script': script, 'inputs': inputs + ['figure_cache.py'], 'outputs': [], 'cwd': cwd}
+
+
+# Paths, scripts included, are relative to WORK_DIR; `cwd` is where a script's own relative paths resolve from
+STAGES = [
+    {'name': 'combine', 'script': 'combine.py', 'inputs': [], 'outputs': [COMPLETE_CSV, SIMPLIFIED_CSV]},
+    {'name': 'fill_missing_targets', 'script': 'fill_missing_targets.py', 'inputs': [COMPLETE_CSV],
+     'outputs': ['combined_attack_data_filled.csv'], 'pass_inputs': True},
+    {'name': 'fix_missing_years', 'script': 'fix_missing_years.py', 'inputs': ['combined_attack_data_filled.csv'],
+     'outputs': ['combined_attack_data_corrected.csv']},
+    {'name': 'process_raids', 'script': 'process_raids.py', 'inputs': ['combined_attack_data_corrected.csv'],
+     'outputs': [SUMMARY_CSV]},
+    {'name': 'analyze_raids', 'script': 'analyze_raids.py', 'inputs': [SUMMARY_CSV], 'outputs': [CLASSIFICATION_CSV]},
+    {'name': 'add_category', 'script': 'add_category.py', 'inputs': [CLASSIFICATION_CSV], 'outputs': [CATEGORY_CSV]},
+    {'name': 'filter_usaaf_data', 'script': 'filter_usaaf_data.py', 'inputs': [CATEGORY_CSV, SUMMARY_CSV],
+     'outputs': [USAAF_FULL_CSV, USAAF_CATEGORY_CSV]},
+    {'name': 'raids_dataset', 'script': 'raids_dataset.py', 'inputs': [CATEGORY_CSV, SUMMARY_CSV],
+     'outputs': [RAIDS_DATASET]},
+    visualization('visualize_bombing_classification.py', [CLASSIFICATION_CSV]),
+    visualization('visualize_bombing_by_year_category_city.py', [RAIDS_DATASET, 'raids_cube.py']),
+    visualization('visualize_raf_usaaf_comparison.py', [RAIDS_DATASET, 'raids_cube.py'],
+                  cwd=os.path.dirname(WORK_DIR)),
+    visualization('visualize_usaaf_bombing.py', [RAIDS_DATASET, CLASSIFICATION_CSV, 'raids_cube.py',
+                                                  'group_figures.py', 'render_farm.py']),
+    visualization('visualize_raid_frequency.py', [USAAF_FULL_CSV, 'raids_loader.py']),
+    visualization('visualize_raid_frequency_bombing_scores.py', [USAAF_FULL_CSV, 'raids_loader.py']),
+    visualization('visualize_city_bombardment_experience.py', [USAAF_FULL_CSV, 'raids_loader.py',
+                                                                'group_figures.py', 'render_farm.py']),
+    # Last, so the figures it lists have been drawn
+    {'name': 'dashboard_catalog', 'script': 'dashboard_catalog.py', 'inputs': [USAAF_FULL_CSV] + DASHBOARD_FIGURES,
+     'outputs': [DASHBOARD_CATALOG]},
+]
+
+
+def select_stages(targets):
+    """The named stages plus every stage they depend on, in build order."""
+    if not targets:
+        return list(STAGES)
+    stages = {stage['name']: stage for stage in STAGES}
+    unknown = set(targets) - set(stages)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    producers = {output: stage['name'] for stage in STAGES for output in stage['outputs']}
+    needed = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(producers[path] for path in stages[name]['inputs'] if path in producers)
+    return [stage for stage in STAGES if stage['name'] in needed]
+
+
+def stage_inputs(stage, reviewed_csv):
+    inputs = [reviewed_csv if path == COMPLETE_CSV and os.path.exists(os.path.join(WORK_DIR, reviewed_csv))
+              else path for path in stage['inputs']]
+    return [stage['script']] + inputs
+
+
+def page_files(base_dir):
+    """Every file combine reads, as (path, signature) pairs."""
+    files = []
+    for _, _, img_output_path in combine.find_page_dirs(base_dir):
+        for name in combine.PAGE_FILES + ('no_table.txt',):
+            path = os.path.join(img_output_path, name)
+            files.append((path, file_signature(path)))
+    return files
+
+
+def fingerprint(files):
+    """Digest of a list of (path, signature) pairs."""
+    sha = hashlib.sha256()
+    for path, signature in files:
+        sha.update(f"{path}\t{signature}\n".encode('utf-8'))
+    return sha.hexdigest()
+
+
+def snapshot(paths):
+    return {path: {'signature': file_signature(os.path.join(WORK_DIR, path)),
+                   'digest': file_digest(os.path.join(WORK_DIR, path))} for path in paths}
+
+
+def stale_reason(stage, inputs, entry, state, pages=None):
+    """Why `stage` has to run, or None if it is up to date."""
+    if entry is None or entry.get('status') != 'done':
+        return 'never built'
+    missing = [path for path in stage['outputs'] if not os.path.exists(os.path.join(WORK_DIR, path))]
+    if missing:
+        return f"missing {missing[0]}"
+    if pages is not None and entry.get('pages') != pages:
+        return 'pages changed'
+
+    recorded = entry.get('inputs', {})
+    if set(recorded) != set(inputs):
+        return 'inputs changed'
+    refreshed = False
+    for path in inputs:
+        signature = file_signature(os.path.join(WORK_DIR, path))
+        if signature == recorded[path]['signature']:
+            continue
+        if file_digest(os.path.join(WORK_DIR, path)) != recorded[path]['digest']:
+            return f"{path} changed"
+        # Rewritten with the same content; remember the new mtime so it isn't hashed again
+        recorded[path]['signature'] = signature
+        refreshed = True
+    if refreshed:
+        state.record(stage['name'], 'done', **{key: value for key, value in entry.items() if key != 'status'})
+    return None
+
+
+def run_combine(base_dir, page_cache, workers=None):
+    # combine_files leaves an unchanged output alone so the stages after it stay up to date
+    rows = combine.combine_files(base_dir, os.path.join(WORK_DIR, COMPLETE_CSV),
+                                 os.path.join(WORK_DIR, SIMPLIFIED_CSV), page_cache, workers)
+    page_cache.save()
+    print(f"  pages re-read: {page_cache.misses}, reused: {page_cache.hits}, rows: {rows}")
+
+
+def build(targets=None, base_dir=BASE_DIR, state_path=None, reviewed_csv=REVIEWED_CSV,
+          force=False, dry_run=False, workers=None):
+    state = Manifest(state_path or os.path.join(WORK_DIR, STATE_NAME))
+    page_cache = combine.PageCache(os.path.join(WORK_DIR, PAGE_CACHE_NAME))
+    start_time = time.time()
+    ran = []
+    failed = []
+    broken_outputs = set()
+
+    for stage in select_stages(targets):
+        inputs = stage_inputs(stage, reviewed_csv)
+        if broken_outputs.intersection(inputs):
+            print(f"[hold] {stage['name']} (an input failed to build)")
+            # Its outputs are stale too, so the stages downstream of it are held as well
+            broken_outputs.update(stage['outputs'])
+            continue
+        pages = None
+        if stage['name'] == 'combine':
+            # The page list and file stats stand in for combine's inputs; contents are checked per page
+            pages = fingerprint(page_files(base_dir))
+        reason = 'forced' if force else stale_reason(stage, inputs, state.entries.get(stage['name']), state, pages)
+        if reason is None:
+            print(f"[skip] {stage['name']}")
+            continue
+
+        print(f"[run]  {stage['name']} ({reason})")
+        if dry_run:
+            continue
+        stage_start = time.time()
+        try:
+            if stage['name'] == 'combine':
+                run_combine(base_dir, page_cache, workers)
+            else:
+                args = inputs[1:] if stage.get('pass_inputs') else []
+                subprocess.run([sys.executable, os.path.join(WORK_DIR, stage['script'])] + args, check=True,
+                               cwd=stage.get('cwd', WORK_DIR), stdout=subprocess.DEVNULL)
+        except Exception as e:
+            # Keep going with the stages that don't need this one, like make -k
+            print(f"       failed: {e}")
+            logging.error(f"Stage {stage['name']} failed: {e}")
+            state.record(stage['name'], 'failed', error=str(e))
+            failed.append(stage['name'])
+            broken_outputs.update(stage['outputs'])
+            continue
+        seconds = round(time.time() - stage_start, 2)
+        details = {'inputs': snapshot(inputs), 'outputs': snapshot(stage['outputs']), 'seconds': seconds}
+        if pages is not None:
+            details['pages'] = pages
+        state.record(stage['name'], 'done', **details)
+        ran.append(stage['name'])
+        print(f"       {seconds:.2f}s")
+
+    if 'combine' in ran and os.path.exists(os.path.join(WORK_DIR, reviewed_csv)):
+        print(f"Note: fill_missing_targets reads {reviewed_csv}, not the rebuilt {COMPLETE_CSV}; "
+              f"rerun check_attacka_data.py to carry page edits into the chain.")
+    print(f"Stages run: {len(ran)}, failed: {len(failed)}, elapsed: {time.time() - start_time:.1f}s")
+    return ran, failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the stale parts of the attack-data chain.")
+    parser.add_argument("targets", nargs="*", help=f"Stages to build (default: all). One of: "
+                                                   f"{', '.join(stage['name'] for stage in STAGES)}.")
+    parser.add_argument("--base-dir", default=BASE_DIR, help="Root of the BOX_*/BOOK_* tree.")
+    parser.add_argument("--state", default=None, help=f"State file (default: {STATE_NAME} next to this script).")
+    parser.add_argument("--reviewed", default=REVIEWED_CSV,
+                        help="Reviewed export fed to fill_missing_targets when it exists.")
+    parser.add_argument("--force", action="store_true", help="Run the selected stages even if up to date.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would run.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes reading pages for combine (default: all cores).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        filename=os.path.join(WORK_DIR, 'combine.log'), filemode='w')
+    build(args.targets, base_dir=args.base_dir, state_path=args.state, reviewed_csv=args.reviewed,
+          force=args.force, dry_run=args.dry_run, workers=args.workers)
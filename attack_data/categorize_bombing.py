@@ -1,8 +1,12 @@
 import pandas as pd
+import numpy as np
 from datetime import timedelta
 import logging
+import argparse
 
-logging.basicConfig(level=logging.INFO)
+TIME_WINDOW_HOURS = 4
+# Missions on the same attack sheet are missions against the same target
+TARGET_KEYS = ['box', 'book', 'image']
 
 def categorize_mission(row, df, time_window_hours=4):
     """
@@ -44,7 +48,31 @@ def categorize_mission(row, df, time_window_hours=4):
     # If we get here, it's precision bombing
     return 'precision'
 
-def main():
+def categorize_missions(df, time_window_hours=TIME_WINDOW_HOURS):
+    """categorize_mission for every row at once.
+
+    A mission is 'area' if it dropped incendiaries itself or if another
+    mission on the same sheet did within +/- time_window_hours (inclusive).
+    Instead of filtering the whole frame per row, each mission is matched
+    to the nearest incendiary mission on its sheet with merge_asof; missions
+    with a missing sheet key or DATETIME match nothing, as before.
+    """
+    times = pd.to_datetime(df['DATETIME'])
+    incendiary = (df['INCENDIARY BOMBS NUMBER'] > 0).to_numpy()
+    valid = (df[TARGET_KEYS].notna().all(axis=1) & times.notna()).to_numpy()
+
+    missions = df.loc[valid, TARGET_KEYS].assign(DATETIME=times[valid], row=np.flatnonzero(valid))
+    missions = missions.sort_values('DATETIME', kind='stable')
+    sources = missions[incendiary[missions['row']]].drop(columns='row').assign(near_incendiary=True)
+
+    matched = pd.merge_asof(missions, sources, on='DATETIME', by=TARGET_KEYS, direction='nearest',
+                            tolerance=pd.Timedelta(hours=time_window_hours))
+    near = np.zeros(len(df), dtype=bool)
+    near[matched.loc[matched['near_incendiary'].notna(), 'row'].to_numpy()] = True
+
+    return pd.Series(np.where(incendiary | near, 'area', 'precision'), index=df.index)
+
+def main(time_window_hours=TIME_WINDOW_HOURS):
     # Read the cleaned data
     logging.info("Reading cleaned data...")
     df = pd.read_csv('combined_attack_data_cleaned.csv')
@@ -54,7 +82,7 @@ def main():
     
     # Add bombing type categorization
     logging.info("Categorizing bombing missions...")
-    df['bombing_type'] = df.apply(lambda row: categorize_mission(row, df), axis=1)
+    df['bombing_type'] = categorize_missions(df, time_window_hours)
     
     # Save the dataframe with the bombing type
     df.to_csv('combined_attack_data_bombing_type.csv', index=False)
@@ -74,4 +102,9 @@ def main():
     print(year_type_summary)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Label every mission as area or precision bombing.")
+    parser.add_argument("--window-hours", type=float, default=TIME_WINDOW_HOURS,
+                        help="Incendiaries dropped this close in time on the same sheet make a mission area bombing.")
+    args = parser.parse_args()
+    main(args.window_hours)
\ No newline at end of file
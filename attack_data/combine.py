@@ -1,90 +1,154 @@
 import os
+import numpy as np
 import pandas as pd
 import json
+import pickle
 import logging
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
+from manifest import file_signature, file_digest
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='combine.log', filemode='w')
 logger = logging.getLogger(__name__)
 
-def process_files(base_path):
-    # Initialize lists to store data and tracking information
-    all_data = []
-    all_data_simplified = []
-    empty_table_files = []
-    previous_metadata = None
-    
-    # Walk through the directory structure
+# Files in an IMG_*_output directory that combine reads
+PAGE_FILES = ('extracted_data.json', 'table_data_final.csv')
+# Bump when read_page's result changes so cached pages are read again
+PAGE_FORMAT = 2
+METADATA_KEYS = ['target_location', 'target_name', 'latitude', 'longitude', 'target_code']
+# Simplified flag -> bomb number column it is read from
+BOMB_FLAGS = {
+    'has_he_bombs': 'HIGH EXPLOSIVE BOMBS NUMBER',
+    'has_incendiary_bombs': 'INCENDIARY BOMBS NUMBER',
+    'has_fragmentation_bombs': 'FRAGMENTATION BOMBS NUMBER',
+}
+# Pages read ahead of the one being combined, per worker
+READ_AHEAD = 16
+# Rows written to the outputs at a time
+BLOCK_ROWS = 20000
+
+
+class PageCache:
+    """Parsed pages keyed by output directory, reused while their files are unchanged.
+
+    A page is re-read only when the size or mtime of one of its PAGE_FILES
+    changed and the content hash no longer matches, so touching a file
+    without editing it costs a hash rather than a parse.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.entries = pickle.load(f)
+
+    def lookup(self, img_path):
+        """(page, stamp): the cached page or None, and the stamp to store() a fresh read under."""
+        files = [os.path.join(img_path, name) for name in PAGE_FILES]
+        signature = [file_signature(path) for path in files]
+        entry = self.entries.get(img_path)
+        if entry is not None and entry.get('format') != PAGE_FORMAT:
+            entry = None
+        if entry is not None and entry['signature'] == signature:
+            self.hits += 1
+            return entry['page'], None
+
+        digest = [file_digest(path) for path in files]
+        if entry is not None and entry['digest'] == digest:
+            entry['signature'] = signature
+            self.hits += 1
+            return entry['page'], None
+        return None, (signature, digest)
+
+    def store(self, img_path, stamp, page):
+        signature, digest = stamp
+        self.entries[img_path] = {'format': PAGE_FORMAT, 'signature': signature, 'digest': digest, 'page': page}
+        self.misses += 1
+
+    def get(self, img_path):
+        page, stamp = self.lookup(img_path)
+        if page is None:
+            page = read_page(img_path)
+            self.store(img_path, stamp, page)
+        return page
+
+    def prune(self, img_paths):
+        """Forget pages that are no longer in the tree."""
+        for img_path in set(self.entries) - set(img_paths):
+            del self.entries[img_path]
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+
+def find_page_dirs(base_path):
+    """(box_dir, book_dir, img_output_path) for every page output directory, in combine order."""
+    pages = []
     for box_dir in sorted(os.listdir(base_path)):
         if not box_dir.startswith('BOX_'):
             continue
-            
+
         box_path = os.path.join(base_path, box_dir)
         for book_dir in sorted(os.listdir(box_path)):
             if not book_dir.startswith('BOOK_'):
                 continue
-                
+
             book_path = os.path.join(box_path, book_dir)
             for img_dir in sorted(os.listdir(book_path)):
-                if not img_dir.endswith('_output'):
-                    continue
-                    
-                img_output_path = os.path.join(book_path, img_dir)
-                
-                # Skip if no_table.txt exists
-                if os.path.exists(os.path.join(img_output_path, 'no_table.txt')):
-                    logger.info(f"Skipping {img_output_path} - no table marker found")
-                    continue
-                
-                # Process the files
-                try:
-                    complete_data, simplified_data = process_image_output(
-                        img_output_path, 
-                        box_dir, 
-                        book_dir, 
-                        previous_metadata,
-                        empty_table_files
-                    )
-                    
-                    if complete_data:
-                        all_data.extend(complete_data)
-                        all_data_simplified.extend(simplified_data)
-                        # Update previous_metadata if we found valid metadata
-                        if complete_data[0].get('target_location') != 'NA':
-                            previous_metadata = {
-                                'target_location': complete_data[0]['target_location'],
-                                'target_name': complete_data[0]['target_name'],
-                                'latitude': complete_data[0]['latitude'],
-                                'longitude': complete_data[0]['longitude'],
-                                'target_code': complete_data[0]['target_code']
-                            }
-                except Exception as e:
-                    logger.error(f"Error processing {img_output_path}: {str(e)}")
-                    continue
-
-    # Create final DataFrames
-    df_complete = pd.DataFrame(all_data)
-    df_simplified = pd.DataFrame(all_data_simplified)
-    
-    # Log empty table files
-    if empty_table_files:
-        logger.warning("Files with tables but no values:")
-        for file in empty_table_files:
-            logger.warning(f"  {file}")
-    
-    return df_complete, df_simplified
+                if img_dir.endswith('_output'):
+                    pages.append((box_dir, book_dir, os.path.join(book_path, img_dir)))
+    return pages
+
+
+def has_bombs(numbers):
+    """Rows with a bomb count: not missing, not 0 and not an empty string."""
+    present = pd.notna(numbers) & (numbers != 0)
+    if numbers.dtype == object:
+        present &= numbers != ''
+    return present
+
+
+def value_kind(value):
+    """What a column of `value` would hold: 'bool', 'int', 'float', 'none' or 'object'."""
+    if isinstance(value, (bool, np.bool_)):
+        return 'bool'
+    if isinstance(value, (int, np.integer)):
+        return 'int'
+    if isinstance(value, (float, np.floating)):
+        return 'float'
+    return 'none' if value is None else 'object'
+
+
+def array_kind(values):
+    if values.dtype.kind in 'biuf':
+        return {'b': 'bool', 'i': 'int', 'u': 'int', 'f': 'float'}[values.dtype.kind]
+    return 'none' if pd.isna(values).all() else 'object'
+
 
-def process_image_output(img_path, box_dir, book_dir, previous_metadata, empty_table_files):
+def read_page(img_path):
+    """Read one page's own metadata and bomb rows.
+
+    The result depends only on the files in `img_path`, so it can be cached
+    per page; carrying metadata over from the previous page is left to
+    process_image_output. The non-summation rows with any bombs are kept
+    as one array per column in 'columns', with the kind of each in 'kinds',
+    and which bomb types they have in 'bombs'.
+    """
     # Read metadata from extracted_data.json
     json_path = os.path.join(img_path, 'extracted_data.json')
     if not os.path.exists(json_path):
-        logger.warning(f"No extracted_data.json found in {img_path}")
-        return None, None
-        
+        return {'status': 'no_json'}
+
     with open(json_path, 'r') as f:
         extracted_data = json.load(f)
-    
+
     # Get metadata
     metadata = extracted_data.get('metadata', {})
     current_metadata = {
@@ -94,77 +158,302 @@ def process_image_output(img_path, box_dir, book_dir, previous_metadata, empty_t
         'longitude': metadata.get('Longitude', 'NA'),
         'target_code': metadata.get('Target Code', 'NA')
     }
-    
-    # Use previous metadata if current is all NA
-    if all(v == 'NA' for v in current_metadata.values()) and previous_metadata:
-        current_metadata = previous_metadata
-    
+
     # Read CSV data
     csv_path = os.path.join(img_path, 'table_data_final.csv')
     if not os.path.exists(csv_path):
-        logger.warning(f"No table_data_final.csv found in {img_path}")
-        return None, None
-        
+        return {'status': 'no_csv', 'metadata': current_metadata}
+
     df = pd.read_csv(csv_path)
-    
+
     # Skip if no valid rows
     if len(df) == 0 or (df['SUMMATION_ROW'] == True).all():
+        return {'status': 'empty', 'metadata': current_metadata}
+
+    rows = df[df['SUMMATION_ROW'] == False]
+    # The rows used to be taken one by one with iterrows, which casts a page of only numbers to one type
+    common = rows.iloc[:0].to_numpy().dtype
+    if common != object:
+        rows = rows.astype(common)
+    columns = {col: rows[col].to_numpy() for col in rows.columns}
+    bombs = {flag: has_bombs(columns[col]) for flag, col in BOMB_FLAGS.items()}
+    keep = np.logical_or.reduce(list(bombs.values()))
+    columns = {col: values[keep] for col, values in columns.items()}
+
+    return {'status': 'ok', 'metadata': current_metadata, 'length': int(keep.sum()), 'columns': columns,
+            'kinds': {col: array_kind(values) for col, values in columns.items()},
+            'bombs': {flag: values[keep] for flag, values in bombs.items()}}
+
+
+def load_page(img_path):
+    """read_page in a worker: (page, None), or (None, error message) if it failed."""
+    try:
+        return read_page(img_path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def read_pages(pages, page_cache=None, workers=None):
+    """Yield (box_dir, book_dir, img_output_path, page, error) in the order of `pages`.
+
+    Pages missing from `page_cache` are read on a process pool, at most
+    READ_AHEAD per worker ahead of the one being yielded. `page` is None
+    for pages with a no_table.txt marker.
+    """
+    workers = workers or os.cpu_count()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending = deque()
+
+    def finish():
+        box_dir, book_dir, img_output_path, stamp, result = pending.popleft()
+        page, error = result.result() if isinstance(result, Future) else result
+        if page is not None and stamp is not None:
+            page_cache.store(img_output_path, stamp, page)
+        return box_dir, book_dir, img_output_path, page, error
+
+    try:
+        for box_dir, book_dir, img_output_path in pages:
+            stamp = None
+            if os.path.exists(os.path.join(img_output_path, 'no_table.txt')):
+                result = (None, None)
+            else:
+                page = None
+                if page_cache is not None:
+                    page, stamp = page_cache.lookup(img_output_path)
+                if page is not None:
+                    result = (page, None)
+                elif executor is not None:
+                    result = executor.submit(load_page, img_output_path)
+                else:
+                    result = load_page(img_output_path)
+            pending.append((box_dir, book_dir, img_output_path, stamp, result))
+            while len(pending) > READ_AHEAD * workers or (pending and not isinstance(pending[0][4], Future)):
+                yield finish()
+        while pending:
+            yield finish()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+class Rows:
+    """Rows of one page for an output: a column array and its kind per column name."""
+
+    def __init__(self, length):
+        self.length = length
+        self.columns = {}
+        self.kinds = {}
+
+    def constant(self, name, value):
+        column = np.empty(self.length, dtype=object)
+        column.fill(value)
+        self.columns[name] = column
+        self.kinds[name] = value_kind(value)
+
+    def column(self, name, values, kind):
+        self.columns[name] = values
+        self.kinds[name] = kind
+
+    def first(self, name):
+        return self.columns[name][0]
+
+
+def process_image_output(img_path, box_dir, book_dir, previous_metadata, empty_table_files, page=None):
+    """(complete, simplified) Rows of the page's bomb rows, or (None, None)."""
+    if page is None:
+        page = read_page(img_path)
+
+    if page['status'] == 'no_json':
+        logger.warning(f"No extracted_data.json found in {img_path}")
+        return None, None
+
+    # Use previous metadata if current is all NA
+    current_metadata = page['metadata']
+    if all(v == 'NA' for v in current_metadata.values()) and previous_metadata:
+        current_metadata = previous_metadata
+
+    if page['status'] == 'no_csv':
+        logger.warning(f"No table_data_final.csv found in {img_path}")
+        return None, None
+
+    if page['status'] == 'empty':
         empty_table_files.append(img_path)
         logger.warning(f"Skipping {img_path} - no valid rows")
         return None, None
-    
-    # Process each non-summation row
-    complete_results = []
-    simplified_results = []
-    
-    for index, row in df[df['SUMMATION_ROW'] == False].iterrows():
-        # Process bomb data
-        has_he_bombs = not pd.isna(row['HIGH EXPLOSIVE BOMBS NUMBER']) and row['HIGH EXPLOSIVE BOMBS NUMBER'] != 0 and row['HIGH EXPLOSIVE BOMBS NUMBER'] != ''
-        has_incendiary_bombs = not pd.isna(row['INCENDIARY BOMBS NUMBER']) and row['INCENDIARY BOMBS NUMBER'] != 0 and row['INCENDIARY BOMBS NUMBER'] != ''
-        has_fragmentation_bombs = not pd.isna(row['FRAGMENTATION BOMBS NUMBER']) and row['FRAGMENTATION BOMBS NUMBER'] != 0 and row['FRAGMENTATION BOMBS NUMBER'] != ''
-        
-        if not has_he_bombs and not has_incendiary_bombs and not has_fragmentation_bombs:
+
+    if page['length'] == 0:
+        return None, None
+    source = {'box': box_dir, 'book': book_dir, 'image': os.path.basename(img_path)}
+    columns = page['columns']
+
+    # Complete dataset: page columns override metadata of the same name, in the metadata's place
+    complete = Rows(page['length'])
+    for name, value in {**source, **current_metadata}.items():
+        complete.constant(name, value)
+    for col, values in columns.items():
+        complete.column(col, values, page['kinds'][col])
+
+    # Simplified dataset
+    simplified = Rows(page['length'])
+    for name in ['box', 'book', 'image', 'target_location', 'target_name']:
+        simplified.column(name, complete.columns[name], complete.kinds[name])
+    if 'target_location' in columns or 'target_name' in columns:
+        simplified.constant('target_location', current_metadata['target_location'])
+        simplified.constant('target_name', current_metadata['target_name'])
+    for name, col in [('day', 'DAY'), ('month', 'MONTH'), ('year', 'YEAR'), ('air_force', 'AIR FORCE')]:
+        simplified.column(name, columns[col], page['kinds'][col])
+    for flag in BOMB_FLAGS:
+        simplified.column(flag, page['bombs'][flag], 'bool')
+
+    return complete, simplified
+
+
+def combine_pages(base_path, page_cache=None, workers=None):
+    """Yield the (complete, simplified) Rows of each page with bomb rows, in combine order."""
+    empty_table_files = []
+    previous_metadata = None
+
+    pages = find_page_dirs(base_path)
+    for box_dir, book_dir, img_output_path, page, error in read_pages(pages, page_cache, workers):
+        if error is not None:
+            logger.error(f"Error processing {img_output_path}: {error}")
+            continue
+        # Skip if no_table.txt exists
+        if page is None:
+            logger.info(f"Skipping {img_output_path} - no table marker found")
             continue
 
-        # Complete dataset
-        complete_result = {
-            'box': box_dir,
-            'book': book_dir,
-            'image': os.path.basename(img_path),
-            **current_metadata,
-            **row.to_dict()  # Include all columns from the CSV
-        }
-        complete_results.append(complete_result)
-
-        # Simplified dataset
-        simplified_result = {
-            'box': box_dir,
-            'book': book_dir,
-            'image': os.path.basename(img_path),
-            'target_location': current_metadata['target_location'],
-            'target_name': current_metadata['target_name'],
-            'day': row['DAY'],
-            'month': row['MONTH'],
-            'year': row['YEAR'],
-            'air_force': row['AIR FORCE'],
-            'has_he_bombs': has_he_bombs,
-            'has_incendiary_bombs': has_incendiary_bombs,
-            'has_fragmentation_bombs': has_fragmentation_bombs
-        }
-        simplified_results.append(simplified_result)
-    
-    return complete_results, simplified_results
+        try:
+            complete, simplified = process_image_output(
+                img_output_path, box_dir, book_dir, previous_metadata, empty_table_files, page)
+        except Exception as e:
+            logger.error(f"Error processing {img_output_path}: {str(e)}")
+            continue
+
+        if complete is not None:
+            yield complete, simplified
+            # Update previous_metadata if we found valid metadata
+            if complete.first('target_location') != 'NA':
+                previous_metadata = {key: complete.first(key) for key in METADATA_KEYS}
+
+    if page_cache is not None:
+        page_cache.prune([img_output_path for _, _, img_output_path in pages])
+
+    # Log empty table files
+    if empty_table_files:
+        logger.warning("Files with tables but no values:")
+        for file in empty_table_files:
+            logger.warning(f"  {file}")
+
+
+class OutputSchema:
+    """Columns and column types of the frame the combined rows would make together.
+
+    The output used to be one DataFrame built from the rows of every page,
+    which takes the union of their columns and types each column by all of
+    its values. Only the kind of values a page has in a column decides
+    that, so the pages' kinds are kept and pandas is asked how it would type
+    one value of each.
+    """
+
+    KIND_VALUES = {'bool': True, 'int': 1, 'float': 1.5, 'object': 'x', 'none': None}
+
+    def __init__(self):
+        self.kinds = {}
+        self.counts = {}
+        self.pages = 0
+
+    def add(self, rows):
+        self.pages += 1
+        for col, kind in rows.kinds.items():
+            self.kinds.setdefault(col, set()).add(kind)
+            self.counts[col] = self.counts.get(col, 0) + 1
+
+    @property
+    def columns(self):
+        return list(self.kinds)
+
+    def dtypes(self):
+        dtypes = {}
+        for col, kinds in self.kinds.items():
+            records = [{col: self.KIND_VALUES[kind]} for kind in sorted(kinds)]
+            # Rows of pages without the column are missing it
+            if self.counts[col] < self.pages:
+                records.append({})
+            dtypes[col] = pd.DataFrame(records)[col].dtype
+        return dtypes
+
+    def frame(self, pages, dtypes):
+        """The rows of `pages` as one DataFrame with the output's columns and types."""
+        data = {}
+        for col in self.kinds:
+            parts = [rows.columns[col] if col in rows.columns else np.full(rows.length, np.nan) for rows in pages]
+            data[col] = np.concatenate([part.astype(dtypes[col], copy=False) for part in parts])
+        return pd.DataFrame(data, copy=False)
+
+
+def replace_if_changed(tmp_path, path):
+    """Move `tmp_path` over `path` unless it has the same content; True if `path` was written."""
+    if os.path.exists(path) and file_digest(tmp_path) == file_digest(path):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+def combine_files(base_path, complete_path, simplified_path, page_cache=None, workers=None):
+    """Combine the tree into the complete and simplified CSVs; returns the number of rows.
+
+    Pages are combined one at a time and spilled to a temporary file, so
+    only the pages being read are held in memory. Once every page has been
+    seen the column types are known, and the spilled pages are appended to
+    the outputs BLOCK_ROWS at a time with those types. An output whose
+    content did not change is left untouched.
+    """
+    schemas = (OutputSchema(), OutputSchema())
+    rows = 0
+    with tempfile.TemporaryFile() as spill:
+        for pages in combine_pages(base_path, page_cache, workers):
+            for schema, page in zip(schemas, pages):
+                schema.add(page)
+            pickle.dump(pages, spill, protocol=pickle.HIGHEST_PROTOCOL)
+            rows += pages[0].length
+
+        spill.seek(0)
+        paths = [path + '.tmp' for path in (complete_path, simplified_path)]
+        with open(paths[0], 'w') as complete_file, open(paths[1], 'w') as simplified_file:
+            files = (complete_file, simplified_file)
+            dtypes = [schema.dtypes() for schema in schemas]
+            if not rows:
+                # What an empty DataFrame writes
+                for f in files:
+                    f.write(pd.DataFrame().to_csv(index=False))
+            block = []
+            block_rows = 0
+            for page in range(schemas[0].pages):
+                block.append(pickle.load(spill))
+                block_rows += block[-1][0].length
+                if block_rows >= BLOCK_ROWS or page == schemas[0].pages - 1:
+                    for i, (schema, f) in enumerate(zip(schemas, files)):
+                        schema.frame([pages[i] for pages in block], dtypes[i]).to_csv(
+                            f, header=f.tell() == 0, index=False)
+                    block = []
+                    block_rows = 0
+
+    for path in (complete_path, simplified_path):
+        replace_if_changed(path + '.tmp', path)
+    return rows
+
 
 if __name__ == "__main__":
+    # Set up logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='combine.log', filemode='w')
+
     base_path = "/Users/chim/Working/Thesis/Attack_Images/BOXES"
-    df_complete, df_simplified = process_files(base_path)
-    
-    # Save complete dataset
     complete_output_path = "combined_attack_data_complete_test.csv"
-    df_complete.to_csv(complete_output_path, index=False)
-    logger.info(f"Complete data saved to {complete_output_path}")
-    
-    # Save simplified dataset
     simplified_output_path = "combined_attack_data_simplified_test.csv"
-    df_simplified.to_csv(simplified_output_path, index=False)
-    logger.info(f"Simplified data saved to {simplified_output_path}")
\ No newline at end of file
+    rows = combine_files(base_path, complete_output_path, simplified_output_path)
+
+    logger.info(f"Complete data saved to {complete_output_path}")
+    logger.info(f"Simplified data saved to {simplified_output_path}")
+    logger.info(f"Rows combined: {rows}")
@@ -19,6 +19,14 @@ plt.rcParams['font.size'] = 12
 reports_dir = Path('reports_3/')
 reports_dir.mkdir(exist_ok=True, parents=True)
 
+# Rolling analyses look back over twelve month starts
+WINDOW_MONTHS = 12
+CUBE_KEYS = ['force_name', 'book_category', 'mission_category']
+CUBE_MEASURES = ['TOTAL TONS', 'HIGH EXPLOSIVE BOMBS TONS', 'INCENDIARY BOMBS TONS']
+# Stands in for a missing key so those tons still count towards window and category totals;
+# a missing book_category is never reported as a category of its own
+NO_CATEGORY = '<none>'
+
 def load_and_prepare_data(file_path):
     logging.info("Loading data...")
     df = pd.read_csv(file_path, low_memory=False)
@@ -62,6 +70,84 @@ def extract_book_category(book_name):
     category = ' '.join(category_parts)
     return category.replace('__', '')  # Remove any double underscores
  
+def build_monthly_cube(df):
+    """Tonnage per month and (force_name, book_category, mission_category).
+
+    Rows are (month, first_day): attacks on the first of the month are kept
+    apart from the rest of it, because the rolling windows end on the first
+    of the current month. Columns are (measure, force_name, book_category,
+    mission_category), with 'nonzero' counting attacks whose TOTAL TONS is
+    not zero, so an empty window is told apart from float residue.
+    """
+    dated = df[df['date'].notna()]
+    month = dated['date'].dt.to_period('M').dt.to_timestamp()
+    values = dated[CUBE_MEASURES].assign(nonzero=(dated['TOTAL TONS'].fillna(0) != 0).astype(int))
+    keys = [month.rename('month'), (dated['date'] == month).rename('first_day')]
+    keys += [dated[key].fillna(NO_CATEGORY) for key in CUBE_KEYS]
+    cube = values.groupby(keys).sum().unstack(CUBE_KEYS, fill_value=0).sort_index(axis=1)
+    cube.columns.names = ['measure'] + CUBE_KEYS
+    return cube
+
+def rolling_window_sums(cube, start, end, months=WINDOW_MONTHS):
+    """Cube totals over the window ending at each month start from `start` to `end`.
+
+    The window runs from the first of the month `months - 1` months back to
+    the first of the current month, inclusive: the previous whole months
+    plus the current month's first day. Computed as differences of running
+    totals, so each month costs the same however long the window is.
+    """
+    index = pd.date_range(pd.Timestamp(start) - pd.DateOffset(months=months - 1), end, freq='MS')
+    whole = cube.groupby(level='month').sum().reindex(index, fill_value=0)
+    first_day = cube[cube.index.get_level_values('first_day')].droplevel('first_day').reindex(index, fill_value=0)
+
+    running = whole.cumsum()
+    window = running.shift(1, fill_value=0) - running.shift(months, fill_value=0) + first_day
+    return window.loc[pd.Timestamp(start):].rename_axis('date')
+
+def category_contributions(tons, nonzero, parts):
+    """Each book category's share of the window tonnage, split into `parts`.
+
+    `tons`, `nonzero` and every value of `parts` are window totals indexed
+    by (date, book_category). A part contributes
+    (part / category tons) * (category tons / window tons), for categories
+    with positive tonnage in the window. Tons without a book category count
+    towards the window total but get no row.
+    """
+    weight = tons / tons.groupby(level='date').transform('sum')
+    keep = (nonzero > 0) & (tons > 0) & (tons.index.get_level_values('book_category') != NO_CATEGORY)
+    stats = pd.DataFrame({name: (part / tons) * weight for name, part in parts.items()}, index=tons.index)
+    return stats[keep].rename_axis(['date', 'category']).reset_index()
+
+def rows_by_category(window):
+    """Move book_category from the columns of a window frame into its (date, book_category) index."""
+    return window.T.unstack('book_category').T
+
+def industry_contribution_stats(cube, force_name, start='1943-03-01', end='1945-12-01'):
+    """Rolling precision/area contributions of each book category for one force."""
+    window = rolling_window_sums(cube, start, end)
+    if force_name not in window.columns.get_level_values('force_name'):
+        return pd.DataFrame()
+    # (date, book_category) x (measure, mission_category)
+    force = rows_by_category(window.xs(force_name, axis=1, level='force_name'))
+    tons = force['TOTAL TONS']
+    return category_contributions(tons.sum(axis=1), force['nonzero'].sum(axis=1), {
+        'precision_contrib': tons.get('precision', 0),
+        'area_contrib': tons.get('area', 0)
+    })
+
+def area_composition_stats(cube, start='1942-01-01', end='1945-12-01'):
+    """Rolling HE/incendiary contributions of each book category to area bombing."""
+    window = rolling_window_sums(cube, start, end)
+    if 'area' not in window.columns.get_level_values('mission_category'):
+        return pd.DataFrame()
+    area = window.xs('area', axis=1, level='mission_category')
+    # (date, book_category) x measure, summed over both forces
+    totals = rows_by_category(area.T.groupby(level=['measure', 'book_category']).sum().T)
+    return category_contributions(totals['TOTAL TONS'], totals['nonzero'], {
+        'he_contrib': totals['HIGH EXPLOSIVE BOMBS TONS'],
+        'inc_contrib': totals['INCENDIARY BOMBS TONS']
+    })
+
 def create_attack_type_comparison(df):
     logging.info("Creating attack type comparison charts...")
 
@@ -212,9 +298,11 @@ def create_trends_by_industry(df):
 
     logging.info("Trends by industry and bombing type created and saved.")
 
-def create_industry_contribution_analysis(df):
+def create_industry_contribution_analysis(df, cube=None):
     """Analyze bombing type proportions by industry for each air force"""
     logging.info("Starting industry contribution analysis...")
+    if cube is None:
+        cube = build_monthly_cube(df)
     
     output_dir = reports_dir / 'industry_contribution'
     output_dir.mkdir(exist_ok=True, parents=True)
@@ -229,45 +317,7 @@ def create_industry_contribution_analysis(df):
     
     # Create separate plots for each force
     for force_name in ['RAF', 'USAAF']:
-        force_df = df[df['force_name'] == force_name].copy()
-        
-        # Create monthly stats for each category
-        results = []
-        date_range = pd.date_range(start='1943-03-01', end='1945-12-01', freq='MS')  # Starting from Spring 1943
-        
-        for current_date in date_range:
-            window_end = current_date
-            window_start = current_date - pd.DateOffset(months=11)
-            
-            # Get data in window
-            window_data = force_df[
-                (force_df['date'] >= window_start) & 
-                (force_df['date'] <= window_end)
-            ]
-            
-            if len(window_data) > 0:
-                # Calculate overall tonnage
-                total_tonnage = window_data['TOTAL TONS'].sum()
-                
-                # Calculate category contributions
-                for category in window_data['book_category'].unique():
-                    category_data = window_data[window_data['book_category'] == category]
-                    category_tonnage = category_data['TOTAL TONS'].sum()
-                    category_weight = category_tonnage / total_tonnage
-                    
-                    if category_tonnage > 0:
-                        # Calculate proportions for each mission type
-                        mission_tons = category_data.groupby('mission_category')['TOTAL TONS'].sum()
-                        
-                        results.append({
-                            'date': current_date,
-                            'category': category,
-                            'precision_contrib': (mission_tons.get('precision', 0) / category_tonnage) * category_weight,
-                            'area_contrib': (mission_tons.get('area', 0) / category_tonnage) * category_weight
-                        })
-        
-        # Convert to DataFrame and create plots
-        contribution_stats = pd.DataFrame(results)
+        contribution_stats = industry_contribution_stats(cube, force_name)
         
         if contribution_stats.empty:
             logging.warning(f"No contribution data for {force_name}")
@@ -422,55 +472,16 @@ def create_overall_trends(df):
 
     logging.info("Overall trends by bombing type created and saved.")
 
-def analyze_area_bombing_composition(df):
+def analyze_area_bombing_composition(df, cube=None):
     """Analyze the composition of area bombing between HE and incendiary bombs by industry"""
     logging.info("Starting area bombing composition analysis...")
+    if cube is None:
+        cube = build_monthly_cube(df)
     
     output_dir = reports_dir / 'area_bombing_composition'
     output_dir.mkdir(exist_ok=True, parents=True)
 
-    # Filter for area bombing only
-    area_df = df[df['mission_category'] == 'area'].copy()
-    
-    # Create monthly stats for each category
-    results = []
-    date_range = pd.date_range(start='1942-01-01', end='1945-12-01', freq='MS')
-    
-    for current_date in date_range:
-        window_end = current_date
-        window_start = current_date - pd.DateOffset(months=11)
-        
-        # Get data in window
-        window_data = area_df[
-            (area_df['date'] >= window_start) & 
-            (area_df['date'] <= window_end)
-        ]
-        
-        if len(window_data) > 0:
-            # Calculate overall tonnage for the window
-            total_window_tonnage = window_data['TOTAL TONS'].sum()
-            
-            # Calculate category contributions
-            for category in window_data['book_category'].unique():
-                category_data = window_data[window_data['book_category'] == category]
-                category_tonnage = category_data['TOTAL TONS'].sum()
-                category_weight = category_tonnage / total_window_tonnage
-                
-                if category_tonnage > 0:
-                    # Calculate proportions for HE and incendiary
-                    he_tons = category_data['HIGH EXPLOSIVE BOMBS TONS'].sum()
-                    inc_tons = category_data['INCENDIARY BOMBS TONS'].sum()
-                    
-                    # Calculate weighted contributions
-                    results.append({
-                        'date': current_date,
-                        'category': category,
-                        'he_contrib': (he_tons / category_tonnage) * category_weight,
-                        'inc_contrib': (inc_tons / category_tonnage) * category_weight
-                    })
-    
-    # Convert to DataFrame
-    composition_stats = pd.DataFrame(results)
+    composition_stats = area_composition_stats(cube)
     
     if not composition_stats.empty:
         plt.style.use('dark_background')
@@ -721,15 +732,16 @@ Yearly Statistics:
 def main():
     # Load data
     df = load_and_prepare_data('combined_attack_data_bombing_type.csv')
+    cube = build_monthly_cube(df)
 
     # Create charts and reports
     # create_summary_statistics_detailed(df)
     # create_attack_type_comparison(df)
     # create_trends_by_industry(df)    
-    create_industry_contribution_analysis(df)
+    create_industry_contribution_analysis(df, cube)
     create_overall_trends(df)
     # create_summary_statistics(df)
-    # analyze_area_bombing_composition(df)
+    # analyze_area_bombing_composition(df, cube)
     # create_top_missions_report(df)
     
     logging.info("All reports and charts have been created successfully.")
@@ -0,0 +1,160 @@
+# dashboard_catalog.py
+"""Startup catalog for the Streamlit dashboard.
+
+On every rerun app.py sorted the unique locations and categories of the raid
+table and probed plots/usaaf/ for the figures it shows. This build step
+writes them once to processed_data/dashboard/catalog.json. The catalog
+holds:
+- the cities, target categories and years in the data, each with its raid
+  count, mean area bombing score, mean tonnage and mean incendiary %;
+- the pre-rendered figures in IMAGES that exist, as display-width copies.
+
+st.image decodes, resizes and re-encodes every image wider than the page on
+each rerun, and the figures are saved at 300 dpi. The copies are resized
+to DISPLAY_WIDTH once, so Streamlit serves their bytes as they are.
+
+The app loads it once per server process with st.cache_resource.
+load_catalog() rebuilds the catalog when the raids CSV or one of the
+figures changed since it was written. Figure presence is recorded when
+the catalog is built, so build_attack_data.py builds it after the
+visualize_* stages, with the figures among its inputs.
+
+    python dashboard_catalog.py      # rebuild
+
+    from dashboard_catalog import load_catalog
+    catalog = load_catalog()
+    catalog['cities'].loc['BERLIN', 'raids']
+    catalog['images']['general/tonnage_distribution.png']   # path to show, or None
+"""
+
+import os
+import json
+
+import pandas as pd
+from PIL import Image
+
+from manifest import file_signature
+
+RAIDS_CSV = 'processed_data/usaaf/usaaf_raids_full.csv'
+CATALOG_DIR = 'processed_data/dashboard'
+CATALOG_PATH = os.path.join(CATALOG_DIR, 'catalog.json')
+IMAGE_DIR = os.path.join(CATALOG_DIR, 'images')
+PLOT_PATH = 'plots/usaaf'
+# Widest image st.image shows without resizing it (MAXIMUM_CONTENT_WIDTH)
+DISPLAY_WIDTH = 1460
+# Bump when the catalog layout changes so old files are rebuilt
+CATALOG_VERSION = 2
+
+# Pre-rendered figures the dashboard shows, relative to PLOT_PATH
+IMAGES = [
+    'general/overall_score_distribution.png',
+    'general/tonnage_distribution.png',
+    'general/he_vs_incendiary_by_year.png',
+    'general/tonnage_vs_score_relationship.png',
+    'general/quarterly_metrics_evolution.png',
+    'general/he_vs_incendiary_by_category.png',
+    'general/tonnage_distribution_by_category.png',
+    'general/year_category_score_heatmap.png',
+    'general/monthly_score_progression.png',
+    'years/category_by_year.png',
+    'cities/schweinfurt/raids_timeline.png',
+    'cities/schweinfurt/schweinfurt_vs_other_bearings.png',
+]
+
+# Catalog section -> column of the raid table it lists
+ENTITIES = {'cities': 'target_location', 'categories': 'CATEGORY', 'years': 'Year'}
+
+
+def normalize_raids(data):
+    """The Year and location columns the dashboard filters on."""
+    # Add Year column if it doesn't exist
+    if 'Year' not in data.columns and 'YEAR' in data.columns:
+        data['Year'] = (1940 + data['YEAR'].astype(float)).astype(int)
+        # Handle any outlier years
+        data.loc[data['Year'] < 1939, 'Year'] = 1940
+        data.loc[data['Year'] > 1946, 'Year'] = 1945
+
+    # Normalize location names to uppercase to prevent duplicates with different case
+    data['target_location'] = data['target_location'].str.strip().str.upper()
+    return data
+
+
+def entity_metrics(df, column):
+    """Raid count and mean score, tonnage and incendiary % of every value of `column`."""
+    metrics = df.groupby(column).agg(
+        raids=('AREA_BOMBING_SCORE_NORMALIZED', 'size'),
+        score=('AREA_BOMBING_SCORE_NORMALIZED', 'mean'),
+        tons=('TOTAL_TONS', 'mean'),
+        incendiary=('INCENDIARY_PERCENT', 'mean'),
+    )
+    return metrics.round(3).rename_axis('name').reset_index()
+
+
+def display_image(source, image_dir=IMAGE_DIR, plot_path=PLOT_PATH):
+    """Path of a copy of `source` at most DISPLAY_WIDTH wide, written if missing or older; None if no source."""
+    if not os.path.exists(source):
+        return None
+    target = os.path.join(image_dir, os.path.relpath(source, plot_path))
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+        return target
+    with Image.open(source) as image:
+        if image.width <= DISPLAY_WIDTH:
+            return source
+        height = round(image.height * DISPLAY_WIDTH / image.width)
+        resized = image.resize((DISPLAY_WIDTH, height), resample=Image.LANCZOS)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = target + '.tmp'
+    resized.save(tmp_path, format='PNG')
+    os.replace(tmp_path, target)
+    return target
+
+
+def figure_signatures(plot_path=PLOT_PATH):
+    """file_signature of each of the IMAGES, None for the missing ones."""
+    return {name: file_signature(os.path.join(plot_path, name)) for name in IMAGES}
+
+
+def build_catalog(raids_csv=RAIDS_CSV, plot_path=PLOT_PATH, image_dir=IMAGE_DIR):
+    df = normalize_raids(pd.read_csv(raids_csv, low_memory=False))
+    catalog = {'version': CATALOG_VERSION, 'source': raids_csv, 'source_signature': file_signature(raids_csv),
+               'figure_signatures': figure_signatures(plot_path)}
+    for section, column in ENTITIES.items():
+        catalog[section] = entity_metrics(df, column).to_dict(orient='list')
+    catalog['images'] = {name: display_image(os.path.join(plot_path, name), image_dir, plot_path) for name in IMAGES}
+    return catalog
+
+
+def write_catalog(catalog, path=CATALOG_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(catalog, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def with_frames(catalog):
+    """The catalog with its sections as DataFrames indexed by name."""
+    for section in ENTITIES:
+        catalog[section] = pd.DataFrame(catalog[section]).set_index('name')
+    return catalog
+
+
+def load_catalog(path=CATALOG_PATH, raids_csv=RAIDS_CSV, plot_path=PLOT_PATH, image_dir=IMAGE_DIR):
+    """The catalog at `path`, rebuilt first if it is missing or older than the raids CSV or a figure."""
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            catalog = json.load(f)
+        if (catalog.get('version') == CATALOG_VERSION and catalog.get('source') == raids_csv
+                and catalog.get('source_signature') == file_signature(raids_csv)
+                and catalog.get('figure_signatures') == figure_signatures(plot_path)):
+            return with_frames(catalog)
+    catalog = build_catalog(raids_csv, plot_path, image_dir)
+    write_catalog(catalog, path)
+    return with_frames(catalog)
+
+
+if __name__ == "__main__":
+    catalog = build_catalog()
+    write_catalog(catalog)
+    print(f"Wrote {CATALOG_PATH}: " + ", ".join(f"{len(catalog[section]['name'])} {section}" for section in ENTITIES)
+          + f", {sum(path is not None for path in catalog['images'].values())} of {len(IMAGES)} figures present")
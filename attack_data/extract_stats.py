@@ -1,17 +1,12 @@
 import pandas as pd
 import numpy as np
+from raids_loader import load_cleaned_raids
 
 # Load USAAF data - using same path as in visualize_usaaf_bombing.py
 print('Loading USAAF bombing data...')
 try:
-    df = pd.read_csv('processed_data/usaaf/usaaf_raids_classification_with_category.csv')
-    
-    # Clean up year data similar to visualize_usaaf_bombing.py
-    print('Cleaning year data...')
-    df['YEAR'] = df['YEAR'].fillna(0).astype(float)
-    df['Year'] = (1940 + df['YEAR']).astype(int)
-    df.loc[df['Year'] < 1941, 'Year'] = 1941
-    df.loc[df['Year'] > 1946, 'Year'] = 1945
+    # Year and Location come from the shared loader
+    df = load_cleaned_raids('processed_data/usaaf/usaaf_raids_classification_with_category.csv')
     
     # Add the score category field as in visualize_usaaf_bombing.py
     df['Score Category'] = pd.cut(df['AREA_BOMBING_SCORE_NORMALIZED'], 
@@ -19,8 +14,6 @@ try:
                              labels=['Very Precise (0-2)', 'Precise (2-4)', 
                                     'Mixed (4-6)', 'Area (6-8)', 'Heavy Area (8-10)'])
                                     
-    # Create clean location field
-    df['Location'] = df['target_location'].str.strip().str.upper()
     
     print('\n=== OVERALL STATISTICS ===')
     print(f'Total USAAF raids analyzed: {len(df)}')
@@ -0,0 +1,223 @@
+# figure_cache.py
+"""Fingerprinted savefig for the plots/ tree.
+
+The visualize_* scripts redraw and re-encode every PNG on each run, even
+when the data behind most figures did not change. savefig() is a drop-in
+for plt.savefig() that also takes the data a figure was drawn from:
+
+    savefig('plots/usaaf/years/yearly_evolution.png', yearly_scores, dpi=300)
+
+The output is fingerprinted by those inputs (DataFrame/Series values,
+labels and dtypes, arrays, plain values), the savefig options, the source
+of the file calling savefig and the current rcParams. When plots/
+figure_manifest.json already has that fingerprint for the output and the
+file on disk is the one it recorded, the figure is not rendered again;
+the caller's plt.close() just discards it. Rendering and PNG encoding at
+300 dpi is most of the cost of a figure, so the drawing calls before
+savefig are left alone. A call without inputs is always rendered.
+
+The manifest lists every output with its status: "fresh" when the file is
+the one recorded for its fingerprint, "stale" (with the reason) when the
+file is missing or was replaced, the script that drew it changed since, or
+its render failed.
+render_farm jobs are recorded in the same manifest.
+
+    python figure_cache.py            # list stale outputs
+
+Configured through environment variables:
+
+    FIGURE_CACHE_PATH   manifest file (default: plots/figure_manifest.json next to this module)
+    FIGURE_CACHE_MODE   "readwrite" (default), or "off" to render every figure
+"""
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import inspect
+import threading
+
+import numpy as np
+import pandas as pd
+
+from manifest import file_signature, file_digest
+
+WORK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(WORK_DIR, 'plots', 'figure_manifest.json')
+MODES = ("readwrite", "off")
+
+
+def update_digest(sha, value):
+    """Feed `value` into `sha`, recursing into containers."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        sha.update(type(value).__name__.encode('utf-8'))
+        if isinstance(value, pd.DataFrame):
+            sha.update(repr(list(value.columns)).encode('utf-8'))
+            sha.update(repr(value.dtypes.tolist()).encode('utf-8'))
+        else:
+            sha.update(repr((value.name, value.dtype)).encode('utf-8'))
+        # Unnamed integer indexes are row numbers; renumbered rows draw the same figure
+        index = value.index
+        keep_index = not (pd.api.types.is_integer_dtype(index.dtype) and index.names == [None])
+        if keep_index:
+            sha.update(repr((index.names, index.dtype)).encode('utf-8'))
+        sha.update(pd.util.hash_pandas_object(value, index=keep_index).to_numpy().tobytes())
+    elif isinstance(value, pd.Index):
+        update_digest(sha, value.to_series(index=range(len(value))))
+    elif isinstance(value, np.ndarray):
+        sha.update(repr((value.dtype, value.shape)).encode('utf-8'))
+        sha.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode('utf-8'))
+    elif isinstance(value, (list, tuple)):
+        sha.update(f"{type(value).__name__}{len(value)}".encode('utf-8'))
+        for item in value:
+            update_digest(sha, item)
+    elif isinstance(value, dict):
+        sha.update(f"dict{len(value)}".encode('utf-8'))
+        for key, item in value.items():
+            update_digest(sha, key)
+            update_digest(sha, item)
+    else:
+        sha.update(repr(value).encode('utf-8'))
+
+
+def rc_digest(rc_params=None):
+    """Digest of the rcParams a figure is drawn with."""
+    if rc_params is None:
+        import matplotlib.pyplot as plt
+        rc_params = plt.rcParams
+    items = sorted((key, value) for key, value in rc_params.items() if key != 'backend')
+    return hashlib.sha256(repr(items).encode('utf-8')).hexdigest()
+
+
+def fingerprint(code_path, inputs, options=None, rc=None):
+    """Digest of everything that decides what a figure looks like."""
+    sha = hashlib.sha256(file_digest(code_path).encode('utf-8'))
+    sha.update((rc or rc_digest()).encode('utf-8'))
+    update_digest(sha, options or {})
+    update_digest(sha, list(inputs))
+    return sha.hexdigest()
+
+
+class FigureCache:
+    def __init__(self, path=DEFAULT_PATH, mode="readwrite"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown figure cache mode '{mode}', expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(path):
+        """Output path relative to attack_data/, whichever directory the script runs from."""
+        return os.path.relpath(os.path.abspath(path), WORK_DIR)
+
+    def is_fresh(self, path, digest):
+        if self.mode == "off":
+            return False
+        entry = self.entries.get(self.key(path))
+        fresh = (entry is not None and 'error' not in entry and entry['fingerprint'] == digest
+                 and entry['signature'] == file_signature(path))
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return fresh
+
+    def record(self, path, digest, code_path, **details):
+        """Remember the fingerprint `path` was rendered from; pass error=... if rendering failed."""
+        with self.lock:
+            self.entries[self.key(path)] = {
+                'status': "stale" if 'error' in details else "fresh", 'fingerprint': digest,
+                'code': os.path.relpath(os.path.abspath(code_path), WORK_DIR),
+                'code_digest': file_digest(code_path),
+                'signature': file_signature(path), **details,
+            }
+
+    def stale_reason(self, key, entry, code_digests):
+        """Why the recorded output is out of date, or None."""
+        if 'error' in entry:
+            return 'render failed'
+        output = os.path.join(WORK_DIR, key)
+        signature = file_signature(output)
+        if signature is None:
+            return 'missing'
+        if signature != entry['signature']:
+            return 'replaced'
+        code = entry['code']
+        if code not in code_digests:
+            code_digests[code] = file_digest(os.path.join(WORK_DIR, code))
+        if code_digests[code] != entry['code_digest']:
+            return f"{code} changed"
+        return None
+
+    def refresh_status(self):
+        code_digests = {}
+        for key, entry in self.entries.items():
+            reason = self.stale_reason(key, entry, code_digests)
+            entry['status'] = "fresh" if reason is None else "stale"
+            if reason is not None:
+                entry['reason'] = reason
+            else:
+                entry.pop('reason', None)
+
+    def save(self):
+        if self.mode == "off":
+            return
+        with self.lock:
+            self.refresh_status()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=4, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def stale(self):
+        self.refresh_status()
+        return {key: entry['reason'] for key, entry in self.entries.items() if entry['status'] == "stale"}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide figure cache configured from the environment; saved at exit."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = FigureCache(path=os.getenv("FIGURE_CACHE_PATH", DEFAULT_PATH),
+                                         mode=os.getenv("FIGURE_CACHE_MODE", "readwrite"))
+            atexit.register(_default_cache.save)
+    return _default_cache
+
+
+def savefig(path, *inputs, **options):
+    """plt.savefig(path, **options), skipped when `path` was saved before from the same inputs, code and style."""
+    import matplotlib.pyplot as plt
+    if not inputs:
+        plt.savefig(path, **options)
+        return
+    code_path = inspect.currentframe().f_back.f_code.co_filename
+    cache = get_cache()
+    digest = fingerprint(code_path, inputs, options)
+    if cache.is_fresh(path, digest):
+        return
+    start = time.time()
+    plt.savefig(path, **options)
+    cache.record(path, digest, code_path, seconds=round(time.time() - start, 3))
+
+
+if __name__ == "__main__":
+    cache = FigureCache(path=os.getenv("FIGURE_CACHE_PATH", DEFAULT_PATH))
+    stale = cache.stale()
+    print(f"Outputs in {cache.path}: {len(cache.entries)}, fresh: {len(cache.entries) - len(stale)}, "
+          f"stale: {len(stale)}")
+    for key, reason in sorted(stale.items()):
+        print(f"  {key}: {reason}")
@@ -1,7 +1,9 @@
 import csv
 import os
+import sys
 
-input_file = 'combined_attack_data_checked.csv'
+# The reviewed export by default; build_attack_data.py passes the combined CSV when there is none
+input_file = sys.argv[1] if len(sys.argv) > 1 else 'combined_attack_data_checked.csv'
 output_file = 'combined_attack_data_filled.csv'
 
 # Initialize variables to store previous non-empty target values
@@ -0,0 +1,135 @@
+# group_charts.py
+"""Per-group charts for the Streamlit dashboard.
+
+The City, Category and Year pages of app.py used to show the PNGs that
+visualize_usaaf_bombing.py saved for each year, target category and top
+city, so any other location had no charts until the plot scripts were
+re-run. group_summary() reduces the raids of any group to what its charts
+need: histogram counts, box-plot quartiles, score category counts and
+component means, each from one vectorized pass over the group's rows. The
+chart functions turn a summary into a Vega-Lite (Altair) spec that the
+browser draws. Only the tonnage/incendiary scatter sends the raids
+themselves, and only three columns of them.
+
+    summary = group_summary(city_raids)
+    st.altair_chart(score_distribution(summary), use_container_width=True)
+"""
+
+import numpy as np
+import pandas as pd
+import altair as alt
+
+SCORE = 'AREA_BOMBING_SCORE_NORMALIZED'
+SCORE_BINS = [0, 2, 4, 6, 8, 10]
+SCORE_LABELS = ['Very Precise (0-2)', 'Precise (2-4)', 'Mixed (4-6)', 'Area (6-8)', 'Heavy Area (8-10)']
+TARGET_TYPES = {1: 'Industrial/Area', 0: 'Non-Industrial/Precision'}
+COMPONENTS = ['Target Type', 'Tonnage', 'Incendiary']
+HISTOGRAM_BINS = np.linspace(0, 10, 21)
+# Same thresholds as group_figures.group_jobs
+MIN_RAIDS_PIE = 21
+MIN_RAIDS_COMPONENTS = 5
+
+
+def score_histogram(scores):
+    counts, edges = np.histogram(scores.dropna(), bins=HISTOGRAM_BINS)
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+
+
+def target_type_boxes(data):
+    """Quartiles and 1.5 IQR whiskers of the scores of each target type, as seaborn draws them."""
+    scores = pd.DataFrame({'Target Type': data['TARGET_SCORE'].map(TARGET_TYPES),
+                           'score': data[SCORE]}).dropna()
+    if scores.empty:
+        return pd.DataFrame(columns=['Target Type', 'q1', 'median', 'q3', 'low', 'high', 'raids'])
+    grouped = scores.groupby('Target Type')['score']
+    boxes = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    boxes.columns = ['q1', 'median', 'q3']
+    iqr = boxes['q3'] - boxes['q1']
+    low_fence = scores['Target Type'].map(boxes['q1'] - 1.5 * iqr)
+    high_fence = scores['Target Type'].map(boxes['q3'] + 1.5 * iqr)
+    inside = scores[(scores['score'] >= low_fence) & (scores['score'] <= high_fence)]
+    boxes['low'] = inside.groupby('Target Type')['score'].min()
+    boxes['high'] = inside.groupby('Target Type')['score'].max()
+    boxes['raids'] = grouped.size()
+    return boxes.reset_index()
+
+
+def score_categories(scores):
+    categories = pd.cut(scores, bins=SCORE_BINS, labels=SCORE_LABELS)
+    counts = categories.value_counts().reindex(SCORE_LABELS)
+    return counts[counts > 0].rename_axis('Score Category').reset_index(name='raids')
+
+
+def group_summary(data):
+    """Everything the group charts draw, for the raids in `data`."""
+    return {
+        'raids': len(data),
+        'histogram': score_histogram(data[SCORE]),
+        'median': data[SCORE].median(),
+        'points': pd.DataFrame({'TOTAL_TONS': data['TOTAL_TONS'].clip(0, 500),
+                                'INCENDIARY_PERCENT': data['INCENDIARY_PERCENT'].clip(0, 100),
+                                SCORE: data[SCORE]}),
+        'target_types': target_type_boxes(data),
+        'categories': score_categories(data[SCORE]),
+        'components': pd.DataFrame({'component': COMPONENTS,
+                                    'score': [data['TARGET_SCORE'].mean() * 10,
+                                              data['TONNAGE_SCORE'].mean(),
+                                              data['INCENDIARY_SCORE'].mean()]}),
+    }
+
+
+def score_distribution(summary):
+    """Histogram of the area bombing scores, with the median marked"""
+    bars = alt.Chart(summary['histogram']).mark_bar().encode(
+        x=alt.X('bin_start:Q', scale=alt.Scale(domain=[0, 10]),
+                title='Area Bombing Score (10 = Clear Area Bombing, 0 = Precise Bombing)'),
+        x2='bin_end:Q',
+        y=alt.Y('count:Q', title='Count'),
+    )
+    if pd.isna(summary['median']):
+        return bars
+    median = pd.DataFrame({'median': [summary['median']], 'label': [f"Median: {summary['median']:.1f}"]})
+    rule = alt.Chart(median).mark_rule(color='red', strokeDash=[6, 4]).encode(x='median:Q')
+    label = rule.mark_text(color='red', align='left', dx=4, y=8).encode(text='label:N')
+    return bars + rule + label
+
+
+def tonnage_vs_incendiary(summary):
+    """Tonnage against incendiary percentage, colored by score"""
+    return alt.Chart(summary['points']).mark_circle(size=40, opacity=0.7).encode(
+        x=alt.X('TOTAL_TONS:Q', scale=alt.Scale(domain=[0, 500]), title='Total Tons (clipped at 500)'),
+        y=alt.Y('INCENDIARY_PERCENT:Q', scale=alt.Scale(domain=[0, 100]), title='Incendiary Percentage'),
+        color=alt.Color(f'{SCORE}:Q', scale=alt.Scale(scheme='viridis', domain=[0, 10]),
+                        title='Area Bombing Score'),
+    )
+
+
+def scores_by_target_type(summary):
+    """Box plot of scores for industrial and non-industrial targets"""
+    base = alt.Chart(summary['target_types']).encode(x=alt.X('Target Type:N', title='Target Type'))
+    whiskers = base.mark_rule().encode(
+        y=alt.Y('low:Q', scale=alt.Scale(domain=[0, 10]), title='Area Bombing Score'), y2='high:Q')
+    boxes = base.mark_bar(size=60).encode(
+        y='q1:Q', y2='q3:Q', color=alt.Color('Target Type:N', legend=None),
+        tooltip=['Target Type', 'raids', 'low', 'q1', 'median', 'q3', 'high'])
+    medians = base.mark_tick(color='white', size=60, thickness=2).encode(y='median:Q')
+    return whiskers + boxes + medians
+
+
+def category_pie(summary):
+    """Share of raids in each score category"""
+    return alt.Chart(summary['categories']).mark_arc().encode(
+        theta=alt.Theta('raids:Q'),
+        color=alt.Color('Score Category:N', sort=SCORE_LABELS,
+                        scale=alt.Scale(scheme='viridis', domain=SCORE_LABELS)),
+        tooltip=['Score Category', 'raids'],
+    )
+
+
+def component_scores(summary):
+    """Average target, tonnage and incendiary scores"""
+    bars = alt.Chart(summary['components']).mark_bar(color='darkblue', opacity=0.6).encode(
+        x=alt.X('component:N', sort=COMPONENTS, title=None),
+        y=alt.Y('score:Q', scale=alt.Scale(domain=[0, 10]), title='Average Component Score'),
+    )
+    return bars + bars.mark_text(dy=-8, color='black').encode(text=alt.Text('score:Q', format='.1f'))
@@ -0,0 +1,361 @@
+# group_figures.py
+"""Per-group figures rendered as render_farm jobs.
+
+The standard set visualize_usaaf_bombing.py draws for every year, target
+category and top city, and the four-panel bombardment calendar of
+visualize_city_bombardment_experience.py. They live here rather than in the
+scripts so the render workers can import them without running a script.
+group_jobs() and calendar_job() hand each job only the columns its figure
+reads, so a figure is redrawn only when its own slice of the data changes.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from matplotlib.gridspec import GridSpec
+from matplotlib.patches import Patch
+
+from render_farm import job
+
+SCORE = 'AREA_BOMBING_SCORE_NORMALIZED'
+# Set up a common color map for consistency
+norm = plt.Normalize(0, 10)
+
+
+def score_distribution(data, group_name, path):
+    """Histogram of the area bombing scores of one group"""
+    plt.figure(figsize=(12, 6))
+    sns.histplot(data['AREA_BOMBING_SCORE_NORMALIZED'], bins=20, kde=True)
+    plt.title(f'Distribution of Area Bombing Scores - {group_name} (USAAF)', fontsize=16)
+    plt.xlabel('Area Bombing Score (10 = Clear Area Bombing, 0 = Precise Bombing)', fontsize=12)
+    plt.ylabel('Count', fontsize=12)
+    plt.axvline(data['AREA_BOMBING_SCORE_NORMALIZED'].median(), color='red', linestyle='--', 
+               label=f'Median: {data["AREA_BOMBING_SCORE_NORMALIZED"].median():.1f}')
+    plt.xlim(0, 10)  # Enforce consistent x-axis limits
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def tonnage_vs_incendiary(data, group_name, path):
+    """Tonnage against incendiary percentage, colored by score"""
+    plt.figure(figsize=(12, 8))
+    scatter = plt.scatter(
+        data['TOTAL_TONS'].clip(0, 500), 
+        data['INCENDIARY_PERCENT'].clip(0, 100), 
+        c=data['AREA_BOMBING_SCORE_NORMALIZED'], 
+        alpha=0.7, 
+        cmap='viridis', 
+        s=40,
+        norm=norm
+    )
+    plt.colorbar(scatter, label='Area Bombing Score')
+    plt.title(f'Tonnage vs Incendiary Percentage - {group_name} (USAAF)', fontsize=16)
+    plt.xlabel('Total Tons (clipped at 500)', fontsize=12)
+    plt.ylabel('Incendiary Percentage', fontsize=12)
+    plt.xlim(0, 500)  # Enforce consistent x-axis limits
+    plt.ylim(0, 100)  # Enforce consistent y-axis limits
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def scores_by_target_type(data, group_name, path):
+    """Box plot of scores for industrial and non-industrial targets"""
+    plt.figure(figsize=(10, 6))
+    data.loc[:, 'Target Type'] = data['TARGET_SCORE'].map({1: 'Industrial/Area', 0: 'Non-Industrial/Precision'})
+    sns.boxplot(x='Target Type', y='AREA_BOMBING_SCORE_NORMALIZED', data=data)
+    plt.title(f'Area Bombing Scores by Target Type - {group_name} (USAAF)', fontsize=16)
+    plt.xlabel('Target Type', fontsize=12)
+    plt.ylabel('Area Bombing Score', fontsize=12)
+    plt.ylim(0, 10)  # Enforce consistent y-axis limits
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def category_pie(data, group_name, path):
+    """Share of raids in each score category"""
+    plt.figure(figsize=(12, 10))
+    cat_counts = data['Score Category'].value_counts().sort_index()
+    colors = plt.cm.viridis(np.linspace(0, 1, len(cat_counts)))
+    cat_counts.plot.pie(autopct='%1.1f%%', colors=colors, explode=[0.05]*len(cat_counts),
+                       textprops={'fontsize': 12})
+    plt.title(f'Distribution of Bombing Categories - {group_name} (USAAF)', fontsize=16)
+    plt.ylabel('')  # Hide the ylabel
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def component_radar(data, group_name, path):
+    """Radar chart of the average target, tonnage and incendiary scores"""
+    # Calculate average component scores
+    avg_target = data['TARGET_SCORE'].mean() * 10
+    avg_tonnage = data['TONNAGE_SCORE'].mean()
+    avg_incendiary = data['INCENDIARY_SCORE'].mean()
+    
+    # Create radar chart
+    categories = ['Target Type', 'Tonnage', 'Incendiary']
+    values = [avg_target, avg_tonnage, avg_incendiary]
+    
+    # Create the radar chart
+    angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
+    values += values[:1]  # Close the loop
+    angles += angles[:1]  # Close the loop
+    
+    fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(polar=True))
+    ax.plot(angles, values, 'o-', linewidth=2, color='darkblue')
+    ax.fill(angles, values, alpha=0.25, color='darkblue')
+    ax.set_thetagrids(np.degrees(angles[:-1]), categories)
+    ax.set_ylim(0, 10)  # Consistent range for component scores
+    ax.set_title(f'Average Component Scores - {group_name} (USAAF)', fontsize=16, pad=20)
+    ax.grid(True)
+    
+    # Add values at points
+    for angle, value, category in zip(angles[:-1], values[:-1], categories):
+        ax.text(angle, value + 0.5, f'{value:.1f}', 
+               horizontalalignment='center', verticalalignment='center')
+    
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def group_jobs(data, group_name, save_dir):
+    """The standard set of plots for a given dataset subset, as render jobs"""
+    slug = group_name.replace(" ", "_").lower()
+    figures = [(score_distribution, 'score_distribution', [SCORE]),
+               (tonnage_vs_incendiary, 'tonnage_vs_incendiary', ['TOTAL_TONS', 'INCENDIARY_PERCENT', SCORE]),
+               (scores_by_target_type, 'scores_by_target_type', ['TARGET_SCORE', SCORE])]
+    if len(data) > 20:  # Only create if enough data points
+        figures.append((category_pie, 'category_pie', ['Score Category']))
+    if len(data) >= 5:
+        figures.append((component_radar, 'component_radar', ['TARGET_SCORE', 'TONNAGE_SCORE', 'INCENDIARY_SCORE']))
+    jobs = []
+    for func, prefix, columns in figures:
+        path = f'{save_dir}/{prefix}_{slug}.png'
+        jobs.append(job(func, [data[columns]], (group_name, path), [path]))
+    return jobs
+
+
+def bombardment_calendar(location_data, location_raw_data, location, all_quarters, path):
+    """Create a multi-panel bombardment calendar for a single location"""
+    location_data = location_data.set_index('Quarter')
+    
+    # Calculate incendiary percentage by quarter
+    inc_by_quarter = {}
+    for quarter in all_quarters:
+        quarter_data = location_raw_data[location_raw_data['Quarter'] == quarter]
+        if len(quarter_data) > 0 and quarter_data['TOTAL_TONS'].sum() > 0:
+            # Check if INCENDIARY_TONS exists, if not calculate it from INCENDIARY_PERCENT
+            if 'INCENDIARY_TONS' not in quarter_data.columns:
+                if 'INCENDIARY_PERCENT' in quarter_data.columns:
+                    inc_tons = (quarter_data['INCENDIARY_PERCENT'] * quarter_data['TOTAL_TONS'] / 100).sum()
+                else:
+                    inc_tons = 0
+            else:
+                inc_tons = quarter_data['INCENDIARY_TONS'].sum()
+            
+            total_tons = quarter_data['TOTAL_TONS'].sum()
+            inc_by_quarter[quarter] = (inc_tons / total_tons) * 100 if total_tons > 0 else 0
+        else:
+            inc_by_quarter[quarter] = 0
+    
+    # Create figure with 4 panels
+    fig = plt.figure(figsize=(16, 12))
+    gs = GridSpec(4, 1, height_ratios=[2, 1, 1, 1], hspace=0.3)
+    
+    # Prepare data arrays
+    quarters = []
+    raids = []
+    tonnage = []
+    tons_per_raid = []
+    area_scores = []
+    inc_percentages = []
+    
+    for quarter in all_quarters:
+        quarters.append(quarter)
+        if quarter in location_data.index:
+            raids.append(location_data.loc[quarter, 'Raid_Count'])
+            tonnage.append(location_data.loc[quarter, 'Total_Tonnage'])
+            
+            # Calculate tons per raid
+            if location_data.loc[quarter, 'Raid_Count'] > 0:
+                tons_per_raid.append(location_data.loc[quarter, 'Total_Tonnage'] / location_data.loc[quarter, 'Raid_Count'])
+            else:
+                tons_per_raid.append(0)
+            
+            # Get area bombing score
+            if not np.isnan(location_data.loc[quarter, 'Avg_Area_Bombing_Score']):
+                area_scores.append(location_data.loc[quarter, 'Avg_Area_Bombing_Score'])
+            else:
+                area_scores.append(np.nan)
+                
+            # Get incendiary percentage
+            inc_percentages.append(inc_by_quarter.get(quarter, 0))
+        else:
+            raids.append(0)
+            tonnage.append(0)
+            tons_per_raid.append(0)
+            area_scores.append(np.nan)
+            inc_percentages.append(0)
+    
+    # Define shared x positions and quarters
+    x_positions = np.arange(len(quarters))
+    
+    # Simplified color schemes
+    main_color = '#1f77b4'  # Blue
+    secondary_color = '#d62728'  # Red
+    bar_colors = [main_color if r > 0 else '#cccccc' for r in raids]
+    
+    # Panel 1: Raid count and tonnage
+    ax1 = fig.add_subplot(gs[0])
+    
+    # Create bar chart for raids with simplified colors
+    ax1.bar(x_positions, raids, color=bar_colors, alpha=0.8, label='Raid Count')
+    ax1.set_ylabel('Number of Raids', fontsize=12)
+    
+    # Create line chart for tonnage on secondary y-axis
+    ax1_twin = ax1.twinx()
+    ax1_twin.plot(x_positions, tonnage, color=secondary_color, linewidth=2, label='Total Tonnage')
+    ax1_twin.set_ylabel('Total Tonnage', color=secondary_color, fontsize=12)
+    ax1_twin.tick_params(axis='y', labelcolor=secondary_color)
+    
+    # Set x-axis labels
+    ax1.set_xticks(x_positions)
+    ax1.set_xticklabels([])  # Hide x labels for top panel
+    ax1.set_title(f'Bombardment Experience for {location} (1942-1945)', fontsize=20)
+    
+    # Add vertical grid lines to help align panels
+    ax1.grid(True, axis='x', alpha=0.3, linestyle='--')
+    ax1.grid(True, axis='y', alpha=0.2)
+    
+    # Add legend
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax1_twin.get_legend_handles_labels()
+    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', fontsize=12)
+    
+    # Panel 2: Bombing intensity (tons per raid)
+    ax2 = fig.add_subplot(gs[1])
+    
+    # Simplified color scheme for tons per raid
+    intensity_colors = []
+    for tpr in tons_per_raid:
+        if tpr <= 0:
+            intensity_colors.append('#cccccc')  # Gray for zero values
+        elif tpr < 25:
+            intensity_colors.append('#9ecae1')  # Light blue for low intensity
+        elif tpr < 50:
+            intensity_colors.append('#4292c6')  # Medium blue for medium intensity
+        else:
+            intensity_colors.append('#084594')  # Dark blue for high intensity
+    
+    # Create bar chart for tons per raid with simplified colors
+    ax2.bar(x_positions, tons_per_raid, color=intensity_colors, alpha=0.8)
+    
+    # Create legend for tons per raid
+    handles = [
+        Patch(facecolor='#9ecae1', label='< 25 tons'),
+        Patch(facecolor='#4292c6', label='25-50 tons'),
+        Patch(facecolor='#084594', label='> 50 tons')
+    ]
+    ax2.legend(handles=handles, loc='upper right', fontsize=10)
+    
+    ax2.set_ylabel('Tons Per Raid', fontsize=12)
+    ax2.set_xticks(x_positions)
+    ax2.set_xticklabels([])  # Hide x labels for middle panel
+    ax2.grid(True, axis='x', alpha=0.3, linestyle='--')
+    ax2.grid(True, axis='y', alpha=0.2)
+    
+    # Panel 3: Bombing approach (area bombing score)
+    ax3 = fig.add_subplot(gs[2])
+    
+    # Simplified colors for area bombing
+    area_colors = []
+    for score in area_scores:
+        if np.isnan(score):
+            area_colors.append('#cccccc')  # Gray for NaN values
+        elif score <= 3:
+            area_colors.append('#4292c6')  # Blue for precision bombing
+        elif score < 7:
+            area_colors.append('#f7a35c')  # Orange for mixed bombing
+        else:
+            area_colors.append('#d62728')  # Red for area bombing
+    
+    # Create bar chart for area bombing score with simplified colors
+    ax3.bar(x_positions, area_scores, color=area_colors, alpha=0.8)
+    
+    # Create legend for area bombing
+    handles = [
+        Patch(facecolor='#4292c6', label='Precision (0-3)'),
+        Patch(facecolor='#f7a35c', label='Mixed (4-6)'),
+        Patch(facecolor='#d62728', label='Area (7-10)')
+    ]
+    ax3.legend(handles=handles, loc='upper right', fontsize=10)
+    
+    ax3.set_ylabel('Area Bombing Score', fontsize=12)
+    ax3.set_ylim(0, 10)
+    ax3.set_xticks(x_positions)
+    ax3.set_xticklabels([])  # Hide x labels
+    ax3.grid(True, axis='x', alpha=0.3, linestyle='--')
+    ax3.grid(True, axis='y', alpha=0.2)
+    
+    # Panel 4: Incendiary percentage
+    ax4 = fig.add_subplot(gs[3])
+    
+    # Simplified colors for incendiary percentage
+    inc_colors = []
+    for pct in inc_percentages:
+        if pct <= 0:
+            inc_colors.append('#cccccc')  # Gray for zero values
+        elif pct < 25:
+            inc_colors.append('#9ecae1')  # Light blue for low percentage
+        elif pct < 50:
+            inc_colors.append('#f7a35c')  # Orange for medium percentage
+        else:
+            inc_colors.append('#d62728')  # Red for high percentage
+    
+    # Create bar chart for incendiary percentage with simplified colors
+    ax4.bar(x_positions, inc_percentages, color=inc_colors, alpha=0.8)
+    
+    # Create legend for incendiary percentage
+    handles = [
+        Patch(facecolor='#9ecae1', label='< 25%'),
+        Patch(facecolor='#f7a35c', label='25-50%'),
+        Patch(facecolor='#d62728', label='> 50%')
+    ]
+    ax4.legend(handles=handles, loc='upper right', fontsize=10)
+    
+    ax4.set_ylabel('Incendiary %', fontsize=12)
+    ax4.set_ylim(0, 100)
+    ax4.set_xticks(x_positions)
+    ax4.set_xticklabels(quarters, rotation=45, ha='right')
+    ax4.grid(True, axis='x', alpha=0.3, linestyle='--')
+    ax4.grid(True, axis='y', alpha=0.2)
+    
+    # Add horizontal grid lines to align panels visually
+    x_min, x_max = ax1.get_xlim()
+    for i in range(len(quarters)):
+        if i % 2 == 0:  # Add vertical line for every other quarter
+            ax1.axvline(x=i, color='gray', alpha=0.2, linestyle='-', zorder=0)
+            ax2.axvline(x=i, color='gray', alpha=0.2, linestyle='-', zorder=0)
+            ax3.axvline(x=i, color='gray', alpha=0.2, linestyle='-', zorder=0)
+            ax4.axvline(x=i, color='gray', alpha=0.2, linestyle='-', zorder=0)
+    
+    # Ensure consistent x-axis limits across all panels
+    for ax in [ax1, ax2, ax3, ax4]:
+        ax.set_xlim(-0.5, len(quarters)-0.5)
+    
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def calendar_job(location, bombardment_df, raids, all_quarters, save_dir='plots/city_bombardment'):
+    """Render job for the bombardment calendar of one location"""
+    path = f'{save_dir}/calendar_{location.lower().replace(" ", "_")}.png'
+    columns = [col for col in ['Quarter', 'TOTAL_TONS', 'INCENDIARY_PERCENT', 'INCENDIARY_TONS'] if col in raids.columns]
+    frames = [bombardment_df[bombardment_df['Location'] == location], raids.loc[raids['Location'] == location, columns]]
+    return job(bombardment_calendar, frames, (location, all_quarters, path), [path])
@@ -0,0 +1,57 @@
+# manifest.py
+"""On-disk record of per-item status so an interrupted batch run can resume."""
+
+import os
+import json
+import hashlib
+import threading
+
+
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def status(self, key):
+        return self.entries.get(key, {}).get("status")
+
+    def is_done(self, key):
+        return self.status(key) == "done"
+
+    def record(self, key, status, **details):
+        with self.lock:
+            self.entries[key] = {"status": status, **details}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=4)
+            os.replace(tmp_path, self.path)
+
+    def counts(self):
+        counts = {}
+        for entry in self.entries.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+
+def file_signature(path):
+    """(size, mtime_ns) of `path`, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def file_digest(path):
+    """SHA-256 of the contents of `path`, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
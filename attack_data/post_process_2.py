@@ -4,13 +4,7 @@ import numpy as np
 from fuzzywuzzy import fuzz
 import logging
 
-# Configure logging
-logging.basicConfig(
-    filename='/Users/chim/Working/Thesis/Attack_Images/OCR/PRODUCTION/running/final_processing_log.txt',
-    level=logging.DEBUG,
-    format='%(asctime)s - [PID %(process)d] - %(levelname)s - %(message)s',
-    filemode='w'
-)
+log_file = '/Users/chim/Working/Thesis/Attack_Images/OCR/PRODUCTION/running/final_processing_log.txt'
 
 BASE_DIR = '/Users/chim/Working/Thesis/Attack_Images/BOXES'
 
@@ -121,20 +115,167 @@ def process_row(row):
 
     return row
 
+# Vectorized reconciliation
+#
+# For a valid size code, get_expected_values keeps the tonnage and number
+# that were read and fills in the missing one from each candidate weight.
+# The field being filled was missing, so it scores 0 for every candidate,
+# and the other fields score the same for every candidate too. The string
+# score therefore always ties, and find_best_match keeps the first weight.
+# The engine below takes the first weight of every size code directly.
+
+BOMB_TYPES = ['HIGH EXPLOSIVE', 'INCENDIARY', 'FRAGMENTATION']
+BOMB_COLUMNS = [f'{bomb_type} BOMBS {field}' for bomb_type in BOMB_TYPES for field in ('NUMBER', 'SIZE', 'TONS')]
+
+
+def weight_table(mapping):
+    """The first weight of each size code of one bomb type, by code; NaN for codes without weights."""
+    table = np.full(max(mapping) + 1, np.nan)
+    for size_code, weights in mapping.items():
+        if weights:
+            table[size_code] = weights[0]
+    return table
+
+
+WEIGHT_TABLES = {bomb_type: weight_table(mapping) for bomb_type, mapping in bomb_weight_mapping.items()}
+
+
+def parse_size_code(value):
+    """The size code get_expected_values reads from `value`, or None."""
+    if pd.isna(value) or value == 0:
+        return None
+    try:
+        return int(value)
+    except (ValueError, OverflowError):
+        return None
+
+
+def size_codes(sizes):
+    """parse_size_code over a column, through its distinct values; -1 where there is no code."""
+    uniques = pd.unique(sizes)
+    parsed = np.array([-1 if code is None else code for code in map(parse_size_code, uniques)], dtype=np.int64)
+    return parsed[pd.Index(uniques).get_indexer(sizes)]
+
+
+def reconcile(tons, number, size, bomb_type):
+    """Reconciled (tons, number, size, updated) for the columns of one bomb type.
+
+    `updated` marks the rows process_row would rewrite; the returned values
+    are only meaningful there.
+    """
+    table = WEIGHT_TABLES[bomb_type]
+    codes = size_codes(size)
+    in_table = (codes > 0) & (codes < len(table))
+    weights = table[np.where(in_table, codes, 0)]
+    has_weights = ~np.isnan(weights)
+
+    tons_read = pd.notna(tons).to_numpy()
+    number_read = pd.notna(number).to_numpy()
+    tons_value = pd.to_numeric(tons, errors='coerce').to_numpy(dtype=float)
+    number_value = pd.to_numeric(number, errors='coerce').to_numpy(dtype=float)
+    updated = has_weights & (tons_read | number_read)
+    # process_row would do arithmetic on the text here and fail; leave such rows alone
+    updated &= ~(tons_read & ~number_read & np.isnan(tons_value))
+    updated &= ~(number_read & ~tons_read & np.isnan(number_value))
+
+    # Expected values of the first weight, as in get_expected_values
+    new_number = np.where(number_read, number_value, (tons_value * 2000) / weights)
+    new_tons = np.where(tons_read, tons_value, (number_value * weights) / 2000)
+    logging.debug(f"{bomb_type}: {updated.sum()} of {len(updated)} rows reconciled")
+    return new_tons, new_number, codes, updated
+
+
+def reconcile_columns(df):
+    """{column: (rows, values)} to write into the bomb columns of `df`.
+
+    Tonnage and number are only written where they were missing; process_row
+    writes the values that were read back as they were.
+    """
+    updates = {}
+    for bomb_type in BOMB_TYPES:
+        tons = df[f'{bomb_type} BOMBS TONS']
+        number = df[f'{bomb_type} BOMBS NUMBER']
+        new_tons, new_number, codes, updated = reconcile(tons, number, df[f'{bomb_type} BOMBS SIZE'], bomb_type)
+        updates[f'{bomb_type} BOMBS TONS'] = (updated & pd.isna(tons).to_numpy(), new_tons)
+        updates[f'{bomb_type} BOMBS NUMBER'] = (updated & pd.isna(number).to_numpy(), new_number)
+        updates[f'{bomb_type} BOMBS SIZE'] = (updated, np.array([int(code) for code in codes], dtype=object))
+    return updates
+
+
+def apply_updates(df, updates):
+    """`df` with the updates written in, with the column types df.apply(process_row, axis=1) gives.
+
+    apply rebuilds the frame from its rows. When every column is numeric the
+    rows, and so every column, come back as one common numeric type.
+    Otherwise the rows are objects and each column's type is inferred again.
+    """
+    common = df.iloc[:0].to_numpy().dtype
+    result = df.astype(common)
+    for col, (rows, values) in updates.items():
+        if not rows.any():
+            continue
+        column = result[col].to_numpy(copy=True)
+        if common != object:
+            values = values.astype(common)
+        column[rows] = values[rows]
+        result[col] = column
+    if common == object:
+        result = result.infer_objects()
+    return result
+
+
+def process_dataframe(df):
+    """Reconcile the bomb number, size and tonnage columns; same result as df.apply(process_row, axis=1)."""
+    if df.empty:
+        return df.copy()
+    return apply_updates(df, reconcile_columns(df))
+
 def process_csv(input_csv, output_csv):
     df = pd.read_csv(input_csv)
-    df = df.apply(process_row, axis=1)
+    df = process_dataframe(df)
     df.to_csv(output_csv, index=False)
     logging.info(f"Processed {input_csv} and saved results to {output_csv}")
 
+def process_tables(input_csvs, output_name='table_data_final.csv'):
+    """Reconcile many tables in one batch; each result is written next to its input as `output_name`."""
+    frames = {}
+    for input_csv in input_csvs:
+        df = pd.read_csv(input_csv)
+        missing = [col for col in BOMB_COLUMNS if col not in df.columns]
+        if missing:
+            logging.error(f"Skipping {input_csv}: missing columns {missing}")
+            continue
+        frames[input_csv] = df
+    if not frames:
+        return 0
+
+    corpus = pd.concat([df[BOMB_COLUMNS] for df in frames.values()], ignore_index=True)
+    updates = reconcile_columns(corpus)
+    start = 0
+    for input_csv, df in frames.items():
+        stop = start + len(df)
+        page_updates = {col: (rows[start:stop], values[start:stop]) for col, (rows, values) in updates.items()}
+        result = apply_updates(df, page_updates) if len(df) else df
+        result.to_csv(os.path.join(os.path.dirname(input_csv), output_name), index=False)
+        start = stop
+    logging.info(f"Processed {len(frames)} tables ({len(corpus)} rows)")
+    return len(frames)
+
+def find_updated_tables(base_dir=BASE_DIR):
+    return sorted(os.path.join(root, file) for root, dirs, files in os.walk(base_dir)
+                  for file in files if file.endswith('table_data_updated.csv'))
+
 def main():
-    for root, dirs, files in os.walk(BASE_DIR):
-        for file in files:
-            if file.endswith('table_data_updated.csv'):
-                input_csv = os.path.join(root, file)
-                output_csv = os.path.join(root, 'table_data_final.csv')
-                process_csv(input_csv, output_csv)
+    process_tables(find_updated_tables(BASE_DIR))
 
 if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.DEBUG,
+        format='%(asctime)s - [PID %(process)d] - %(levelname)s - %(message)s',
+        filemode='w'
+    )
+
     main()
 
@@ -1,5 +1,6 @@
 # process_ocr.py
 
+import io
 import json
 import csv
 import sys
@@ -9,21 +10,11 @@ import logging
 from thefuzz import fuzz
 from PIL import Image
 from openai import OpenAI
+from llm_cache import cached_chat, get_cache, CacheMissError
 
 
-# Get the JPG filename from the JSON filename
-json_file = sys.argv[1]
-
-# Configure logging
 log_file = '/Users/chim/Working/Thesis/Attack_Images/OCR/PRODUCTION/running/processing_log.txt'
 
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format='%(asctime)s - [PID %(process)d] - %(levelname)s - %(message)s',
-    filemode='a'
-)
-
 client = OpenAI()
 
 def process_ocr_data(ocr_data, jpg_file):
@@ -283,8 +274,10 @@ def send_to_ai(prompt, attributes, max_retries=3, model="gpt-4o"):
             
             logging.info(f"Attempt {attempt + 1}: Sending prompt to AI:\n{full_prompt}")
 
-            # Make the API call
-            response = client.chat.completions.create(
+            # Make the API call (served from the response cache when this attempt was seen before)
+            full_response = cached_chat(
+                client,
+                variant=attempt,
                 model=model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that extracts target information from US Strategic Bombing Survey documents."},
@@ -295,7 +288,7 @@ def send_to_ai(prompt, attributes, max_retries=3, model="gpt-4o"):
             )
             
             # Extract the JSON part from the response
-            full_response = response.choices[0].message.content.strip()
+            full_response = full_response.strip()
             logging.info(f"Received full response from AI:\n{full_response}")
 
             # Use regex to find the JSON part
@@ -318,6 +311,8 @@ def send_to_ai(prompt, attributes, max_retries=3, model="gpt-4o"):
                 logging.warning(f"Attempt {attempt + 1}: JSON response does not contain all expected attributes. Retrying...")
         except json.JSONDecodeError:
             logging.error(f"Attempt {attempt + 1}: Failed to parse JSON. Retrying...")
+        except CacheMissError:
+            raise
         except Exception as e:
             logging.error(f"Attempt {attempt + 1}: An error occurred: {str(e)}. Retrying...")
     
@@ -449,27 +444,35 @@ def extract_table_data(table, expected_names):
     logging.debug(f"Extracted table data: {data}")
     return data
 
+def format_csv(data):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(data.keys())
+    writer.writerows(zip(*data.values()))
+    return buffer.getvalue()
+
 def save_csv(data, filename):
     with open(filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(data.keys())
-        writer.writerows(zip(*data.values()))
+        f.write(format_csv(data))
 
 def save_json(data, filename):
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
 
-# Main execution
-if __name__ == "__main__":
-    file = sys.argv[1]
+def process_page(file):
+    """Extract the table and target information of one page's OCR JSON.
+
+    Writes extracted_data.json and table_data.csv to the page's _output folder
+    and returns (output_path, extracted_data), or None when the page has no
+    usable table. Raises FileNotFoundError if the page's JPG is missing.
+    """
     with open(file, 'r') as f:
         ocr_data = json.load(f)
 
     # find the corresponding JPG image file
     jpg_file = file.replace(".json", ".JPG")
     if not os.path.exists(jpg_file):
-        logging.error(f"Corresponding JPG file not found: {jpg_file}")
-        exit(1)
+        raise FileNotFoundError(f"Corresponding JPG file not found: {jpg_file}")
     
     logging.info(f"--------------Processing {jpg_file}--------------")
 
@@ -479,9 +482,26 @@ if __name__ == "__main__":
 
     extracted_data = process_ocr_data(ocr_data, jpg_file)        
     if extracted_data is None:
-        logging.error("No suitable table found in the OCR data. Exiting.")
-        exit(0)
+        logging.error("No suitable table found in the OCR data.")
+        return None
 
     save_json(extracted_data, output_path + "/extracted_data.json")
     save_csv(extracted_data["table_data"], output_path + "/table_data.csv")
     logging.info("Data extraction complete. Check extracted_data.json and table_data.csv for results.")
+    return output_path, extracted_data
+
+# Main execution
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format='%(asctime)s - [PID %(process)d] - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+
+    try:
+        process_page(sys.argv[1])
+    except FileNotFoundError as e:
+        logging.error(str(e))
+        exit(1)
+    logging.info(f"Response cache: {get_cache().stats()}")
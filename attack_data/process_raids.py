@@ -1,95 +1,116 @@
 import pandas as pd
+import numpy as np
 import os
 
-# Load the data
-df = pd.read_csv('combined_attack_data_corrected.csv')
-print("Available columns:", df.columns.tolist())
+INPUT_FILE = 'combined_attack_data_corrected.csv'
 
-# Function to identify raids
-def identify_raids(df):
-    raids = []
-    current_raid = []
-    
-    # Sort by location, target, date and time for proper sequencing
-    sorted_df = df.sort_values(by=['target_location', 'target_name', 'YEAR', 'MONTH', 'DAY', 'TIME OF ATTACK'])
-    
-    for idx, row in sorted_df.iterrows():
-        if not current_raid:
-            current_raid.append(row)
-            continue
-            
-        prev_row = current_raid[-1]
-        
-        # Check if this row belongs to the same raid (same location, target, and date)
-        same_location = prev_row['target_location'] == row['target_location']
-        same_target = prev_row['target_name'] == row['target_name']
-        same_day = prev_row['DAY'] == row['DAY']
-        same_month = prev_row['MONTH'] == row['MONTH']
-        same_year = prev_row['YEAR'] == row['YEAR']
-        
-        if same_location and same_target and same_day and same_month and same_year:
-            current_raid.append(row)
-        else:
-            raids.append(current_raid)
-            current_raid = [row]
-    
-    # Add the last raid
-    if current_raid:
-        raids.append(current_raid)
-    
-    return raids
+# Rows are sorted on these before grouping; consecutive rows that agree on
+# RAID_KEYS (and have none of them missing) belong to the same raid
+SORT_COLUMNS = ['target_location', 'target_name', 'YEAR', 'MONTH', 'DAY', 'TIME OF ATTACK']
+RAID_KEYS = ['target_location', 'target_name', 'DAY', 'MONTH', 'YEAR']
 
-# Function to aggregate raid data
-def aggregate_raid_data(raid_rows):
-    first_row = raid_rows[0]
-    
-    # Get unique books for this raid
-    books = set(row['book'] for row in raid_rows if pd.notna(row['book']))
-    book_info = list(books)[0] if len(books) == 1 else list(books)
-    
-    result = {
-        'target_location': first_row['target_location'],
-        'target_name': first_row['target_name'],
-        'BOOK': book_info,  # Add book information
-        'latitude': first_row['latitude'],
-        'longitude': first_row['longitude'],
-        'target_code': first_row['target_code'],
-        'DAY': first_row['DAY'],
-        'MONTH': first_row['MONTH'],
-        'YEAR': first_row['YEAR'],
-        'TIME OF ATTACK': first_row['TIME OF ATTACK'],  # Using first attack time as reference
-        'AIR FORCE': first_row['AIR FORCE'],
-        # Sum of aircraft
-        'TOTAL_AIRCRAFT': sum(row['NUMBER OF AIRCRAFT BOMBING'] for row in raid_rows if pd.notna(row['NUMBER OF AIRCRAFT BOMBING'])),
-        # Average altitude
-        'AVG_ALTITUDE': sum(row['ALTITUDE OF RELEASE IN HUND. FT.'] for row in raid_rows if pd.notna(row['ALTITUDE OF RELEASE IN HUND. FT.'])) / 
-                        sum(1 for row in raid_rows if pd.notna(row['ALTITUDE OF RELEASE IN HUND. FT.'])) if any(pd.notna(row['ALTITUDE OF RELEASE IN HUND. FT.']) for row in raid_rows) else None,
-        # Sum of high explosive bombs
-        'TOTAL_HE_BOMBS': sum(row['HIGH EXPLOSIVE BOMBS NUMBER'] for row in raid_rows if pd.notna(row['HIGH EXPLOSIVE BOMBS NUMBER'])),
-        'TOTAL_HE_TONS': sum(row['HIGH EXPLOSIVE BOMBS TONS'] for row in raid_rows if pd.notna(row['HIGH EXPLOSIVE BOMBS TONS'])),
-        # Sum of incendiary bombs
-        'TOTAL_INCENDIARY_BOMBS': sum(row['INCENDIARY BOMBS NUMBER'] for row in raid_rows if pd.notna(row['INCENDIARY BOMBS NUMBER'])),
-        'TOTAL_INCENDIARY_TONS': sum(row['INCENDIARY BOMBS TONS'] for row in raid_rows if pd.notna(row['INCENDIARY BOMBS TONS'])),
-        # Sum of fragmentation bombs
-        'TOTAL_FRAG_BOMBS': sum(row['FRAGMENTATION BOMBS NUMBER'] for row in raid_rows if pd.notna(row['FRAGMENTATION BOMBS NUMBER'])),
-        'TOTAL_FRAG_TONS': sum(row['FRAGMENTATION BOMBS TONS'] for row in raid_rows if pd.notna(row['FRAGMENTATION BOMBS TONS'])),
-        # Total tonnage
-        'TOTAL_TONS': sum(row['TOTAL TONS'] for row in raid_rows if pd.notna(row['TOTAL TONS'])),
-        # Count of attacks in the raid
-        'NUM_ATTACKS': len(raid_rows)
-    }
-    return result
+# Taken from the first (earliest) row of each raid
+FIRST_COLUMNS = ['target_location', 'target_name', 'latitude', 'longitude', 'target_code',
+                 'DAY', 'MONTH', 'YEAR', 'TIME OF ATTACK', 'AIR FORCE']
+
+# Summed over each raid, skipping missing values
+SUM_COLUMNS = {
+    'TOTAL_AIRCRAFT': 'NUMBER OF AIRCRAFT BOMBING',
+    'TOTAL_HE_BOMBS': 'HIGH EXPLOSIVE BOMBS NUMBER',
+    'TOTAL_HE_TONS': 'HIGH EXPLOSIVE BOMBS TONS',
+    'TOTAL_INCENDIARY_BOMBS': 'INCENDIARY BOMBS NUMBER',
+    'TOTAL_INCENDIARY_TONS': 'INCENDIARY BOMBS TONS',
+    'TOTAL_FRAG_BOMBS': 'FRAGMENTATION BOMBS NUMBER',
+    'TOTAL_FRAG_TONS': 'FRAGMENTATION BOMBS TONS',
+    'TOTAL_TONS': 'TOTAL TONS',
+}
+ALTITUDE_COLUMN = 'ALTITUDE OF RELEASE IN HUND. FT.'
+
+# Column order of raids_summary.csv
+OUTPUT_COLUMNS = ['target_location', 'target_name', 'BOOK', 'latitude', 'longitude', 'target_code',
+                  'DAY', 'MONTH', 'YEAR', 'TIME OF ATTACK', 'AIR FORCE', 'TOTAL_AIRCRAFT', 'AVG_ALTITUDE',
+                  'TOTAL_HE_BOMBS', 'TOTAL_HE_TONS', 'TOTAL_INCENDIARY_BOMBS', 'TOTAL_INCENDIARY_TONS',
+                  'TOTAL_FRAG_BOMBS', 'TOTAL_FRAG_TONS', 'TOTAL_TONS', 'NUM_ATTACKS']
+
+def assign_raid_ids(sorted_df):
+    """Raid number of every row of an already sorted frame, by change detection on RAID_KEYS.
+
+    A missing key never matches, so such rows start a new raid.
+    """
+    new_raid = np.zeros(len(sorted_df), dtype=bool)
+    new_raid[:1] = True
+    for col in RAID_KEYS:
+        values = sorted_df[col].to_numpy()
+        missing = pd.isna(values)
+        new_raid[1:] |= (values[1:] != values[:-1]) | missing[1:] | missing[:-1]
+    return np.cumsum(new_raid) - 1, new_raid
+
+
+def raid_books(sorted_df, raid_id, n_raids):
+    """BOOK per raid: the book name when a raid has one, a list of them when it spans several."""
+    books = pd.DataFrame({'raid': raid_id, 'book': sorted_df['book'].to_numpy()})
+    books = books.dropna().drop_duplicates()
+    counts = np.bincount(books['raid'], minlength=n_raids)
+
+    book_info = np.empty(n_raids, dtype=object)
+    for raid in np.flatnonzero(counts != 1):
+        book_info[raid] = []
+    single = books[counts[books['raid']] == 1]
+    book_info[single['raid'].to_numpy()] = single['book'].to_numpy()
+    for raid, group in books[counts[books['raid']] > 1].groupby('raid'):
+        book_info[raid] = sorted(group['book'])
+    return book_info
+
+
+def sequential_sums(values, raid_id, starts, n_raids):
+    """Per-raid column sums added left to right, as Python's sum() would add them.
+
+    groupby().sum() uses compensated summation, which differs from the old
+    output in the last digit; instead every raid's k-th rows are added in one
+    vectorized step, for k = 0, 1, ... up to the longest raid.
+    """
+    position = np.arange(len(raid_id)) - starts[raid_id]
+    order = np.argsort(position, kind='stable')
+    bounds = np.cumsum(np.bincount(position))
+    totals = np.zeros((n_raids, values.shape[1]))
+    lo = 0
+    for hi in bounds:
+        rows = order[lo:hi]
+        totals[raid_id[rows]] += values[rows]
+        lo = hi
+    return totals
+
+
+def summarize_raids(df):
+    """Group the attacks into raids: one row per raid, in the column order of raids_summary.csv."""
+    sorted_df = df.sort_values(by=SORT_COLUMNS)
+    raid_id, new_raid = assign_raid_ids(sorted_df)
+    starts = np.flatnonzero(new_raid)
+    n_raids = len(starts)
+
+    summary = sorted_df.loc[new_raid, FIRST_COLUMNS].reset_index(drop=True)
+    summary['BOOK'] = raid_books(sorted_df, raid_id, n_raids)
+
+    # Missing values are skipped by adding 0.0, which leaves a running sum unchanged
+    columns = list(SUM_COLUMNS.values()) + [ALTITUDE_COLUMN]
+    values = sorted_df[columns].to_numpy(dtype=float)
+    totals = sequential_sums(np.nan_to_num(values, nan=0.0), raid_id, starts, n_raids)
+    for i, total in enumerate(SUM_COLUMNS):
+        summary[total] = totals[:, i]
+
+    altitude_count = np.bincount(raid_id, weights=~np.isnan(values[:, -1]), minlength=n_raids)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary['AVG_ALTITUDE'] = np.where(altitude_count > 0, totals[:, -1] / altitude_count, np.nan)
+    summary['NUM_ATTACKS'] = np.bincount(raid_id, minlength=n_raids)
+    return summary[OUTPUT_COLUMNS]
 
 # Main process
-def process_raids():
+def process_raids(input_file=INPUT_FILE):
     print("Loading and processing data...")
-    raids = identify_raids(df)
-    
-    # Process each raid
-    raid_summaries = [aggregate_raid_data(raid) for raid in raids]
-    
-    # Create a DataFrame from the raid summaries
-    raids_df = pd.DataFrame(raid_summaries)
+    df = pd.read_csv(input_file)
+    print("Available columns:", df.columns.tolist())
+
+    raids_df = summarize_raids(df)
     
     # Create output directory if it doesn't exist
     os.makedirs('processed_data', exist_ok=True)
@@ -1,74 +1,130 @@
 import pandas as pd
+import numpy as np
 import os
 import sys
 import re
 import json
+import time
+import bisect
 from openai import OpenAI
+from llm_cache import cached_chat, get_cache, CacheMissError
 import logging
 # from tqdm import tqdm
 
-# Configure logging
 log_file = '/Users/chim/Working/Thesis/Attack_Images/OCR/PRODUCTION/running/table_processing_log.txt'
 
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format='%(asctime)s - [PID %(process)d] - %(levelname)s - %(message)s',
-    filemode='a'
-)
-
 client = OpenAI()
 
+# Messages shared by the check_* functions and the vectorized VECTOR_RULES below
+DAY_REQUIRED_MSG = "DAY is required. should be a number between 1 and 31 or a range (e.g., 15-16)."
+DAY_RANGE_MSG = "DAY should be between 1 and 31."
+DAY_SPAN_MSG = "DAY range should be between 1 and 31 and start <= end."
+DAY_FORMAT_MSG = "Invalid DAY format. Expected single day (1-31) or a range (e.g., 15-16)."
+MONTH_REQUIRED_MSG = "MONTH is required. Should be a number between 1 and 12."
+MONTH_RANGE_MSG = "MONTH should be between 1 and 12."
+MONTH_TYPE_MSG = "MONTH should be an integer with a value between 1 and 12."
+YEAR_REQUIRED_MSG = "YEAR is required. Should be a single digit (0-5) representing 1940-1945."
+YEAR_RANGE_MSG = "YEAR should be between 0 and 5."
+YEAR_TYPE_MSG = "YEAR should be a single digit integer between 0 and 5."
+TIME_REQUIRED_MSG = "TIME OF ATTACK is required. Should be a 4 digit number representing the time in 24-hour format (e.g., 1434)."
+TIME_RANGE_MSG = "TIME OF ATTACK should be in 24-hour format HHMM."
+TIME_FORMAT_MSG = "Invalid TIME OF ATTACK format. Expected HHMM."
+AIR_FORCE_REQUIRED_RAF_MSG = "AIR FORCE is required. Could be 8, 9, 12, 15, or R. Potentially is R."
+AIR_FORCE_REQUIRED_MSG = "AIR FORCE is required. Should be 8, 9, 12, or 15. Potentially is 8."
+AIR_FORCE_VALUE_MSG = "AIR FORCE code should be one of 8, 9, 12, 15, or R."
+GROUP_SQUADRON_REQUIRED_MSG = "GROUP/SQUADRON NUMBER is required. Should be 2 to 4 numbers followed by an optional A, B, or C, and then G or S (e.g., 305CG, 99G, 305S)."
+GROUP_SQUADRON_FORMAT_MSG = "GROUP/SQUADRON NUMBER should be 2 to 4 numbers followed by an optional A, B, or C, and then G or S (e.g., 305CG, 99G, 305S)."
+AIRCRAFT_REQUIRED_MSG = "NUMBER OF AIRCRAFT BOMBING is required. Should be a number between 1 and 999."
+AIRCRAFT_RANGE_MSG = "NUMBER OF AIRCRAFT BOMBING should be between 1 and 999."
+AIRCRAFT_TYPE_MSG = "NUMBER OF AIRCRAFT BOMBING should be an integer with a value between 1 and 999."
+ALTITUDE_REQUIRED_MSG = "ALTITUDE OF RELEASE IN HUND. FT. is required. Should be a number between 50 and 600."
+ALTITUDE_RANGE_MSG = "ALTITUDE OF RELEASE IN HUND. FT. should be between 50 and 600."
+ALTITUDE_TYPE_MSG = "ALTITUDE OF RELEASE IN HUND. FT. should be an integer with a value between 50 and 600."
+SIGHTING_REQUIRED_MSG = "SIGHTING is required. Should be a number between 1 and 13 or a letter R, L, D, S, or G."
+SIGHTING_RANGE_MSG = "SIGHTING should be between 1 and 13."
+SIGHTING_TYPE_MSG = "SIGHTING should be a number between 1 and 13 or a letter R, L, D, S, or G."
+VISIBILITY_REQUIRED_MSG = "VISIBILITY OF TARGET is required. Should be a letter G, C, P, or N."
+VISIBILITY_VALUE_MSG = "VISIBILITY OF TARGET should be a letter G, C, P, or N."
+PRIORITY_REQUIRED_MSG = "TARGET PRIORITY is required. Should be a number between 1 and 4."
+PRIORITY_RANGE_MSG = "TARGET PRIORITY should be between 1 and 4."
+PRIORITY_TYPE_MSG = "TARGET PRIORITY should be an integer with a value between 1 and 4."
+HE_NUMBER_REQUIRED_MSG = "HIGH EXPLOSIVE BOMBS NUMBER is required. Should be a number between 1 and 999."
+HE_NUMBER_RANGE_MSG = "HIGH EXPLOSIVE BOMBS NUMBER should be between 1 and 999."
+HE_NUMBER_TYPE_MSG = "HIGH EXPLOSIVE BOMBS NUMBER should be an integer with a value between 1 and 999."
+HE_SIZE_REQUIRED_MSG = "HIGH EXPLOSIVE BOMBS SIZE is required. Should be a number between 1 and 16, or 21 to 23, or 'C'."
+HE_SIZE_RANGE_MSG = "HIGH EXPLOSIVE BOMBS SIZE should be between 1 and 16, or 21 to 23, or 'C'."
+HE_SIZE_TYPE_MSG = "HIGH EXPLOSIVE BOMBS SIZE should be a number between 1 and 16, or 21 to 23, or 'C'."
+HE_NOSE_REQUIRED_MSG = "HIGH EXPLOSIVE BOMBS FUZING NOSE is required. Should be one of 1, 2, 3, 4, 5, 6, or 9."
+HE_NOSE_RANGE_MSG = "HIGH EXPLOSIVE BOMBS FUZING NOSE should be one of 1, 2, 3, 4, 5, 6, or 9."
+HE_NOSE_TYPE_MSG = "HIGH EXPLOSIVE BOMBS FUZING NOSE should be an integer: 1, 2, 3, 4, 5, 6, or 9."
+HE_TAIL_REQUIRED_MSG = "HIGH EXPLOSIVE BOMBS FUZING TAIL is required. Should be one of 1-16, 91, or 92."
+HE_TAIL_RANGE_MSG = "HIGH EXPLOSIVE BOMBS FUZING TAIL should be one of 1-16, 91, or 92."
+HE_TAIL_TYPE_MSG = "HIGH EXPLOSIVE BOMBS FUZING TAIL should be an integer: 1-16, 91, or 92."
+INCENDIARY_NUMBER_REQUIRED_MSG = "INCENDIARY BOMBS NUMBER is required. Should be a number between 1 and 999."
+INCENDIARY_NUMBER_RANGE_MSG = "INCENDIARY BOMBS NUMBER should be between 1 and 999."
+INCENDIARY_NUMBER_TYPE_MSG = "INCENDIARY BOMBS NUMBER should be an integer with a value between 1 and 999."
+INCENDIARY_SIZE_REQUIRED_MSG = "INCENDIARY BOMBS SIZE is required. Should be a number between 1-13, 21-25, or 31-37."
+INCENDIARY_SIZE_RANGE_MSG = "INCENDIARY BOMBS SIZE should be between 1-13, 21-25, or 31-37."
+INCENDIARY_SIZE_TYPE_MSG = "INCENDIARY BOMBS SIZE should be a number between 1-13, 21-25, or 31-37."
+FRAG_NUMBER_REQUIRED_MSG = "FRAGMENTATION BOMBS NUMBER is required. Should be a number between 1 and 999."
+FRAG_NUMBER_RANGE_MSG = "FRAGMENTATION BOMBS NUMBER should be between 1 and 999."
+FRAG_NUMBER_TYPE_MSG = "FRAGMENTATION BOMBS NUMBER should be an integer with a value between 1 and 999."
+FRAG_SIZE_REQUIRED_MSG = "FRAGMENTATION BOMBS SIZE is required. Should be a number between 1-11 or 41."
+FRAG_SIZE_RANGE_MSG = "FRAGMENTATION BOMBS SIZE should be between 1-11 or 41."
+FRAG_SIZE_TYPE_MSG = "FRAGMENTATION BOMBS SIZE should be a number between 1-11 or 41."
+TONNAGE_TYPE_MSG = "Tonnage values should be numbers."
+TONNAGE_SUM_MSG = "Individual tonnages do not sum up to TOTAL TONS."
+
 def check_DAY(value, is_required):
     # Expected: Single day (1-31) or a range (e.g., 15-16)
     if pd.isna(value):
-        return not is_required, "DAY is required. should be a number between 1 and 31 or a range (e.g., 15-16)." if is_required else (True, None)
+        return not is_required, DAY_REQUIRED_MSG if is_required else (True, None)
     value = str(value).strip()
     if value.isdigit():
         day = int(float(value))
         if 1 <= day <= 31:
             return True, None
         else:
-            return False, "DAY should be between 1 and 31."
+            return False, DAY_RANGE_MSG
     elif re.match(r'^\d{1,2}-\d{1,2}$', value):
         start_day, end_day = map(int, value.split('-'))
         if 1 <= start_day <= 31 and 1 <= end_day <= 31 and start_day <= end_day:
             return True, None
         else:
-            return False, "DAY range should be between 1 and 31 and start <= end."
+            return False, DAY_SPAN_MSG
     else:
-        return False, "Invalid DAY format. Expected single day (1-31) or a range (e.g., 15-16)."
+        return False, DAY_FORMAT_MSG
 
 def check_MONTH(value, is_required):
     # Expected: Number from 1 to 12
     if pd.isna(value):
-        return not is_required, "MONTH is required. Should be a number between 1 and 12." if is_required else (True, None)
+        return not is_required, MONTH_REQUIRED_MSG if is_required else (True, None)
     try:
         month = int(float(value))
         if 1 <= month <= 12:
             return True, None
         else:
-            return False, "MONTH should be between 1 and 12."
+            return False, MONTH_RANGE_MSG
     except ValueError:
-        return False, "MONTH should be an integer with a value between 1 and 12."
+        return False, MONTH_TYPE_MSG
 
 def check_YEAR(value, is_required):
     # Expected: Single digit (0-5) representing 1940-1945
     if pd.isna(value):
-        return not is_required, "YEAR is required. Should be a single digit (0-5) representing 1940-1945." if is_required else (True, None)
+        return not is_required, YEAR_REQUIRED_MSG if is_required else (True, None)
     try:
         year = int(float(value))
         if 0 <= year <= 5:
             return True, None
         else:
-            return False, "YEAR should be between 0 and 5."
+            return False, YEAR_RANGE_MSG
     except ValueError:
-        return False, "YEAR should be a single digit integer between 0 and 5."
+        return False, YEAR_TYPE_MSG
 
 def check_TIME_OF_ATTACK(value, is_required):
     # Expected: 24-hour time format (e.g., 1434)
     if pd.isna(value):
-        return not is_required, "TIME OF ATTACK is required. Should be a 4 digit number representing the time in 24-hour format (e.g., 1434)." if is_required else (True, None)
+        return not is_required, TIME_REQUIRED_MSG if is_required else (True, None)
     value = str(value).strip()
     if re.match(r'^\d{4}$', value):
         hour = int(value[:2])
@@ -76,9 +132,9 @@ def check_TIME_OF_ATTACK(value, is_required):
         if 0 <= hour <= 23 and 0 <= minute <= 59:
             return True, None
         else:
-            return False, "TIME OF ATTACK should be in 24-hour format HHMM."
+            return False, TIME_RANGE_MSG
     else:
-        return False, "Invalid TIME OF ATTACK format. Expected HHMM."
+        return False, TIME_FORMAT_MSG
 
 def check_AIR_FORCE(value, *args):
     # Expected: 8, 9, 12, 15 for US Air Forces, or R for Royal Air Force
@@ -87,107 +143,107 @@ def check_AIR_FORCE(value, *args):
     if pd.isna(value):
         if is_required:
             if is_RAF:
-                return False, "AIR FORCE is required. Could be 8, 9, 12, 15, or R. Potentially is R."
+                return False, AIR_FORCE_REQUIRED_RAF_MSG
             else:
-                return False, "AIR FORCE is required. Should be 8, 9, 12, or 15. Potentially is 8."
+                return False, AIR_FORCE_REQUIRED_MSG
         else:
             return True, None
     valid_values = {'8', '9', '12', '15', 'R'}
     if str(value).strip() in valid_values:
         return True, None
     else:
-        return False, "AIR FORCE code should be one of 8, 9, 12, 15, or R."
+        return False, AIR_FORCE_VALUE_MSG
 
 def check_GROUP_SQUADRON_NUMBER(value, is_required):
     # Expected: IDs like 305G, 305AG, 305BG, 305CG, 95G, 99G, etc.
     if pd.isna(value):
-        return not is_required, "GROUP/SQUADRON NUMBER is required. Should be 2 to 4 numbers followed by an optional A, B, or C, and then G or S (e.g., 305CG, 99G, 305S)." if is_required else (True, None)
+        return not is_required, GROUP_SQUADRON_REQUIRED_MSG if is_required else (True, None)
     value = str(value).strip()
     if re.match(r'^\d{2,4}([ABC]?[GS])$', value):
         return True, None
     else:
-        return False, "GROUP/SQUADRON NUMBER should be 2 to 4 numbers followed by an optional A, B, or C, and then G or S (e.g., 305CG, 99G, 305S)."
+        return False, GROUP_SQUADRON_FORMAT_MSG
 
 def check_NUMBER_OF_AIRCRAFT_BOMBING(value, is_required):
     # Expected: Number from 1 to hundreds
     if pd.isna(value):    
-        return not is_required, "NUMBER OF AIRCRAFT BOMBING is required. Should be a number between 1 and 999." if is_required else (True, None)
+        return not is_required, AIRCRAFT_REQUIRED_MSG if is_required else (True, None)
     try:
         num = int(float(value))
         if 1 <= num <= 999:
             return True, None
         else:
-            return False, "NUMBER OF AIRCRAFT BOMBING should be between 1 and 999."
+            return False, AIRCRAFT_RANGE_MSG
     except ValueError:
-        return False, "NUMBER OF AIRCRAFT BOMBING should be an integer with a value between 1 and 999."
+        return False, AIRCRAFT_TYPE_MSG
 
 def check_ALTITUDE_OF_RELEASE(value, is_required):
     # expected a number between 50 and 600
     if pd.isna(value):
-        return not is_required, "ALTITUDE OF RELEASE IN HUND. FT. is required. Should be a number between 50 and 600." if is_required else (True, None)
+        return not is_required, ALTITUDE_REQUIRED_MSG if is_required else (True, None)
     try:
         num = int(float(value))
         if 50 <= num <= 600:
             return True, None
         else:
-            return False, "ALTITUDE OF RELEASE IN HUND. FT. should be between 50 and 600."
+            return False, ALTITUDE_RANGE_MSG
     except ValueError:
-        return False, "ALTITUDE OF RELEASE IN HUND. FT. should be an integer with a value between 50 and 600."
+        return False, ALTITUDE_TYPE_MSG
 
 def check_SIGHTING(value, is_required):
     # expected a number between 1 and 13 or a letter R, L, D, S, or G
     if pd.isna(value):
-        return not is_required, "SIGHTING is required. Should be a number between 1 and 13 or a letter R, L, D, S, or G." if is_required else (True, None)
+        return not is_required, SIGHTING_REQUIRED_MSG if is_required else (True, None)
     value = str(value).strip()
     if re.match(r'^\d+(\.\d+)?$', value):
         num = int(float(value))
         if 1 <= num <= 13:
             return True, None
         else:
-            return False, "SIGHTING should be between 1 and 13."
+            return False, SIGHTING_RANGE_MSG
     elif value in {'R', 'L', 'D', 'S', 'G'}:
         return True, None
     else:
-        return False, "SIGHTING should be a number between 1 and 13 or a letter R, L, D, S, or G."
+        return False, SIGHTING_TYPE_MSG
 
 def check_VISIBILITY_OF_TARGET(value, is_required):
     # expected a letter, G, C, P, or N
     if pd.isna(value):
-        return not is_required, "VISIBILITY OF TARGET is required. Should be a letter G, C, P, or N." if is_required else (True, None)
+        return not is_required, VISIBILITY_REQUIRED_MSG if is_required else (True, None)
     value = str(value).strip()
     if value in {'G', 'C', 'P', 'N'}:
         return True, None
     else:
-        return False, "VISIBILITY OF TARGET should be a letter G, C, P, or N."
+        return False, VISIBILITY_VALUE_MSG
 
 def check_TARGET_PRIORITY(value, is_required):
     # expected a value between 1 and 4
     if pd.isna(value):
-        return not is_required, "TARGET PRIORITY is required. Should be a number between 1 and 4." if is_required else (True, None)
+        return not is_required, PRIORITY_REQUIRED_MSG if is_required else (True, None)
     try:
         num = int(float(value))
         if 1 <= num <= 4:
             return True, None
         else:
-            return False, "TARGET PRIORITY should be between 1 and 4."
+            return False, PRIORITY_RANGE_MSG
     except ValueError:
-        return False, "TARGET PRIORITY should be an integer with a value between 1 and 4."
+        return False, PRIORITY_TYPE_MSG
 
 def check_HIGH_EXPLOSIVE_BOMBS_NUMBER(value, is_required):
     if pd.isna(value):
-        return not is_required, "HIGH EXPLOSIVE BOMBS NUMBER is required. Should be a number between 1 and 999." if is_required else (True, None)
+        return not is_required, HE_NUMBER_REQUIRED_MSG if is_required else (True, None)
     try:
         num = int(float(value))
         if 1 <= num <= 999:
             return True, None
         else:
-            return False, "HIGH EXPLOSIVE BOMBS NUMBER should be between 1 and 999."
+            return False, HE_NUMBER_RANGE_MSG
     except ValueError:
-        return False, "HIGH EXPLOSIVE BOMBS NUMBER should be an integer with a value between 1 and 999."
+        return False, HE_NUMBER_TYPE_MSG
 
 def check_HIGH_EXPLOSIVE_BOMBS_SIZE(value, is_required):
     if pd.isna(value):
-        return not is_required, "HIGH EXPLOSIVE BOMBS SIZE is required. Should be a number between 1 and 16, or 21 to 23, or 'C'." if is_required else (True, None)
+        return not is_required, HE_SIZE_REQUIRED_MSG if is_required else (True, None)
     if value == 'C':
         return True, None
     try:
@@ -195,83 +251,83 @@ def check_HIGH_EXPLOSIVE_BOMBS_SIZE(value, is_required):
         if 1 <= num <= 16 or 21 <= num <= 23:
             return True, None
         else:
-            return False, "HIGH EXPLOSIVE BOMBS SIZE should be between 1 and 16, or 21 to 23, or 'C'."
+            return False, HE_SIZE_RANGE_MSG
     except ValueError:
-        return False, "HIGH EXPLOSIVE BOMBS SIZE should be a number between 1 and 16, or 21 to 23, or 'C'."
+        return False, HE_SIZE_TYPE_MSG
 
 def check_HIGH_EXPLOSIVE_BOMBS_FUZING_NOSE(value, is_required):
     if pd.isna(value):
-        return not is_required, "HIGH EXPLOSIVE BOMBS FUZING NOSE is required. Should be one of 1, 2, 3, 4, 5, 6, or 9." if is_required else (True, None)
+        return not is_required, HE_NOSE_REQUIRED_MSG if is_required else (True, None)
     valid_values = {1, 2, 3, 4, 5, 6, 9}
     try:
         num = int(float(value))
         if num in valid_values:
             return True, None
         else:
-            return False, "HIGH EXPLOSIVE BOMBS FUZING NOSE should be one of 1, 2, 3, 4, 5, 6, or 9."
+            return False, HE_NOSE_RANGE_MSG
     except ValueError:
-        return False, "HIGH EXPLOSIVE BOMBS FUZING NOSE should be an integer: 1, 2, 3, 4, 5, 6, or 9."
+        return False, HE_NOSE_TYPE_MSG
 
 def check_HIGH_EXPLOSIVE_BOMBS_FUZING_TAIL(value, is_required):
     if pd.isna(value):
-        return not is_required, "HIGH EXPLOSIVE BOMBS FUZING TAIL is required. Should be one of 1-16, 91, or 92." if is_required else (True, None)
+        return not is_required, HE_TAIL_REQUIRED_MSG if is_required else (True, None)
     valid_values = {1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 91, 92}
     try:
         num = int(float(value))
         if num in valid_values:
             return True, None
         else:
-            return False, "HIGH EXPLOSIVE BOMBS FUZING TAIL should be one of 1-16, 91, or 92."
+            return False, HE_TAIL_RANGE_MSG
     except ValueError:
-        return False, "HIGH EXPLOSIVE BOMBS FUZING TAIL should be an integer: 1-16, 91, or 92."
+        return False, HE_TAIL_TYPE_MSG
 
 def check_INCENDIARY_BOMBS_NUMBER(value, is_required):
     if pd.isna(value):
-        return not is_required, "INCENDIARY BOMBS NUMBER is required. Should be a number between 1 and 999." if is_required else (True, None)
+        return not is_required, INCENDIARY_NUMBER_REQUIRED_MSG if is_required else (True, None)
     try:
         num = int(float(value))
         if 1 <= num <= 999:
             return True, None
         else:
-            return False, "INCENDIARY BOMBS NUMBER should be between 1 and 999."
+            return False, INCENDIARY_NUMBER_RANGE_MSG
     except ValueError:
-        return False, "INCENDIARY BOMBS NUMBER should be an integer with a value between 1 and 999."
+        return False, INCENDIARY_NUMBER_TYPE_MSG
 
 def check_INCENDIARY_BOMBS_SIZE(value, is_required):
     if pd.isna(value):
-        return not is_required, "INCENDIARY BOMBS SIZE is required. Should be a number between 1-13, 21-25, or 31-37." if is_required else (True, None)
+        return not is_required, INCENDIARY_SIZE_REQUIRED_MSG if is_required else (True, None)
     try:
         num = int(float(value))
         if 1 <= num <= 13 or 21 <= num <= 25 or 31 <= num <= 37:
             return True, None
         else:
-            return False, "INCENDIARY BOMBS SIZE should be between 1-13, 21-25, or 31-37."
+            return False, INCENDIARY_SIZE_RANGE_MSG
     except ValueError:
-        return False, "INCENDIARY BOMBS SIZE should be a number between 1-13, 21-25, or 31-37."
+        return False, INCENDIARY_SIZE_TYPE_MSG
 
 def check_FRAGMENTATION_BOMBS_NUMBER(value, is_required):
     if pd.isna(value):
-        return not is_required, "FRAGMENTATION BOMBS NUMBER is required. Should be a number between 1 and 999." if is_required else (True, None)
+        return not is_required, FRAG_NUMBER_REQUIRED_MSG if is_required else (True, None)
     try:
         num = int(float(value))
         if 1 <= num <= 999:
             return True, None
         else:
-            return False, "FRAGMENTATION BOMBS NUMBER should be between 1 and 999."
+            return False, FRAG_NUMBER_RANGE_MSG
     except ValueError:
-        return False, "FRAGMENTATION BOMBS NUMBER should be an integer with a value between 1 and 999."
+        return False, FRAG_NUMBER_TYPE_MSG
 
 def check_FRAGMENTATION_BOMBS_SIZE(value, is_required):
     if pd.isna(value):
-        return not is_required, "FRAGMENTATION BOMBS SIZE is required. Should be a number between 1-11 or 41." if is_required else (True, None)
+        return not is_required, FRAG_SIZE_REQUIRED_MSG if is_required else (True, None)
     try:
         num = int(float(value))
         if 1 <= num <= 11 or num == 41:
             return True, None
         else:
-            return False, "FRAGMENTATION BOMBS SIZE should be between 1-11 or 41."
+            return False, FRAG_SIZE_RANGE_MSG
     except ValueError:
-        return False, "FRAGMENTATION BOMBS SIZE should be a number between 1-11 or 41."
+        return False, FRAG_SIZE_TYPE_MSG
 
 def check_TONNAGE(row):
     logging.debug(f"Checking TONNAGE for row {row}")
@@ -282,7 +338,7 @@ def check_TONNAGE(row):
         frag_tons = int(float(row['FRAGMENTATION BOMBS TONS']))
         total_tons = int(float(row['TOTAL TONS']))
     except ValueError:
-        return False, "Tonnage values should be numbers."
+        return False, TONNAGE_TYPE_MSG
 
     # check if TOTAL TONS is na
     if pd.isna(total_tons):
@@ -298,7 +354,7 @@ def check_TONNAGE(row):
     calculated_total = he_tons + incendiary_tons + frag_tons
 
     if calculated_total != total_tons or pd.isna(calculated_total):
-        return False, "Individual tonnages do not sum up to TOTAL TONS."
+        return False, TONNAGE_SUM_MSG
     else:
         logging.debug(f"Row {row}: TONNAGE is valid.")
         return True, None
@@ -369,7 +425,12 @@ def check_summation_row(df, row_idx):
     return is_sum_row    
 
 
-def send_to_ai(prompt, attributes, max_retries=3, model="gpt-4o-mini"):
+def send_to_ai(prompt, attributes, max_retries=3, model="gpt-4o-mini", partial=False):
+    """Ask for corrected values of `attributes`; the parsed JSON, or None after max_retries.
+
+    With partial=True a response holding only some of the attributes is
+    returned as those values instead of being retried.
+    """
     for attempt in range(max_retries):
         try:            
             # Append instructions for JSON format
@@ -382,8 +443,10 @@ def send_to_ai(prompt, attributes, max_retries=3, model="gpt-4o-mini"):
             
             logging.debug(f"Attempt {attempt + 1}: Sending prompt to AI:\n{full_prompt}")
 
-            # Make the API call
-            response = client.chat.completions.create(
+            # Make the API call (served from the response cache when this attempt was seen before)
+            full_response = cached_chat(
+                client,
+                variant=attempt,
                 model=model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that corrects data entry errors in the US Strategic Bombing Survey."},
@@ -394,7 +457,7 @@ def send_to_ai(prompt, attributes, max_retries=3, model="gpt-4o-mini"):
             )
             
             # Extract the JSON part from the response
-            full_response = response.choices[0].message.content.strip()
+            full_response = full_response.strip()
             logging.debug(f"Received full response from AI:\n{full_response}")
 
             # Use regex to find the JSON part
@@ -413,10 +476,15 @@ def send_to_ai(prompt, attributes, max_retries=3, model="gpt-4o-mini"):
             if all(attr in result for attr in attributes):
                 logging.debug(f"Successfully received all expected attributes: {result}")
                 return result
+            elif partial and any(attr in result for attr in attributes):
+                logging.warning(f"Attempt {attempt + 1}: JSON response contains only some of the expected attributes.")
+                return {attr: result[attr] for attr in attributes if attr in result}
             else:
                 logging.warning(f"Attempt {attempt + 1}: JSON response does not contain all expected attributes. Retrying...")
         except json.JSONDecodeError:
             logging.error(f"Attempt {attempt + 1}: Failed to parse JSON. Retrying...")
+        except CacheMissError:
+            raise
         except Exception as e:
             logging.error(f"Attempt {attempt + 1}: An error occurred: {str(e)}. Retrying...")
     
@@ -519,13 +587,437 @@ def add_additional_context(prompt, row, prev_row, col):
     logging.debug(f"Final prompt: {prompt}")
     return prompt
 
-def split_csv_cells(input_csv):
-    number_of_gpt_requests_made = 0
+# Define check functions for each column
+CHECK_FUNCTIONS = {
+    'DAY': check_DAY,
+    'MONTH': check_MONTH,
+    'YEAR': check_YEAR,
+    'TIME OF ATTACK': check_TIME_OF_ATTACK,
+    'AIR FORCE': check_AIR_FORCE,
+    'GROUP/SQUADRON NUMBER': check_GROUP_SQUADRON_NUMBER,
+    'NUMBER OF AIRCRAFT BOMBING': check_NUMBER_OF_AIRCRAFT_BOMBING,
+    'ALTITUDE OF RELEASE IN HUND. FT.': check_ALTITUDE_OF_RELEASE,
+    'SIGHTING': check_SIGHTING,
+    'VISIBILITY OF TARGET': check_VISIBILITY_OF_TARGET,
+    'TARGET PRIORITY': check_TARGET_PRIORITY,
+    'HIGH EXPLOSIVE BOMBS NUMBER': check_HIGH_EXPLOSIVE_BOMBS_NUMBER,
+    'HIGH EXPLOSIVE BOMBS SIZE': check_HIGH_EXPLOSIVE_BOMBS_SIZE,
+    'HIGH EXPLOSIVE BOMBS FUZING NOSE': check_HIGH_EXPLOSIVE_BOMBS_FUZING_NOSE,
+    'HIGH EXPLOSIVE BOMBS FUZING TAIL': check_HIGH_EXPLOSIVE_BOMBS_FUZING_TAIL,
+    'INCENDIARY BOMBS NUMBER': check_INCENDIARY_BOMBS_NUMBER,
+    'INCENDIARY BOMBS SIZE': check_INCENDIARY_BOMBS_SIZE,
+    'FRAGMENTATION BOMBS NUMBER': check_FRAGMENTATION_BOMBS_NUMBER,
+    'FRAGMENTATION BOMBS SIZE': check_FRAGMENTATION_BOMBS_SIZE,
+}
+
+# Day, Month, Year, Time of Attack, Air Force, Number of Aircraft Bombing, Altitude of release,
+# group squadron number, sighting, visibility of target, target priority are always required
+REQUIRED_COLS = ['DAY', 'MONTH', 'YEAR', 'AIR FORCE', 'NUMBER OF AIRCRAFT BOMBING', 'TIME OF ATTACK',
+                 'ALTITUDE OF RELEASE IN HUND. FT.', 'GROUP/SQUADRON NUMBER', 'SIGHTING',
+                 'VISIBILITY OF TARGET', 'TARGET PRIORITY']
+# Bomb columns are only required when any column of the same bomb type has a value
+HE_COLS = ['HIGH EXPLOSIVE BOMBS NUMBER', 'HIGH EXPLOSIVE BOMBS SIZE', 'HIGH EXPLOSIVE BOMBS TONS', 'HIGH EXPLOSIVE BOMBS FUZING NOSE', 'HIGH EXPLOSIVE BOMBS FUZING TAIL']
+INCENDIARY_COLS = ['INCENDIARY BOMBS NUMBER', 'INCENDIARY BOMBS SIZE', 'INCENDIARY BOMBS TONS']
+FRAG_COLS = ['FRAGMENTATION BOMBS NUMBER', 'FRAGMENTATION BOMBS SIZE', 'FRAGMENTATION BOMBS TONS']
+
+# Number of invalid cells sent per correction request (None sends the whole page at once)
+BATCH_SIZE = 25
+
+def is_column_required(row, col):
+    if col in HE_COLS:
+        return has_valid_value(row, HE_COLS)
+    if col in INCENDIARY_COLS:
+        return has_valid_value(row, INCENDIARY_COLS)
+    if col in FRAG_COLS:
+        return has_valid_value(row, FRAG_COLS)
+    return col in REQUIRED_COLS
+
+# Vectorized validation engine. Each rule evaluates a whole column at once and
+# returns an error code per cell: 0 is valid, 1 is a missing required value and
+# higher codes index into the column's message list. The messages are the
+# *_MSG constants the matching check_* function returns, so prompts are unchanged.
+AIR_FORCE_CHANGED_MSG = "Air Force value has changed while the date remains the same. This is unusual and should be verified."
+
+def _as_str(values):
+    return np.char.strip(values.astype(str))
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
 
-    # Read the input CSV file
-    df = pd.read_csv(input_csv)    
+def _as_int(values):
+    # int(float(value)) for every cell, NaN where the conversion would fail
+    try:
+        num = values.astype(float)
+    except ValueError:
+        num = np.array([_to_float(value) for value in values], dtype=float)
+    return np.trunc(num)
+
+DAY_RANGE_PATTERN = re.compile(r'(\d{1,2})-(\d{1,2})')
+TIME_PATTERN = re.compile(r'\d{4}')
+GROUP_SQUADRON_PATTERN = re.compile(r'\d{2,4}[ABC]?[GS]')
+SIGHTING_NUMBER_PATTERN = re.compile(r'\d+(\.\d+)?')
+
+def _fullmatch(strings, pattern):
+    return np.fromiter((pattern.fullmatch(value) is not None for value in strings), dtype=bool, count=len(strings))
+
+def _in_ranges(num, ranges):
+    valid = np.zeros(len(num), dtype=bool)
+    for low, high in ranges:
+        valid |= (num >= low) & (num <= high)
+    return valid
+
+def _int_rule(ranges, range_msg, type_msg):
+    def rule(values):
+        num = _as_int(values)
+        is_number = ~np.isnan(num)
+        return [(is_number & ~_in_ranges(num, ranges), range_msg), (~is_number, type_msg)]
+    return rule
+
+def _rule_DAY(values):
+    strings = _as_str(values)
+    is_digit = np.char.isdigit(strings)
+    day = _as_int(np.where(is_digit, strings, ''))
+    is_range = ~is_digit & _fullmatch(strings, DAY_RANGE_PATTERN)
+    bounds = np.char.partition(np.where(is_range, strings, '0-0'), '-')
+    start, end = bounds[:, 0].astype(float), bounds[:, 2].astype(float)
+    range_ok = _in_ranges(start, [(1, 31)]) & _in_ranges(end, [(1, 31)]) & (start <= end)
+    return [
+        (is_digit & ~_in_ranges(day, [(1, 31)]), DAY_RANGE_MSG),
+        (is_range & ~range_ok, DAY_SPAN_MSG),
+        (~is_digit & ~is_range, DAY_FORMAT_MSG),
+    ]
+
+def _rule_TIME_OF_ATTACK(values):
+    strings = _as_str(values)
+    is_hhmm = _fullmatch(strings, TIME_PATTERN)
+    hhmm = _as_int(np.where(is_hhmm, strings, ''))
+    valid_time = _in_ranges(hhmm // 100, [(0, 23)]) & _in_ranges(hhmm % 100, [(0, 59)])
+    return [
+        (is_hhmm & ~valid_time, TIME_RANGE_MSG),
+        (~is_hhmm, TIME_FORMAT_MSG),
+    ]
+
+def _rule_AIR_FORCE(values):
+    return [(~np.isin(_as_str(values), ['8', '9', '12', '15', 'R']), AIR_FORCE_VALUE_MSG)]
+
+def _rule_GROUP_SQUADRON_NUMBER(values):
+    return [(~_fullmatch(_as_str(values), GROUP_SQUADRON_PATTERN),
+             GROUP_SQUADRON_FORMAT_MSG)]
+
+def _rule_SIGHTING(values):
+    strings = _as_str(values)
+    is_number = _fullmatch(strings, SIGHTING_NUMBER_PATTERN)
+    num = _as_int(np.where(is_number, strings, ''))
+    return [
+        (is_number & ~_in_ranges(num, [(1, 13)]), SIGHTING_RANGE_MSG),
+        (~is_number & ~np.isin(strings, ['R', 'L', 'D', 'S', 'G']), SIGHTING_TYPE_MSG),
+    ]
+
+def _rule_VISIBILITY_OF_TARGET(values):
+    return [(~np.isin(_as_str(values), ['G', 'C', 'P', 'N']), VISIBILITY_VALUE_MSG)]
+
+def _rule_HIGH_EXPLOSIVE_BOMBS_SIZE(values):
+    num = _as_int(values)
+    is_number = ~np.isnan(num)
+    not_c = values != 'C'
+    return [
+        (not_c & is_number & ~_in_ranges(num, [(1, 16), (21, 23)]), HE_SIZE_RANGE_MSG),
+        (not_c & ~is_number, HE_SIZE_TYPE_MSG),
+    ]
+# column -> (message for a missing required value, rule)
+VECTOR_RULES = {
+    'DAY': (DAY_REQUIRED_MSG, _rule_DAY),
+    'MONTH': (MONTH_REQUIRED_MSG,
+              _int_rule([(1, 12)], MONTH_RANGE_MSG, MONTH_TYPE_MSG)),
+    'YEAR': (YEAR_REQUIRED_MSG,
+             _int_rule([(0, 5)], YEAR_RANGE_MSG, YEAR_TYPE_MSG)),
+    'TIME OF ATTACK': (TIME_REQUIRED_MSG, _rule_TIME_OF_ATTACK),
+    'AIR FORCE': (AIR_FORCE_REQUIRED_MSG, _rule_AIR_FORCE),
+    'GROUP/SQUADRON NUMBER': (GROUP_SQUADRON_REQUIRED_MSG, _rule_GROUP_SQUADRON_NUMBER),
+    'NUMBER OF AIRCRAFT BOMBING': (AIRCRAFT_REQUIRED_MSG,
+                                   _int_rule([(1, 999)], AIRCRAFT_RANGE_MSG, AIRCRAFT_TYPE_MSG)),
+    'ALTITUDE OF RELEASE IN HUND. FT.': (ALTITUDE_REQUIRED_MSG,
+                                         _int_rule([(50, 600)], ALTITUDE_RANGE_MSG, ALTITUDE_TYPE_MSG)),
+    'SIGHTING': (SIGHTING_REQUIRED_MSG, _rule_SIGHTING),
+    'VISIBILITY OF TARGET': (VISIBILITY_REQUIRED_MSG, _rule_VISIBILITY_OF_TARGET),
+    'TARGET PRIORITY': (PRIORITY_REQUIRED_MSG,
+                        _int_rule([(1, 4)], PRIORITY_RANGE_MSG, PRIORITY_TYPE_MSG)),
+    'HIGH EXPLOSIVE BOMBS NUMBER': (HE_NUMBER_REQUIRED_MSG,
+                                    _int_rule([(1, 999)], HE_NUMBER_RANGE_MSG, HE_NUMBER_TYPE_MSG)),
+    'HIGH EXPLOSIVE BOMBS SIZE': (HE_SIZE_REQUIRED_MSG, _rule_HIGH_EXPLOSIVE_BOMBS_SIZE),
+    'HIGH EXPLOSIVE BOMBS FUZING NOSE': (HE_NOSE_REQUIRED_MSG,
+                                         _int_rule([(1, 6), (9, 9)], HE_NOSE_RANGE_MSG, HE_NOSE_TYPE_MSG)),
+    'HIGH EXPLOSIVE BOMBS FUZING TAIL': (HE_TAIL_REQUIRED_MSG,
+                                         _int_rule([(1, 16), (91, 92)], HE_TAIL_RANGE_MSG, HE_TAIL_TYPE_MSG)),
+    'INCENDIARY BOMBS NUMBER': (INCENDIARY_NUMBER_REQUIRED_MSG,
+                                _int_rule([(1, 999)], INCENDIARY_NUMBER_RANGE_MSG, INCENDIARY_NUMBER_TYPE_MSG)),
+    'INCENDIARY BOMBS SIZE': (INCENDIARY_SIZE_REQUIRED_MSG,
+                              _int_rule([(1, 13), (21, 25), (31, 37)], INCENDIARY_SIZE_RANGE_MSG, INCENDIARY_SIZE_TYPE_MSG)),
+    'FRAGMENTATION BOMBS NUMBER': (FRAG_NUMBER_REQUIRED_MSG,
+                                   _int_rule([(1, 999)], FRAG_NUMBER_RANGE_MSG, FRAG_NUMBER_TYPE_MSG)),
+    'FRAGMENTATION BOMBS SIZE': (FRAG_SIZE_REQUIRED_MSG,
+                                 _int_rule([(1, 11), (41, 41)], FRAG_SIZE_RANGE_MSG, FRAG_SIZE_TYPE_MSG)),
+}
+
+def _column_arrays(df):
+    # One conversion up front; per-column DataFrame lookups dominate on small pages
+    return dict(zip(df.columns, df.to_numpy(dtype=object).T))
+
+def _has_value(arrays, cols):
+    values = np.stack([arrays[col] for col in cols], axis=1)
+    return (~pd.isna(values) & (values != "")).any(axis=1)
+
+def required_mask(arrays, length):
+    """Whether each checked cell is required, following is_column_required."""
+    required = {col: np.full(length, col in REQUIRED_COLS) for col in CHECK_FUNCTIONS}
+    for cols in (HE_COLS, INCENDIARY_COLS, FRAG_COLS):
+        has_value = _has_value(arrays, cols)
+        for col in cols:
+            if col in required:
+                required[col] = has_value
+    return required
+
+def validate_table(df, pages=None):
+    """Run every column rule over the whole table in one pass.
+
+    `pages` optionally labels the page of each row so that several pages can be
+    validated together without comparing rows across page boundaries.
+
+    Returns (error_mask, error_codes, error_messages): two DataFrames shaped like
+    the checked columns, and a dict mapping each column to its list of messages
+    indexed by error code. Summation rows are never flagged.
+    """
+    arrays = _column_arrays(df)
+    required = required_mask(arrays, len(df))
+    checked = ~arrays['SUMMATION_ROW'].astype(bool)
+    codes = {}
+    error_messages = {}
+    for col, (required_msg, rule) in VECTOR_RULES.items():
+        values = arrays[col]
+        is_na = pd.isna(values)
+        conditions = [is_na & required[col]]
+        messages = [None, required_msg]
+        for condition, message in rule(values):
+            conditions.append(~is_na & condition)
+            messages.append(message)
+        if col == 'AIR FORCE':
+            # A valid Air Force that changes while the date stays the same is suspicious
+            changed = np.zeros(len(df), dtype=bool)
+            same = np.ones(len(df) - 1, dtype=bool) if len(df) else np.zeros(0, dtype=bool)
+            for date_col in ('DAY', 'MONTH', 'YEAR'):
+                date_values = arrays[date_col]
+                same &= date_values[1:] == date_values[:-1]
+            if pages is not None:
+                pages = np.asarray(pages)
+                same &= pages[1:] == pages[:-1]
+            changed[1:] = same & (values[1:] != values[:-1])
+            conditions.append(changed)
+            messages.append(AIR_FORCE_CHANGED_MSG)
+        codes[col] = np.select(conditions, np.arange(1, len(conditions) + 1), 0).astype(np.int8) * checked
+        error_messages[col] = messages
+    error_codes = pd.DataFrame(codes, index=df.index)
+    return error_codes > 0, error_codes, error_messages
+
+TONNAGE_MESSAGES = [None, TONNAGE_TYPE_MSG, TONNAGE_SUM_MSG]
+
+def validate_tonnage(df):
+    """Vectorized check_TONNAGE: an error code per row indexing TONNAGE_MESSAGES."""
+    arrays = _column_arrays(df)
+    he, incendiary, frag, total = (_as_int(arrays[col]) for col in
+                                   ['HIGH EXPLOSIVE BOMBS TONS', 'INCENDIARY BOMBS TONS', 'FRAGMENTATION BOMBS TONS', 'TOTAL TONS'])
+    calculated_total = he + incendiary + frag
+    not_numbers = np.isnan(calculated_total) | np.isnan(total)
+    mismatch = ~not_numbers & (calculated_total != total)
+    codes = np.select([not_numbers, mismatch], [1, 2], 0)
+    return codes * ~arrays['SUMMATION_ROW'].astype(bool)
+
+def build_context_index(df):
+    """Per-column sorted positions of valid, non-empty, non-summation values.
+
+    Built once per table so that get_indexed_context_values can find the
+    nearest valid neighbours of a cell with bisect instead of rescanning and
+    re-validating the whole column for every invalid cell.
+    """
+    arrays = _column_arrays(df)
+    not_summation = ~arrays['SUMMATION_ROW'].astype(bool)
+    context_index = {}
+    for col, (_, rule) in VECTOR_RULES.items():
+        values = arrays[col]
+        usable = ~pd.isna(values) & (values != "") & not_summation
+        for condition, _ in rule(values):
+            usable &= ~condition
+        positions = np.flatnonzero(usable).tolist()
+        all_values = df[col].tolist()
+        context_index[col] = (positions, [all_values[i] for i in positions])
+    return context_index
+
+def get_indexed_context_values(context_index, col, row_idx, n=4):
+    """Same result as get_context_values, answered from a prebuilt context index."""
+    positions, values = context_index[col]
+    before = bisect.bisect_left(positions, row_idx) - 1
+    after = bisect.bisect_right(positions, row_idx)
+
+    # Walk outwards from the current row, preferring the previous row on ties
+    previous_values = []
+    subsequent_values = []
+    while len(previous_values) + len(subsequent_values) < n:
+        has_previous = before >= 0
+        has_subsequent = after < len(positions)
+        if not has_previous and not has_subsequent:
+            break
+        if has_previous and (not has_subsequent or row_idx - positions[before] <= positions[after] - row_idx):
+            previous_values.append((positions[before] - row_idx, values[before]))
+            before -= 1
+        else:
+            subsequent_values.append((positions[after] - row_idx, values[after]))
+            after += 1
+
+    # Previous values are listed furthest first, as in get_context_values
+    previous_values.reverse()
+
+    return {
+        "previous": previous_values,
+        "subsequent": subsequent_values
+    }
+
+def find_invalid_cells(df):
+    """Validate every cell of every non-summation row.
+
+    Returns a list of (row_idx, col, value, error_msg) for the cells that failed,
+    in row order and then column order.
+    """
+    error_mask, error_codes, error_messages = validate_table(df)
+    cols = list(error_codes.columns)
+    codes = error_codes.to_numpy()
+    values = df[cols].to_numpy(dtype=object)
+    invalid_cells = []
+    for row_idx, col_idx in zip(*np.nonzero(codes)):
+        col = cols[col_idx]
+        invalid_cells.append((int(row_idx), col, values[row_idx, col_idx], error_messages[col][codes[row_idx, col_idx]]))
+    return invalid_cells
+
+def find_tonnage_errors(df):
+    """Returns a list of (row_idx, error, tonnage_values) for non-summation rows whose tonnages don't add up."""
+    tonnage_codes = validate_tonnage(df)
+    tonnage_errors = []
+    for row_idx in np.flatnonzero(tonnage_codes):
+        current_row = df.iloc[row_idx]
+        tonnage_values = {}
+        if has_valid_value(current_row, HE_COLS):
+            tonnage_values['HIGH EXPLOSIVE BOMBS TONS'] = current_row['HIGH EXPLOSIVE BOMBS TONS']
+        if has_valid_value(current_row, INCENDIARY_COLS):
+            tonnage_values['INCENDIARY BOMBS TONS'] = current_row['INCENDIARY BOMBS TONS']
+        if has_valid_value(current_row, FRAG_COLS):
+            tonnage_values['FRAGMENTATION BOMBS TONS'] = current_row['FRAGMENTATION BOMBS TONS']
+        # Always include TOTAL TONS
+        tonnage_values['TOTAL TONS'] = current_row['TOTAL TONS']
+        tonnage_errors.append((int(row_idx), TONNAGE_MESSAGES[tonnage_codes[row_idx]], tonnage_values))
+    return tonnage_errors
+
+def cell_key(row_idx, col):
+    return f"row {row_idx + 1} | {col}"
+
+def build_cell_prompt(df, row_idx, col, value, error_msg, context_index):
+    # Get context for this column
+    context_values = get_indexed_context_values(context_index, col, row_idx, n=5)
+    prompt = (
+        f"Value Error in column '{col}' at row {row_idx + 1}:\n"
+        f"Current Value: {value}\n"
+        f"Error: {error_msg}\n"
+        f"Context Values:\n"
+        f"  Previous values (relative row index, value):\n"
+    )
+
+    for rel_idx, prev_value in context_values["previous"]:
+        prompt += f"    {rel_idx}: {prev_value}\n"
+    
+    prompt += " --- Current Row is Here! --- \n"
+
+    prompt += f"  Subsequent values (relative row index, value):\n"
+
+    for rel_idx, next_value in context_values["subsequent"]:
+        prompt += f"    {rel_idx}: {next_value}\n"
 
-   # Replace ":unselected:" with "" in the entire DataFrame
+    # function to add additional context to the prompt based on the column
+    prev_row = df.iloc[row_idx - 1] if row_idx > 0 else None
+    prompt = add_additional_context(prompt, df.iloc[row_idx], prev_row, col)
+
+    prompt += f"Please suggest the correct value for the current row."
+    return prompt
+
+def build_tonnage_prompt(row_idx, tonnage_error, tonnage_values):
+    return (
+        f"Tonnage Error at row {row_idx + 1}:\n"
+        f"Error: {tonnage_error}\n"
+        f"Expected Rule: Individual tonnages should sum up to TOTAL TONS. Total Tons should be the sum of all TONS columns.\n"
+        f"Tonnage Values: {tonnage_values}\n"
+        f"Please correct the tonnage values."
+    )
+
+def request_corrections(sections, batch_size=BATCH_SIZE):
+    """Send the correction sections of a page in batches of `batch_size` cells.
+
+    `sections` is a list of (keys, prompt) pairs; the model is asked to return one
+    corrected value per key. Sections whose keys a batch response left out are
+    asked again on their own. Returns the merged corrections and the number of
+    requests made.
+    """
+    # Group sections so that no request carries more than `batch_size` cells
+    batches = []
+    batch_cells = 0
+    for keys, prompt in sections:
+        if not batches or (batch_size and batch_cells + len(keys) > batch_size):
+            batches.append([])
+            batch_cells = 0
+        batches[-1].append((keys, prompt))
+        batch_cells += len(keys)
+
+    corrections = {}
+    number_of_requests = 0
+    for batch in batches:
+        prompt_text = (
+            "The following values from one page of a US Strategic Bombing Survey table failed validation. "
+            "Each section is labelled with the key(s) to use for its corrected value(s).\n"
+        )
+        attributes = []
+        for keys, prompt in batch:
+            prompt_text += f"\n### {', '.join(keys)}\n{prompt}\n"
+            attributes.extend(keys)
+        result = send_to_ai(prompt_text, attributes, partial=len(batch) > 1)
+        number_of_requests += 1
+        if result is not None:
+            corrections.update(result)
+        if len(batch) > 1:
+            for keys, prompt in batch:
+                if not all(key in corrections for key in keys):
+                    result = send_to_ai(prompt, keys)
+                    number_of_requests += 1
+                    if result is not None:
+                        corrections.update(result)
+    return corrections, number_of_requests
+
+def apply_cell_correction(df, row_idx, col, corrected_value):
+    try:
+        # Try to convert the value to the appropriate type
+        if pd.api.types.is_numeric_dtype(df[col]) and col not in ['GROUP/SQUADRON NUMBER', 'AIR FORCE']:
+            corrected_value = int(float(corrected_value))
+        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+            corrected_value = pd.to_datetime(corrected_value)
+        else:
+            # For non-numeric columns or special cases, keep as string
+            corrected_value = str(corrected_value).strip()
+        
+        df.at[row_idx, col] = corrected_value
+        logging.info(f"Row {row_idx + 1}: Corrected Value for '{col}': {corrected_value}")
+    except ValueError as e:
+        logging.error(f"Row {row_idx + 1}: Error converting value for '{col}': {str(e)}")
+
+def prepare_table(df):
+    """Strip checkbox markers and empty rows, flag summation rows and split multi-line cells."""
+    # Replace ":unselected:" with "" in the entire DataFrame
     df = df.replace(":unselected:", "", regex=False)
     df = df.replace(":selected:", "", regex=False)
     logging.debug("Replaced all instances of ':unselected:' with ''")
@@ -577,221 +1069,61 @@ def split_csv_cells(input_csv):
     logging.debug(f"Number of rows after initial cleanup: {len(df)}")
     logging.debug(f"Number of columns after initial cleanup: {len(df.columns)}")
 
-    # Define check functions for each column
-    check_functions = {
-        'DAY': check_DAY,
-        'MONTH': check_MONTH,
-        'YEAR': check_YEAR,
-        'TIME OF ATTACK': check_TIME_OF_ATTACK,
-        'AIR FORCE': check_AIR_FORCE,
-        'GROUP/SQUADRON NUMBER': check_GROUP_SQUADRON_NUMBER,
-        'NUMBER OF AIRCRAFT BOMBING': check_NUMBER_OF_AIRCRAFT_BOMBING,
-        'ALTITUDE OF RELEASE IN HUND. FT.': check_ALTITUDE_OF_RELEASE,
-        'SIGHTING': check_SIGHTING,
-        'VISIBILITY OF TARGET': check_VISIBILITY_OF_TARGET,
-        'TARGET PRIORITY': check_TARGET_PRIORITY,
-        'HIGH EXPLOSIVE BOMBS NUMBER': check_HIGH_EXPLOSIVE_BOMBS_NUMBER,
-        'HIGH EXPLOSIVE BOMBS SIZE': check_HIGH_EXPLOSIVE_BOMBS_SIZE,
-        'HIGH EXPLOSIVE BOMBS FUZING NOSE': check_HIGH_EXPLOSIVE_BOMBS_FUZING_NOSE,
-        'HIGH EXPLOSIVE BOMBS FUZING TAIL': check_HIGH_EXPLOSIVE_BOMBS_FUZING_TAIL,
-        'INCENDIARY BOMBS NUMBER': check_INCENDIARY_BOMBS_NUMBER,
-        'INCENDIARY BOMBS SIZE': check_INCENDIARY_BOMBS_SIZE,
-        'FRAGMENTATION BOMBS NUMBER': check_FRAGMENTATION_BOMBS_NUMBER,
-        'FRAGMENTATION BOMBS SIZE': check_FRAGMENTATION_BOMBS_SIZE,
-    }
+    return df
 
-    # Iterate through each row
-    logging.debug("Starting to process rows...")
-    for row_idx in range(len(df)):
-        # Get the current row and nearby rows for context
-        current_row = df.iloc[row_idx]
+def split_csv_cells(input_csv, batch_size=BATCH_SIZE):
+    # Read the input CSV file
+    return clean_table(pd.read_csv(input_csv), batch_size)
+
+def clean_table(df, batch_size=BATCH_SIZE):
+    """Validate and correct one page's table as read from table_data.csv."""
+    start_time = time.time()
+    df = prepare_table(df)
+
+    # Validate the whole page first, then ask for all corrections in as few requests as possible
+    invalid_cells = find_invalid_cells(df)
+    tonnage_errors = find_tonnage_errors(df)
+    logging.info(f"Found {len(invalid_cells)} invalid cells and {len(tonnage_errors)} tonnage errors")
+
+    sections = []
+    context_index = build_context_index(df)
+    for row_idx, col, value, error_msg in invalid_cells:
+        prompt = build_cell_prompt(df, row_idx, col, value, error_msg, context_index)
+        logging.debug(f"Row {row_idx + 1}: {prompt}")
+        sections.append(([cell_key(row_idx, col)], prompt))
+    for row_idx, tonnage_error, tonnage_values in tonnage_errors:
+        prompt = build_tonnage_prompt(row_idx, tonnage_error, tonnage_values)
+        logging.debug(f"Row {row_idx + 1}: {prompt}")
+        sections.append(([cell_key(row_idx, col) for col in tonnage_values], prompt))
+
+    corrections, number_of_gpt_requests_made = request_corrections(sections, batch_size)
+
+    for row_idx, col, value, error_msg in invalid_cells:
+        key = cell_key(row_idx, col)
+        if key in corrections:
+            apply_cell_correction(df, row_idx, col, corrections[key])
+        else:
+            logging.error(f"Row {row_idx + 1}: Error in column '{col}': Unable to get corrected value.")
 
-        # Check if this is a summation row and perform necessary checks
-        if current_row['SUMMATION_ROW']:
-            logging.debug(f"Row {row_idx + 1} is a summation row.")
+    for row_idx, tonnage_error, tonnage_values in tonnage_errors:
+        keys = [cell_key(row_idx, col) for col in tonnage_values]
+        if not all(key in corrections for key in keys):
+            logging.error(f"Row {row_idx + 1}: Error in Tonnage: Unable to get corrected values.")
             continue
+        for col in tonnage_values:
+            value = corrections[cell_key(row_idx, col)]
+            try:
+                int_value = int(float(value))
+                df.at[row_idx, col] = int_value
+                logging.debug(f"Updated value in column '{col}' at row {row_idx + 1} to: {int_value}")
+            except ValueError:
+                # If conversion fails, log an error and skip this value
+                logging.error(f"Error: Could not convert '{value}' to int for column '{col}' at row {row_idx + 1}")
+                continue
 
-        # # check if this is an RAF entry or a US entry. For the RAF most of the values aren't filled in except for date, time, air force, aircraft bombing, sometimes altitude, and the bombs (not fuzing though)
-        # col_count = 0
-        # is_RAF = False
-        # for col in df.columns:
-        #     if col in ['GROUP/SQUADRON NUMBER', 'SIGHTING', 'VISIBILITY OF TARGET', 'TARGET PRIORITY', 'HIGH EXPLOSIVE BOMBS FUZING NOSE', 'HIGH EXPLOSIVE BOMBS FUZING TAIL', 'TIME OF ATTACK', 'ALTITUDE OF RELEASE IN HUND. FT.']:
-        #         if not pd.isna(current_row[col]):
-        #             col_count += 1
-        # if col_count == 0:
-        #     # Check if this row could be RAF
-        #     is_potential_RAF = current_row['AIR FORCE'] not in ['8', '9', '12', '15']
-            
-        #     # If it's a potential RAF row, check the previous row if it exists
-        #     if is_potential_RAF and row_idx > 0:
-        #         prev_row = df.iloc[row_idx - 1]
-                
-        #         # Check if the date is the same as the previous row
-        #         same_date = (current_row['DAY'] == prev_row['DAY'] and 
-        #                      current_row['MONTH'] == prev_row['MONTH'] and 
-        #                      current_row['YEAR'] == prev_row['YEAR'])
-                
-        #         # If the date is the same and the previous row is not RAF, consider this row as part of the same US Air Force mission
-        #         if same_date and prev_row['AIR FORCE'] in ['8', '9', '12', '15']:
-        #             is_RAF = False
-        #         else:
-        #             is_RAF = True
-        #     else:
-        #         is_RAF = is_potential_RAF
-        
-        # logging.debug(f"Row {row_idx + 1} appears to be a RAF entry: {is_RAF}")
-        
-        # Check each cell in the row
-        for col, check_func in check_functions.items():
-            value = current_row[col]
-            is_required = False
-            # Day, Month, Year, Time of Attack, Air Force, Number of Aircraft Bombing always required
-            if col in ['DAY', 'MONTH', 'YEAR', 'AIR FORCE', 'NUMBER OF AIRCRAFT BOMBING']:
-                is_required = True
-            # else if it's not an RAF entry then Altitude of release, group squadron number, sighting, visibility of target, target priority all required            
-            if col in ['TIME OF ATTACK', 'ALTITUDE OF RELEASE IN HUND. FT.', 'GROUP/SQUADRON NUMBER', 'SIGHTING', 'VISIBILITY OF TARGET', 'TARGET PRIORITY']:
-                is_required = True
-                # if not is_RAF:
-                #     is_required = True 
-                # else: 
-                #     is_required = False
-            # if there is any value in the columns related to high explosive bombs ... then they are all required except fuzing nose/tail.. if not raf then fuzing nose tail are required
-            he_cols = ['HIGH EXPLOSIVE BOMBS NUMBER', 'HIGH EXPLOSIVE BOMBS SIZE','HIGH EXPLOSIVE BOMBS TONS', 'HIGH EXPLOSIVE BOMBS FUZING NOSE', 'HIGH EXPLOSIVE BOMBS FUZING TAIL']            
-            if col in he_cols:
-                if has_valid_value(current_row, he_cols):
-                    is_required = True
-                    # if not is_RAF:                
-                    #     is_required = True
-                    # else:
-                    #     if col in ['HIGH EXPLOSIVE BOMBS FUZING NOSE', 'HIGH EXPLOSIVE BOMBS FUZING TAIL']:
-                    #         is_required = False
-                    #     else:
-                    #         is_required = True
-                else:
-                    is_required = False
-            # if there is any value in the columns related to incendiary bombs ... then they are all required except fuzing nose/tail.. if not raf then fuzing nose tail are required
-            incendiary_cols = ['INCENDIARY BOMBS NUMBER', 'INCENDIARY BOMBS SIZE', 'INCENDIARY BOMBS TONS']
-            if col in incendiary_cols:
-                if has_valid_value(current_row, incendiary_cols):
-                    is_required = True
-                else:
-                    is_required = False
-            # if there is any value in the columns related to fragmentation bombs ... then they are all required except fuzing nose/tail.. if not raf then fuzing nose tail are required
-            frag_cols = ['FRAGMENTATION BOMBS NUMBER', 'FRAGMENTATION BOMBS SIZE', 'FRAGMENTATION BOMBS TONS']
-            if col in frag_cols:
-                if has_valid_value(current_row, frag_cols):
-                    is_required = True
-                else:
-                    is_required = False
-
-            
-            if col == "AIR FORCE":
-                is_valid, error_msg = check_func(value, is_required)
-                if is_valid and row_idx > 0:
-                    prev_row = df.iloc[row_idx - 1]
-                    if (current_row['DAY'] == prev_row['DAY'] and 
-                        current_row['MONTH'] == prev_row['MONTH'] and 
-                        current_row['YEAR'] == prev_row['YEAR'] and 
-                        current_row['AIR FORCE'] != prev_row['AIR FORCE']):
-                        is_valid = False
-                        error_msg = "Air Force value has changed while the date remains the same. This is unusual and should be verified."
-                        # logging.warning(f"Row {row_idx + 1}: {error_msg}")
-            else:
-                is_valid, error_msg = check_func(value, is_required)
-            if not is_valid:
-                # Get context for this column
-                context_values = get_context_values(df, col, row_idx, check_func, n=5)
-                prompt = (
-                    f"Value Error in column '{col}' at row {row_idx + 1}:\n"
-                    f"Current Value: {value}\n"
-                    f"Error: {error_msg}\n"
-                    f"Context Values:\n"
-                    f"  Previous values (relative row index, value):\n"
-                )
-
-                for rel_idx, prev_value in context_values["previous"]:
-                    prompt += f"    {rel_idx}: {prev_value}\n"
-                
-                prompt += " --- Current Row is Here! --- \n"
-
-                prompt += f"  Subsequent values (relative row index, value):\n"
-
-                for rel_idx, next_value in context_values["subsequent"]:
-                    prompt += f"    {rel_idx}: {next_value}\n"
-
-                # function to add additional context to the prompt based on the column
-                if row_idx > 0:
-                    prompt = add_additional_context(prompt, current_row, df.iloc[row_idx - 1], col)
-                else:
-                    prompt = add_additional_context(prompt, current_row, None, col)
-
-                prompt += f"Please suggest the correct value for the current row."    
-                logging.debug(f"Row {row_idx + 1}: {prompt}")
-                corrected_values = send_to_ai(prompt, [col])
-                number_of_gpt_requests_made += 1
-                if corrected_values is not None and col in corrected_values:
-                    corrected_value = corrected_values[col]
-                    try:
-                        # Try to convert the value to the appropriate type
-                        if pd.api.types.is_numeric_dtype(df[col]) and col not in ['GROUP/SQUADRON NUMBER', 'AIR FORCE']:
-                            corrected_value = int(float(corrected_value))
-                        elif pd.api.types.is_datetime64_any_dtype(df[col]):
-                            corrected_value = pd.to_datetime(corrected_value)
-                        else:
-                            # For non-numeric columns or special cases, keep as string
-                            corrected_value = str(corrected_value).strip()
-                        
-                        df.at[row_idx, col] = corrected_value
-                        # fix the value for the current row as well
-                        current_row = df.iloc[row_idx]                 
-                        
-                        logging.info(f"Row {row_idx + 1}: Corrected Value for '{col}': {corrected_value}")
-                    except ValueError as e:
-                        logging.error(f"Row {row_idx + 1}: Error converting value for '{col}': {str(e)}")
-                else:
-                    logging.error(f"Row {row_idx + 1}: Error in column '{col}': Unable to get corrected value.")            
-        
-        # Check tonnage values
-        is_tonnage_valid, tonnage_error = check_TONNAGE(current_row)
-        if not is_tonnage_valid:
-            # Prepare prompt with tonnage details
-            tonnage_values = {}            
-            if has_valid_value(current_row, he_cols):
-                tonnage_values['HIGH EXPLOSIVE BOMBS TONS'] = current_row['HIGH EXPLOSIVE BOMBS TONS']
-                        
-            if has_valid_value(current_row, incendiary_cols):
-                tonnage_values['INCENDIARY BOMBS TONS'] = current_row['INCENDIARY BOMBS TONS']
-                        
-            if has_valid_value(current_row, frag_cols):
-                tonnage_values['FRAGMENTATION BOMBS TONS'] = current_row['FRAGMENTATION BOMBS TONS']
-            
-            # Always include TOTAL TONS
-            tonnage_values['TOTAL TONS'] = current_row['TOTAL TONS']
-            
-            prompt = (
-                f"Tonnage Error at row {row_idx + 1}:\n"
-                f"Error: {tonnage_error}\n"
-                f"Expected Rule: Individual tonnages should sum up to TOTAL TONS. Total Tons should be the sum of all TONS columns.\n"
-                f"Tonnage Values: {tonnage_values}\n"
-                f"Please correct the tonnage values."
-            )
-            logging.debug(f"Row {row_idx + 1}: {prompt}")
-            corrected_values = send_to_ai(prompt, list(tonnage_values.keys()))
-            number_of_gpt_requests_made += 1            
-            if corrected_values:
-                for col, value in corrected_values.items():
-                    try:
-                        int_value = int(float(value))
-                        df.at[row_idx, col] = int_value
-                        logging.debug(f"Updated value in column '{col}' at row {row_idx + 1} to: {int_value}")
-                    except ValueError:
-                        # If conversion fails, log an error and skip this value
-                        logging.error(f"Error: Could not convert '{value}' to int for column '{col}' at row {row_idx + 1}")
-                        continue
-            else:
-                logging.error(f"Row {row_idx + 1}: Error in Tonnage: Unable to get corrected values.")
-        
     logging.info(f"Made {number_of_gpt_requests_made} gpt api requests")
+    logging.info(f"Response cache: {get_cache().stats()}")
+    logging.info(f"Processed page in {time.time() - start_time:.2f} seconds")
 
     return df
 
@@ -804,6 +1136,13 @@ def split_csv_cells(input_csv):
     
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format='%(asctime)s - [PID %(process)d] - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+
     input_csv = sys.argv[1]
     logging.info(f"------------Processing {input_csv}------------")
 
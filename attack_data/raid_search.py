@@ -0,0 +1,83 @@
+# raid_search.py
+"""Substring search over the target names and locations of the raids table.
+
+app.display_data_table used to run str.contains over the whole selection on
+every keystroke. The two columns have only a few thousand distinct values
+between them, so SearchIndex keys a trigram index on those values rather
+than on the rows. A term of three or more characters intersects the
+postings of its trigrams to get the few candidate values and checks only
+those for the substring. Shorter terms scan the distinct values. The
+matching values are then turned into rows through the columns' category
+codes.
+
+Matching is case-insensitive and literal, like str.contains(term,
+case=False, regex=False).
+
+    index = SearchIndex(df)
+    hits = index.search('marshalling')   # boolean array over df's rows
+    df[index.mask(df.index, 'marshalling')]  # rows of a subset of df
+"""
+
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+SEARCH_COLUMNS = ('target_name', 'target_location')
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ColumnIndex:
+    """Trigram postings over the distinct lower-cased values of one column."""
+
+    def __init__(self, values):
+        categorical = pd.Categorical(values.astype('string').str.lower())
+        self.codes = categorical.codes
+        self.values = list(categorical.categories)
+        postings = defaultdict(list)
+        for value_id, value in enumerate(self.values):
+            for gram in trigrams(value):
+                postings[gram].append(value_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def matching_values(self, term):
+        """Ids of the distinct values containing `term`."""
+        if len(term) < 3:
+            candidates = range(len(self.values))
+        else:
+            lists = sorted((self.postings.get(gram) for gram in trigrams(term)),
+                           key=lambda ids: -1 if ids is None else len(ids))
+            if lists[0] is None:
+                return np.array([], dtype=np.int32)
+            candidates = lists[0]
+            for ids in lists[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        return np.array([value_id for value_id in candidates if term in self.values[value_id]], dtype=np.int32)
+
+    def search(self, term):
+        return np.isin(self.codes, self.matching_values(term))
+
+
+class SearchIndex:
+    def __init__(self, df, columns=SEARCH_COLUMNS):
+        self.index = df.index
+        self.columns = {col: ColumnIndex(df[col]) for col in columns if col in df.columns}
+
+    def search(self, term):
+        """Boolean array over the indexed rows: `term` occurs in any of the columns."""
+        term = term.strip().lower()
+        hits = np.zeros(len(self.index), dtype=bool)
+        if not term:
+            hits[:] = True
+            return hits
+        for column in self.columns.values():
+            hits |= column.search(term)
+        return hits
+
+    def mask(self, labels, term):
+        """search(term) for the rows labelled `labels`, a subset of the indexed frame."""
+        hits = pd.Series(self.search(term), index=self.index)
+        return hits.reindex(labels, fill_value=False).to_numpy()
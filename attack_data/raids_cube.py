@@ -0,0 +1,137 @@
+# raids_cube.py
+"""Aggregate cube shared by the visualize_* scripts.
+
+The visualize_* scripts used to run one groupby / pivot_table / crosstab
+pass over the raid frame for every chart. build_cube() instead groups the
+raids once by every dimension the frame has (Year, Quarter, Month,
+CATEGORY, Location, Air Force, Score Category) and keeps only additive
+measures: raid counts, tonnage, HE/incendiary tons and the sums and sums of
+squares of the scores. Any coarser view is a sum over the cube's few
+thousand cells, from which rollup() derives means, standard deviations and
+tonnage-weighted means. Medians and distributions still need the raids
+themselves and are taken from the frame.
+
+load_cube() pickles the cube under processed_data/cache/, keyed by a hash
+of the columns it is built from, so it is materialized once per version of
+the data however many scripts and runs query it.
+
+    from raids_cube import load_cube, rollup, counts
+    cube = load_cube(df)
+    yearly = rollup(cube, ['Year'])                    # score_mean, score_std, tons_sum, ...
+    year_cat = counts(cube, 'Year', 'Score Category')  # like pd.crosstab
+"""
+
+import os
+import glob
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from raids_loader import CACHE_DIR
+
+DIMENSIONS = ['Year', 'Quarter', 'Month', 'CATEGORY', 'Location', 'Air Force', 'Score Category']
+SCORE = 'AREA_BOMBING_SCORE_NORMALIZED'
+# Columns averaged by the component radar charts
+COMPONENTS = ['TARGET_SCORE', 'TONNAGE_SCORE', 'INCENDIARY_SCORE']
+# Bump when the measures change so stale pickles are not reused
+CUBE_VERSION = 1
+
+
+def cube_measures(df):
+    """Per-raid values of the additive measures, one row per raid."""
+    score = df[SCORE]
+    tons = df['TOTAL_TONS']
+    # Missing incendiary percentages count as 0%, as in the scripts' HE/incendiary split
+    incendiary = df['INCENDIARY_PERCENT'].fillna(0)
+    measures = pd.DataFrame({
+        'raids': 1,
+        'score_n': score.notna().astype(int),
+        'score_sum': score,
+        'score_sumsq': score ** 2,
+        'tons_n': tons.notna().astype(int),
+        'tons_sum': tons,
+        'he_tons': tons * (100 - incendiary) / 100,
+        'incendiary_tons': tons * incendiary / 100,
+        'incendiary_pct_sum': incendiary,
+        'weighted_score_sum': score * tons,
+        # np.average propagates NaN, so a group with a missing score or tonnage has no weighted mean
+        'weighted_missing': (score.isna() | tons.isna()).astype(int),
+    }, index=df.index)
+    for col in COMPONENTS:
+        measures[f'{col}_n'] = df[col].notna().astype(int)
+        measures[f'{col}_sum'] = df[col]
+    return measures
+
+
+def build_cube(df, dimensions=DIMENSIONS):
+    """Sum the measures over every combination of the dimensions present in `df`."""
+    dims = [dim for dim in dimensions if dim in df.columns]
+    measures = cube_measures(df)
+    keys = [df[dim] for dim in dims]
+    return measures.groupby(keys, dropna=False, observed=True, sort=False).sum().reset_index()
+
+
+def with_statistics(totals):
+    """Means, standard deviations and weighted means from summed measures."""
+    n = totals['score_n']
+    totals['score_mean'] = totals['score_sum'] / n
+    variance = (totals['score_sumsq'] - totals['score_sum'] ** 2 / n) / (n - 1)
+    totals['score_std'] = np.sqrt(np.maximum(variance, 0)).where(n > 1)
+    totals['tons_mean'] = totals['tons_sum'] / totals['tons_n']
+    totals['incendiary_pct_mean'] = totals['incendiary_pct_sum'] / totals['raids']
+    weighted = totals['weighted_score_sum'] / totals['tons_sum']
+    totals['weighted_score_mean'] = weighted.where(totals['weighted_missing'] == 0)
+    for col in COMPONENTS:
+        totals[f'{col}_mean'] = totals[f'{col}_sum'] / totals[f'{col}_n']
+    return totals
+
+
+def rollup(cube, by=None, where=None):
+    """Measures summed over every dimension not in `by`, with the derived statistics.
+
+    `where` is a boolean mask over the cube's cells (e.g.
+    cube['Location'].isin(cities)). Groups with a missing key are dropped,
+    like DataFrame.groupby. With no `by`, returns one Series for all raids.
+    """
+    if where is not None:
+        cube = cube[where]
+    measures = cube.columns.difference(DIMENSIONS, sort=False)
+    if not by:
+        return with_statistics(pd.DataFrame([cube[measures].sum()])).iloc[0]
+    totals = cube.groupby(by, observed=True)[measures].sum()
+    return with_statistics(totals)
+
+
+def counts(cube, index, columns, where=None):
+    """Raid counts of `index` (a dimension or a list of them) by `columns`, laid out like pd.crosstab."""
+    index = [index] if isinstance(index, str) else list(index)
+    table = rollup(cube, index + [columns], where)['raids'].unstack(columns, fill_value=0)
+    if isinstance(cube[columns].dtype, pd.CategoricalDtype):
+        table = table.reindex(columns=[c for c in cube[columns].cat.categories if c in table.columns])
+    return table
+
+
+def frame_digest(df, dimensions=DIMENSIONS):
+    """Hash of the columns the cube is built from."""
+    cols = [dim for dim in dimensions if dim in df.columns] + [SCORE, 'TOTAL_TONS', 'INCENDIARY_PERCENT'] + COMPONENTS
+    sha = hashlib.sha256(','.join(cols).encode('utf-8'))
+    sha.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def load_cube(df, name='raids', cache_dir=CACHE_DIR, dimensions=DIMENSIONS):
+    """build_cube(df), from the on-disk cache when the same data was cubed before."""
+    cached = os.path.join(cache_dir, f"cube-{name}-v{CUBE_VERSION}-{frame_digest(df, dimensions)[:16]}.pkl")
+    if os.path.exists(cached):
+        return pd.read_pickle(cached)
+
+    cube = build_cube(df, dimensions)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(cache_dir, f"cube-{glob.escape(name)}-v*.pkl")):
+        os.remove(stale)
+    tmp_path = cached + '.tmp'
+    cube.to_pickle(tmp_path)
+    os.replace(tmp_path, cached)
+    return cube
@@ -0,0 +1,208 @@
+# raids_dataset.py
+"""Typed, partitioned Parquet copy of the raid-level tables.
+
+Joins processed_data/raids_summary.csv with the categorised classification
+(row for row, the same way filter_usaaf_data.py does) and writes a Parquet
+dataset partitioned by Year and AIR FORCE:
+
+    processed_data/raids_dataset/Year=1944/AIR FORCE=8/part-0.parquet
+
+Locations, categories and air forces are stored as dictionaries and come
+back as pandas categoricals, integral counts are nullable ints and the
+cleaned Year/Month/Day used by the visualize_* scripts are precomputed
+together with a real `date` column. Bomb counts and tonnage stay float:
+OCR'd fractions survive in about one percent of the summed counts.
+
+    python raids_dataset.py          # rebuild from the CSVs
+
+    from raids_dataset import load_raids
+    df = load_raids(columns=['Location', 'date', 'TOTAL_TONS'], years=[1944], usaaf_only=True)
+
+A rebuild is written to a sibling directory and swapped in, so readers never
+see a mix of old and new partitions.
+"""
+
+import os
+import json
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from manifest import file_digest
+from raids_loader import clean_raids
+
+SUMMARY_CSV = 'processed_data/raids_summary.csv'
+CATEGORY_CSV = 'processed_data/raids_area_bombing_classification_with_category.csv'
+DATASET_DIR = 'processed_data/raids_dataset'
+METADATA_FILE = '_common_metadata'
+
+CATEGORY_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMA = pa.schema([
+    ('raid_id', pa.int32()),
+    ('target_location', CATEGORY_TYPE),
+    ('Location', CATEGORY_TYPE),
+    ('target_name', pa.string()),
+    ('BOOK', pa.string()),
+    ('CATEGORY', CATEGORY_TYPE),
+    ('latitude', pa.string()),
+    ('longitude', pa.string()),
+    ('target_code', pa.string()),
+    ('DAY', pa.string()),
+    ('MONTH', pa.float64()),
+    ('YEAR', pa.float64()),
+    ('Month', pa.int8()),
+    ('Day', pa.int8()),
+    ('date', pa.date32()),
+    ('TIME OF ATTACK', pa.int16()),
+    ('TOTAL_AIRCRAFT', pa.float64()),
+    ('AVG_ALTITUDE', pa.float64()),
+    ('TOTAL_HE_BOMBS', pa.float64()),
+    ('TOTAL_HE_TONS', pa.float64()),
+    ('TOTAL_INCENDIARY_BOMBS', pa.float64()),
+    ('TOTAL_INCENDIARY_TONS', pa.float64()),
+    ('TOTAL_FRAG_BOMBS', pa.float64()),
+    ('TOTAL_FRAG_TONS', pa.float64()),
+    ('TOTAL_TONS', pa.float64()),
+    ('NUM_ATTACKS', pa.int16()),
+    ('INCENDIARY_PERCENT', pa.float64()),
+    ('TARGET_SCORE', pa.int8()),
+    ('TONNAGE_SCORE', pa.float64()),
+    ('INCENDIARY_SCORE', pa.float64()),
+    ('AREA_BOMBING_SCORE', pa.float64()),
+    ('AREA_BOMBING_SCORE_NORMALIZED', pa.float64()),
+    # Partition keys: stored in the directory names, not in the files.
+    # Dictionary-typed keys can't be read back without listing every value up
+    # front, so AIR FORCE is a plain string here and made categorical on load.
+    ('Year', pa.int16()),
+    ('AIR FORCE', pa.string()),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([SCHEMA.field('Year'), SCHEMA.field('AIR FORCE')]), flavor='hive'
+)
+
+# pandas dtypes the nullable integer columns are cast to before conversion
+INT_DTYPES = {'raid_id': 'Int32', 'Month': 'Int8', 'Day': 'Int8', 'TIME OF ATTACK': 'Int16',
+              'NUM_ATTACKS': 'Int16', 'TARGET_SCORE': 'Int8', 'Year': 'Int16'}
+
+
+def add_date_columns(df):
+    """Year/Month/Day/Location/date as clean_raids derives them, keeping the raw YEAR/MONTH/DAY."""
+    cleaned = clean_raids(df[['YEAR', 'MONTH', 'DAY', 'target_location']].copy())
+    for col in ('Year', 'Month', 'Day', 'Location'):
+        df[col] = cleaned[col]
+    df['date'] = cleaned['Date']
+    return df
+
+
+def normalize_air_force(values):
+    """'8.0' and 8 both become '8'; 'R' and missing values are left alone."""
+    as_text = values.astype('string').str.strip()
+    numeric = pd.to_numeric(as_text, errors='coerce')
+    whole = numeric.notna() & (numeric % 1 == 0)
+    as_text[whole] = numeric[whole].astype('int64').astype('string')
+    return as_text
+
+
+def load_source_tables(summary_csv=SUMMARY_CSV, category_csv=CATEGORY_CSV):
+    summary = pd.read_csv(summary_csv, low_memory=False)
+    classification = pd.read_csv(category_csv)
+    classification['raid_id'] = classification.index
+    # Both files have one row per raid in the same order; shared columns are identical
+    extra = [col for col in classification.columns if col not in summary.columns]
+    df = summary.join(classification[extra])
+    return df
+
+
+def to_table(df):
+    """Cast a joined raids frame to SCHEMA."""
+    df = add_date_columns(df.copy())
+    df['AIR FORCE'] = normalize_air_force(df['AIR FORCE'])
+    for col in ('latitude', 'longitude', 'target_code', 'DAY'):
+        df[col] = df[col].astype('string')
+    for col, dtype in INT_DTYPES.items():
+        df[col] = df[col].astype('float64').round().astype(dtype)
+    for col in ('target_location', 'Location', 'CATEGORY'):
+        df[col] = df[col].astype('category')
+    return pa.Table.from_pandas(df[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+
+
+def build_dataset(output_dir=DATASET_DIR, summary_csv=SUMMARY_CSV, category_csv=CATEGORY_CSV):
+    table = to_table(load_source_tables(summary_csv, category_csv))
+    # Written beside the old dataset and swapped in whole, so a Year/AIR FORCE
+    # partition that is gone from the source doesn't survive the rebuild
+    output_dir = os.path.normpath(output_dir)
+    tmp_dir, old_dir = output_dir + '.tmp', output_dir + '.old'
+    for stale in (tmp_dir, old_dir):
+        shutil.rmtree(stale, ignore_errors=True)
+    ds.write_dataset(table, tmp_dir, format='parquet', partitioning=PARTITIONING,
+                     basename_template='part-{i}.parquet')
+    # Written last, so its presence means the dataset is complete. The source digests make
+    # its contents change with the data, for the build stages that depend on it
+    sources = {path: file_digest(path) for path in (summary_csv, category_csv)}
+    pq.write_metadata(SCHEMA.with_metadata({'sources': json.dumps(sources)}),
+                      os.path.join(tmp_dir, METADATA_FILE))
+    if os.path.exists(output_dir):
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"Wrote {table.num_rows} raids to {output_dir}")
+    return table.num_rows
+
+
+def ensure_dataset(dataset_dir=DATASET_DIR):
+    """Build the dataset from the CSVs if it hasn't been built yet."""
+    if not os.path.exists(os.path.join(dataset_dir, METADATA_FILE)):
+        build_dataset(dataset_dir)
+
+
+def open_dataset(dataset_dir=DATASET_DIR):
+    return ds.dataset(dataset_dir, schema=SCHEMA, format='parquet', partitioning=PARTITIONING,
+                      ignore_prefixes=['_', '.'])
+
+
+def load_raids(columns=None, years=None, air_forces=None, usaaf_only=False, categorical=True,
+               dataset_dir=DATASET_DIR):
+    """Read the raids dataset, touching only the requested columns and partitions.
+
+    `usaaf_only` keeps every raid not flown by the RAF (AIR FORCE != 'R',
+    missing air forces included), matching filter_usaaf_data.py. Dictionary
+    columns come back as categoricals holding only the values that were read;
+    `categorical=False` returns them as plain strings, as pd.read_csv would,
+    for scripts whose plots would otherwise draw every category.
+    """
+    condition = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if years is not None:
+        condition = both(condition, ds.field('Year').isin(list(years)))
+    if air_forces is not None:
+        condition = both(condition, ds.field('AIR FORCE').isin([str(af) for af in air_forces]))
+    if usaaf_only:
+        condition = both(condition, (ds.field('AIR FORCE') != 'R') | ds.field('AIR FORCE').is_null())
+
+    # raid_id is always read so rows come back in the CSV order
+    wanted = columns if columns is None or 'raid_id' in columns else ['raid_id'] + list(columns)
+    table = open_dataset(dataset_dir).to_table(columns=wanted, filter=condition)
+    df = table.to_pandas(types_mapper={pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(),
+                                       pa.int32(): pd.Int32Dtype()}.get)
+    df = df.sort_values('raid_id', ignore_index=True)
+    if wanted is not columns:
+        df = df.drop(columns='raid_id')
+    if 'AIR FORCE' in df.columns:
+        df['AIR FORCE'] = df['AIR FORCE'].astype('category')
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].cat.remove_unused_categories() if categorical else df[col].astype(object)
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+if __name__ == "__main__":
+    build_dataset()
@@ -0,0 +1,95 @@
+# raids_loader.py
+"""Shared loader for the cleaned raid tables used by the analysis scripts.
+
+Every visualize_* / stats script used to re-derive the same columns after
+pd.read_csv: YEAR/MONTH/DAY cleaned, Year clamped to 1941-1945, Month and
+Day clipped, an upper-cased Location, a Date and the Year_Quarter/Quarter
+strings. load_cleaned_raids() does that once with vectorized operations and
+pickles the result under processed_data/cache/, keyed by the SHA-256 of the
+source CSV, so later runs only read the pickle.
+
+    from raids_loader import load_cleaned_raids
+    df = load_cleaned_raids('processed_data/usaaf/usaaf_raids_full.csv')
+"""
+
+import os
+import glob
+
+import numpy as np
+import pandas as pd
+
+from manifest import file_digest
+
+USAAF_FULL_CSV = 'processed_data/usaaf/usaaf_raids_full.csv'
+CACHE_DIR = 'processed_data/cache'
+# Bump when clean_raids changes so stale pickles are not reused
+CLEANING_VERSION = 1
+
+
+def clean_day(day_value):
+    if pd.isna(day_value):
+        return 1
+    day_str = str(day_value)
+    if '-' in day_str:
+        day_str = day_str.split('-')[0]
+    try:
+        return int(float(day_str))
+    except (ValueError, TypeError):
+        return 1
+
+
+def clean_days(days):
+    """Vectorized clean_day: first day of a range, 1 when missing or unreadable."""
+    text = days.astype(object).where(days.isna(), days.astype(str))
+    parsed = pd.to_numeric(text.str.split('-').str[0], errors='coerce')
+    # Anything to_numeric rejects goes through clean_day itself
+    unparsed = parsed.isna() & days.notna()
+    if unparsed.any():
+        parsed[unparsed] = days[unparsed].map(clean_day)
+    return np.trunc(parsed.fillna(1)).astype(int)
+
+
+def clean_raids(df):
+    """Add the cleaned date and location columns in place, as the analysis scripts did."""
+    df['YEAR'] = df['YEAR'].fillna(0).astype(float)
+    df['Year'] = (1940 + df['YEAR']).astype(int)
+    # Handle any outlier years
+    df.loc[df['Year'] < 1941, 'Year'] = 1941
+    df.loc[df['Year'] > 1946, 'Year'] = 1945
+
+    df['MONTH'] = df['MONTH'].fillna(1).astype(float).astype(int)
+    df['Month'] = df['MONTH'].clip(1, 12)
+
+    df['DAY'] = clean_days(df['DAY'])
+    df['Day'] = df['DAY'].clip(1, 31)
+
+    df['Location'] = df['target_location'].str.strip().str.upper()
+    df['Date'] = pd.to_datetime({'year': df['Year'], 'month': df['Month'], 'day': df['Day']}, errors='coerce')
+
+    quarter = ((df['Month'] - 1) // 3 + 1).astype(str)
+    df['Year_Quarter'] = df['Year'].astype(str) + '-Q' + quarter
+    df['Quarter'] = df['Year'].astype(str) + 'Q' + quarter
+    return df
+
+
+def cache_path(path, cache_dir=CACHE_DIR):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}-v{CLEANING_VERSION}-{file_digest(path)[:16]}.pkl")
+
+
+def load_cleaned_raids(path=USAAF_FULL_CSV, cache_dir=CACHE_DIR):
+    """Return `path` read and passed through clean_raids, from the on-disk cache when the CSV is unchanged."""
+    cached = cache_path(path, cache_dir)
+    if os.path.exists(cached):
+        return pd.read_pickle(cached)
+
+    df = clean_raids(pd.read_csv(path))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(path))[0]
+    for stale in glob.glob(os.path.join(cache_dir, f"{glob.escape(name)}-v*.pkl")):
+        os.remove(stale)
+    tmp_path = cached + '.tmp'
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, cached)
+    return df
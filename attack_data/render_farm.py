@@ -0,0 +1,135 @@
+# render_farm.py
+"""Process-pool renderer for the per-year/per-category/per-city figure loops.
+
+The visualize_* scripts used to call their group plotting functions one
+after another, saving a few 300-dpi PNGs per year, category and city.
+Instead each figure becomes a job: a plotting function importable from a
+module (so a worker can unpickle it), the DataFrame slice it plots, its
+other arguments and the files it writes. render() runs the jobs on a
+process pool with the Agg backend and the caller's rcParams, or in the
+calling process when given a single worker. Under the spawn start method
+the workers re-import the calling script, so its work must sit behind an
+`if __name__ == "__main__":` guard.
+
+A job is fingerprinted like a figure_cache.savefig() call: by the slice
+it plots, its arguments, the source of the module defining its function
+and the rcParams it renders with. Rendered jobs are recorded in the figure
+manifest, and a job whose fingerprint is unchanged and whose outputs are
+still the recorded files is skipped.
+
+    from render_farm import job, render
+    jobs = [job(group_figures.score_distribution, [year_data[cols]], ('Year 1944', path), [path])]
+    render(jobs)
+"""
+
+import os
+import time
+import inspect
+import logging
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+import figure_cache
+
+
+def job(func, frames, args, outputs):
+    """A figure job: func(*frames, *args) writes `outputs`."""
+    return {'func': func, 'frames': list(frames), 'args': tuple(args), 'outputs': list(outputs)}
+
+
+def current_rc_params():
+    import matplotlib.pyplot as plt
+    return {key: value for key, value in plt.rcParams.items() if key != 'backend'}
+
+
+def fingerprint(job, rc_digest):
+    """Digest of everything that decides what `job` draws."""
+    func = job['func']
+    options = {'func': f"{func.__module__}.{func.__qualname__}", 'args': job['args']}
+    return figure_cache.fingerprint(inspect.getsourcefile(func), job['frames'], options, rc_digest)
+
+
+def init_worker(rc_params):
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.rcParams.update(rc_params)
+
+
+def render_job(func, frames, args):
+    """Draw one job in a worker or in-process; returns (status, details)."""
+    import matplotlib.pyplot as plt
+    # Only the job's own figures are closed, so a serial run leaves the caller's open
+    open_before = set(plt.get_fignums())
+    start = time.time()
+    try:
+        func(*frames, *args)
+        return "done", {"seconds": round(time.time() - start, 3)}
+    except Exception as e:
+        logging.error(f"Failed {func.__name__}{args}: {e}\n{traceback.format_exc()}")
+        return "failed", {"error": str(e), "seconds": round(time.time() - start, 3)}
+    finally:
+        for number in set(plt.get_fignums()) - open_before:
+            plt.close(number)
+
+
+def print_timings(timings, skipped):
+    """Per-figure table, slowest first."""
+    if timings:
+        width = max(len(name) for name, _, _ in timings)
+        print(f"  {'figure':<{width}}  {'status':<6}  {'seconds':>7}")
+        for name, status, seconds in sorted(timings, key=lambda row: row[2], reverse=True):
+            print(f"  {name:<{width}}  {status:<6}  {seconds:>7.2f}")
+    total = sum(seconds for _, _, seconds in timings)
+    print(f"  rendered: {len(timings)} ({total:.1f}s of rendering), skipped (unchanged): {skipped}")
+
+
+def run_jobs(pending, workers, rc_params):
+    """Yield (entry, (status, details)) for each pending entry as its job finishes.
+
+    With a single worker the jobs are drawn in this process, one after another.
+    """
+    if workers == 1:
+        for key, digest, figure in pending:
+            yield (key, digest, figure), render_job(figure['func'], figure['frames'], figure['args'])
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(rc_params,)) as executor:
+        futures = {executor.submit(render_job, figure['func'], figure['frames'], figure['args']):
+                   (key, digest, figure) for key, digest, figure in pending}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def render(jobs, workers=None, cache=None):
+    """Render the jobs whose fingerprint changed; returns the number that failed."""
+    workers = workers or os.cpu_count()
+    cache = cache or figure_cache.get_cache()
+    rc_params = current_rc_params()
+    rc_digest = figure_cache.rc_digest(rc_params)
+
+    pending = []
+    for figure in jobs:
+        digest = fingerprint(figure, rc_digest)
+        if all(cache.is_fresh(path, digest) for path in figure['outputs']):
+            continue
+        pending.append((figure['outputs'][0], digest, figure))
+    skipped = len(jobs) - len(pending)
+    print(f"Figures to render: {len(pending)} of {len(jobs)} (workers: {workers})")
+
+    timings = []
+    failed = 0
+    start_time = time.time()
+    if pending:
+        for (key, digest, figure), (status, details) in run_jobs(pending, workers, rc_params):
+            code_path = inspect.getsourcefile(figure['func'])
+            for path in figure['outputs']:
+                cache.record(path, digest, code_path, **details)
+            timings.append((os.path.basename(key), status, details['seconds']))
+            failed += status == "failed"
+        cache.save()
+
+    print_timings(timings, skipped)
+    print(f"Elapsed: {time.time() - start_time:.1f}s, failed: {failed}")
+    return failed
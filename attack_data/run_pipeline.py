@@ -0,0 +1,119 @@
+# run_pipeline.py
+"""Run process_ocr -> process_table -> post_process_2 over every page of the BOXES tree.
+
+Pages (BOX_*/BOOK_*/*.json) are fanned out over a process pool and all three
+stages of a page run in the same worker. Each stage still writes its usual
+artifact (table_data.csv, table_data_updated.csv, table_data_final.csv), but
+the next stage parses that CSV text from memory instead of reading it back
+from disk, so it sees exactly the types it would have got from the file.
+
+Per-page status is kept in a manifest so an interrupted run picks up where it
+stopped:
+
+    python run_pipeline.py [BOXES_DIR] --workers 8
+"""
+
+import io
+import os
+import glob
+import time
+import logging
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import process_ocr
+import process_table
+import post_process_2
+from manifest import Manifest
+
+BASE_DIR = '/Users/chim/Working/Thesis/Attack_Images/BOXES'
+MANIFEST_NAME = 'pipeline_manifest.json'
+LOG_NAME = 'pipeline_log.txt'
+
+
+def find_pages(base_dir):
+    return sorted(glob.glob(os.path.join(base_dir, 'BOX_*', 'BOOK_*', '*.json')))
+
+
+def init_worker(log_file, chat_client=None):
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format='%(asctime)s - [PID %(process)d] - %(levelname)s - %(message)s',
+        filemode='a'
+    )
+    if chat_client is not None:
+        # Offline runs (benchmarks) swap in a local chat client
+        process_ocr.client = chat_client
+        process_table.client = chat_client
+
+
+def process_page(json_path, batch_size=process_table.BATCH_SIZE):
+    """Run all three stages for one page; returns (status, details)."""
+    start = time.time()
+    try:
+        result = process_ocr.process_page(json_path)
+        if result is None:
+            return "no_table", {"seconds": round(time.time() - start, 2)}
+        output_path, extracted_data = result
+
+        table_csv = process_ocr.format_csv(extracted_data["table_data"])
+        df = process_table.clean_table(pd.read_csv(io.StringIO(table_csv)), batch_size)
+        updated_csv = df.to_csv(index=False)
+        with open(os.path.join(output_path, 'table_data_updated.csv'), 'w') as f:
+            f.write(updated_csv)
+
+        df = post_process_2.process_dataframe(pd.read_csv(io.StringIO(updated_csv)))
+        df.to_csv(os.path.join(output_path, 'table_data_final.csv'), index=False)
+        logging.info(f"Finished {json_path} ({len(df)} rows)")
+        return "done", {"rows": len(df), "seconds": round(time.time() - start, 2)}
+    except Exception as e:
+        logging.error(f"Failed {json_path}: {e}\n{traceback.format_exc()}")
+        return "failed", {"error": str(e), "seconds": round(time.time() - start, 2)}
+
+
+def run_pipeline(base_dir=BASE_DIR, workers=None, manifest_path=None, log_file=None,
+                 retry_failed=True, chat_client=None):
+    workers = workers or os.cpu_count()
+    manifest = Manifest(manifest_path or os.path.join(base_dir, MANIFEST_NAME))
+    log_file = log_file or os.path.join(base_dir, LOG_NAME)
+
+    finished = {"done", "no_table"} if retry_failed else {"done", "no_table", "failed"}
+    pages = [page for page in find_pages(base_dir) if manifest.status(page) not in finished]
+    print(f"Pages to process: {len(pages)} (workers: {workers}, manifest: {manifest.path})")
+    if not pages:
+        return 0.0
+
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(log_file, chat_client)) as executor:
+        futures = {executor.submit(process_page, page): page for page in pages}
+        for completed, future in enumerate(as_completed(futures), 1):
+            status, details = future.result()
+            manifest.record(futures[future], status, **details)
+            if completed % 50 == 0 or completed == len(pages):
+                elapsed = time.time() - start_time
+                print(f"Progress: {completed}/{len(pages)} ({completed / elapsed * 60:.1f} pages/min)")
+
+    elapsed = time.time() - start_time
+    pages_per_minute = len(pages) / elapsed * 60
+    print(f"Status counts: {manifest.counts()}")
+    print(f"Elapsed: {elapsed:.1f}s, {pages_per_minute:.1f} pages/min, "
+          f"{pages_per_minute / workers:.1f} pages/min per worker")
+    return pages_per_minute
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the OCR -> table -> bomb-weight pipeline over the BOXES tree.")
+    parser.add_argument("base_dir", nargs="?", default=BASE_DIR, help="Root of the BOX_*/BOOK_* tree.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument("--manifest", default=None, help=f"Manifest path (default: <base_dir>/{MANIFEST_NAME}).")
+    parser.add_argument("--log-file", default=None, help=f"Log file (default: <base_dir>/{LOG_NAME}).")
+    parser.add_argument("--skip-failed", action="store_true", help="Don't retry pages that failed on a previous run.")
+    args = parser.parse_args()
+
+    run_pipeline(args.base_dir, workers=args.workers, manifest_path=args.manifest,
+                 log_file=args.log_file, retry_failed=not args.skip_failed)
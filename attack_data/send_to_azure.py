@@ -1,48 +1,140 @@
 import os
-import sys
 import time
 import json
 import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from azure.core.credentials import AzureKeyCredential
 from azure.ai.formrecognizer import DocumentAnalysisClient
 from azure.core.exceptions import HttpResponseError, ServiceRequestError
+from manifest import Manifest
 
 # Set your endpoint and key from environment variables
 endpoint = os.getenv("AZURE_FORM_RECOGNIZER_ENDPOINT")
 key = os.getenv("AZURE_FORM_RECOGNIZER_KEY")
 
-# Initialize the Document Analysis Client
-document_analysis_client = DocumentAnalysisClient(
-    endpoint=endpoint, credential=AzureKeyCredential(key)
-)
-
 # Define rate limits
-RATE_LIMIT_ANALYZE = 5  # Reduced Transactions per second (TPS) for Analyze
-DELAY_ANALYZE = 1 / RATE_LIMIT_ANALYZE + 2  # Increased delay per request for Analyze
+RATE_LIMIT_ANALYZE = 5  # Transactions per second (TPS) for Analyze
+MAX_WORKERS = 8  # Number of analyze pollers kept in flight
+MANIFEST_NAME = "azure_manifest.json"
+
+
+def get_client():
+    """Initialize the Document Analysis Client from the environment."""
+    return DocumentAnalysisClient(
+        endpoint=endpoint, credential=AzureKeyCredential(key)
+    )
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all workers.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    `acquire()` blocks until one token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        # A bucket that holds less than one token never lets a request through.
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token if one is available; return the seconds to wait otherwise."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        wait = self.try_acquire()
+        while wait:
+            time.sleep(wait)
+            wait = self.try_acquire()
+
+
+class _StubResult:
+    def __init__(self, image_path):
+        self.image_path = image_path
+
+    def to_dict(self):
+        return {"stub": True, "image": os.path.basename(self.image_path)}
+
+
+class _StubPoller:
+    def __init__(self, image_path, latency):
+        self.image_path = image_path
+        self.latency = latency
+
+    def result(self):
+        time.sleep(self.latency)
+        return _StubResult(self.image_path)
+
+
+class StubDocumentAnalysisClient:
+    """Offline stand-in for DocumentAnalysisClient.
+
+    Simulates the layout service's polling latency and answers with a 429
+    whenever calls arrive faster than `tps` or at random with probability
+    `error_rate`.
+    """
+
+    def __init__(self, latency=3.0, jitter=1.0, error_rate=0.05, tps=RATE_LIMIT_ANALYZE):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.window = TokenBucket(tps)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+
+    def begin_analyze_document(self, model_id, document):
+        with self.lock:
+            self.calls += 1
+            over_limit = self.window.try_acquire() > 0
+            if over_limit or random.random() < self.error_rate:
+                self.throttled += 1
+                error = HttpResponseError(message="(429) Too Many Requests")
+                error.status_code = 429
+                raise error
+        return _StubPoller(document.name, self.latency + random.uniform(0, self.jitter))
+
 
 # Function to analyze a document and save the result as a JSON file
-def analyze_document(image_path):
+def analyze_document(image_path, client, limiter, save=True, base_delay=5):
+    """Analyze one image, retrying with exponential backoff.
+
+    Returns the number of attempts made, or None if every attempt failed.
+    """
     print(f"Analyzing {image_path}")
     max_retries = 10
-    base_delay = 5  # Start with a 5-second delay
-    
+
     for attempt in range(max_retries):
+        limiter.acquire()
         with open(image_path, "rb") as image_file:
             try:
-                poller = document_analysis_client.begin_analyze_document(
+                poller = client.begin_analyze_document(
                     "prebuilt-layout", document=image_file
                 )
                 result = poller.result()
 
-                # Construct the output path for the JSON result
-                output_path = os.path.splitext(image_path)[0] + ".json"
-                
-                # Save the result as a JSON file
-                with open(output_path, "w") as json_file:
-                    json.dump(result.to_dict(), json_file, indent=4)
-                
-                print(f"Processed and saved result for {image_path} to {output_path}")
-                return  # Success, exit the function
+                if save:
+                    # Construct the output path for the JSON result
+                    output_path = os.path.splitext(image_path)[0] + ".json"
+
+                    # Save the result as a JSON file
+                    with open(output_path, "w") as json_file:
+                        json.dump(result.to_dict(), json_file, indent=4)
+
+                    print(f"Processed and saved result for {image_path} to {output_path}")
+                return attempt + 1  # Success, exit the function
             except (HttpResponseError, ServiceRequestError) as e:
                 if attempt < max_retries - 1:
                     delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
@@ -51,34 +143,85 @@ def analyze_document(image_path):
                     time.sleep(delay)
                 else:
                     print(f"Failed to analyze {image_path} after {max_retries} attempts: {str(e)}")
+    return None
 
 
-def process_directory(directory):
+def find_pending_images(directory, manifest):
     images = []
     for root, _, files in os.walk(directory):
         for f in files:
             if f.lower().endswith('.jpg'):
                 image_path = os.path.join(root, f)
                 json_path = os.path.splitext(image_path)[0] + ".json"
-                if not os.path.exists(json_path):
+                if not os.path.exists(json_path) and not manifest.is_done(image_path):
                     images.append(image_path)
+    return sorted(images)
+
+
+def process_directory(directory, workers=MAX_WORKERS, rate=RATE_LIMIT_ANALYZE,
+                      client=None, manifest_path=None, save=True, base_delay=5):
+    """Analyze every unprocessed JPG under `directory` with `workers` pollers in flight."""
+    if client is None:
+        client = get_client()
+    if manifest_path is None:
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+    manifest = Manifest(manifest_path)
+    limiter = TokenBucket(rate)
 
+    images = find_pending_images(directory, manifest)
     total_images = len(images)
     print(f"Total images to be processed: {total_images}")
-    confirmation = input("Do you want to proceed with processing these images? (yes/no): ")
-    if confirmation.lower() != 'yes':
-        print("Processing aborted.")
+    print(f"Workers: {workers}, rate limit: {rate} TPS, manifest: {manifest_path}")
+    if not images:
+        print("Processing complete.")
         return
 
-    for image in images:
-        analyze_document(image)
-        time.sleep(DELAY_ANALYZE)  # Respect rate limit
-    
+    def run(image_path):
+        start = time.time()
+        attempts = analyze_document(image_path, client, limiter, save=save, base_delay=base_delay)
+        status = "done" if attempts else "failed"
+        manifest.record(image_path, status, attempts=attempts or 0, seconds=round(time.time() - start, 2))
+        return status
+
+    start_time = time.time()
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run, image): image for image in images}
+        for future in as_completed(futures):
+            if future.result() == "done":
+                done += 1
+            else:
+                failed += 1
+            elapsed = time.time() - start_time
+            print(f"Progress: {done + failed}/{total_images} "
+                  f"({done / elapsed * 60:.1f} images/min)")
+
+    elapsed = time.time() - start_time
     print("Processing complete.")
+    print(f"Succeeded: {done}, failed: {failed}, elapsed: {elapsed:.1f}s")
+    print(f"Achieved throughput: {done / elapsed * 60:.1f} images/min")
 
 
 if __name__ == "__main__":
-    # Run the process_directory function for a given directory
-    directory = sys.argv[1]
-    
-    process_directory(directory)
+    parser = argparse.ArgumentParser(description="Send attack-sheet images to the Azure layout model.")
+    parser.add_argument("directory", help="Directory to walk for .jpg images.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Number of requests kept in flight.")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT_ANALYZE, help="Analyze transactions per second.")
+    parser.add_argument("--manifest", default=None, help=f"Manifest path (default: <directory>/{MANIFEST_NAME}).")
+    parser.add_argument("--stub", action="store_true",
+                        help="Run offline against a simulated client; no JSON results are written.")
+    parser.add_argument("--stub-latency", type=float, default=3.0, help="Simulated seconds per analysis.")
+    parser.add_argument("--stub-error-rate", type=float, default=0.05, help="Probability of a simulated 429.")
+    args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+
+    if args.stub:
+        stub = StubDocumentAnalysisClient(latency=args.stub_latency, error_rate=args.stub_error_rate)
+        manifest_path = args.manifest or os.path.join(args.directory, "azure_manifest_stub.json")
+        process_directory(args.directory, workers=args.workers, rate=args.rate, client=stub,
+                          manifest_path=manifest_path, save=False, base_delay=0.5)
+        print(f"Stub calls: {stub.calls}, throttled: {stub.throttled}")
+    else:
+        process_directory(args.directory, workers=args.workers, rate=args.rate,
+                          manifest_path=args.manifest)
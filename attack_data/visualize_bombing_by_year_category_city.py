@@ -4,6 +4,12 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 from matplotlib.colors import LinearSegmentedColormap
+from raids_cube import load_cube, rollup, counts
+from figure_cache import savefig
+from raids_dataset import load_raids
+
+RAID_COLUMNS = ['Location', 'TOTAL_TONS', 'INCENDIARY_PERCENT', 'TARGET_SCORE', 'TONNAGE_SCORE', 'INCENDIARY_SCORE',
+                'AREA_BOMBING_SCORE_NORMALIZED', 'CATEGORY', 'YEAR']
 
 # Set style
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -15,23 +21,9 @@ plt.rcParams['figure.dpi'] = 300
 for dir_name in ['plots/years', 'plots/categories', 'plots/cities']:
     os.makedirs(dir_name, exist_ok=True)
 
-# Load and merge data
+# Load the raids of both air forces from the Parquet dataset; Location comes upper-cased
 print("Loading data...")
-raids_classification = pd.read_csv('processed_data/raids_area_bombing_classification_with_category.csv')
-raids_summary = pd.read_csv('processed_data/raids_summary.csv')
-
-# Create a unique identifier to merge datasets
-raids_classification['raid_id'] = raids_classification.index
-raids_summary['raid_id'] = raids_summary.index
-
-# Merge datasets
-print("Merging datasets...")
-df = pd.merge(
-    raids_classification, 
-    raids_summary[['raid_id', 'DAY', 'MONTH', 'YEAR', 'AIR FORCE', 'TOTAL_AIRCRAFT']], 
-    on='raid_id', 
-    how='left'
-)
+df = load_raids(columns=RAID_COLUMNS, categorical=False)
 
 # Clean up year data - it should be 1940s
 print("Cleaning year data...")
@@ -41,9 +33,6 @@ df['Year'] = (1940 + df['YEAR']).astype(int)
 df.loc[df['Year'] < 1939, 'Year'] = 1940
 df.loc[df['Year'] > 1946, 'Year'] = 1945
 
-# Create a clean location field
-df['Location'] = df['target_location'].str.strip().str.upper()
-
 # Identify top 10 cities
 top_cities = df['Location'].value_counts().head(10).index.tolist()
 print(f"Top 10 most raided cities: {', '.join(top_cities)}")
@@ -67,7 +56,7 @@ def generate_plots(data, group_name, save_dir):
     plt.xlim(0, 10)  # Enforce consistent x-axis limits
     plt.legend()
     plt.tight_layout()
-    plt.savefig(f'{save_dir}/score_distribution_{group_name.replace(" ", "_").lower()}.png', dpi=300)
+    savefig(f'{save_dir}/score_distribution_{group_name.replace(" ", "_").lower()}.png', data['AREA_BOMBING_SCORE_NORMALIZED'], dpi=300)
     plt.close()
     
     # 2. Scatter plot of Tonnage vs Incendiary Score
@@ -88,7 +77,7 @@ def generate_plots(data, group_name, save_dir):
     plt.xlim(0, 500)  # Enforce consistent x-axis limits
     plt.ylim(0, 100)  # Enforce consistent y-axis limits
     plt.tight_layout()
-    plt.savefig(f'{save_dir}/tonnage_vs_incendiary_{group_name.replace(" ", "_").lower()}.png', dpi=300)
+    savefig(f'{save_dir}/tonnage_vs_incendiary_{group_name.replace(" ", "_").lower()}.png', data[['TOTAL_TONS', 'INCENDIARY_PERCENT', 'AREA_BOMBING_SCORE_NORMALIZED']], dpi=300)
     plt.close()
     
     # 3. Box plot of scores by target type
@@ -100,7 +89,7 @@ def generate_plots(data, group_name, save_dir):
     plt.ylabel('Area Bombing Score', fontsize=12)
     plt.ylim(0, 10)  # Enforce consistent y-axis limits
     plt.tight_layout()
-    plt.savefig(f'{save_dir}/scores_by_target_type_{group_name.replace(" ", "_").lower()}.png', dpi=300)
+    savefig(f'{save_dir}/scores_by_target_type_{group_name.replace(" ", "_").lower()}.png', data[['TARGET_SCORE', 'AREA_BOMBING_SCORE_NORMALIZED']], dpi=300)
     plt.close()
     
     # 4. Category distribution (pie chart)
@@ -113,7 +102,7 @@ def generate_plots(data, group_name, save_dir):
         plt.title(f'Distribution of Bombing Categories - {group_name}', fontsize=16)
         plt.ylabel('')  # Hide the ylabel
         plt.tight_layout()
-        plt.savefig(f'{save_dir}/category_pie_{group_name.replace(" ", "_").lower()}.png', dpi=300)
+        savefig(f'{save_dir}/category_pie_{group_name.replace(" ", "_").lower()}.png', cat_counts, dpi=300)
         plt.close()
     
     # 5. Component scores (radar chart for groups with sufficient data)
@@ -146,7 +135,7 @@ def generate_plots(data, group_name, save_dir):
                    horizontalalignment='center', verticalalignment='center')
         
         plt.tight_layout()
-        plt.savefig(f'{save_dir}/component_radar_{group_name.replace(" ", "_").lower()}.png', dpi=300)
+        savefig(f'{save_dir}/component_radar_{group_name.replace(" ", "_").lower()}.png', values, dpi=300)
         plt.close()
 
 # Add score category to data
@@ -156,6 +145,10 @@ df['Score Category'] = pd.cut(df['AREA_BOMBING_SCORE_NORMALIZED'],
                              labels=['Very Precise (0-2)', 'Precise (2-4)', 
                                     'Mixed (4-6)', 'Area (6-8)', 'Heavy Area (8-10)'])
 
+# Every count and mean below is read from one aggregation over these dimensions
+print("Building aggregate cube...")
+cube = load_cube(df, name='all_raids')
+
 print("Generating plots by year...")
 # 1. Generate plots by year
 years = sorted(df['Year'].unique())
@@ -170,7 +163,12 @@ for year in years:
 print("Creating year evolution plots...")
 # 1. Evolution of bombing scores over years
 plt.figure(figsize=(14, 8))
-yearly_scores = df.groupby('Year')['AREA_BOMBING_SCORE_NORMALIZED'].agg(['mean', 'median', 'std']).reset_index()
+yearly = rollup(cube, ['Year'])
+yearly_scores = pd.DataFrame({
+    'mean': yearly['score_mean'],
+    'median': df.groupby('Year')['AREA_BOMBING_SCORE_NORMALIZED'].median(),
+    'std': yearly['score_std']
+}).reset_index()
 yearly_scores = yearly_scores[(yearly_scores['Year'] >= 1940) & (yearly_scores['Year'] <= 1945)]
 
 plt.errorbar(yearly_scores['Year'], yearly_scores['mean'], yerr=yearly_scores['std'], 
@@ -184,12 +182,12 @@ plt.xticks(yearly_scores['Year'], fontsize=12)
 plt.ylim(0, 10)  # Consistent y-axis limit
 plt.legend(fontsize=12)
 plt.tight_layout()
-plt.savefig('plots/years/yearly_evolution.png', dpi=300)
+savefig('plots/years/yearly_evolution.png', yearly_scores, dpi=300)
 plt.close()
 
 # 2. Stacked bar chart of bombing categories by year
 plt.figure(figsize=(14, 8))
-year_cat = pd.crosstab(df['Year'], df['Score Category'])
+year_cat = counts(cube, 'Year', 'Score Category')
 year_cat = year_cat.loc[year_cat.index.astype(float).astype(int).isin(range(1940, 1946))]
 year_cat_pct = year_cat.div(year_cat.sum(axis=1), axis=0) * 100
 
@@ -214,7 +212,7 @@ for i, year in enumerate(year_cat_pct.index):
         cumulative_sum += year_cat_pct.loc[year, col]
 
 plt.tight_layout()
-plt.savefig('plots/years/category_by_year.png', dpi=300)
+savefig('plots/years/category_by_year.png', year_cat_pct, dpi=300)
 plt.close()
 
 print("Generating plots by category...")
@@ -245,17 +243,12 @@ plt.ylim(0, 10)  # Consistent y-axis limit
 plt.xticks(rotation=45, ha='right', fontsize=12)
 plt.grid(True, alpha=0.3, axis='y')
 plt.tight_layout()
-plt.savefig('plots/categories/category_comparison.png', dpi=300)
+savefig('plots/categories/category_comparison.png', cat_subset[['CATEGORY', 'AREA_BOMBING_SCORE_NORMALIZED']], cat_medians, dpi=300)
 plt.close()
 
 # 2. Heatmap of category and year
 plt.figure(figsize=(16, 10))
-pivot_data = df.pivot_table(
-    values='AREA_BOMBING_SCORE_NORMALIZED',
-    index='CATEGORY',
-    columns='Year',
-    aggfunc='mean'
-)
+pivot_data = rollup(cube, ['CATEGORY', 'Year'])['score_mean'].unstack('Year')
 # Focus on years 1940-1945 and categories with sufficient data
 pivot_filtered = pivot_data.loc[pivot_data.count(axis=1) >= 3, [y for y in range(1940, 1946) if y in pivot_data.columns]]
 pivot_filtered = pivot_filtered.dropna(thresh=3)  # Drop rows with too many NaNs
@@ -267,7 +260,7 @@ plt.title('Average Area Bombing Score by Category and Year', fontsize=18)
 plt.xlabel('Year', fontsize=14)
 plt.ylabel('Target Category', fontsize=14)
 plt.tight_layout()
-plt.savefig('plots/categories/category_year_heatmap.png', dpi=300)
+savefig('plots/categories/category_year_heatmap.png', pivot_filtered, dpi=300)
 plt.close()
 
 print("Generating plots by city...")
@@ -282,7 +275,7 @@ for city in top_cities:
 print("Creating city comparison plots...")
 # 1. Bar chart of average bombing scores for top cities
 plt.figure(figsize=(14, 8))
-city_scores = df[df['Location'].isin(top_cities)].groupby('Location')['AREA_BOMBING_SCORE_NORMALIZED'].mean().sort_values(ascending=False)
+city_scores = rollup(cube, ['Location'], where=cube['Location'].isin(top_cities))['score_mean'].sort_values(ascending=False)
 
 # Create a colormap based on the scores
 colors = plt.cm.viridis(np.linspace(0, 1, len(city_scores)))
@@ -300,18 +293,13 @@ for i, v in enumerate(city_scores):
     plt.text(i, v + 0.2, f"{v:.1f}", ha='center', fontsize=12, fontweight='bold')
 
 plt.tight_layout()
-plt.savefig('plots/cities/city_comparison.png', dpi=300)
+savefig('plots/cities/city_comparison.png', city_scores, dpi=300)
 plt.close()
 
 # 2. Evolution of bombing intensity for top 5 cities
 plt.figure(figsize=(14, 8))
 top5_cities = city_scores.index[:5]  # Top 5 most heavily bombed cities by score
-city_year_counts = df[df['Location'].isin(top5_cities)].pivot_table(
-    values='AREA_BOMBING_SCORE_NORMALIZED', 
-    index='Year', 
-    columns='Location', 
-    aggfunc='mean'
-)
+city_year_counts = rollup(cube, ['Year', 'Location'], where=cube['Location'].isin(top5_cities))['score_mean'].unstack('Location')
 
 # Filter to just 1940-1945
 city_year_counts = city_year_counts.loc[city_year_counts.index.astype(int).isin(range(1940, 1946))]
@@ -327,12 +315,12 @@ plt.grid(True, alpha=0.3)
 plt.ylim(0, 10)  # Consistent y-axis limit
 plt.legend(fontsize=12)
 plt.tight_layout()
-plt.savefig('plots/cities/city_evolution.png', dpi=300)
+savefig('plots/cities/city_evolution.png', city_year_counts, dpi=300)
 plt.close()
 
 # 3. Stacked bar chart showing proportion of raid categories for top cities
 plt.figure(figsize=(14, 8))
-city_categories = pd.crosstab(df[df['Location'].isin(top_cities)]['Location'], df[df['Location'].isin(top_cities)]['Score Category'])
+city_categories = counts(cube, 'Location', 'Score Category', where=cube['Location'].isin(top_cities))
 city_categories_pct = city_categories.div(city_categories.sum(axis=1), axis=0) * 100
 
 # Sort by proportion of area bombing (highest to lowest)
@@ -362,7 +350,7 @@ for i, city in enumerate(city_categories_pct.index):
         cumulative_sum += city_categories_pct.loc[city, col]
 
 plt.tight_layout()
-plt.savefig('plots/cities/category_by_city.png', dpi=300)
+savefig('plots/cities/category_by_city.png', city_categories_pct, dpi=300)
 plt.close()
 
 print("Visualization complete. Results saved to plots/years, plots/categories, and plots/cities directories.") 
\ No newline at end of file
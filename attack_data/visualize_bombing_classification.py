@@ -3,6 +3,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from figure_cache import savefig
 
 # Set style
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -27,7 +28,7 @@ plt.axvline(df['AREA_BOMBING_SCORE_NORMALIZED'].median(), color='red', linestyle
            label=f'Median: {df["AREA_BOMBING_SCORE_NORMALIZED"].median():.1f}')
 plt.legend()
 plt.tight_layout()
-plt.savefig('plots/area_bombing_score_distribution.png', dpi=300)
+savefig('plots/area_bombing_score_distribution.png', df['AREA_BOMBING_SCORE_NORMALIZED'], dpi=300)
 
 # 2. Scatter plot of Tonnage vs Incendiary Percentage, colored by Area Bombing Score
 print("Creating scatter plot...")
@@ -43,7 +44,7 @@ plt.title('Tonnage vs Incendiary Percentage', fontsize=16)
 plt.xlabel('Total Tons (clipped at 500)', fontsize=12)
 plt.ylabel('Incendiary Percentage', fontsize=12)
 plt.tight_layout()
-plt.savefig('plots/tonnage_vs_incendiary.png', dpi=300)
+savefig('plots/tonnage_vs_incendiary.png', df[['TOTAL_TONS', 'INCENDIARY_PERCENT', 'AREA_BOMBING_SCORE_NORMALIZED']], dpi=300)
 
 # 3. Box plot of Area Bombing Scores by Industrial vs Non-Industrial targets
 print("Creating box plot...")
@@ -54,7 +55,7 @@ plt.title('Area Bombing Scores by Target Type', fontsize=16)
 plt.xlabel('Target Type', fontsize=12)
 plt.ylabel('Area Bombing Score', fontsize=12)
 plt.tight_layout()
-plt.savefig('plots/area_bombing_by_target_type.png', dpi=300)
+savefig('plots/area_bombing_by_target_type.png', df[['Target Type', 'AREA_BOMBING_SCORE_NORMALIZED']], dpi=300)
 
 # 4. Create a table of sample raids with different area bombing scores
 print("Creating table of example raids...")
@@ -88,7 +89,7 @@ plt.figure(figsize=(10, 8))
 sns.heatmap(correlation_data.corr(), annot=True, cmap='coolwarm', fmt='.2f')
 plt.title('Correlation Between Scoring Components', fontsize=16)
 plt.tight_layout()
-plt.savefig('plots/correlation_heatmap.png', dpi=300)
+savefig('plots/correlation_heatmap.png', correlation_data, dpi=300)
 
 # 6. Bar chart of distribution by score category
 print("Creating bar chart of score categories...")
@@ -107,7 +108,7 @@ plt.xticks(rotation=45)
 for i, v in enumerate(category_counts.values):
     plt.text(i, v + 100, f"{v:,}", ha='center')
 plt.tight_layout()
-plt.savefig('plots/bombing_category_distribution.png', dpi=300)
+savefig('plots/bombing_category_distribution.png', category_counts, dpi=300)
 
 # 7. 3D component visualization
 print("Creating 3D component visualization...")
@@ -139,6 +140,6 @@ ax.set_zlim(0, 10)
 plt.colorbar(scatter, label='Area Bombing Score')
 plt.title('3D Visualization of Bombing Score Components', fontsize=16)
 plt.tight_layout()
-plt.savefig('plots/3d_component_visualization.png', dpi=300)
+savefig('plots/3d_component_visualization.png', df_sample[['TARGET_SCORE', 'TONNAGE_SCORE', 'INCENDIARY_SCORE', 'AREA_BOMBING_SCORE_NORMALIZED']], dpi=300)
 
 print("\nVisualization complete. Plots saved to 'plots/' directory.") 
\ No newline at end of file
@@ -4,6 +4,12 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 from matplotlib.colors import LinearSegmentedColormap
+from raids_cube import load_cube, rollup, counts
+from figure_cache import savefig
+from raids_dataset import load_raids
+
+RAID_COLUMNS = ['Location', 'TOTAL_TONS', 'INCENDIARY_PERCENT', 'TARGET_SCORE', 'TONNAGE_SCORE', 'INCENDIARY_SCORE',
+                'AREA_BOMBING_SCORE_NORMALIZED', 'CATEGORY', 'AIR FORCE', 'Year']
 
 # Set style
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -16,41 +22,15 @@ for dir_name in ['attack_data/plots/comparison/years', 'attack_data/plots/compar
                 'attack_data/plots/comparison/cities', 'attack_data/plots/comparison/general']:
     os.makedirs(dir_name, exist_ok=True)
 
-# Load bombing classification data
-print("Loading bombing classification data...")
-raids_classification = pd.read_csv('attack_data/processed_data/raids_area_bombing_classification_with_category.csv')
-
-# Load raids summary data with air force information
-print("Loading raids summary data...")
-raids_summary = pd.read_csv('attack_data/processed_data/raids_summary.csv')
-
-# Create raid_id in both datasets (will be the index)
-raids_classification['raid_id'] = raids_classification.index
-raids_summary['raid_id'] = raids_summary.index
-
-# Merge datasets
-print("Merging datasets...")
-df = pd.merge(
-    raids_classification,
-    raids_summary[['raid_id', 'AIR FORCE', 'DAY', 'MONTH', 'YEAR']],
-    on='raid_id',
-    how='inner'
-)
+# Load the raids of both air forces from the Parquet dataset; Year (clamped to 1941-1945)
+# and the upper-cased Location come precomputed
+print("Loading raids data...")
+df = load_raids(columns=RAID_COLUMNS, categorical=False, dataset_dir='attack_data/processed_data/raids_dataset')
+df['Year'] = df['Year'].astype(int)
 
 # Create Air Force type
 df['Air Force'] = df['AIR FORCE'].apply(lambda x: 'RAF' if x == 'R' else 'USAAF')
 
-# Clean up year data - it should be 1940s
-print("Cleaning year data...")
-df['YEAR'] = df['YEAR'].fillna(0).astype(float)  # Handle missing values
-df['Year'] = (1940 + df['YEAR']).astype(int)
-# Handle any outlier years
-df.loc[df['Year'] < 1941, 'Year'] = 1941
-df.loc[df['Year'] > 1946, 'Year'] = 1945
-
-# Create a clean location field
-df['Location'] = df['target_location'].str.strip().str.upper()
-
 # Add score category to data
 print("Creating score categories...")
 df['Score Category'] = pd.cut(df['AREA_BOMBING_SCORE_NORMALIZED'], 
@@ -58,6 +38,10 @@ df['Score Category'] = pd.cut(df['AREA_BOMBING_SCORE_NORMALIZED'],
                              labels=['Very Precise (0-2)', 'Precise (2-4)', 
                                     'Mixed (4-6)', 'Area (6-8)', 'Heavy Area (8-10)'])
 
+# Every count and mean below is read from one aggregation over these dimensions
+print("Building aggregate cube...")
+cube = load_cube(df, name='raf_usaaf', cache_dir='attack_data/processed_data/cache')
+
 # Set up a common color map for consistency
 cmap = plt.cm.viridis
 norm = plt.Normalize(0, 10)
@@ -86,12 +70,17 @@ plt.ylabel('Density', fontsize=14)
 plt.xlim(0, 10)
 plt.grid(True, alpha=0.3)
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/general/usaaf_vs_raf_score_distribution.png', dpi=300)
+savefig('attack_data/plots/comparison/general/usaaf_vs_raf_score_distribution.png', df[['AREA_BOMBING_SCORE_NORMALIZED', 'Air Force']], dpi=300)
 plt.close()
 
 # 2. Mean and median scores comparison
 plt.figure(figsize=(12, 8))
-force_stats = df.groupby('Air Force')['AREA_BOMBING_SCORE_NORMALIZED'].agg(['mean', 'median', 'std']).reset_index()
+by_force = rollup(cube, ['Air Force'])
+force_stats = pd.DataFrame({
+    'mean': by_force['score_mean'],
+    'median': df.groupby('Air Force')['AREA_BOMBING_SCORE_NORMALIZED'].median(),
+    'std': by_force['score_std']
+}).reset_index()
 
 x = np.arange(len(force_stats))
 width = 0.35
@@ -118,12 +107,12 @@ for i, v in enumerate(force_stats['median']):
     ax.text(i + width/2, v + 0.1, f"{v:.2f}", ha='center', fontsize=12)
 
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/general/usaaf_vs_raf_score_stats.png', dpi=300)
+savefig('attack_data/plots/comparison/general/usaaf_vs_raf_score_stats.png', force_stats, dpi=300)
 plt.close()
 
 # 3. Bombing categories comparison
 plt.figure(figsize=(14, 8))
-category_by_af = pd.crosstab(df['Air Force'], df['Score Category'])
+category_by_af = counts(cube, 'Air Force', 'Score Category')
 category_by_af_pct = category_by_af.div(category_by_af.sum(axis=1), axis=0) * 100
 
 # Plot side by side
@@ -147,12 +136,15 @@ for i, af in enumerate(category_by_af_pct.index):
         cumulative_sum += category_by_af_pct.loc[af, col]
 
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/general/usaaf_vs_raf_categories.png', dpi=300)
+savefig('attack_data/plots/comparison/general/usaaf_vs_raf_categories.png', category_by_af_pct, dpi=300)
 plt.close()
 
 # 4. Evolution over time
 plt.figure(figsize=(14, 8))
-yearly_scores = df.groupby(['Year', 'Air Force'])['AREA_BOMBING_SCORE_NORMALIZED'].agg(['mean', 'median']).reset_index()
+yearly_scores = pd.DataFrame({
+    'mean': rollup(cube, ['Year', 'Air Force'])['score_mean'],
+    'median': df.groupby(['Year', 'Air Force'])['AREA_BOMBING_SCORE_NORMALIZED'].median()
+}).reset_index()
 yearly_scores = yearly_scores[(yearly_scores['Year'] >= 1941) & (yearly_scores['Year'] <= 1945)]
 
 # Plot evolution of both air forces
@@ -169,12 +161,12 @@ plt.ylim(0, 10)  # Consistent y-axis limit
 plt.grid(True, alpha=0.3)
 plt.legend(fontsize=12)
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/years/yearly_evolution.png', dpi=300)
+savefig('attack_data/plots/comparison/years/yearly_evolution.png', yearly_scores, dpi=300)
 plt.close()
 
 # 5. Stacked bar chart of bombing categories by year and air force
 plt.figure(figsize=(16, 10))
-year_af_cat = pd.crosstab([df['Year'], df['Air Force']], df['Score Category'])
+year_af_cat = counts(cube, ['Year', 'Air Force'], 'Score Category')
 year_af_cat = year_af_cat.loc[year_af_cat.index.get_level_values(0).astype(int).isin(range(1941, 1946))]
 year_af_cat_pct = year_af_cat.div(year_af_cat.sum(axis=1), axis=0) * 100
 
@@ -200,7 +192,7 @@ g.set_titles("{col_name}")
 g.tight_layout()
 g.fig.suptitle('Distribution of Bombing Categories by Year and Air Force', fontsize=18, y=1.02)
 plt.legend(title='Bombing Category', bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.)
-plt.savefig('attack_data/plots/comparison/years/category_by_year_air_force.png', dpi=300, bbox_inches='tight')
+savefig('attack_data/plots/comparison/years/category_by_year_air_force.png', plot_data, dpi=300, bbox_inches='tight')
 plt.close()
 
 # 6. Incendiary percentage comparison
@@ -215,12 +207,12 @@ plt.grid(True, alpha=0.3, axis='y')
 
 # Add mean value text
 for i, af in enumerate(df['Air Force'].unique()):
-    mean_val = df[df['Air Force'] == af]['INCENDIARY_PERCENT'].mean()
+    mean_val = by_force.loc[af, 'incendiary_pct_mean']
     plt.text(i, df[df['Air Force'] == af]['INCENDIARY_PERCENT'].median() + 5, 
              f"Mean: {mean_val:.1f}%", ha='center', fontsize=12)
 
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/general/incendiary_comparison.png', dpi=300)
+savefig('attack_data/plots/comparison/general/incendiary_comparison.png', df[['Air Force', 'INCENDIARY_PERCENT']], by_force['incendiary_pct_mean'], dpi=300)
 plt.close()
 
 # City-specific visualizations
@@ -228,10 +220,10 @@ print("Creating city comparison plots...")
 
 # 1. Bar chart of average bombing scores for top cities by air force
 plt.figure(figsize=(16, 10))
-city_scores = df[df['Location'].isin(top_cities)].groupby(['Location', 'Air Force'])['AREA_BOMBING_SCORE_NORMALIZED'].mean().reset_index()
+city_scores = rollup(cube, ['Location', 'Air Force'], where=cube['Location'].isin(top_cities))['score_mean']
 
 # Pivot the data
-city_scores_pivot = city_scores.pivot(index='Location', columns='Air Force', values='AREA_BOMBING_SCORE_NORMALIZED')
+city_scores_pivot = city_scores.unstack('Air Force')
 city_scores_pivot = city_scores_pivot.fillna(0)  # Fill NaNs with 0 for cities only targeted by one air force
 
 # Sort by the maximum of RAF or USAAF scores
@@ -255,16 +247,16 @@ for i, city in enumerate(city_scores_pivot.index):
                      f"{city_scores_pivot.loc[city, af]:.1f}", ha='center', fontsize=10, fontweight='bold')
 
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/cities/city_comparison_by_air_force.png', dpi=300)
+savefig('attack_data/plots/comparison/cities/city_comparison_by_air_force.png', city_scores_pivot, dpi=300)
 plt.close()
 
 # 2. Stacked bar chart showing proportion of raid categories for top cities by air force
 for af in df['Air Force'].unique():
     plt.figure(figsize=(14, 8))
-    af_data = df[(df['Location'].isin(top_cities)) & (df['Air Force'] == af)]
+    af_cells = cube['Location'].isin(top_cities) & (cube['Air Force'] == af)
     
-    if len(af_data) > 0:
-        city_categories = pd.crosstab(af_data['Location'], af_data['Score Category'])
+    if cube.loc[af_cells, 'raids'].sum() > 0:
+        city_categories = counts(cube, 'Location', 'Score Category', where=af_cells)
         city_categories_pct = city_categories.div(city_categories.sum(axis=1), axis=0) * 100
 
         # Sort by proportion of area bombing (highest to lowest)
@@ -294,7 +286,7 @@ for af in df['Air Force'].unique():
                 cumulative_sum += city_categories_pct.loc[city, col]
 
         plt.tight_layout()
-        plt.savefig(f'attack_data/plots/comparison/cities/category_by_city_{af.lower()}.png', dpi=300)
+        savefig(f'attack_data/plots/comparison/cities/category_by_city_{af.lower()}.png', city_categories_pct, dpi=300)
     plt.close()
 
 # 3. Tonnage comparison
@@ -313,12 +305,12 @@ for i, af in enumerate(df['Air Force'].unique()):
              f"Mean: {mean_val:.1f} tons", ha='center', fontsize=12)
 
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/general/tonnage_comparison.png', dpi=300)
+savefig('attack_data/plots/comparison/general/tonnage_comparison.png', df[['Air Force', 'TOTAL_TONS']], dpi=300)
 plt.close()
 
 # 4. Target category comparison
 plt.figure(figsize=(16, 10))
-target_type_af = pd.crosstab(df['CATEGORY'], df['Air Force'])
+target_type_af = counts(cube, 'CATEGORY', 'Air Force')
 target_type_af_pct = target_type_af.div(target_type_af.sum(axis=0), axis=1) * 100
 
 # Sort by difference between RAF and USAAF
@@ -349,7 +341,7 @@ for i, cat in enumerate(target_type_af_pct.index):
                     fontsize=10, fontweight='bold', color='white')
 
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/general/target_category_comparison.png', dpi=300)
+savefig('attack_data/plots/comparison/general/target_category_comparison.png', target_type_af_pct, dpi=300)
 plt.close()
 
 # 5. Scatter plot of Tonnage vs Incendiary Score colored by Air Force
@@ -371,7 +363,7 @@ plt.ylim(0, 100)  # Enforce consistent y-axis limits
 plt.grid(True, alpha=0.3)
 plt.legend(fontsize=12)
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/general/tonnage_vs_incendiary_by_af.png', dpi=300)
+savefig('attack_data/plots/comparison/general/tonnage_vs_incendiary_by_af.png', df[['TOTAL_TONS', 'INCENDIARY_PERCENT', 'Air Force']], dpi=300)
 plt.close()
 
 # 6. Hexbin plot for better visualization of density
@@ -382,7 +374,7 @@ g.set_axis_labels("Total Tons (clipped at 500)", "Incendiary Percentage")
 g.set_titles("{col_name}")
 g.add_legend()
 plt.tight_layout()
-plt.savefig('attack_data/plots/comparison/general/tonnage_vs_incendiary_hexbin.png', dpi=300)
+savefig('attack_data/plots/comparison/general/tonnage_vs_incendiary_hexbin.png', df[['TOTAL_TONS', 'INCENDIARY_PERCENT', 'Air Force']], dpi=300)
 plt.close()
 
 print("All visualizations completed!") 
\ No newline at end of file
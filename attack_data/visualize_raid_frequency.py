@@ -6,6 +6,8 @@ import os
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.ticker import MaxNLocator
 from scipy.cluster.hierarchy import linkage, dendrogram, fcluster
+from raids_loader import load_cleaned_raids
+from figure_cache import savefig
 
 # Set style
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -19,50 +21,8 @@ os.makedirs('plots/raid_frequency/comprehensive', exist_ok=True)
 
 # Load USAAF data
 print("Loading USAAF-only data...")
-df = pd.read_csv('processed_data/usaaf/usaaf_raids_full.csv')
-
-# Clean up year data
-print("Cleaning year and date data...")
-df['YEAR'] = df['YEAR'].fillna(0).astype(float)
-df['Year'] = (1940 + df['YEAR']).astype(int)
-# Handle any outlier years
-df.loc[df['Year'] < 1941, 'Year'] = 1941
-df.loc[df['Year'] > 1946, 'Year'] = 1945
-
-# Clean up month data
-df['MONTH'] = df['MONTH'].fillna(1).astype(float).astype(int)
-df['Month'] = df['MONTH'].clip(1, 12)  # Ensure valid month values
-
-# Clean up day data
-def clean_day(day_value):
-    if pd.isna(day_value):
-        return 1
-    day_str = str(day_value)
-    if '-' in day_str:
-        day_str = day_str.split('-')[0]
-    try:
-        return int(float(day_str))
-    except (ValueError, TypeError):
-        return 1
-
-df['DAY'] = df['DAY'].apply(clean_day)
-df['Day'] = df['DAY'].clip(1, 31)  # Ensure valid day values
-
-# Create a clean location field
-df['Location'] = df['target_location'].str.strip().str.upper()
-
-# Create date fields
-df['Date'] = pd.to_datetime(
-    df['Year'].astype(str) + '-' + 
-    df['Month'].astype(str).str.zfill(2) + '-' + 
-    df['Day'].astype(str).str.zfill(2),
-    errors='coerce'
-)
-
-# Create quarter-year field manually
-df['Year_Quarter'] = df['Year'].astype(str) + '-Q' + ((df['Month']-1)//3 + 1).astype(str)
-# Create quarter field - use string representation instead of PeriodIndex
-df['Quarter'] = df['Year'].astype(str) + 'Q' + ((df['Month']-1)//3 + 1).astype(str)
+# Cleaned Year/Month/Day, Location, Date and Quarter fields come from the shared loader
+df = load_cleaned_raids('processed_data/usaaf/usaaf_raids_full.csv')
 
 print("Analyzing raid frequency by location and quarter...")
 
@@ -104,7 +64,7 @@ plt.xticks(range(len(raid_counts)), raid_counts.index.astype(str), rotation=45,
 plt.grid(True, alpha=0.3)
 plt.legend(title='Location', fontsize=12, title_fontsize=14)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/raids_by_location_per_quarter.png', dpi=300)
+savefig('plots/raid_frequency/raids_by_location_per_quarter.png', raid_counts, top_locations, dpi=300)
 plt.close()
 
 # Create a stacked area chart of raid frequency
@@ -139,7 +99,7 @@ plt.xticks(range(len(raid_counts)), raid_counts.index.astype(str), rotation=45,
 plt.grid(True, alpha=0.3)
 plt.legend(title='Location', fontsize=12, title_fontsize=14, loc='upper left')
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/stacked_area_raids_by_location.png', dpi=300)
+savefig('plots/raid_frequency/stacked_area_raids_by_location.png', raid_counts, top_locations, dpi=300)
 plt.close()
 
 # Create a heatmap of raid frequency
@@ -156,7 +116,7 @@ plt.title('Heatmap of USAAF Raids by Location and Quarter', fontsize=18)
 plt.xlabel('Quarter', fontsize=14)
 plt.ylabel('Location', fontsize=14)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/heatmap_raids_by_location_quarter.png', dpi=300)
+savefig('plots/raid_frequency/heatmap_raids_by_location_quarter.png', raid_counts, dpi=300)
 plt.close()
 
 # Create a grouped bar chart for quarterly comparison
@@ -202,7 +162,7 @@ for year in range(1942, 1946):
     plt.grid(True, alpha=0.3, axis='y')
     plt.legend(title='Quarter', fontsize=12, title_fontsize=14)
     plt.tight_layout()
-    plt.savefig(f'plots/raid_frequency/raids_by_location_quarters_{year}.png', dpi=300)
+    savefig(f'plots/raid_frequency/raids_by_location_quarters_{year}.png', quarter_location_counts, dpi=300)
     plt.close()
 
 # Create a line chart showing the total raid count per quarter
@@ -219,7 +179,7 @@ plt.grid(True, alpha=0.3)
 plt.xticks(rotation=45, ha='right')
 plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))  # Ensure integer y-axis labels
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/total_raids_per_quarter.png', dpi=300)
+savefig('plots/raid_frequency/total_raids_per_quarter.png', quarterly_totals, dpi=300)
 plt.close()
 
 # Create bubble chart showing raid frequency, tonnage, and area bombing score
@@ -274,7 +234,7 @@ for location in top_locations:
             )
     
     plt.tight_layout()
-    plt.savefig(f'plots/raid_frequency/bubble_chart_{location.lower().replace(" ", "_")}.png', dpi=300)
+    savefig(f'plots/raid_frequency/bubble_chart_{location.lower().replace(" ", "_")}.png', location_data, dpi=300)
     plt.close()
 
 # ------- NEW COMPREHENSIVE ANALYSIS FOR ALL LOCATIONS -------
@@ -342,7 +302,7 @@ if len(raid_pattern_data_filtered) > 1:  # Only cluster if we have enough data
         leaf_font_size=8,
     )
     plt.tight_layout()
-    plt.savefig('plots/raid_frequency/comprehensive/location_clustering_dendrogram.png', dpi=300)
+    savefig('plots/raid_frequency/comprehensive/location_clustering_dendrogram.png', raid_pattern_data_filtered, dpi=300)
     plt.close()
     
     # Get number of clusters
@@ -386,7 +346,7 @@ plt.title('Yearly Raid Frequency - Top 50 Locations (USAAF)', fontsize=18)
 plt.xlabel('Year', fontsize=14)
 plt.ylabel('Location', fontsize=14)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/top50_locations_yearly_heatmap.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/top50_locations_yearly_heatmap.png', yearly_raid_counts[top_50_by_raids], dpi=300)
 plt.close()
 
 # 5. Create a heatmap with tonnage information
@@ -419,7 +379,7 @@ plt.title('Yearly Bombing Tonnage - Top 50 Locations (USAAF)', fontsize=18)
 plt.xlabel('Year', fontsize=14)
 plt.ylabel('Location', fontsize=14)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/top50_tonnage_yearly_heatmap.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/top50_tonnage_yearly_heatmap.png', yearly_tonnage[top_50_by_tonnage], dpi=300)
 plt.close()
 
 # 6. Combined metric: Create a metric that combines raid frequency and tonnage
@@ -447,7 +407,7 @@ plt.title('Yearly Bombing Intensity (Tons per Raid) - Top 50 Locations (USAAF)',
 plt.xlabel('Year', fontsize=14)
 plt.ylabel('Location', fontsize=14)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/top50_intensity_yearly_heatmap.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/top50_intensity_yearly_heatmap.png', yearly_tons_per_raid[top_50_by_intensity], dpi=300)
 plt.close()
 
 # 7. Create quarterly aggregate visualizations
@@ -484,7 +444,7 @@ lines2, labels2 = ax2.get_legend_handles_labels()
 ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', fontsize=12)
 
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/quarterly_all_locations_raids_and_tonnage.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/quarterly_all_locations_raids_and_tonnage.png', quarterly_all_locations_raids, quarterly_all_locations_tonnage, all_quarters, dpi=300)
 plt.close()
 
 # 8. Create a visualization showing raid frequency distribution by location
@@ -501,7 +461,7 @@ plt.xlabel('Number of Raids', fontsize=14)
 plt.ylabel('Number of Locations', fontsize=14)
 plt.grid(True, alpha=0.3)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/raid_count_distribution.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/raid_count_distribution.png', all_raided_locations, dpi=300)
 plt.close()
 
 # Create a log-scale version for better visualization
@@ -512,7 +472,7 @@ plt.xlabel('Number of Raids', fontsize=14)
 plt.ylabel('Number of Locations (Log Scale)', fontsize=14)
 plt.grid(True, alpha=0.3)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/raid_count_distribution_log.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/raid_count_distribution_log.png', all_raided_locations, dpi=300)
 plt.close()
 
 # 9. Tonnage distribution by location
@@ -527,7 +487,7 @@ plt.xlabel('Total Tons', fontsize=14)
 plt.ylabel('Number of Locations', fontsize=14)
 plt.grid(True, alpha=0.3)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/tonnage_distribution.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/tonnage_distribution.png', location_tonnage, dpi=300)
 plt.close()
 
 # Log-scale version
@@ -538,7 +498,7 @@ plt.xlabel('Total Tons', fontsize=14)
 plt.ylabel('Number of Locations (Log Scale)', fontsize=14)
 plt.grid(True, alpha=0.3)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/tonnage_distribution_log.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/tonnage_distribution_log.png', location_tonnage, dpi=300)
 plt.close()
 
 # 10. Create a scatterplot of raid count vs. tonnage for all locations
@@ -583,7 +543,7 @@ for i, row in top_points.iterrows():
     )
 
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/raid_count_vs_tonnage_scatter.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/raid_count_vs_tonnage_scatter.png', location_data, dpi=300)
 plt.close()
 
 # 11. Create a treemap visualization of top 100 locations by total tonnage
@@ -607,7 +567,7 @@ try:
     plt.axis('off')
     plt.title('Treemap of Top 100 Locations by Total Bombing Tonnage (USAAF)', fontsize=20)
     plt.tight_layout()
-    plt.savefig('plots/raid_frequency/comprehensive/top100_tonnage_treemap.png', dpi=300)
+    savefig('plots/raid_frequency/comprehensive/top100_tonnage_treemap.png', top100_tonnage, dpi=300)
     plt.close()
 except ImportError:
     print("Squarify package not found, skipping treemap visualization")
@@ -654,7 +614,7 @@ ax = sns.heatmap(
 )
 plt.title('Monthly Raid Frequency Calendar (USAAF)', fontsize=18)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/monthly_raid_calendar.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/monthly_raid_calendar.png', raid_matrix, dpi=300)
 plt.close()
 
 # Create tonnage calendar heatmap
@@ -671,7 +631,7 @@ ax = sns.heatmap(
 )
 plt.title('Monthly Bombing Tonnage Calendar (USAAF)', fontsize=18)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/monthly_tonnage_calendar.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/monthly_tonnage_calendar.png', tonnage_matrix, dpi=300)
 plt.close()
 
 # Create average tonnage per raid calendar
@@ -690,7 +650,7 @@ ax = sns.heatmap(
 )
 plt.title('Monthly Average Bombing Intensity Calendar (USAAF)', fontsize=18)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/comprehensive/monthly_avg_tonnage_calendar.png', dpi=300)
+savefig('plots/raid_frequency/comprehensive/monthly_avg_tonnage_calendar.png', avg_tonnage_matrix, dpi=300)
 plt.close()
 
 print("Comprehensive raid frequency and tonnage analysis complete. Results saved to plots/raid_frequency/comprehensive/ directory.") 
\ No newline at end of file
@@ -5,6 +5,8 @@ import seaborn as sns
 import os
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.ticker import MaxNLocator
+from raids_loader import load_cleaned_raids
+from figure_cache import savefig
 
 # Set style
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -17,50 +19,8 @@ os.makedirs('plots/raid_frequency/bombing_scores', exist_ok=True)
 
 # Load USAAF data
 print("Loading USAAF-only data...")
-df = pd.read_csv('processed_data/usaaf/usaaf_raids_full.csv')
-
-# Clean up year data
-print("Cleaning year and date data...")
-df['YEAR'] = df['YEAR'].fillna(0).astype(float)
-df['Year'] = (1940 + df['YEAR']).astype(int)
-# Handle any outlier years
-df.loc[df['Year'] < 1941, 'Year'] = 1941
-df.loc[df['Year'] > 1946, 'Year'] = 1945
-
-# Clean up month data
-df['MONTH'] = df['MONTH'].fillna(1).astype(float).astype(int)
-df['Month'] = df['MONTH'].clip(1, 12)  # Ensure valid month values
-
-# Clean up day data
-def clean_day(day_value):
-    if pd.isna(day_value):
-        return 1
-    day_str = str(day_value)
-    if '-' in day_str:
-        day_str = day_str.split('-')[0]
-    try:
-        return int(float(day_str))
-    except (ValueError, TypeError):
-        return 1
-
-df['DAY'] = df['DAY'].apply(clean_day)
-df['Day'] = df['DAY'].clip(1, 31)  # Ensure valid day values
-
-# Create a clean location field
-df['Location'] = df['target_location'].str.strip().str.upper()
-
-# Create date fields
-df['Date'] = pd.to_datetime(
-    df['Year'].astype(str) + '-' + 
-    df['Month'].astype(str).str.zfill(2) + '-' + 
-    df['Day'].astype(str).str.zfill(2),
-    errors='coerce'
-)
-
-# Create quarter-year field manually
-df['Year_Quarter'] = df['Year'].astype(str) + '-Q' + ((df['Month']-1)//3 + 1).astype(str)
-# Create quarter field - use string representation instead of PeriodIndex
-df['Quarter'] = df['Year'].astype(str) + 'Q' + ((df['Month']-1)//3 + 1).astype(str)
+# Cleaned Year/Month/Day, Location, Date and Quarter fields come from the shared loader
+df = load_cleaned_raids('processed_data/usaaf/usaaf_raids_full.csv')
 
 print("Analyzing bombing scores in relation to raid frequency and tonnage...")
 
@@ -110,7 +70,7 @@ for i, row in top_points.iterrows():
     )
 
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/bombing_scores/raid_count_vs_tonnage_by_bombing_score.png', dpi=300)
+savefig('plots/raid_frequency/bombing_scores/raid_count_vs_tonnage_by_bombing_score.png', location_data, dpi=300)
 plt.close()
 
 # 2. Create a heatmap of average area bombing scores by location and year
@@ -157,7 +117,7 @@ plt.title('Yearly Area Bombing Scores by Location (USAAF)', fontsize=18)
 plt.xlabel('Year', fontsize=14)
 plt.ylabel('Location', fontsize=14)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/bombing_scores/yearly_bombing_scores_heatmap.png', dpi=300)
+savefig('plots/raid_frequency/bombing_scores/yearly_bombing_scores_heatmap.png', yearly_bombing_scores, dpi=300)
 plt.close()
 
 # 3. Create a combined metric of tonnage-weighted area bombing scores by location
@@ -206,7 +166,7 @@ for i, row in enumerate(top_locations_by_weighted_score.iterrows()):
     )
 
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/bombing_scores/top_locations_by_tonnage_weighted_score.png', dpi=300)
+savefig('plots/raid_frequency/bombing_scores/top_locations_by_tonnage_weighted_score.png', top_locations_by_weighted_score, dpi=300)
 plt.close()
 
 # 4. Create seasonal trend analysis of area bombing scores
@@ -241,7 +201,7 @@ lines2, labels2 = ax2.get_legend_handles_labels()
 ax1.legend(['Area Bombing Score', 'Number of Raids'], loc='upper right', fontsize=12)
 
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/bombing_scores/seasonal_bombing_score_trends.png', dpi=300)
+savefig('plots/raid_frequency/bombing_scores/seasonal_bombing_score_trends.png', monthly_bombing_scores, monthly_raid_counts, dpi=300)
 plt.close()
 
 # 5. Create evolution of bombing approach over time (quarterly)
@@ -296,7 +256,7 @@ for i, row in enumerate(quarterly_metrics.itertuples()):
         )
 
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/bombing_scores/quarterly_bombing_approach_evolution.png', dpi=300)
+savefig('plots/raid_frequency/bombing_scores/quarterly_bombing_approach_evolution.png', quarterly_metrics, dpi=300)
 plt.close()
 
 # 6. Create a calendar heatmap of area bombing scores
@@ -336,7 +296,7 @@ ax = sns.heatmap(
 )
 plt.title('Monthly Area Bombing Score Calendar (USAAF)', fontsize=18)
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/bombing_scores/monthly_bombing_score_calendar.png', dpi=300)
+savefig('plots/raid_frequency/bombing_scores/monthly_bombing_score_calendar.png', score_matrix, dpi=300)
 plt.close()
 
 # 7. Create a scatter plot of bombing intensity vs area bombing score by location
@@ -399,7 +359,7 @@ for i, row in top_by_score.iterrows():
     )
 
 plt.tight_layout()
-plt.savefig('plots/raid_frequency/bombing_scores/bombing_intensity_vs_area_score.png', dpi=300)
+savefig('plots/raid_frequency/bombing_scores/bombing_intensity_vs_area_score.png', location_data, dpi=300)
 plt.close()
 
 # 8. Create 3D scatter plot with Raid Count, Tonnage, and Area Bombing Score
@@ -438,7 +398,7 @@ try:
         )
     
     plt.tight_layout()
-    plt.savefig('plots/raid_frequency/bombing_scores/3d_raids_tonnage_area_score.png', dpi=300)
+    savefig('plots/raid_frequency/bombing_scores/3d_raids_tonnage_area_score.png', location_data, top_points, dpi=300)
     plt.close()
 except ImportError:
     print("3D plotting requires mpl_toolkits.mplot3d, skipping 3D visualization.")
@@ -487,7 +447,7 @@ if 'CATEGORY' in df.columns:
     plt.xlabel('Year', fontsize=14)
     plt.ylabel('Target Category', fontsize=14)
     plt.tight_layout()
-    plt.savefig('plots/raid_frequency/bombing_scores/category_year_bombing_scores.png', dpi=300)
+    savefig('plots/raid_frequency/bombing_scores/category_year_bombing_scores.png', category_year_scores, dpi=300)
     plt.close()
     
     # Create bar chart of category bombing scores
@@ -524,7 +484,7 @@ if 'CATEGORY' in df.columns:
         )
     
     plt.tight_layout()
-    plt.savefig('plots/raid_frequency/bombing_scores/category_bombing_scores.png', dpi=300)
+    savefig('plots/raid_frequency/bombing_scores/category_bombing_scores.png', category_scores, dpi=300)
     plt.close()
 
 print("Area bombing score visualizations complete. Results saved to plots/raid_frequency/bombing_scores/ directory.") 
\ No newline at end of file
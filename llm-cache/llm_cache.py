@@ -0,0 +1,196 @@
+# llm-cache/llm_cache.py
+"""Content-addressed cache for OpenAI chat completions.
+
+Each request is keyed by a SHA-256 of its canonical JSON (model, messages,
+sampling parameters and a retry `variant`) and the returned message content
+is stored in SQLite, so re-running a pipeline stage over the same pages
+replays earlier answers instead of paying for them again.
+
+Configured through environment variables:
+
+    LLM_CACHE_PATH         database file (default: llm_cache.sqlite next to this module)
+    LLM_CACHE_MODE         "readwrite" (default), "replay" to read only and fail on a miss, or "off"
+    LLM_CACHE_TTL          seconds before an entry expires (default: never)
+    LLM_CACHE_MAX_ENTRIES  keep at most this many entries, evicting least recently used
+                           (hit times are buffered and written in batches)
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+import pathlib
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite")
+MODES = ("readwrite", "replay", "off")
+EVICT_EVERY = 100  # Run eviction after this many inserts
+ACCESS_FLUSH_EVERY = 100  # Write buffered access times after this many hits
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a request has no cached response."""
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_PATH, mode="readwrite", ttl=None, max_entries=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        # key -> last hit time, written in batches; only kept when LRU eviction is on
+        self.pending_access = {}
+        self.lock = threading.Lock()
+
+        if mode == "replay":
+            # Replay never writes, so it also works on a read-only copy of the cache
+            uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False)
+            return
+
+        # One connection shared by worker threads; SQLite's own locking and
+        # WAL mode handle several pipeline processes writing concurrently.
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " response TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(request, variant=0):
+        payload = json.dumps({"request": request, "variant": variant},
+                             sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created = row
+            now = time.time()
+            if self.ttl is not None and now - created > self.ttl:
+                if self.mode != "replay":
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.conn.commit()
+                return None
+            # Access times only order LRU eviction, so hits don't write unless it is on
+            if self.max_entries is not None and self.mode != "replay":
+                self.pending_access[key] = now
+                if len(self.pending_access) >= ACCESS_FLUSH_EVERY:
+                    self._flush_access()
+            return response
+
+    def _flush_access(self):
+        """Write the buffered access times in one transaction; the caller holds the lock."""
+        if self.pending_access:
+            self.conn.executemany("UPDATE responses SET accessed = ? WHERE key = ?",
+                                  [(accessed, key) for key, accessed in self.pending_access.items()])
+            self.conn.commit()
+            self.pending_access = {}
+
+    def put(self, key, model, response):
+        with self.lock:
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            self.conn.commit()
+            self.inserts += 1
+        if self.inserts % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries and trim the table to `max_entries`."""
+        with self.lock:
+            self._flush_access()
+            removed = 0
+            if self.ttl is not None:
+                removed += self.conn.execute(
+                    "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+                ).rowcount
+            if self.max_entries is not None:
+                removed += self.conn.execute(
+                    "DELETE FROM responses WHERE key NOT IN"
+                    " (SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)",
+                    (self.max_entries,),
+                ).rowcount
+            self.conn.commit()
+        if removed:
+            logging.debug(f"Evicted {removed} cached responses")
+        return removed
+
+    def stats(self):
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def chat(self, client, variant=0, **request):
+        """Return the message content for `client.chat.completions.create(**request)`.
+
+        `variant` distinguishes retries of the same prompt, so a caller that
+        rejects a cached answer and retries gets the next recorded attempt
+        rather than the same response again.
+        """
+        if self.mode == "off":
+            response = client.chat.completions.create(**request)
+            return response.choices[0].message.content
+
+        key = self.make_key(request, variant)
+        cached = self.get(key)
+        with self.lock:
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        if self.mode == "replay":
+            raise CacheMissError(f"No cached response for request {key[:12]} (model={request.get('model')})")
+
+        response = client.chat.completions.create(**request)
+        content = response.choices[0].message.content
+        self.put(key, request.get("model"), content)
+        return content
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide cache configured from the environment."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            ttl = os.getenv("LLM_CACHE_TTL")
+            max_entries = os.getenv("LLM_CACHE_MAX_ENTRIES")
+            _default_cache = ResponseCache(
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_PATH),
+                mode=os.getenv("LLM_CACHE_MODE", "readwrite"),
+                ttl=float(ttl) if ttl else None,
+                max_entries=int(max_entries) if max_entries else None,
+            )
+    return _default_cache
+
+
+def cached_chat(client, variant=0, **request):
+    """Cached drop-in for `client.chat.completions.create(**request)` returning the message content."""
+    return get_cache().chat(client, variant=variant, **request)
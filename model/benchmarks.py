@@ -0,0 +1,489 @@
+# benchmarks.py
+"""Timing comparisons for the bombing model.
+
+    python benchmarks.py turns [NODES]
+    python benchmarks.py output [NODES]
+    python benchmarks.py incremental [NODES]
+    python benchmarks.py paths [NODES]
+    python benchmarks.py ensemble [NODES]
+"""
+
+import os
+import time
+import random
+import logging
+import argparse
+import itertools
+import tempfile
+from typing import List, Tuple, Dict
+from dataclasses import asdict
+
+import numpy as np
+import networkx as nx
+import pyarrow.parquet as pq
+
+import model
+import ensemble
+
+# (nodes, edges) of the networks benchmarked, and the turns run on each
+SIZES = [(1000, 4000), (10000, 40000), (100000, 400000)]
+TURNS = 20
+# Paths sampled per endpoint for the network output benchmarks
+SAMPLED_PATHS = 2000
+# Turns of the incremental output benchmark, enough to cross several resyncs
+INCREMENTAL_TURNS = 200
+# Replicates per run of the ensemble benchmark, and its turns per simulation
+ENSEMBLE_REPLICATES = 24
+ENSEMBLE_TURNS = 100
+# Endpoints whose path cache is checked against nx.all_simple_paths
+CHECKED_ENDPOINTS = 5
+
+
+class WarfareNetworkScalar:
+    """model.WarfareNetwork with its state in dicts keyed by node and edge; the reference for the benchmarks."""
+
+    def __init__(self, num_nodes: int, num_edges: int, workers_per_node: int = 10):
+        # Initialize network
+        logging.debug(f"Initializing WarfareNetwork with {num_nodes} nodes and {num_edges} edges.")
+        self.G = nx.gnm_random_graph(num_nodes, num_edges, directed=True)
+        self.workers = {node: workers_per_node for node in self.G.nodes()}
+        self.max_workers = workers_per_node
+        self.initial_workers = workers_per_node * num_nodes
+        self.replacement_workers = self.initial_workers
+        self.node_capacity = {node: 1.0 for node in self.G.nodes()}
+        self.edge_capacity = {edge: 1.0 for edge in self.G.edges()}
+        self.total_workers_killed = 0
+        
+        # Identify endpoint nodes (nodes with no outgoing edges)
+        self.endpoint_nodes = [node for node in self.G.nodes() 
+                             if self.G.out_degree(node) == 0]
+        logging.debug(f"Identified endpoint nodes: {self.endpoint_nodes}")
+        
+        # Cache for paths to endpoints
+        self._path_cache = self._build_path_cache()
+
+    def _build_path_cache(self) -> Dict[int, List[List[int]]]:
+        """Build cache of all paths to each endpoint with optimizations"""
+        logging.debug("Building path cache for endpoints.")
+        cache = {}
+        
+        for endpoint in self.endpoint_nodes:
+            # Create a subgraph of nodes that can reach this endpoint
+            # First, reverse the graph to find predecessors
+            pred = nx.predecessor(self.G, endpoint)
+            reachable_nodes = set(pred.keys())
+            
+            # Create subgraph of only relevant nodes
+            subgraph = self.G.subgraph(reachable_nodes)
+            
+            # Limit path length to prevent exponential explosion
+            MAX_PATH_LENGTH = 5  # Adjust this value based on your needs
+            all_paths = []
+            
+            for node in reachable_nodes:
+                if node != endpoint:
+                    try:
+                        # Use a generator and limit the number of paths per node
+                        paths = list(nx.all_simple_paths(
+                            subgraph, 
+                            node, 
+                            endpoint, 
+                            cutoff=MAX_PATH_LENGTH
+                        ))
+                        # Limit the number of paths per node if needed
+                        MAX_PATHS_PER_NODE = 10  # Adjust based on needs
+                        all_paths.extend(paths[:MAX_PATHS_PER_NODE])
+                    except nx.NetworkXNoPath:
+                        continue
+            
+            cache[endpoint] = all_paths
+            logging.debug(f"Cached {len(all_paths)} paths for endpoint {endpoint}.")
+        
+        return cache
+
+    def calculate_path_value(self, path: List[int]) -> float:
+        """Calculate the cascading value of a path based on node capacities"""
+        value = 1.0
+        for node in path:
+            value *= self.node_capacity[node]
+            # If any node is completely destroyed, the whole path is worthless
+            if value == 0:
+                logging.debug(f"Path {path} is worthless due to destroyed node.")
+                return 0
+        logging.debug(f"Calculated path value for {path}: {value}")
+        return value
+
+    def calculate_network_output(self) -> Tuple[float, Dict[int, float]]:
+        """Calculate total network output and individual endpoint outputs"""
+        total_output = 0.0
+        endpoint_outputs = {}
+        
+        for endpoint in self.endpoint_nodes:
+            all_paths = self._path_cache[endpoint]
+            
+            # Calculate unique nodes in all paths to this endpoint
+            unique_nodes = set()
+            for path in all_paths:
+                unique_nodes.update(path)
+            
+            # Calculate the value of each path and sum them
+            path_values = sum(self.calculate_path_value(path) for path in all_paths)
+            
+            # Calculate endpoint output weighted by number of unique nodes
+            if all_paths:  # Only if there are paths to this endpoint
+                endpoint_output = path_values * len(unique_nodes)
+                endpoint_outputs[endpoint] = endpoint_output
+                total_output += endpoint_output
+                logging.debug(f"Endpoint {endpoint} output: {endpoint_output}")
+            else:
+                endpoint_outputs[endpoint] = 0.0
+        
+        logging.debug(f"Total network output calculated: {total_output}")
+        return total_output, endpoint_outputs
+
+    def precision_bombing(self, num_targets: int) -> Tuple[int, int]:
+        """Precision bombing targets specific nodes/edges"""
+        logging.debug(f"Executing precision bombing with {num_targets} targets.")
+        targets = random.sample(list(self.G.nodes()) + list(self.G.edges()), 
+                              min(num_targets, len(self.G.nodes()) + len(self.G.edges())))
+        nodes_hit = 0
+        edges_hit = 0
+        
+        for target in targets:
+            if isinstance(target, int):  # Node
+                damage = random.uniform(0.5, 1.0)  # Variable damage
+                self.node_capacity[target] *= max(0, 1 - damage)
+                nodes_hit += 1
+                logging.debug(f"Node {target} hit with damage {damage}. New capacity: {self.node_capacity[target]}")
+            else:  # Edge
+                damage = random.uniform(0.5, 1.0)
+                self.edge_capacity[target] *= max(0, 1 - damage)
+                edges_hit += 1
+                logging.debug(f"Edge {target} hit with damage {damage}. New capacity: {self.edge_capacity[target]}")
+                
+        return nodes_hit, edges_hit
+
+    def area_bombing(self, num_targets: int) -> Tuple[int, int, int]:
+        """Area bombing affects infrastructure and workers"""
+        logging.debug(f"Executing area bombing with {num_targets} targets.")
+        num_workers_per_target = 5  # Reduced worker casualties
+        nodes_hit, edges_hit = self.precision_bombing(num_targets)
+        
+        # Handle worker casualties
+        workers_killed = 0
+        max_workers_to_remove = min(
+            num_targets * num_workers_per_target,
+            int((sum(self.workers.values()) + self.replacement_workers) * 0.1)  # Max 10% casualties
+        )
+        
+        workers_to_remove = max_workers_to_remove
+        
+        while workers_to_remove > 0:
+            if self.replacement_workers > 0:
+                remove_from_replacement = min(workers_to_remove, self.replacement_workers)
+                self.replacement_workers -= remove_from_replacement
+                workers_to_remove -= remove_from_replacement
+                workers_killed += remove_from_replacement
+                logging.debug(f"Removed {remove_from_replacement} workers from replacement pool.")
+            else:
+                node = random.choice(list(self.G.nodes()))
+                remove_from_node = min(workers_to_remove, self.workers[node])
+                self.workers[node] -= remove_from_node
+                workers_to_remove -= remove_from_node
+                workers_killed += remove_from_node
+                logging.debug(f"Removed {remove_from_node} workers from node {node}.")
+        
+        self.total_workers_killed += workers_killed
+        logging.debug(f"Total workers killed in area bombing: {workers_killed}")
+        return nodes_hit, edges_hit, workers_killed
+
+    def repair_and_replenish(self):
+        """Handle repairs and worker replenishment"""
+        logging.debug("Repairing and replenishing workers.")
+        # Repair nodes based on worker count
+        for node in self.G.nodes():
+            if self.node_capacity[node] < 1.0 and self.workers[node] > 0:
+                worker_efficiency = self.workers[node] / self.max_workers
+                repair_amount = 0.25 * worker_efficiency * (1.0 - self.node_capacity[node])
+                self.node_capacity[node] = min(1.0, self.node_capacity[node] + repair_amount)
+                logging.debug(f"Node {node} repaired by {repair_amount}. New capacity: {self.node_capacity[node]}")
+
+        # Repair edges (slower than nodes)
+        for edge in self.G.edges():
+            if self.edge_capacity[edge] < 1.0:
+                repair_amount = 0.1 * (1.0 - self.edge_capacity[edge])
+                self.edge_capacity[edge] = min(1.0, self.edge_capacity[edge] + repair_amount)
+                logging.debug(f"Edge {edge} repaired by {repair_amount}. New capacity: {self.edge_capacity[edge]}")
+
+        # Replenish workers (daily growth rate of 2%/365)
+        daily_growth_rate = 0.02 / 365
+        total_current_workers = sum(self.workers.values()) + self.replacement_workers
+        
+        if total_current_workers < self.initial_workers:
+            new_workers = int(total_current_workers * daily_growth_rate)
+            self.replacement_workers += new_workers
+            logging.debug(f"Replenished {new_workers} workers to replacement pool.")
+
+        # Distribute replacement workers
+        for node in self.G.nodes():
+            if self.workers[node] < self.max_workers and self.replacement_workers > 0:
+                workers_needed = self.max_workers - self.workers[node]
+                workers_added = min(workers_needed, self.replacement_workers)
+                self.workers[node] += workers_added
+                self.replacement_workers -= workers_added
+                logging.debug(f"Added {workers_added} workers to node {node}. Total now: {self.workers[node]}")
+
+    def get_statistics(self, turn: int) -> model.SimulationStats:
+        """Gather current simulation statistics"""
+        total_workers = sum(self.workers.values())
+        destroyed_nodes = sum(1 for cap in self.node_capacity.values() if cap == 0.0)
+        damaged_nodes = sum(1 for cap in self.node_capacity.values() if 0.0 < cap < 1.0)
+        destroyed_edges = sum(1 for cap in self.edge_capacity.values() if cap == 0.0)
+        damaged_edges = sum(1 for cap in self.edge_capacity.values() if 0.0 < cap < 1.0)
+        
+        network_output, endpoint_outputs = self.calculate_network_output()
+        
+        logging.debug(f"Gathered statistics for turn {turn}.")
+        return model.SimulationStats(
+            turn=turn,
+            network_output=network_output,
+            total_workers=total_workers,
+            replacement_workers=self.replacement_workers,
+            destroyed_nodes=destroyed_nodes,
+            damaged_nodes=damaged_nodes,
+            destroyed_edges=destroyed_edges,
+            damaged_edges=damaged_edges,
+            workers_killed=self.total_workers_killed,
+            avg_node_capacity=sum(self.node_capacity.values()) / len(self.node_capacity),
+            avg_edge_capacity=sum(self.edge_capacity.values()) / len(self.edge_capacity),
+            avg_workers_per_node=total_workers / len(self.G.nodes()),
+            endpoint_outputs=endpoint_outputs
+        )
+
+
+def play_turns(network, turns, seed):
+    """Alternate precision and area turns, as run_simulation plays them; returns (stats, seconds)."""
+    random.seed(seed)
+    stats = []
+    start = time.perf_counter()
+    for turn in range(turns):
+        bombing_effect = 3 + turn // 20
+        if turn % 2:
+            network.area_bombing(bombing_effect)
+        else:
+            network.precision_bombing(bombing_effect)
+        network.repair_and_replenish()
+        stats.append(network.get_statistics(turn))
+    return stats, time.perf_counter() - start
+
+
+def same_value(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same_value(a[key], b[key]) for key in a)
+    return np.isclose(a, b, rtol=1e-12) if isinstance(a, float) else a == b
+
+
+def same_stats(a, b):
+    return same_value(asdict(a), asdict(b))
+
+
+def benchmark_turns(sizes):
+    """Turns/sec of the dict-backed WarfareNetworkScalar against the array-backed WarfareNetwork."""
+    logging.disable(logging.DEBUG)
+    for nodes, edges in sizes:
+        turns = TURNS if nodes <= 10000 else 5
+        random.seed(nodes)
+        scalar_network = WarfareNetworkScalar(nodes, edges)
+        random.seed(nodes)
+        network = model.WarfareNetwork(nodes, edges, path_cache={})
+        # The scalar class's own builder finds no paths, so both evaluate output over the same sampled ones
+        cache = sampled_path_cache(network.G, network.endpoint_nodes)
+        scalar_network._path_cache = cache
+        network.use_path_cache(cache)
+        scalar, scalar_time = play_turns(scalar_network, turns, seed=nodes + 1)
+        arrays, array_time = play_turns(network, turns, seed=nodes + 1)
+        mismatches = sum(not same_stats(a, b) for a, b in zip(scalar, arrays))
+        print(f"{nodes:>7} nodes, {edges:>7} edges: dict {turns / scalar_time:8.1f} turns/s, "
+              f"array {turns / array_time:8.1f} turns/s ({scalar_time / array_time:.0f}x), "
+              f"turns with differing statistics: {mismatches}")
+
+
+def sampled_path_cache(G, endpoints, paths_per_endpoint=SAMPLED_PATHS, max_length=6, seed=0):
+    """Simple paths of up to max_length nodes into each endpoint, from random walks along in-edges.
+
+    Stands in for a real path cache, which takes minutes to enumerate on
+    these networks; the network output only depends on the paths' nodes.
+    """
+    rng = random.Random(seed)
+    cache = {}
+    for endpoint in endpoints:
+        paths = []
+        for _ in range(paths_per_endpoint if G.in_degree(endpoint) else 0):
+            path = [endpoint]
+            while len(path) < max_length:
+                sources = [node for node in G.predecessors(path[-1]) if node not in path]
+                if not sources or (len(path) > 1 and rng.random() < 0.2):
+                    break
+                path.append(rng.choice(sources))
+            if len(path) > 1:
+                paths.append(path[::-1])
+        cache[endpoint] = paths
+    return cache
+
+
+def output_turns(network, turns, seed):
+    """Seeded precision turns, destroying a node every fifth turn; returns (outputs, seconds in calculate_network_output)."""
+    random.seed(seed)
+    outputs = []
+    seconds = 0.0
+    for turn in range(turns):
+        network.precision_bombing(3 + turn)
+        if turn % 5 == 4:
+            node = turn * 7919 % len(network.node_capacity)
+            network.node_capacity[node] = 0.0
+            if hasattr(network, 'mark_dirty'):
+                network.mark_dirty([node])
+        network.repair_and_replenish()
+        start = time.perf_counter()
+        outputs.append(network.calculate_network_output())
+        seconds += time.perf_counter() - start
+    return outputs, seconds
+
+
+def same_output(a, b):
+    (total_a, endpoints_a), (total_b, endpoints_b) = a, b
+    return (np.isclose(total_a, total_b, rtol=1e-9) and endpoints_a.keys() == endpoints_b.keys()
+            and all(np.isclose(endpoints_a[e], endpoints_b[e], rtol=1e-9) for e in endpoints_a))
+
+
+def benchmark_output(sizes):
+    """calculate_network_output per path in Python against one sparse mat-vec, over the same seeded turns."""
+    logging.disable(logging.DEBUG)
+    for nodes, edges in sizes:
+        turns = TURNS if nodes <= 10000 else 5
+        random.seed(nodes)
+        scalar = WarfareNetworkScalar(nodes, edges)
+        random.seed(nodes)
+        network = model.WarfareNetwork(nodes, edges, path_cache={})
+        cache = sampled_path_cache(network.G, network.endpoint_nodes)
+        scalar._path_cache = cache
+        start = time.perf_counter()
+        network.use_path_cache(cache)
+        compile_time = time.perf_counter() - start
+
+        expected, scalar_time = output_turns(scalar, turns, seed=nodes + 1)
+        outputs, sparse_time = output_turns(network, turns, seed=nodes + 1)
+        mismatches = sum(not same_output(a, b) for a, b in zip(expected, outputs))
+        paths = sum(len(paths) for paths in cache.values())
+        print(f"{nodes:>7} nodes, {paths:>8} paths: python {scalar_time / turns * 1e3:9.2f} ms/turn, "
+              f"sparse {sparse_time / turns * 1e3:7.2f} ms/turn ({scalar_time / sparse_time:.0f}x, "
+              f"compiled in {compile_time:.2f}s), turns with differing output: {mismatches}")
+
+
+def benchmark_incremental(sizes):
+    """Full recompute of the path values against the dirty-node update, on the same network every turn."""
+    logging.disable(logging.DEBUG)
+    for nodes, edges in sizes:
+        random.seed(nodes)
+        network = model.WarfareNetwork(nodes, edges, path_cache={})
+        network.use_path_cache(sampled_path_cache(network.G, network.endpoint_nodes))
+        random.seed(nodes + 1)
+        full_time = incremental_time = 0.0
+        mismatches = dirty_nodes = 0
+        for turn in range(INCREMENTAL_TURNS):
+            # run_simulation's turns, kept in the range where the network still has output
+            bombing_effect = 3 + turn % 20
+            if turn % 2:
+                network.area_bombing(bombing_effect)
+            else:
+                network.precision_bombing(bombing_effect)
+            network.repair_and_replenish()
+            dirty_nodes += len(np.unique(np.concatenate(network._dirty_nodes)))
+
+            start = time.perf_counter()
+            expected = network._paths.endpoint_outputs(network.node_capacity)
+            full_time += time.perf_counter() - start
+            start = time.perf_counter()
+            total, outputs = network.calculate_network_output()
+            incremental_time += time.perf_counter() - start
+            mismatches += not (np.isclose(total, expected.sum(), rtol=1e-9)
+                               and np.allclose(list(outputs.values()), expected, rtol=1e-9, atol=0))
+        paths = network._paths.matrix.shape[0]
+        print(f"{nodes:>7} nodes, {paths:>8} paths, {dirty_nodes / INCREMENTAL_TURNS:6.0f} dirty nodes/turn: "
+              f"full {full_time / INCREMENTAL_TURNS * 1e3:7.2f} ms/turn, "
+              f"incremental {incremental_time / INCREMENTAL_TURNS * 1e3:6.2f} ms/turn "
+              f"({full_time / incremental_time:.1f}x), turns with differing output: {mismatches}")
+
+
+def benchmark_paths(sizes):
+    """Path cache build time, in one process and across all cores, and its load time from disk."""
+    logging.disable(logging.DEBUG)
+    workers = os.cpu_count()
+    for nodes, edges in sizes:
+        G = nx.gnm_random_graph(nodes, edges, seed=nodes, directed=True)
+        endpoints = [node for node in G if G.out_degree(node) == 0]
+        start = time.perf_counter()
+        cache = model.build_path_cache(G, endpoints, workers=1)
+        serial_time = time.perf_counter() - start
+        start = time.perf_counter()
+        pooled = model.build_path_cache(G, endpoints, workers=workers)
+        pooled_time = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = model.path_cache_file(nodes, edges, nodes, cache_dir)
+            digest = model.edges_digest(list(G.edges()))
+            model.save_path_cache(path, cache, digest)
+            start = time.perf_counter()
+            loaded = model.load_path_cache(path, digest)
+            load_time = time.perf_counter() - start
+
+        differing = sum(pooled[endpoint] != cache[endpoint] or loaded[endpoint] != cache[endpoint]
+                        for endpoint in endpoints)
+        # Only nodes within the cutoff of an endpoint have paths into it
+        reverse = G.reverse(copy=False)
+        for endpoint in endpoints[:CHECKED_ENDPOINTS]:
+            sources = nx.single_source_shortest_path_length(reverse, endpoint, cutoff=model.MAX_PATH_LENGTH)
+            expected = [path for node in sorted(sources) if node != endpoint
+                        for path in itertools.islice(nx.all_simple_paths(G, node, endpoint, cutoff=model.MAX_PATH_LENGTH),
+                                                     model.MAX_PATHS_PER_NODE)]
+            differing += expected != cache[endpoint]
+        paths = sum(len(paths) for paths in cache.values())
+        print(f"{nodes:>7} nodes, {len(endpoints):>5} endpoints, {paths:>8} paths: built in {serial_time:5.2f}s, "
+              f"{pooled_time:5.2f}s on {workers} processes, loaded in {load_time:4.2f}s; "
+              f"endpoints with differing paths: {differing}")
+
+
+def benchmark_ensemble(sizes):
+    """Ensemble replicates/minute on 1, 2, 4... processes up to the core count, checking every run writes the same table."""
+    counts = [1]
+    while counts[-1] * 2 <= os.cpu_count():
+        counts.append(counts[-1] * 2)
+    for nodes, edges in sizes:
+        with tempfile.TemporaryDirectory() as out_dir:
+            tables = []
+            for workers in counts:
+                path = os.path.join(out_dir, f"{workers}.parquet")
+                rate = ensemble.run_ensemble(ENSEMBLE_REPLICATES, path, workers=workers, num_nodes=nodes,
+                                             num_edges=edges, max_turns=ENSEMBLE_TURNS)
+                tables.append(pq.read_table(path))
+                print(f"{nodes:>7} nodes, {workers:>3} processes: {rate:8.1f} replicates/minute "
+                      f"({ENSEMBLE_TURNS} turns, both strategies)")
+        print(f"{nodes:>7} nodes: runs writing a different table than 1 process: "
+              f"{sum(not table.equals(tables[0]) for table in tables[1:])}")
+
+
+BENCHMARKS = {
+    'turns': benchmark_turns,
+    'output': benchmark_output,
+    'incremental': benchmark_incremental,
+    'paths': benchmark_paths,
+    'ensemble': benchmark_ensemble,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run bombing model benchmarks.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("nodes", nargs="?", type=int, default=None,
+                        help="Only benchmark a network of this many nodes (4 edges per node).")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark]([(args.nodes, 4 * args.nodes)] if args.nodes else SIZES)
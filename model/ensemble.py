@@ -0,0 +1,224 @@
+# ensemble.py
+"""Monte Carlo ensemble of the precision and area bombing simulations.
+
+model.py's __main__ plays one trajectory per strategy, so the comparison
+it prints is a single random draw. Here every replicate plays both
+strategies on the network of `graph_seed`, each with its own random
+stream. The streams come from numpy SeedSequence(seed, spawn_key=
+(replicate, strategy)). Each one seeds the random.Random the network draws
+from, so a replicate's numbers depend only on the seed and its replicate
+number, not on which process ran it or in what order.
+
+Replicates run on a process pool. Each worker loads the network's path
+cache once. The pool returns replicates in order, and they stream into a
+Parquet file of per-turn rows, a row group every ROW_GROUP_REPLICATES.
+summarize() reads the file back into per-turn means with 95% CI bands of
+network output and workers killed, and the turns to victory of each
+strategy.
+
+    python ensemble.py --replicates 500 [--workers N] [--output ensemble.parquet]
+
+    bands, victories = summarize('ensemble.parquet')
+    bands.loc['area', 'network_output']     # mean, low, high, replicates by turn
+"""
+
+import os
+import time
+import random
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import matplotlib.pyplot as plt
+
+import model
+
+STRATEGIES = ["precision", "area"]
+NUM_NODES, NUM_EDGES = 1000, 4000
+WORKERS_PER_NODE = 10
+MAX_TURNS = 365
+GRAPH_SEED = 42
+ENSEMBLE_PATH = 'ensemble.parquet'
+BANDS_PATH = 'ensemble_bands.png'
+ROW_GROUP_REPLICATES = 16
+# Two-sided 95% normal quantile for the CI of a mean
+CI_Z = 1.96
+
+SCHEMA = pa.schema([
+    ('replicate', pa.int32()),
+    ('strategy', pa.dictionary(pa.int8(), pa.string())),
+    ('turn', pa.int32()),
+    ('network_output', pa.float64()),
+    ('total_workers', pa.int64()),
+    ('replacement_workers', pa.int64()),
+    ('destroyed_nodes', pa.int32()),
+    ('damaged_nodes', pa.int32()),
+    ('destroyed_edges', pa.int32()),
+    ('damaged_edges', pa.int32()),
+    ('workers_killed', pa.int64()),
+    ('avg_node_capacity', pa.float64()),
+    ('avg_edge_capacity', pa.float64()),
+    ('avg_workers_per_node', pa.float64()),
+    ('victory', pa.bool_()),
+])
+STAT_COLUMNS = [field.name for field in SCHEMA if field.name not in ('replicate', 'strategy', 'victory')]
+BAND_COLUMNS = ['network_output', 'workers_killed']
+
+
+def replicate_rng(seed, replicate, strategy):
+    """The random stream of one strategy of one replicate."""
+    stream = np.random.SeedSequence(seed, spawn_key=(replicate, STRATEGIES.index(strategy)))
+    return random.Random(stream.generate_state(8).tobytes())
+
+
+_config = None
+_path_cache = None
+
+
+def _init_worker(config):
+    global _config, _path_cache
+    logging.disable(logging.DEBUG)
+    _config = config
+    _path_cache = model.WarfareNetwork(config['num_nodes'], config['num_edges'], seed=config['graph_seed'])._path_cache
+
+
+def run_replicate(replicate):
+    """Columns of SCHEMA for every turn of both strategies of `replicate`."""
+    columns = {name: [] for name in SCHEMA.names}
+    for strategy in STRATEGIES:
+        network = model.WarfareNetwork(_config['num_nodes'], _config['num_edges'], _config['workers_per_node'],
+                                       seed=_config['graph_seed'], path_cache=_path_cache,
+                                       rng=replicate_rng(_config['seed'], replicate, strategy))
+        threshold = model.victory_threshold(network)
+        stats = model.run_simulation(network, _config['max_turns'], strategy, progress=False)
+        for stat in stats:
+            for name in STAT_COLUMNS:
+                columns[name].append(getattr(stat, name))
+            columns['victory'].append(stat.network_output < threshold)
+        columns['replicate'] += [replicate] * len(stats)
+        columns['strategy'] += [strategy] * len(stats)
+    return columns
+
+
+def run_replicates(config, replicates, workers=None):
+    """run_replicate for each of `replicates`, in order, on `workers` processes."""
+    workers = workers or os.cpu_count()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as executor:
+            yield from executor.map(run_replicate, replicates)
+    else:
+        _init_worker(config)
+        yield from map(run_replicate, replicates)
+
+
+def run_ensemble(replicates, path=ENSEMBLE_PATH, seed=0, workers=None, num_nodes=NUM_NODES, num_edges=NUM_EDGES,
+                 workers_per_node=WORKERS_PER_NODE, max_turns=MAX_TURNS, graph_seed=GRAPH_SEED):
+    """Write `replicates` replicates to the Parquet file `path`; returns replicates per minute."""
+    config = {'seed': seed, 'num_nodes': num_nodes, 'num_edges': num_edges, 'workers_per_node': workers_per_node,
+              'max_turns': max_turns, 'graph_seed': graph_seed}
+    logging.disable(logging.DEBUG)
+    # Build the path cache once here so the workers all load it from disk
+    model.WarfareNetwork(num_nodes, num_edges, seed=graph_seed)
+
+    start = time.perf_counter()
+    tmp_path = path + '.tmp'
+    batch = []
+    with pq.ParquetWriter(tmp_path, SCHEMA) as writer:
+        for columns in run_replicates(config, range(replicates), workers):
+            batch.append(columns)
+            if len(batch) == ROW_GROUP_REPLICATES:
+                writer.write_table(row_group(batch))
+                batch = []
+        if batch:
+            writer.write_table(row_group(batch))
+    os.replace(tmp_path, path)
+    return replicates / (time.perf_counter() - start) * 60
+
+
+def row_group(batch):
+    return pa.Table.from_pydict({name: [value for columns in batch for value in columns[name]] for name in SCHEMA.names},
+                                schema=SCHEMA)
+
+
+def mean_ci(values):
+    """Mean, 95% CI bounds and count of each group of a grouped column."""
+    summary = values.agg(['mean', 'std', 'count'])
+    half_width = CI_Z * summary['std'].fillna(0) / np.sqrt(summary['count'])
+    return pd.DataFrame({'mean': summary['mean'], 'low': summary['mean'] - half_width,
+                         'high': summary['mean'] + half_width, 'replicates': summary['count']})
+
+
+def carried_forward(df, column):
+    """`column` by strategy, replicate and turn, each replicate's last value repeated up to the last turn."""
+    by_turn = df.pivot(index=['strategy', 'replicate'], columns='turn', values=column)
+    return by_turn.ffill(axis=1).stack()
+
+
+def summarize(path=ENSEMBLE_PATH):
+    """(bands, victories) of an ensemble file.
+
+    bands is indexed by strategy, column and turn, with the mean and CI
+    over all replicates. A replicate won before the last turn keeps its
+    final state for the turns after, so the bands don't shift to the
+    replicates still running. victories has, for each strategy, the
+    replicates, how many were won, and the mean and CI of the turns to
+    victory of those.
+    """
+    df = pq.read_table(path, columns=['replicate', 'strategy', 'turn', 'victory'] + BAND_COLUMNS).to_pandas()
+    df['strategy'] = df['strategy'].astype(str)
+    bands = pd.concat({column: mean_ci(carried_forward(df, column).groupby(level=['strategy', 'turn']))
+                       for column in BAND_COLUMNS})
+    bands = bands.reorder_levels([1, 0, 2]).sort_index()
+
+    won = df[df['victory']].assign(turns=lambda won: won['turn'] + 1)
+    turns = mean_ci(won.groupby('strategy')['turns'])
+    victories = pd.DataFrame({'replicates': df.groupby('strategy')['replicate'].nunique(),
+                              'victories': turns['replicates']}).reindex(STRATEGIES)
+    victories['victories'] = victories['victories'].fillna(0).astype(int)
+    return bands, victories.join(turns[['mean', 'low', 'high']])
+
+
+def plot_bands(bands, path=BANDS_PATH):
+    """Mean and 95% CI band of each strategy's network output and workers killed over the turns"""
+    fig, axes = plt.subplots(1, len(BAND_COLUMNS), figsize=(20, 8))
+    for ax, column in zip(axes, BAND_COLUMNS):
+        for strategy, color in zip(STRATEGIES, ['blue', 'red']):
+            band = bands.loc[(strategy, column)]
+            ax.plot(band.index, band['mean'], label=strategy.capitalize(), color=color, linewidth=2)
+            ax.fill_between(band.index, band['low'], band['high'], color=color, alpha=0.2)
+        ax.set_title(f"{column.replace('_', ' ').title()} (mean and 95% CI)")
+        ax.set_xlabel('Turns')
+        ax.legend()
+        ax.grid(True)
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a Monte Carlo ensemble of the bombing simulations.")
+    parser.add_argument("--replicates", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0, help="Root seed of the replicates' random streams.")
+    parser.add_argument("--workers", type=int, default=None, help="Processes to run replicates on (default: all cores).")
+    parser.add_argument("--output", default=ENSEMBLE_PATH)
+    parser.add_argument("--plot", default=BANDS_PATH, help="Where to save the CI band figure ('' to skip).")
+    args = parser.parse_args()
+
+    rate = run_ensemble(args.replicates, args.output, args.seed, args.workers)
+    print(f"Ran {args.replicates} replicates at {rate:.1f} replicates/minute into {args.output}")
+    bands, victories = summarize(args.output)
+    for strategy in STRATEGIES:
+        final = {column: bands.loc[(strategy, column)].iloc[-1] for column in BAND_COLUMNS}
+        won = victories.loc[strategy]
+        print(f"{strategy.capitalize():>9}: final network output {final['network_output']['mean']:,.0f} "
+              f"[{final['network_output']['low']:,.0f}, {final['network_output']['high']:,.0f}], "
+              f"workers killed {final['workers_killed']['mean']:,.0f} "
+              f"[{final['workers_killed']['low']:,.0f}, {final['workers_killed']['high']:,.0f}], "
+              f"won {int(won['victories'])} of {int(won['replicates'])}"
+              + (f" in {won['mean']:.1f} turns [{won['low']:.1f}, {won['high']:.1f}]" if won['victories'] else ""))
+    if args.plot:
+        plot_bands(bands, args.plot)
@@ -1,14 +1,33 @@
+import os
+import hashlib
 import networkx as nx
+import numpy as np
 import random
+from scipy import sparse
 import matplotlib.pyplot as plt
 from typing import List, Tuple, Dict, Set
 from dataclasses import dataclass
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
 
+# Network output updates between full recomputes of the path values
+RESYNC_EVERY = 50
+
+# The path cache holds, for each endpoint, up to MAX_PATHS_PER_NODE paths of
+# at most MAX_PATH_LENGTH edges from every node into it
+MAX_PATH_LENGTH = 5
+MAX_PATHS_PER_NODE = 10
+PATH_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "path_cache")
+# Bump when the paths built for a graph change so old cache files are ignored
+PATH_CACHE_VERSION = 2
+
+# The bombing campaign is won when network output falls below this share of the initial workers
+VICTORY_OUTPUT_FRACTION = 0.1
+
 @dataclass
 class SimulationStats:
     turn: int
@@ -25,126 +44,325 @@ class SimulationStats:
     avg_workers_per_node: float
     endpoint_outputs: Dict[int, float]  # New: track individual endpoint outputs
 
+def reverse_distances(predecessors: List[List[int]], endpoint: int, max_length: int) -> Dict[int, int]:
+    """Edges from each node within max_length edges of `endpoint` to it, by BFS along in-edges."""
+    distance = {endpoint: 0}
+    frontier = [endpoint]
+    for length in range(1, max_length + 1):
+        next_frontier = []
+        for node in frontier:
+            for source in predecessors[node]:
+                if source not in distance:
+                    distance[source] = length
+                    next_frontier.append(source)
+        frontier = next_frontier
+    return distance
+
+
+def endpoint_paths(successors: List[List[int]], predecessors: List[List[int]], endpoint: int,
+                   max_length: int = MAX_PATH_LENGTH, max_paths: int = MAX_PATHS_PER_NODE) -> List[List[int]]:
+    """The first max_paths of nx.all_simple_paths(G, node, endpoint, cutoff=max_length) for every node.
+
+    Nodes come in increasing order. A reverse BFS gives each node's distance
+    to the endpoint; the DFS from a node only steps to successors that can
+    still reach the endpoint within the cutoff, so it seldom enters a
+    branch without paths, and it stops at the max_paths'th path.
+    """
+    distance = reverse_distances(predecessors, endpoint, max_length)
+    out_of_reach = max_length + 1
+    paths = []
+    for source in sorted(distance):
+        if source == endpoint:
+            continue
+        found = 0
+        path, stack = [source], [iter(successors[source])]
+        while stack:
+            for node in stack[-1]:
+                if distance.get(node, out_of_reach) > max_length - len(path) or node in path:
+                    continue
+                if node == endpoint:
+                    paths.append(path + [node])
+                    found += 1
+                    if found == max_paths:
+                        stack = []
+                        break
+                else:
+                    path.append(node)
+                    stack.append(iter(successors[node]))
+                    break
+            else:
+                stack.pop()
+                path.pop()
+    return paths
+
+
+_adjacency = None
+
+
+def _init_adjacency(successors: List[List[int]], predecessors: List[List[int]]):
+    global _adjacency
+    _adjacency = (successors, predecessors)
+
+
+def _endpoint_paths(endpoint: int) -> List[List[int]]:
+    return endpoint_paths(*_adjacency, endpoint)
+
+
+def build_path_cache(G: nx.DiGraph, endpoints: List[int], workers: int = None) -> Dict[int, List[List[int]]]:
+    """endpoint_paths for every endpoint of G, whose nodes are 0..n-1, spread over `workers` processes."""
+    successors = [list(G.successors(node)) for node in range(G.number_of_nodes())]
+    predecessors = [list(G.predecessors(node)) for node in range(G.number_of_nodes())]
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(endpoints) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_adjacency,
+                                 initargs=(successors, predecessors)) as executor:
+            chunksize = max(1, len(endpoints) // (4 * workers))
+            return dict(zip(endpoints, executor.map(_endpoint_paths, endpoints, chunksize=chunksize)))
+    return {endpoint: endpoint_paths(successors, predecessors, endpoint) for endpoint in endpoints}
+
+
+def path_cache_file(num_nodes: int, num_edges: int, seed: int, cache_dir: str = PATH_CACHE_DIR) -> str:
+    """Where the path cache of the gnm_random_graph(num_nodes, num_edges, seed=seed) network is kept."""
+    name = (f"gnm_{num_nodes}_{num_edges}_seed{seed}_len{MAX_PATH_LENGTH}_paths{MAX_PATHS_PER_NODE}"
+            f"_v{PATH_CACHE_VERSION}.npz")
+    return os.path.join(cache_dir, name)
+
+
+def edges_digest(edges: List[Tuple[int, int]]) -> str:
+    """SHA-256 of an edge list, identifying the graph a path cache was built for."""
+    return hashlib.sha256(np.array(edges, dtype=np.int64).tobytes()).hexdigest()
+
+
+def save_path_cache(path: str, cache: Dict[int, List[List[int]]], digest: str):
+    """Write `cache` as flat arrays: endpoints, paths per endpoint, nodes per path and the nodes.
+
+    `digest` is the edges_digest of the graph, checked by load_path_cache.
+    """
+    endpoints = list(cache)
+    paths = [path for endpoint in endpoints for path in cache[endpoint]]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f,
+                 endpoints=np.array(endpoints, dtype=np.int64),
+                 path_counts=np.array([len(cache[endpoint]) for endpoint in endpoints], dtype=np.int64),
+                 path_lengths=np.array([len(path) for path in paths], dtype=np.int64),
+                 nodes=np.fromiter((node for path in paths for node in path), dtype=np.int64),
+                 edges_digest=np.array(digest))
+    os.replace(tmp_path, path)
+
+
+def load_path_cache(path: str, digest: str) -> Dict[int, List[List[int]]]:
+    """The cache at `path`, or None if it was built for a graph other than the one of edges_digest `digest`."""
+    with np.load(path) as data:
+        if "edges_digest" not in data.files or str(data["edges_digest"]) != digest:
+            return None
+        endpoints, path_counts = data["endpoints"].tolist(), data["path_counts"]
+        path_lengths, nodes = data["path_lengths"], data["nodes"].tolist()
+    node_ends = np.cumsum(path_lengths).tolist()
+    paths = [nodes[end - length:end] for end, length in zip(node_ends, path_lengths.tolist())]
+    path_ends = np.cumsum(path_counts).tolist()
+    return {endpoint: paths[end - count:end] for endpoint, end, count in zip(endpoints, path_ends, path_counts.tolist())}
+
+
+def log_capacity(capacity: np.ndarray) -> np.ndarray:
+    """log of each capacity, with 0 for destroyed nodes (counted separately)."""
+    return np.log(np.where(capacity == 0, 1.0, capacity))
+
+
+class PathIncidence:
+    """The path cache as a sparse path x node incidence matrix.
+
+    A path's value is the product of the capacities of its nodes, computed
+    for all paths at once as exp(M @ log(capacity)). Paths through a
+    destroyed node are worth 0, found by counting their zero-capacity
+    nodes. An endpoint's output is the sum of its paths' values times the
+    number of distinct nodes on them, which is fixed by the cache.
+    """
+
+    def __init__(self, path_cache: Dict[int, List[List[int]]], endpoints: List[int], num_nodes: int):
+        path_cache = {endpoint: path_cache.get(endpoint, []) for endpoint in endpoints}
+        paths = [path for endpoint in endpoints for path in path_cache[endpoint]]
+        lengths = np.array([len(path) for path in paths], dtype=np.int64)
+        indptr = np.zeros(len(paths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter((node for path in paths for node in path), dtype=np.int64, count=int(indptr[-1]))
+        self.matrix = sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(paths), num_nodes))
+        path_counts = [len(path_cache[endpoint]) for endpoint in endpoints]
+        # Endpoint (by position in endpoints) of each row of the matrix
+        self.path_endpoint = np.repeat(np.arange(len(endpoints)), path_counts)
+        self.num_endpoints = len(endpoints)
+        self.unique_nodes = np.array([len(set().union(*path_cache[endpoint])) for endpoint in endpoints],
+                                     dtype=np.float64)
+
+    def path_values(self, capacity: np.ndarray) -> np.ndarray:
+        values = np.exp(self.matrix @ log_capacity(capacity))
+        values[self.matrix @ (capacity == 0).astype(np.float64) > 0] = 0.0
+        return values
+
+    def endpoint_outputs(self, capacity: np.ndarray) -> np.ndarray:
+        """Output of each endpoint, in endpoint order; 0 for endpoints without paths."""
+        sums = np.bincount(self.path_endpoint, weights=self.path_values(capacity), minlength=self.num_endpoints)
+        return sums * self.unique_nodes
+
+
+class IncrementalOutput:
+    """Endpoint outputs of a PathIncidence, kept up to date node by node.
+
+    Holds each path's log-capacity sum, number of destroyed nodes and value,
+    and each endpoint's sum of path values. update() is told which nodes
+    changed capacity since the last call. It walks their columns of the
+    incidence matrix (the node -> paths index) to correct only the paths
+    through them and their endpoints, so a turn costs in proportion to the
+    damaged nodes and the paths through them. The sums drift by rounding
+    as corrections pile up, so every RESYNC_EVERY updates they are
+    recomputed from scratch.
+    """
+
+    def __init__(self, paths: PathIncidence, capacity: np.ndarray, resync_every: int = None):
+        self.paths = paths
+        self.node_paths = paths.matrix.tocsc()
+        self.resync_every = RESYNC_EVERY if resync_every is None else resync_every
+        self.resync(capacity)
+
+    def resync(self, capacity: np.ndarray):
+        """Recompute every path and endpoint from `capacity`."""
+        matrix = self.paths.matrix
+        self.capacity = capacity.copy()
+        self.log_sums = matrix @ log_capacity(capacity)
+        self.zero_counts = np.rint(matrix @ (capacity == 0).astype(np.float64)).astype(np.int64)
+        self.values = np.where(self.zero_counts > 0, 0.0, np.exp(self.log_sums))
+        self.sums = np.bincount(self.paths.path_endpoint, weights=self.values, minlength=self.paths.num_endpoints)
+        self.updates = 0
+
+    def update(self, capacity: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """Endpoint outputs after the capacities of `nodes` (distinct node ids) changed to those in `capacity`."""
+        self.updates += 1
+        if self.updates >= self.resync_every:
+            self.resync(capacity)
+        elif len(nodes):
+            old, new = self.capacity[nodes], capacity[nodes]
+            self.capacity[nodes] = new
+            log_change = log_capacity(new) - log_capacity(old)
+            zero_change = (new == 0).astype(np.int64) - (old == 0)
+
+            # Rows of the nodes' columns: the paths through each node, node after node
+            indptr = self.node_paths.indptr
+            starts, counts = indptr[nodes], indptr[nodes + 1] - indptr[nodes]
+            offsets = np.cumsum(counts) - counts
+            entries = np.arange(int(counts.sum())) - np.repeat(offsets - starts, counts)
+            rows = self.node_paths.indices[entries]
+            np.add.at(self.log_sums, rows, np.repeat(log_change, counts))
+            np.add.at(self.zero_counts, rows, np.repeat(zero_change, counts))
+
+            # Distinct paths by sorting: np.unique is several times slower on these arrays
+            changed = np.sort(rows)
+            distinct = np.ones(len(changed), dtype=bool)
+            distinct[1:] = changed[1:] != changed[:-1]
+            changed = changed[distinct]
+            values = np.where(self.zero_counts[changed] > 0, 0.0, np.exp(self.log_sums[changed]))
+            np.add.at(self.sums, self.paths.path_endpoint[changed], values - self.values[changed])
+            self.values[changed] = values
+        return self.sums * self.paths.unique_nodes
+
+
 class WarfareNetwork:
-    def __init__(self, num_nodes: int, num_edges: int, workers_per_node: int = 10):
+    """Production network under bombing.
+
+    Node capacities, edge capacities and workers are arrays:
+    gnm_random_graph numbers the nodes 0..n-1, so a node is its own index,
+    and edges are indexed in G.edges() order through edge_index. Random
+    draws are taken in the same order as the dict-backed reference in
+    benchmarks.py, so a seeded run gives the same numbers. Network output
+    is evaluated over the path cache compiled into a PathIncidence. The
+    cache is built by build_path_cache; for a seeded graph it is kept in
+    `cache_dir` and reused by later networks with the same seed, size and
+    edges. Bombing draws from `rng`, a random.Random, or from the global
+    random module. Bombing and repair record the nodes whose capacity they
+    change, and calculate_network_output passes them to an
+    IncrementalOutput to update only the paths through them. Code that
+    writes node_capacity directly must call mark_dirty for those nodes.
+    """
+
+    def __init__(self, num_nodes: int, num_edges: int, workers_per_node: int = 10, seed: int = None,
+                 path_cache: Dict[int, List[List[int]]] = None, cache_dir: str = PATH_CACHE_DIR, workers: int = None,
+                 rng: random.Random = None):
         # Initialize network
         logging.debug(f"Initializing WarfareNetwork with {num_nodes} nodes and {num_edges} edges.")
-        self.G = nx.gnm_random_graph(num_nodes, num_edges, directed=True)
-        self.workers = {node: workers_per_node for node in self.G.nodes()}
+        self.G = nx.gnm_random_graph(num_nodes, num_edges, seed=seed, directed=True)
+        self.num_nodes = self.G.number_of_nodes()
+        self.edges = list(self.G.edges())
+        self.edge_index = {edge: i for i, edge in enumerate(self.edges)}
+        self.workers = np.full(self.num_nodes, workers_per_node, dtype=np.int64)
         self.max_workers = workers_per_node
         self.initial_workers = workers_per_node * num_nodes
         self.replacement_workers = self.initial_workers
-        self.node_capacity = {node: 1.0 for node in self.G.nodes()}
-        self.edge_capacity = {edge: 1.0 for edge in self.G.edges()}
+        self.node_capacity = np.ones(self.num_nodes)
+        self.edge_capacity = np.ones(len(self.edges))
         self.total_workers_killed = 0
+        self.rng = random if rng is None else rng
         
         # Identify endpoint nodes (nodes with no outgoing edges)
         self.endpoint_nodes = [node for node in self.G.nodes() 
                              if self.G.out_degree(node) == 0]
         logging.debug(f"Identified endpoint nodes: {self.endpoint_nodes}")
         
-        # Cache for paths to endpoints
-        self._path_cache = self._build_path_cache()
+        # Cache for paths to endpoints, unless given one; kept on disk when the graph is seeded
+        if path_cache is None:
+            cache_file = path_cache_file(num_nodes, num_edges, seed, cache_dir) if seed is not None else None
+            digest = edges_digest(self.edges) if cache_file else None
+            if cache_file and os.path.exists(cache_file):
+                logging.debug(f"Loading path cache from {cache_file}.")
+                path_cache = load_path_cache(cache_file, digest)
+                if path_cache is None:
+                    logging.debug(f"{cache_file} was built for another graph; rebuilding it.")
+            if path_cache is None:
+                path_cache = self._build_path_cache(workers)
+                if cache_file:
+                    save_path_cache(cache_file, path_cache, digest)
+        self.use_path_cache(path_cache)
+
+    def use_path_cache(self, cache: Dict[int, List[List[int]]]):
+        """Evaluate network output over the paths in `cache`, keyed by endpoint; missing endpoints have none."""
+        self._path_cache = cache
+        self._paths = PathIncidence(cache, self.endpoint_nodes, self.num_nodes)
+        self._output = IncrementalOutput(self._paths, self.node_capacity)
+        self._dirty_nodes = []
+
+    def mark_dirty(self, nodes):
+        """Record that the capacities of `nodes` changed since network output was last calculated."""
+        self._dirty_nodes.append(np.asarray(nodes, dtype=np.int64))
 
-    def _build_path_cache(self) -> Dict[int, List[List[int]]]:
-        """Build cache of all paths to each endpoint with optimizations"""
+    def _build_path_cache(self, workers: int = None) -> Dict[int, List[List[int]]]:
+        """Build cache of paths to each endpoint (see endpoint_paths)"""
         logging.debug("Building path cache for endpoints.")
-        cache = {}
-        
-        for endpoint in self.endpoint_nodes:
-            # Create a subgraph of nodes that can reach this endpoint
-            # First, reverse the graph to find predecessors
-            pred = nx.predecessor(self.G, endpoint)
-            reachable_nodes = set(pred.keys())
-            
-            # Create subgraph of only relevant nodes
-            subgraph = self.G.subgraph(reachable_nodes)
-            
-            # Limit path length to prevent exponential explosion
-            MAX_PATH_LENGTH = 5  # Adjust this value based on your needs
-            all_paths = []
-            
-            for node in reachable_nodes:
-                if node != endpoint:
-                    try:
-                        # Use a generator and limit the number of paths per node
-                        paths = list(nx.all_simple_paths(
-                            subgraph, 
-                            node, 
-                            endpoint, 
-                            cutoff=MAX_PATH_LENGTH
-                        ))
-                        # Limit the number of paths per node if needed
-                        MAX_PATHS_PER_NODE = 10  # Adjust based on needs
-                        all_paths.extend(paths[:MAX_PATHS_PER_NODE])
-                    except nx.NetworkXNoPath:
-                        continue
-            
-            cache[endpoint] = all_paths
-            logging.debug(f"Cached {len(all_paths)} paths for endpoint {endpoint}.")
-        
+        cache = build_path_cache(self.G, self.endpoint_nodes, workers)
+        logging.debug(f"Cached {sum(len(paths) for paths in cache.values())} paths for {len(cache)} endpoints.")
         return cache
 
-    def calculate_path_value(self, path: List[int]) -> float:
-        """Calculate the cascading value of a path based on node capacities"""
-        value = 1.0
-        for node in path:
-            value *= self.node_capacity[node]
-            # If any node is completely destroyed, the whole path is worthless
-            if value == 0:
-                logging.debug(f"Path {path} is worthless due to destroyed node.")
-                return 0
-        logging.debug(f"Calculated path value for {path}: {value}")
-        return value
-
     def calculate_network_output(self) -> Tuple[float, Dict[int, float]]:
         """Calculate total network output and individual endpoint outputs"""
-        total_output = 0.0
-        endpoint_outputs = {}
-        
-        for endpoint in self.endpoint_nodes:
-            all_paths = self._path_cache[endpoint]
-            
-            # Calculate unique nodes in all paths to this endpoint
-            unique_nodes = set()
-            for path in all_paths:
-                unique_nodes.update(path)
-            
-            # Calculate the value of each path and sum them
-            path_values = sum(self.calculate_path_value(path) for path in all_paths)
-            
-            # Calculate endpoint output weighted by number of unique nodes
-            if all_paths:  # Only if there are paths to this endpoint
-                endpoint_output = path_values * len(unique_nodes)
-                endpoint_outputs[endpoint] = endpoint_output
-                total_output += endpoint_output
-                logging.debug(f"Endpoint {endpoint} output: {endpoint_output}")
-            else:
-                endpoint_outputs[endpoint] = 0.0
-        
+        dirty = np.unique(np.concatenate(self._dirty_nodes)) if self._dirty_nodes else np.empty(0, dtype=np.int64)
+        self._dirty_nodes = []
+        outputs = self._output.update(self.node_capacity, dirty)
+        total_output = float(outputs.sum())
         logging.debug(f"Total network output calculated: {total_output}")
-        return total_output, endpoint_outputs
+        return total_output, dict(zip(self.endpoint_nodes, outputs.tolist()))
 
     def precision_bombing(self, num_targets: int) -> Tuple[int, int]:
         """Precision bombing targets specific nodes/edges"""
         logging.debug(f"Executing precision bombing with {num_targets} targets.")
-        targets = random.sample(list(self.G.nodes()) + list(self.G.edges()), 
-                              min(num_targets, len(self.G.nodes()) + len(self.G.edges())))
-        nodes_hit = 0
-        edges_hit = 0
-        
-        for target in targets:
-            if isinstance(target, int):  # Node
-                damage = random.uniform(0.5, 1.0)  # Variable damage
-                self.node_capacity[target] *= max(0, 1 - damage)
-                nodes_hit += 1
-                logging.debug(f"Node {target} hit with damage {damage}. New capacity: {self.node_capacity[target]}")
-            else:  # Edge
-                damage = random.uniform(0.5, 1.0)
-                self.edge_capacity[target] *= max(0, 1 - damage)
-                edges_hit += 1
-                logging.debug(f"Edge {target} hit with damage {damage}. New capacity: {self.edge_capacity[target]}")
-                
+        # Targets are drawn as positions in nodes + edges: below num_nodes a node, above it an edge
+        targets = np.array(self.rng.sample(range(self.num_nodes + len(self.edges)),
+                                         min(num_targets, self.num_nodes + len(self.edges))), dtype=np.int64)
+        damage = np.array([self.rng.uniform(0.5, 1.0) for _ in targets])  # Variable damage
+        is_node = targets < self.num_nodes
+        self.node_capacity[targets[is_node]] *= np.maximum(0, 1 - damage[is_node])
+        self.mark_dirty(targets[is_node])
+        self.edge_capacity[targets[~is_node] - self.num_nodes] *= np.maximum(0, 1 - damage[~is_node])
+        nodes_hit = int(is_node.sum())
+        edges_hit = len(targets) - nodes_hit
+        logging.debug(f"Hit {nodes_hit} nodes and {edges_hit} edges.")
         return nodes_hit, edges_hit
 
     def area_bombing(self, num_targets: int) -> Tuple[int, int, int]:
@@ -157,25 +375,22 @@ class WarfareNetwork:
         workers_killed = 0
         max_workers_to_remove = min(
             num_targets * num_workers_per_target,
-            int((sum(self.workers.values()) + self.replacement_workers) * 0.1)  # Max 10% casualties
+            int((int(self.workers.sum()) + self.replacement_workers) * 0.1)  # Max 10% casualties
         )
         
         workers_to_remove = max_workers_to_remove
         
+        # The replacement pool is hit first, then random nodes until enough workers are gone
+        remove_from_replacement = min(workers_to_remove, self.replacement_workers)
+        self.replacement_workers -= remove_from_replacement
+        workers_to_remove -= remove_from_replacement
+        workers_killed += remove_from_replacement
         while workers_to_remove > 0:
-            if self.replacement_workers > 0:
-                remove_from_replacement = min(workers_to_remove, self.replacement_workers)
-                self.replacement_workers -= remove_from_replacement
-                workers_to_remove -= remove_from_replacement
-                workers_killed += remove_from_replacement
-                logging.debug(f"Removed {remove_from_replacement} workers from replacement pool.")
-            else:
-                node = random.choice(list(self.G.nodes()))
-                remove_from_node = min(workers_to_remove, self.workers[node])
-                self.workers[node] -= remove_from_node
-                workers_to_remove -= remove_from_node
-                workers_killed += remove_from_node
-                logging.debug(f"Removed {remove_from_node} workers from node {node}.")
+            node = self.rng.choice(range(self.num_nodes))
+            remove_from_node = min(workers_to_remove, int(self.workers[node]))
+            self.workers[node] -= remove_from_node
+            workers_to_remove -= remove_from_node
+            workers_killed += remove_from_node
         
         self.total_workers_killed += workers_killed
         logging.debug(f"Total workers killed in area bombing: {workers_killed}")
@@ -185,46 +400,36 @@ class WarfareNetwork:
         """Handle repairs and worker replenishment"""
         logging.debug("Repairing and replenishing workers.")
         # Repair nodes based on worker count
-        for node in self.G.nodes():
-            if self.node_capacity[node] < 1.0 and self.workers[node] > 0:
-                worker_efficiency = self.workers[node] / self.max_workers
-                repair_amount = 0.25 * worker_efficiency * (1.0 - self.node_capacity[node])
-                self.node_capacity[node] = min(1.0, self.node_capacity[node] + repair_amount)
-                logging.debug(f"Node {node} repaired by {repair_amount}. New capacity: {self.node_capacity[node]}")
+        damaged = (self.node_capacity < 1.0) & (self.workers > 0)
+        worker_efficiency = self.workers[damaged] / self.max_workers
+        repair_amount = 0.25 * worker_efficiency * (1.0 - self.node_capacity[damaged])
+        self.node_capacity[damaged] = np.minimum(1.0, self.node_capacity[damaged] + repair_amount)
+        self.mark_dirty(np.flatnonzero(damaged))
 
         # Repair edges (slower than nodes)
-        for edge in self.G.edges():
-            if self.edge_capacity[edge] < 1.0:
-                repair_amount = 0.1 * (1.0 - self.edge_capacity[edge])
-                self.edge_capacity[edge] = min(1.0, self.edge_capacity[edge] + repair_amount)
-                logging.debug(f"Edge {edge} repaired by {repair_amount}. New capacity: {self.edge_capacity[edge]}")
+        damaged = self.edge_capacity < 1.0
+        repair_amount = 0.1 * (1.0 - self.edge_capacity[damaged])
+        self.edge_capacity[damaged] = np.minimum(1.0, self.edge_capacity[damaged] + repair_amount)
 
         # Replenish workers (daily growth rate of 2%/365)
         daily_growth_rate = 0.02 / 365
-        total_current_workers = sum(self.workers.values()) + self.replacement_workers
+        total_current_workers = int(self.workers.sum()) + self.replacement_workers
         
         if total_current_workers < self.initial_workers:
             new_workers = int(total_current_workers * daily_growth_rate)
             self.replacement_workers += new_workers
             logging.debug(f"Replenished {new_workers} workers to replacement pool.")
 
-        # Distribute replacement workers
-        for node in self.G.nodes():
-            if self.workers[node] < self.max_workers and self.replacement_workers > 0:
-                workers_needed = self.max_workers - self.workers[node]
-                workers_added = min(workers_needed, self.replacement_workers)
-                self.workers[node] += workers_added
-                self.replacement_workers -= workers_added
-                logging.debug(f"Added {workers_added} workers to node {node}. Total now: {self.workers[node]}")
+        # Distribute replacement workers to the nodes in order until the pool runs out
+        workers_needed = np.maximum(self.max_workers - self.workers, 0)
+        needed_before = np.cumsum(workers_needed) - workers_needed
+        workers_added = np.clip(self.replacement_workers - needed_before, 0, workers_needed)
+        self.workers += workers_added
+        self.replacement_workers -= int(workers_added.sum())
 
     def get_statistics(self, turn: int) -> SimulationStats:
         """Gather current simulation statistics"""
-        total_workers = sum(self.workers.values())
-        destroyed_nodes = sum(1 for cap in self.node_capacity.values() if cap == 0.0)
-        damaged_nodes = sum(1 for cap in self.node_capacity.values() if 0.0 < cap < 1.0)
-        destroyed_edges = sum(1 for cap in self.edge_capacity.values() if cap == 0.0)
-        damaged_edges = sum(1 for cap in self.edge_capacity.values() if 0.0 < cap < 1.0)
-        
+        total_workers = int(self.workers.sum())
         network_output, endpoint_outputs = self.calculate_network_output()
         
         logging.debug(f"Gathered statistics for turn {turn}.")
@@ -233,22 +438,27 @@ class WarfareNetwork:
             network_output=network_output,
             total_workers=total_workers,
             replacement_workers=self.replacement_workers,
-            destroyed_nodes=destroyed_nodes,
-            damaged_nodes=damaged_nodes,
-            destroyed_edges=destroyed_edges,
-            damaged_edges=damaged_edges,
+            destroyed_nodes=int(np.count_nonzero(self.node_capacity == 0.0)),
+            damaged_nodes=int(np.count_nonzero((self.node_capacity > 0.0) & (self.node_capacity < 1.0))),
+            destroyed_edges=int(np.count_nonzero(self.edge_capacity == 0.0)),
+            damaged_edges=int(np.count_nonzero((self.edge_capacity > 0.0) & (self.edge_capacity < 1.0))),
             workers_killed=self.total_workers_killed,
-            avg_node_capacity=sum(self.node_capacity.values()) / len(self.node_capacity),
-            avg_edge_capacity=sum(self.edge_capacity.values()) / len(self.edge_capacity),
-            avg_workers_per_node=total_workers / len(self.G.nodes()),
+            avg_node_capacity=float(self.node_capacity.mean()),
+            avg_edge_capacity=float(self.edge_capacity.mean()),
+            avg_workers_per_node=total_workers / self.num_nodes,
             endpoint_outputs=endpoint_outputs
         )
 
-def run_simulation(network: WarfareNetwork, max_turns: int, strategy: str) -> List[SimulationStats]:
+def victory_threshold(network: WarfareNetwork) -> float:
+    """Network output below which the bombing campaign is won"""
+    return network.initial_workers * VICTORY_OUTPUT_FRACTION
+
+def run_simulation(network: WarfareNetwork, max_turns: int, strategy: str, progress: bool = True) -> List[SimulationStats]:
     """Run the simulation with specified strategy"""
     stats_history = []
+    victory_output = victory_threshold(network)
     
-    for turn in tqdm(range(max_turns), desc="Running Simulation"):
+    for turn in tqdm(range(max_turns), desc="Running Simulation", disable=not progress):
         # Calculate bombing effect (more gradual increase)
         bombing_effect = 3 + turn // 20  # Slower escalation
         logging.debug(f"Turn {turn}: Bombing effect is {bombing_effect}.")
@@ -263,7 +473,7 @@ def run_simulation(network: WarfareNetwork, max_turns: int, strategy: str) -> Li
         stats_history.append(stats)
         
         # Modified victory condition (less than 10% of initial output)
-        if stats.network_output < network.initial_workers * 0.1:
+        if stats.network_output < victory_output:
             logging.debug(f"Victory condition met at turn {turn}. Network output: {stats.network_output}")
             break
     
@@ -393,16 +603,17 @@ if __name__ == "__main__":
     num_nodes, num_edges = 1000, 4000
     workers_per_node = 10
     max_turns = 365  # One year of daily turns
+    graph_seed = 42  # Both strategies bomb the same network, whose path cache is kept in PATH_CACHE_DIR
 
     # Run simulations
     precision_stats = run_simulation(
-        WarfareNetwork(num_nodes, num_edges, workers_per_node), 
+        WarfareNetwork(num_nodes, num_edges, workers_per_node, seed=graph_seed), 
         max_turns, 
         "precision"
     )
     
     area_stats = run_simulation(
-        WarfareNetwork(num_nodes, num_edges, workers_per_node), 
+        WarfareNetwork(num_nodes, num_edges, workers_per_node, seed=graph_seed), 
         max_turns, 
         "area"
     )
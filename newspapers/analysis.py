@@ -6,6 +6,9 @@ import time
 from typing import Optional
 import concurrent.futures  # Added for parallel processing
 
+# The response cache is shared with the attack-data OCR pipeline (pip install -e llm-cache)
+from llm_cache import cached_chat, get_cache, CacheMissError
+
 class BombingAnalyzer:
     def __init__(self, root_dir: str):
         self.root_dir = Path(root_dir)
@@ -21,7 +24,8 @@ class BombingAnalyzer:
 
     def analyze_snippet(self, snippet: str) -> Optional[dict]:
         try:
-            response = self.client.chat.completions.create(
+            content = cached_chat(
+                self.client,
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -66,8 +70,10 @@ Categories: [ "type of bombing here", "another type here"]
                 presence_penalty=0
             )
             
-            return json.loads(response.choices[0].message.content)
+            return json.loads(content)
             
+        except CacheMissError:
+            raise
         except Exception as e:
             print(f"Error in API call: {str(e)}")
             return None
@@ -130,6 +136,7 @@ Categories: [ "type of bombing here", "another type here"]
         print(f"\nProcessing complete:")
         print(f"Processed: {processed_count} files")
         print(f"Skipped (already existed): {skipped_count} files")
+        print(f"Response cache: {get_cache().stats()}")
 
 def main():
     root_dir = '/Users/chim/Working/Thesis/Readings/src/scrape_newspapers/newspaper_articles'
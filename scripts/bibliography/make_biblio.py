@@ -4,17 +4,20 @@ import json
 from openai import OpenAI
 import re
 
+# The response cache is shared with the attack-data OCR pipeline (pip install -e llm-cache)
+from llm_cache import cached_chat, get_cache, CacheMissError
+
 client = OpenAI()
 
 def query_openai(prompt, model_name="gpt-4o-mini", assistant_instructions="You are a helpful assistant."):
-    completion = client.chat.completions.create(
+    return cached_chat(
+        client,
         model=model_name,
         messages=[
             {"role": "system", "content": assistant_instructions},
             {"role": "user", "content": prompt}
         ]
     )
-    return completion.choices[0].message.content
 
 def get_metadata_files(corpora_dir):
     """Get all .txt.met files from the corpora directory"""
@@ -86,6 +89,8 @@ def main():
             
             print(f"Processed: {file_path}")
             
+        except CacheMissError:
+            raise
         except Exception as e:
             print(f"Error processing {file_path}: {str(e)}")
     
@@ -102,6 +107,7 @@ def main():
         f.write(bibliography)
     
     print(f"\nProcessed {len(citations)} citations")
+    print(f"Response cache: {get_cache().stats()}")
     print("Bibliography saved to bibliography.md")
 
 if __name__ == "__main__":